@@ -9,18 +9,29 @@ import requests
 import pandas as pd
 from dotenv import load_dotenv
 import json
+import sqlite3
 import time
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 import sys
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from aviation_edge_db import insert_api_flights
+from aviation_edge_db import insert_api_flights, open_flight_store
+from aviation_edge_stream import iter_json_array, iter_batches, RawFlightSink
+from aviation_edge_pipeline import CollectionPipeline
+from aviation_edge_transform import annotate_weekdays
+from aviation_edge_logging import configure_logging, get_logger
+from aviation_edge_jobs import JobQueue, default_worker_id
+from aviation_edge_calendar import refresh_after_collection
+from aviation_edge_scheduler import CollectionScheduler
+from aviation_edge_rate import shared_controller
 
 # Load environment variables
 load_dotenv()
 
+logger = get_logger('collector.arrival')
+
 class ArrivalFutureSchedules:
     """
     A class to handle arrival future schedules API data pulling operations
@@ -40,6 +51,9 @@ class ArrivalFutureSchedules:
         self.max_retries = int(os.getenv('MAX_RETRIES', '3'))
         self.requests_per_second = int(os.getenv('REQUESTS_PER_SECOND', '10'))
         
+        # Shared across collectors and pipeline workers in this process
+        self.rate_controller = shared_controller()
+        
         # Setup headers
         self.headers = {
             'Content-Type': 'application/json',
@@ -49,83 +63,8 @@ class ArrivalFutureSchedules:
         if self.api_key:
             self.headers['Authorization'] = f'Bearer {self.api_key}'
         
-        print(f"Arrival Future Schedules API initialized for: {self.base_url}")
+        logger.info(f"Arrival Future Schedules API initialized for: {self.base_url}")
     
-    def _calculate_arrival_weekday(self, flight: Dict, api_weekday: int) -> int:
-        """
-        Calculate the correct arrival weekday considering timezone differences and overnight flights.
-        
-        For arrival data, if the flight crosses to the next day due to flight duration
-        and timezone differences, we need to adjust the weekday accordingly.
-        
-        The Aviation Edge API appears to return weekdays based on arrival times, but for
-        overnight flights, this can be incorrect. We need to correct the logic:
-        - If departure time > arrival time: flight crosses midnight (overnight)
-        - For arrivals API: subtract 1 from weekday to get the correct departure weekday reference
-        - Handle week rollover: Monday (1) - 1 = Sunday (7)
-        
-        Args:
-            flight (Dict): Flight data containing departure and arrival times
-            api_weekday (int): Original weekday from API (appears to be arrival-based)
-            
-        Returns:
-            int: Corrected weekday for proper database storage (1-7, where 1=Monday, 7=Sunday)
-        """
-        try:
-            # Get departure and arrival times
-            departure = flight.get('departure', {})
-            arrival = flight.get('arrival', {})
-            
-            dep_time = departure.get('scheduledTime', '')
-            arr_time = arrival.get('scheduledTime', '')
-            
-            # If we don't have both times, return the original weekday
-            if not dep_time or not arr_time:
-                return api_weekday
-            
-            # Parse times (format: "HH:MM" or "HHMM")
-            def parse_time(time_str):
-                time_str = time_str.replace(':', '')
-                if len(time_str) >= 4:
-                    hours = int(time_str[:2])
-                    minutes = int(time_str[2:4])
-                    return hours * 60 + minutes  # Convert to minutes since midnight
-                return None
-            
-            dep_minutes = parse_time(dep_time)
-            arr_minutes = parse_time(arr_time)
-            
-            if dep_minutes is None or arr_minutes is None:
-                return api_weekday
-            
-            # Check if departure time is later than arrival time (indicates overnight flight)
-            # This handles overnight flights where departure is late (e.g., 21:25) and 
-            # arrival is early next day (e.g., 05:10)
-            if dep_minutes > arr_minutes:
-                # Overnight flight detected - subtract 1 from weekday for correct departure reference
-                corrected_weekday = api_weekday - 1
-                # Handle week rollover (Monday=1 -> Sunday=7)
-                if corrected_weekday < 1:
-                    corrected_weekday = 7
-                
-                # Debug info for PX11 specifically
-                flight_number = flight.get('flight', {}).get('iataNumber', '')
-                if flight_number == 'PX11':
-                    print(f"   🐛 DEBUG PX11: {dep_time} -> {arr_time}, API weekday {api_weekday} -> corrected {corrected_weekday} (overnight -1)")
-                else:
-                    print(f"   🌃 Overnight flight detected: {dep_time} -> {arr_time}, weekday {api_weekday} -> {corrected_weekday} (overnight -1)")
-                return corrected_weekday
-            else:
-                # Same day arrival, keep original weekday
-                flight_number = flight.get('flight', {}).get('iataNumber', '')
-                if flight_number == 'PX11':
-                    print(f"   🐛 DEBUG PX11: {dep_time} -> {arr_time}, API weekday {api_weekday} (no change - same day)")
-                return api_weekday
-                
-        except Exception as e:
-            print(f"   ⚠️  Error calculating arrival weekday: {e}")
-            return api_weekday
-        
     def get_arrival_schedules(self, endpoint: str, days_ahead: int = 8, params: Dict = None) -> Optional[Dict]:
         """
         Get arrival schedule data from an API endpoint
@@ -139,7 +78,7 @@ class ArrivalFutureSchedules:
             Dict: API response data or None if failed
         """
         if days_ahead < 8:
-            print(f"⚠️  WARNING: days_ahead must be minimum 8 days. Got: {days_ahead}")
+            logger.warning(f"⚠️  WARNING: days_ahead must be minimum 8 days. Got: {days_ahead}")
             days_ahead = 8
             
         # Calculate target date
@@ -158,42 +97,37 @@ class ArrivalFutureSchedules:
             
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
         
-        print(f"🔄 Making arrival API call to: {url}")
-        print(f"📅 Target date: {date_str} (arrival flights)")
-        print(f"📋 Parameters: {api_params}")
-        
-        # Rate limiting
-        time.sleep(1.0 / self.requests_per_second)
+        logger.info(f"🔄 Making arrival API call to: {url}")
+        logger.debug(f"📅 Target date: {date_str} (arrival flights)")
+        logger.debug(f"📋 Parameters: {api_params}")
         
-        for attempt in range(self.max_retries):
-            try:
-                response = requests.get(
+        try:
+            # Rate limiting, retries and backoff are handled by the shared rate controller
+            response = self.rate_controller.request(
+                lambda: requests.get(
                     url,
                     params=api_params,
                     headers=self.headers,
                     timeout=self.timeout
-                )
-                
-                print(f"📡 Response status: {response.status_code}")
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    print(f"✅ Successfully retrieved arrival data")
-                    return data
-                elif response.status_code == 404:
-                    print("❌ No arrival data found (404)")
-                    return None
-                else:
-                    print(f"⚠️  Unexpected status code: {response.status_code}")
-                    if attempt < self.max_retries - 1:
-                        print(f"🔄 Retrying in {2 ** attempt} seconds...")
-                        
-            except requests.exceptions.RequestException as e:
-                print(f"❌ Request failed (attempt {attempt + 1}): {e}")
-                if attempt == self.max_retries - 1:
-                    print(f"All retry attempts failed for {url}")
-                    return None
-                time.sleep(2 ** attempt)  # Exponential backoff
+                ),
+                description=url
+            )
+        except requests.exceptions.RequestException as e:
+            logger.error(f"❌ All retry attempts failed for {url}: {e}")
+            return None
+        
+        logger.debug(f"📡 Response status: {response.status_code}")
+        
+        if response.status_code == 200:
+            data = response.json()
+            logger.info(f"✅ Successfully retrieved arrival data")
+            return data
+        elif response.status_code == 404:
+            logger.error("❌ No arrival data found (404)")
+            return None
+        else:
+            logger.error(f"❌ Unexpected status code: {response.status_code}")
+            return None
                 
     def get_schedules_by_date_range(self, endpoint: str, start_date: str, end_date: str) -> Optional[Dict]:
         """
@@ -254,10 +188,10 @@ class ArrivalFutureSchedules:
                     df = pd.DataFrame([data] if isinstance(data, dict) else data)
                 df.to_excel(filepath, index=False, engine='openpyxl')
                 
-            print(f"✅ Arrival data saved to: {filepath}")
+            logger.info(f"✅ Arrival data saved to: {filepath}")
             
         except Exception as e:
-            print(f"❌ Failed to save arrival data: {e}")
+            logger.error(f"❌ Failed to save arrival data: {e}")
     
     def dump_raw_data_to_log(self, data: Any, airport_code: str = None, target_date: str = None, flight_type: str = "arrival"):
         """
@@ -302,10 +236,10 @@ class ArrivalFutureSchedules:
                 f.write(json.dumps(dump_entry, indent=2, ensure_ascii=False))
                 f.write(f"\n{'='*80}\n\n")
             
-            print(f"   📝 Raw data dumped to: dump.log")
+            logger.info(f"   📝 Raw data dumped to: dump.log")
             
         except Exception as e:
-            print(f"   ⚠️  Failed to dump raw data to log: {e}")
+            logger.warning(f"   ⚠️  Failed to dump raw data to log: {e}")
             
     def get_multiple_airports_arrivals(self, airports: List[str], endpoint: str, params: Dict = None) -> Dict[str, Any]:
         """
@@ -322,7 +256,7 @@ class ArrivalFutureSchedules:
         results = {}
         
         for airport in airports:
-            print(f"🔄 Fetching arrival data for airport: {airport}")
+            logger.info(f"🔄 Fetching arrival data for airport: {airport}")
             
             # Ensure arrival type and airport code
             airport_params = {'iataCode': airport, 'type': 'arrival'}
@@ -337,6 +271,93 @@ class ArrivalFutureSchedules:
             
         return results
 
+    def _open_dump_sink(self, airport_code: str, target_date: str, flight_type: str) -> RawFlightSink:
+        """
+        Open a streaming dump.log entry that raw flights are tee'd into as they are parsed
+        
+        Args:
+            airport_code (str): Airport code for context
+            target_date (str): Target date for context
+            flight_type (str): Flight type (arrival/departure)
+            
+        Returns:
+            RawFlightSink: Sink writing one dump.log entry (close it to finish the entry)
+        """
+        # Create dump.log in the project root
+        dump_file_path = os.path.join(os.path.dirname(__file__), '..', 'dump.log')
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        # Check if dump.log exists to determine if we need a header
+        preamble = ''
+        if not os.path.exists(dump_file_path):
+            preamble += "=== AVIATION EDGE API RAW DATA DUMP LOG ===\n"
+            preamble += "This file contains all raw API responses for debugging\n\n"
+        
+        preamble += f"\n{'='*80}\n"
+        preamble += f"DUMP ENTRY: {timestamp}\n"
+        preamble += f"Airport: {airport_code} | Date: {target_date} | Type: {flight_type}\n"
+        preamble += f"Data Type: list | Count: streamed (see data_count)\n"
+        preamble += f"{'='*80}\n"
+        
+        metadata = {
+            'timestamp': timestamp,
+            'airport_code': airport_code,
+            'target_date': target_date,
+            'flight_type': flight_type,
+            'data_type': 'list'
+        }
+        
+        return RawFlightSink(
+            dump_file_path, metadata, array_key='raw_data', count_key='data_count',
+            mode='a', preamble=preamble, postamble=f"\n{'='*80}\n\n"
+        )
+    
+    def _open_raw_data_sink(self, airport_code: str, target_date: str, flight_type: str, base_url: str,
+                            params: Dict) -> RawFlightSink:
+        """
+        Open a streaming raw data file in the temp scripts folder
+        
+        Args:
+            airport_code (str): Airport code for context
+            target_date (str): Target date for context
+            flight_type (str): Flight type (arrival/departure)
+            base_url (str): API URL the flights come from
+            params (Dict): API parameters used for the call
+            
+        Returns:
+            RawFlightSink: Sink writing the raw data file (close it to finish the file)
+        """
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        raw_data_file = f"raw_arrival_data_{airport_code}_{target_date}_{timestamp}.json"
+        raw_data_path = os.path.join(os.path.dirname(__file__), '..', 'temp scripts', raw_data_file)
+        
+        metadata = {
+            'collection_timestamp': timestamp,
+            'airport_code': airport_code,
+            'target_date': target_date,
+            'flight_type': flight_type,
+            'api_url': base_url,
+            'api_params': params
+        }
+        
+        return RawFlightSink(raw_data_path, metadata)
+    
+    def _apply_weekdays(self, flights: List[Dict]) -> List[Dict]:
+        """
+        Attach the corrected arrival weekday to a whole batch of flights
+        
+        Overnight detection and weekday rollover run vectorised over the batch
+        (see aviation_edge_transform.annotate_weekdays for the correction rules).
+        
+        Args:
+            flights (List[Dict]): Flight data from API (annotated in place)
+            
+        Returns:
+            List[Dict]: Flights with a valid weekday, carrying 'extracted_weekday'
+                and 'api_original_weekday'
+        """
+        return annotate_weekdays(flights, correct_overnight=True)
+
     def get_aviation_edge_flights(self, airport_code: str, flight_type: str, target_date: str) -> Optional[List[Dict]]:
         """
         Get flight data from Aviation Edge API with proper weekday extraction
@@ -363,18 +384,22 @@ class ArrivalFutureSchedules:
             'date': target_date
         }
         
-        print(f"🔗 Aviation Edge API Call: {flight_type.upper()} flights for {airport_code} on {target_date}")
-        print(f"   URL: {base_url}")
-        print(f"   Params: iataCode={airport_code}, type={flight_type}, date={target_date}")
+        logger.info(f"🔗 Aviation Edge API Call: {flight_type.upper()} flights for {airport_code} on {target_date}")
+        logger.debug(f"   URL: {base_url}")
+        logger.debug(f"   Params: iataCode={airport_code}, type={flight_type}, date={target_date}")
         
         try:
-            response = requests.get(base_url, params=params, timeout=30)
-            print(f"   Status: {response.status_code}")
+            # Pacing, retries on 429/5xx/network errors and backoff come from the rate controller
+            response = self.rate_controller.request(
+                lambda: requests.get(base_url, params=params, timeout=30),
+                description=f"{airport_code} {flight_type} {target_date}"
+            )
+            logger.debug(f"   Status: {response.status_code}")
             
             if response.status_code == 200:
                 data = response.json()
                 if isinstance(data, list):
-                    print(f"   ✅ Success: {len(data)} flights returned")
+                    logger.info(f"   ✅ Success: {len(data)} flights returned")
                     
                     # Dump raw data to dump.log
                     self.dump_raw_data_to_log(data, airport_code, target_date, flight_type)
@@ -402,47 +427,326 @@ class ArrivalFutureSchedules:
                     with open(raw_data_path, 'w', encoding='utf-8') as f:
                         json.dump(raw_data_output, f, indent=2, ensure_ascii=False)
                     
-                    print(f"   💾 Raw data saved to: {raw_data_file}")
+                    logger.info(f"   💾 Raw data saved to: {raw_data_file}")
                     
                     # Extract weekday from each flight and add it to the data
-                    enhanced_flights = []
-                    for flight in data:
-                        # Get weekday from API response - it's directly in the flight object as a string
-                        weekday_str = flight.get('weekday', '')
-                        weekday_number = None
-                        
-                        # Convert string weekday to integer (API returns weekday as string)
-                        if weekday_str and weekday_str.isdigit():
-                            api_weekday = int(weekday_str)
-                            # Validate weekday is in range 1-7
-                            if 1 <= api_weekday <= 7:
-                                # Apply weekday correction for arrival flights
-                                corrected_weekday = self._calculate_arrival_weekday(flight, api_weekday)
-                                
-                                # Add weekday number to flight data
-                                enhanced_flight = flight.copy()
-                                enhanced_flight['extracted_weekday'] = corrected_weekday
-                                enhanced_flight['api_original_weekday'] = api_weekday  # Keep original for reference
-                                enhanced_flights.append(enhanced_flight)
-                            else:
-                                print(f"   ⚠️  Invalid weekday value: {api_weekday}")
-                        else:
-                            print(f"   ⚠️  No valid weekday data: '{weekday_str}'")
+                    enhanced_flights = self._apply_weekdays(data)
                     
-                    print(f"   📊 Enhanced {len(enhanced_flights)} flights with weekday data")
+                    logger.info(f"   📊 Enhanced {len(enhanced_flights)} flights with weekday data")
                     return enhanced_flights
                 else:
-                    print(f"   ⚠️  Unexpected response format: {type(data)}")
-                    print(f"   Response: {str(data)[:200]}")
-                    return []
+                    logger.warning(f"   ⚠️  Unexpected response format: {type(data)}")
+                    logger.warning(f"   Response: {str(data)[:200]}")
+                    return None
             else:
-                print(f"   ❌ API Error: {response.status_code}")
-                print(f"   Response: {response.text[:200]}")
-                return []
+                logger.error(f"   ❌ API Error: {response.status_code}")
+                logger.error(f"   Response: {response.text[:200]}")
+                return None
                 
         except Exception as e:
-            print(f"   ❌ Request failed: {str(e)}")
-            return []
+            logger.error(f"   ❌ Request failed: {str(e)}")
+            return None
+
+    def iter_raw_aviation_edge_flights(self, airport_code: str, flight_type: str,
+                                       target_date: str, raise_errors: bool = False) -> Iterator[Dict]:
+        """
+        Stream raw flights from Aviation Edge API one at a time
+        
+        The response array is parsed incrementally and each raw flight is tee'd to
+        dump.log and the raw data file as it arrives, so the body is never buffered.
+        
+        Args:
+            airport_code (str): Airport IATA code (e.g., 'MNL', 'POM')
+            flight_type (str): 'departure' or 'arrival'
+            target_date (str): Target date in YYYY-MM-DD format (8+ days ahead)
+            raise_errors (bool): Re-raise API/parse errors after logging them, so
+                callers tracking success (job queue, pipeline) see the failure.
+                An error after the first flight is always re-raised: the caller
+                already holds part of the payload and must not take it as complete
+            
+        Yields:
+            Dict: Raw flight records exactly as returned by the API
+        """
+        # Aviation Edge API endpoint
+        base_url = "https://aviation-edge.com/v2/public/flightsFuture"
+        
+        # Get API key from environment
+        api_key = os.getenv('AVIATION_EDGE_API_KEY', '58b694-b40ef9')
+        
+        # API parameters
+        params = {
+            'key': api_key,
+            'iataCode': airport_code.upper(),
+            'type': flight_type.lower(),
+            'date': target_date
+        }
+        
+        logger.info(f"🔗 Aviation Edge API Call (streaming): {flight_type.upper()} flights for {airport_code} on {target_date}")
+        logger.debug(f"   URL: {base_url}")
+        logger.debug(f"   Params: iataCode={airport_code}, type={flight_type}, date={target_date}")
+        
+        sinks = []
+        
+        try:
+            with self.rate_controller.stream(
+                lambda: requests.get(base_url, params=params, timeout=30, stream=True),
+                description=f"{airport_code} {flight_type} {target_date}"
+            ) as response:
+                logger.debug(f"   Status: {response.status_code}")
+                
+                if response.status_code != 200:
+                    logger.error(f"   ❌ API Error: {response.status_code}")
+                    logger.error(f"   Response: {response.text[:200]}")
+                    if raise_errors:
+                        raise RuntimeError(f"API Error: {response.status_code}")
+                    return
+                
+                for flight in iter_json_array(response.iter_content(chunk_size=65536)):
+                    if not sinks:
+                        # Raw sinks receive every flight exactly as returned by the API
+                        sinks.append(self._open_dump_sink(airport_code, target_date, flight_type))
+                        sinks.append(self._open_raw_data_sink(airport_code, target_date, flight_type, base_url, params))
+                    
+                    for sink in sinks:
+                        sink.write(flight)
+                    
+                    yield flight
+                
+                if sinks:
+                    logger.info(f"   ✅ Success: {sinks[0].count} flights streamed")
+                    logger.info(f"   📝 Raw data dumped to: dump.log")
+                    logger.info(f"   💾 Raw data saved to: {os.path.basename(sinks[1].path)}")
+                else:
+                    logger.info(f"   ✅ Success: 0 flights streamed")
+                
+        except ValueError as e:
+            logger.warning(f"   ⚠️  Unexpected response format: {e}")
+            if raise_errors or sinks:
+                raise
+        except requests.exceptions.RequestException as e:
+            logger.error(f"   ❌ Request failed: {str(e)}")
+            if raise_errors or sinks:
+                raise
+        finally:
+            for sink in sinks:
+                sink.close()
+
+    def stream_aviation_edge_flights(self, airport_code: str, flight_type: str, target_date: str,
+                                     batch_size: int = 500, raise_errors: bool = False) -> Iterator[List[Dict]]:
+        """
+        Stream flight data from Aviation Edge API in fixed-size batches
+        
+        Only one batch of flights is held in memory at a time whatever the airport size.
+        
+        Args:
+            airport_code (str): Airport IATA code (e.g., 'MNL', 'POM')
+            flight_type (str): 'departure' or 'arrival'
+            target_date (str): Target date in YYYY-MM-DD format (8+ days ahead)
+            batch_size (int): Number of flights per yielded batch
+            raise_errors (bool): Re-raise API/parse errors instead of ending the stream
+            
+        Yields:
+            List[Dict]: Batches of flights with corrected weekday information
+        """
+        enhanced_count = 0
+        raw_flights = self.iter_raw_aviation_edge_flights(airport_code, flight_type, target_date, raise_errors)
+        
+        for raw_batch in iter_batches(raw_flights, batch_size):
+            # Parsed flights are not shared, so annotate them in place
+            batch = self._apply_weekdays(raw_batch)
+            enhanced_count += len(batch)
+            if batch:
+                yield batch
+        
+        logger.info(f"   📊 Enhanced {enhanced_count} flights with weekday data")
+
+    def collect_aviation_edge_flights_streaming(self, airport_code: str, flight_type: str, target_date: str,
+                                                batch_size: int = 500, raise_errors: bool = False) -> Tuple[int, int]:
+        """
+        Stream flights from Aviation Edge API straight into the database
+        
+        Each batch is stored through the standardized handler on a single
+        connection as soon as it is parsed. Rows whose fingerprint matches the
+        previous collection of the same airport/type/date are skipped.
+        
+        Args:
+            airport_code (str): Airport IATA code
+            flight_type (str): 'departure' or 'arrival'
+            target_date (str): Target date in YYYY-MM-DD format (8+ days ahead)
+            batch_size (int): Number of flights per database batch
+            raise_errors (bool): Re-raise API/parse errors after storing what arrived
+                (a stream cut off mid-body always raises, and its incomplete payload
+                is never recorded in the ingestion ledger)
+            
+        Returns:
+            Tuple[int, int]: (flights retrieved, flights stored/updated)
+            
+        Raises:
+            RuntimeError: When the database cannot be opened (nothing is fetched)
+        """
+        # The writer service when DB_WRITER_ADDRESS is set, else a direct connection
+        db = open_flight_store()
+        
+        retrieved_count = 0
+        stored_count = 0
+        
+        try:
+            # Fingerprint the whole response so unchanged rows are never rewritten
+            payload = db.open_payload(flight_type.lower(), airport_code.upper(), target_date)
+            for batch in self.stream_aviation_edge_flights(airport_code, flight_type, target_date, batch_size,
+                                                           raise_errors):
+                retrieved_count += len(batch)
+                stored_count += db.insert_flight_batch(
+                    batch, flight_type.lower(), airport_code.upper(), target_date, payload=payload
+                )
+            if retrieved_count:
+                db.record_payload(payload)
+        finally:
+            db.close()
+        
+        return retrieved_count, stored_count
+
+    def collect_pipelined(self, airports: List[str], target_dates: List[str], flight_type: str = 'arrival',
+                          batch_size: int = 500) -> Dict:
+        """
+        Collect several airports/dates through the staged fetch -> transform -> write pipeline
+        
+        Network fetches for upcoming units overlap with weekday correction and
+        database commits for earlier ones, so a sweep takes roughly as long as the
+        slower of the two instead of their sum.
+        
+        Args:
+            airports (List[str]): Airport IATA codes
+            target_dates (List[str]): Target dates in YYYY-MM-DD format (8+ days ahead)
+            flight_type (str): 'departure' or 'arrival'
+            batch_size (int): Number of flights per pipeline batch
+            
+        Returns:
+            Dict: Per-unit stats keyed by (airport, flight_type, date)
+        """
+        units = [(airport.upper(), flight_type.lower(), date) for date in target_dates for airport in airports]
+        return self._run_pipeline(units, batch_size)
+
+    def _run_pipeline(self, units: List[Tuple[str, str, str]], batch_size: int = 500) -> Dict:
+        """Run (airport, type, date) units through a CollectionPipeline configured from .env"""
+        pipeline = CollectionPipeline(
+            fetch=lambda airport, query_type, date: iter_batches(
+                self.iter_raw_aviation_edge_flights(airport, query_type, date, raise_errors=True), batch_size
+            ),
+            enhance=self._apply_weekdays,
+            fetch_workers=int(os.getenv('PIPELINE_FETCH_WORKERS', '4')),
+            queue_size=int(os.getenv('PIPELINE_QUEUE_SIZE', '8')),
+            transaction_rows=int(os.getenv('PIPELINE_TRANSACTION_ROWS', '5000'))
+        )
+        return pipeline.run(units)
+
+    def collect_unit(self, airport_code: str, target_date: str, collection_mode: str = 'batch',
+                     batch_size: int = 500) -> Tuple[int, int]:
+        """
+        Collect and store one airport/date, raising if the API call or the database write did not succeed
+        
+        Args:
+            airport_code (str): Airport IATA code
+            target_date (str): Target date in YYYY-MM-DD format (8+ days ahead)
+            collection_mode (str): 'batch' or 'stream'
+            batch_size (int): Number of flights per database batch in stream mode
+            
+        Returns:
+            Tuple[int, int]: (flights retrieved, flights stored/updated)
+        """
+        if collection_mode == 'stream':
+            return self.collect_aviation_edge_flights_streaming(
+                airport_code, 'arrival', target_date, batch_size, raise_errors=True
+            )
+        
+        flights = self.get_aviation_edge_flights(airport_code, 'arrival', target_date)
+        if flights is None:
+            raise RuntimeError(f"No data retrieved for {airport_code} on {target_date}")
+        return len(flights), self.store_aviation_edge_flights(flights, airport_code, 'arrival', target_date)
+
+    def drain_collection_jobs(self, job_queue: JobQueue, worker_id: str, sweep_id: str = None,
+                              collection_mode: str = 'batch', batch_size: int = 500) -> Dict[str, int]:
+        """
+        Claim and run queued arrival jobs until none are left
+        
+        Jobs whose date has moved inside the 8-day window are failed without an API call.
+        In pipeline mode jobs are claimed in groups and collected through the pipeline.
+        
+        Args:
+            job_queue (JobQueue): Queue to drain
+            worker_id (str): This worker's id for claims
+            sweep_id (str): Only drain this sweep (all sweeps if None)
+            collection_mode (str): 'batch', 'stream' or 'pipeline'
+            batch_size (int): Flights per batch in stream/pipeline mode
+            
+        Returns:
+            Dict: Counts of 'done', 'retried' and 'failed' attempts made by this worker
+        """
+        counts = {'done': 0, 'retried': 0, 'failed': 0}
+        earliest_date = (datetime.now() + timedelta(days=8)).strftime('%Y-%m-%d')
+        group_size = int(os.getenv('PIPELINE_FETCH_WORKERS', '4')) * 2 if collection_mode == 'pipeline' else 1
+        job_delay = float(os.getenv('JOB_DELAY_SECONDS', '2'))
+        
+        def finish(job, error=None, retrieved=0, stored=0, retry=True):
+            try:
+                if error is None:
+                    job_queue.complete(job, worker_id, retrieved, stored)
+                    counts['done'] += 1
+                    return
+                state = job_queue.fail(job, worker_id, error, retry=retry)
+            except sqlite3.Error as e:
+                # The job stays claimed and is picked up again once its lease expires
+                logger.error(f"   ❌ Could not update job {job['id']}: {e}")
+                return
+            counts['retried' if state == 'pending' else 'failed'] += 1
+            logger.warning(f"   ⚠️  Job {job['airport_code']} {job['target_date']} attempt {job['attempts']} "
+                           f"failed ({state or 'claim lost'}): {error}")
+        
+        while True:
+            jobs = []
+            while len(jobs) < group_size:
+                job = job_queue.claim(worker_id, query_type='arrival', sweep_id=sweep_id)
+                if job is None:
+                    break
+                if job['target_date'] < earliest_date:
+                    # 8-day rule: never call Future Schedules inside the window
+                    finish(job, f"target date inside 8-day window (earliest {earliest_date})", retry=False)
+                    continue
+                jobs.append(job)
+            
+            if not jobs:
+                break
+            
+            if collection_mode == 'pipeline':
+                units = [(job['airport_code'], job['query_type'], job['target_date']) for job in jobs]
+                try:
+                    stats = self._run_pipeline(units, batch_size)
+                except Exception as e:
+                    stats = {unit: {'retrieved': 0, 'stored': 0, 'error': f"pipeline failed: {e}", 'committed': False}
+                             for unit in units}
+                for job, unit in zip(jobs, units):
+                    unit_stats = stats[unit]
+                    # Only a confirmed commit completes a job; writer or commit failures are retried
+                    error = None if unit_stats['committed'] else (unit_stats['error'] or "write not confirmed")
+                    finish(job, error, unit_stats['retrieved'], unit_stats['stored'])
+                continue
+            
+            job = jobs[0]
+            logger.info(f"🔄 Job {job['airport_code']} {job['query_type']} {job['target_date']} "
+                        f"(attempt {job['attempts']})")
+            try:
+                retrieved_count, stored_count = self.collect_unit(
+                    job['airport_code'], job['target_date'], collection_mode, batch_size
+                )
+            except Exception as e:
+                finish(job, str(e))
+            else:
+                finish(job, retrieved=retrieved_count, stored=stored_count)
+            
+            # Small delay between jobs
+            time.sleep(job_delay)
+        
+        return counts
 
     def store_aviation_edge_flights(self, flights: List[Dict], airport_code: str, flight_type: str, target_date: str) -> int:
         """
@@ -458,7 +762,7 @@ class ArrivalFutureSchedules:
             int: Number of flights stored/updated
         """
         if not flights:
-            print(f"No flights to store for {airport_code} {flight_type}")
+            logger.info(f"No flights to store for {airport_code} {flight_type}")
             return 0
         
         # Use standardized database handler
@@ -469,7 +773,7 @@ class ArrivalFutureSchedules:
             collection_date=target_date
         )
         
-        print(f"✅ Stored {stored_count} flights using standardized database handler")
+        logger.info(f"✅ Stored {stored_count} flights using standardized database handler")
         return stored_count
 
 def main():
@@ -479,9 +783,9 @@ def main():
     # Initialize the Arrival Future Schedules puller
     schedules = ArrivalFutureSchedules()
     
-    print("🔄 Arrival Future Schedules API Data Collector")
-    print("� Executing arrival data collection")
-    print()
+    logger.info("🔄 Arrival Future Schedules API Data Collector")
+    logger.info("� Executing arrival data collection")
+    logger.info("")
     
     # Read parameters from file
     param_file = os.path.join(os.path.dirname(__file__), 'Arrival-Future-Schedules-Param.txt')
@@ -501,10 +805,10 @@ def main():
                             user_airport = input("Enter airport IATA code for ARRIVAL data collection (e.g., MNL, POM, HND): ").strip().upper()
                             if user_airport:
                                 airports = [user_airport]
-                                print(f"✅ Selected airport: {user_airport}")
-                                print()
+                                logger.info(f"✅ Selected airport: {user_airport}")
+                                logger.info("")
                             else:
-                                print("❌ No airport provided, exiting")
+                                logger.error("❌ No airport provided, exiting")
                                 return
                         else:
                             airports = [code.strip() for code in airports_str.split(',') if code.strip()]
@@ -512,158 +816,261 @@ def main():
                     if not target_date:  # Only take the first valid entry
                         target_date = line.split('=')[1].strip()
     except Exception as e:
-        print(f"❌ Error reading parameter file: {e}")
+        logger.error(f"❌ Error reading parameter file: {e}")
         return
     
     if not airports or not target_date:
-        print(f"❌ Missing parameters: airports={airports}, date={target_date}")
+        logger.error(f"❌ Missing parameters: airports={airports}, date={target_date}")
         return
     
-    print(f"� Configuration:")
-    print(f"   Airports: {', '.join(airports)}")
-    print(f"   Date: {target_date}")
-    print(f"   Type: arrival")
-    print()
+    logger.info(f"� Configuration:")
+    logger.info(f"   Airports: {', '.join(airports)}")
+    logger.info(f"   Date: {target_date}")
+    logger.info(f"   Type: arrival")
+    logger.info("")
+    
+    # Collection mode: 'batch' buffers each response, 'stream' parses it incrementally,
+    # 'pipeline' overlaps fetching and database writes across airports
+    collection_mode = os.getenv('COLLECTION_MODE', 'batch').lower()
+    stream_batch_size = int(os.getenv('STREAM_BATCH_SIZE', '500'))
     
     # Execute collections
     total_stored = 0
     total_retrieved = 0
     
-    for airport in airports:
-        print(f"� Processing {airport} arrivals for {target_date}")
+    if collection_mode == 'pipeline':
+        # Fetch, transform and write stages run concurrently across all airports
+        stats = schedules.collect_pipelined(airports, [target_date], 'arrival', batch_size=stream_batch_size)
+        total_retrieved = sum(unit_stats['retrieved'] for unit_stats in stats.values())
+        total_stored = sum(unit_stats['stored'] for unit_stats in stats.values())
+    else:
+        for airport in airports:
+            logger.info(f"� Processing {airport} arrivals for {target_date}")
         
-        try:
-            # Get flights using the Aviation Edge method
-            flights = schedules.get_aviation_edge_flights(airport, 'arrival', target_date)
+            try:
+                if collection_mode == 'stream':
+                    # Parse the response incrementally and store it batch by batch
+                    retrieved_count, stored_count = schedules.collect_aviation_edge_flights_streaming(
+                        airport, 'arrival', target_date, batch_size=stream_batch_size
+                    )
+                    flights = retrieved_count > 0
+                else:
+                    # Get flights using the Aviation Edge method
+                    flights = schedules.get_aviation_edge_flights(airport, 'arrival', target_date)
+                    retrieved_count = len(flights) if flights else 0
             
-            if flights:
-                retrieved_count = len(flights)
-                total_retrieved += retrieved_count
+                if flights:
+                    total_retrieved += retrieved_count
                 
-                print(f"   ✅ Retrieved: {retrieved_count} flights")
+                    logger.info(f"   ✅ Retrieved: {retrieved_count} flights")
                 
-                # Store in database using standardized handler
-                stored_count = insert_api_flights(
-                    flights_data=flights,
-                    query_type='arrival',
-                    airport_code=airport,
-                    collection_date=target_date
-                )
+                    if collection_mode != 'stream':
+                        # Store in database using standardized handler
+                        stored_count = insert_api_flights(
+                            flights_data=flights,
+                            query_type='arrival',
+                            airport_code=airport,
+                            collection_date=target_date
+                        )
                 
-                total_stored += stored_count
-                print(f"   ✅ Stored: {stored_count} new flights")
+                    total_stored += stored_count
+                    logger.info(f"   ✅ Stored: {stored_count} new flights")
                 
-                if stored_count == 0:
-                    print(f"   ℹ️  All flights already exist (duplicates prevented)")
+                    if stored_count == 0:
+                        logger.info(f"   ℹ️  All flights already exist (duplicates prevented)")
                 
-            else:
-                print(f"   ❌ No data retrieved for {airport}")
+                else:
+                    logger.error(f"   ❌ No data retrieved for {airport}")
             
-            # Rate limiting
-            time.sleep(1)
+                # Rate limiting
+                time.sleep(1)
             
-        except Exception as e:
-            print(f"   ❌ Error processing {airport}: {e}")
-            continue
+            except Exception as e:
+                logger.error(f"   ❌ Error processing {airport}: {e}")
+                continue
     
-    print()
-    print("📊 ARRIVAL COLLECTION SUMMARY")
-    print("=" * 40)
-    print(f"Airports processed: {', '.join(airports)}")
-    print(f"Target date: {target_date}")
-    print(f"Total flights retrieved: {total_retrieved}")
-    print(f"Total new flights stored: {total_stored}")
-    print(f"Duplicates prevented: {total_retrieved - total_stored}")
+    logger.info("")
+    logger.info("📊 ARRIVAL COLLECTION SUMMARY")
+    logger.info("=" * 40)
+    logger.info(f"Airports processed: {', '.join(airports)}")
+    logger.info(f"Target date: {target_date}")
+    logger.info(f"Total flights retrieved: {total_retrieved}")
+    logger.info(f"Total new flights stored: {total_stored}")
+    logger.info(f"Duplicates prevented: {total_retrieved - total_stored}")
     
-    print("\n✅ Arrival collection completed!")
+    logger.info("\n✅ Arrival collection completed!")
 
 def weekly_collection():
     """
-    Weekly collection wrapper that updates param file for 7 consecutive days
-    and runs main() for each day starting from current date + 8 days
+    Weekly collection of 7 consecutive days starting from current date + 8 days
+    Prompts for airport selection once and uses it for all 7 days
+
+    The week is queued as a sweep in the collection_jobs table and drained from
+    there, so an interrupted run resumes with only the unfinished days when it is
+    restarted. Days an earlier sweep already collected (a restart on another day)
+    are not queued again. The parameter file is never rewritten.
     """
     from datetime import datetime, timedelta
     
-    print("🔄 Weekly Arrival Future Schedules Collection")
-    print("� Collecting 7 consecutive days starting from current date + 8 days")
-    print()
+    logger.info("🔄 Weekly Arrival Future Schedules Collection")
+    logger.info("📅 Collecting 7 consecutive days starting from current date + 8 days")
+    logger.info("")
     
     # Calculate start date (current + 8 days for 8-day rule compliance)
     start_date = datetime.now() + timedelta(days=8)
-    param_file = os.path.join(os.path.dirname(__file__), 'Arrival-Future-Schedules-Param.txt')
     
     # Get airport selection once for the entire week
     print("Airport Selection for Weekly Collection:")
     selected_airport = input("Enter airport IATA code for ARRIVAL data collection (e.g., MNL, POM, HND): ").strip().upper()
-    print(f"Selected: {selected_airport}")
-    print()
-    total_days_processed = 0
+    logger.info(f"Selected: {selected_airport}")
+    logger.info("")
     
-    for day_offset in range(7):  # 7 days
-        current_date = start_date + timedelta(days=day_offset)
-        date_str = current_date.strftime('%Y-%m-%d')
-        
-        print(f"� Day {day_offset + 1}/7: {date_str}")
-        
-        # Update parameter file with current date
-        try:
-            # Read current param file
-            with open(param_file, 'r') as f:
-                lines = f.readlines()
-            
-            # Update both date and iataCode lines
-            updated_lines = []
-            for line in lines:
-                if line.strip().startswith('date=') and not line.strip().startswith('#'):
-                    updated_lines.append(f'date={date_str}\n')
-                elif line.strip().startswith('iataCode=') and not line.strip().startswith('#'):
-                    updated_lines.append(f'iataCode={selected_airport}\n')
-                else:
-                    updated_lines.append(line)
-            
-            # Write updated param file
-            with open(param_file, 'w') as f:
-                f.writelines(updated_lines)
-            
-            print(f"   Updated parameter file: date={date_str}, airport={selected_airport}")
-            
-            # Run main collection for this date
-            print(f"   🔄 Running arrival collection for {date_str}")
-            main()
-            
-            total_days_processed += 1
-            print(f"   ✅ Completed day {day_offset + 1}")
-            print()
-            
-            # Small delay between days
-            time.sleep(2)
-            
-        except Exception as e:
-            print(f"   ❌ Error processing {date_str}: {e}")
-            continue
+    if not selected_airport:
+        logger.error("❌ No airport provided, exiting")
+        return
     
-    # Restore PROMPT_USER to parameter file after weekly collection
-    try:
-        with open(param_file, 'r') as f:
-            lines = f.readlines()
-        
-        updated_lines = []
-        for line in lines:
-            if line.strip().startswith('iataCode=') and not line.strip().startswith('#'):
-                updated_lines.append(f'iataCode=PROMPT_USER\n')
-            else:
-                updated_lines.append(line)
+    dates = [(start_date + timedelta(days=day_offset)).strftime('%Y-%m-%d') for day_offset in range(7)]
+    sweep_id = f"weekly-arrival-{selected_airport}-{dates[0]}"
+    
+    with JobQueue() as job_queue:
+        job_queue.recover_orphans()
+        units = [(selected_airport, 'arrival', date) for date in dates]
+        collected = job_queue.done_units(units)
+        added = job_queue.enqueue(sweep_id, [unit for unit in units if unit not in collected])
+        if collected:
+            logger.info(f"♻️  {len(collected)} days already collected, not fetched again")
+        if added < len(dates) - len(collected):
+            logger.info(f"♻️  Resuming sweep {sweep_id}: {len(dates) - len(collected) - added} days already queued")
         
-        with open(param_file, 'w') as f:
-            f.writelines(updated_lines)
+        schedules = ArrivalFutureSchedules()
+        schedules.drain_collection_jobs(
+            job_queue, default_worker_id(), sweep_id,
+            collection_mode=os.getenv('COLLECTION_MODE', 'batch').lower(),
+            batch_size=int(os.getenv('STREAM_BATCH_SIZE', '500'))
+        )
         
-        print("Parameter file restored to PROMPT_USER for future use")
-    except Exception as e:
-        print(f"Warning: Could not restore PROMPT_USER to parameter file: {e}")
+        progress = job_queue.progress(sweep_id)
+        collected = job_queue.done_units(units)
+        for job in job_queue.failed_jobs(sweep_id):
+            logger.error(f"   ❌ {job['target_date']} failed after {job['attempts']} attempts: {job['last_error']}")
+    
+    logger.info("🎉 Weekly collection completed!")
+    logger.info(f"📊 Processed {len(collected)}/7 days")
+    if progress['pending'] or progress['running']:
+        logger.info(f"   {progress['pending'] + progress['running']} days unfinished; run again to resume")
+    logger.info(f"📅 Date range: {dates[0]} to {dates[-1]}")
+
+def job_worker(sweep_id: str = None):
+    """
+    Drain queued arrival collection jobs (all sweeps, or one)
+
+    Several worker processes can run this at once against the same database;
+    each job is claimed by exactly one of them.
+    """
+    worker_id = default_worker_id()
+    logger.info(f"👷 Arrival job worker {worker_id} started")
+    
+    with JobQueue() as job_queue:
+        recovered = job_queue.recover_orphans()
+        if recovered:
+            logger.info(f"♻️  Requeued {recovered} jobs left running by exited workers")
+        counts = ArrivalFutureSchedules().drain_collection_jobs(
+            job_queue, worker_id, sweep_id,
+            collection_mode=os.getenv('COLLECTION_MODE', 'batch').lower(),
+            batch_size=int(os.getenv('STREAM_BATCH_SIZE', '500'))
+        )
+        progress = job_queue.progress(sweep_id, 'arrival')
     
-    print(f"🎉 Weekly collection completed!")
-    print(f"📊 Processed {total_days_processed}/7 days")
-    print(f"� Date range: {start_date.strftime('%Y-%m-%d')} to {(start_date + timedelta(days=6)).strftime('%Y-%m-%d')}")
+    logger.info(f"👷 Worker finished: {counts['done']} done, {counts['retried']} retried, {counts['failed']} failed")
+    logger.info(f"   Queue: {progress['pending']} pending, {progress['running']} running, "
+                f"{progress['done']} done, {progress['failed']} failed")
+
+def daemon_collection(airports: List[str], horizon_days: int = None, daily_budget: int = None):
+    """
+    Keep arrival data for today+8 to today+N days fresh, one unit at a time, until interrupted
+
+    Units are chosen by CollectionScheduler: never-collected dates first, then by
+    staleness and observed change rate, within the daily call budget shared with the
+    departure collector. The schedule and today's call count are stored in the
+    database, so a restarted daemon resumes where it stopped. The parameter file is
+    never rewritten.
+    """
+    collection_mode = 'stream' if os.getenv('COLLECTION_MODE', 'batch').lower() == 'stream' else 'batch'
+    batch_size = int(os.getenv('STREAM_BATCH_SIZE', '500'))
+    job_delay = float(os.getenv('JOB_DELAY_SECONDS', '2'))
+    # Re-check the window at least this often while idle
+    idle_seconds = float(os.getenv('COLLECTOR_IDLE_SECONDS', '900'))
+    
+    with CollectionScheduler('arrival', airports, horizon_days=horizon_days, daily_budget=daily_budget) as scheduler:
+        schedules = ArrivalFutureSchedules()
+        window = scheduler.window()
+        logger.info(f"🛰️  Arrival daemon: {', '.join(scheduler.airports)}, {window[0]} to {window[-1]}, "
+                    f"budget {scheduler.daily_budget} calls/day")
+        try:
+            while True:
+                changes = scheduler.sync()
+                if changes['added'] or changes['dropped']:
+                    logger.info(f"📅 Window moved: {changes['added']} units added, {changes['dropped']} dropped")
+                
+                unit = scheduler.claim_next()
+                if unit is None:
+                    # Searches read the calendar only; bring it up to date while idle
+                    refresh_after_collection()
+                    status = scheduler.status()
+                    wait = max(1.0, min(scheduler.seconds_until_due(), idle_seconds))
+                    logger.info(f"💤 Nothing due ({status['calls_today']}/{status['daily_budget']} calls today), "
+                                f"sleeping {wait / 60:.0f} min")
+                    time.sleep(wait)
+                    continue
+                
+                logger.info(f"🔄 {unit['airport_code']} arrival {unit['target_date']} "
+                            f"(collected {unit['collections']}x, changed {unit['changes']}x)")
+                # The budget is charged with every HTTP attempt, retries included
+                calls_before = schedules.rate_controller.stats['calls']
+                try:
+                    retrieved_count, stored_count = schedules.collect_unit(
+                        unit['airport_code'], unit['target_date'], collection_mode, batch_size
+                    )
+                except Exception as e:
+                    calls = schedules.rate_controller.stats['calls'] - calls_before
+                    scheduler.record(unit, error=str(e), calls=calls)
+                    logger.warning(f"   ⚠️  {unit['airport_code']} {unit['target_date']} failed: {e}")
+                else:
+                    calls = schedules.rate_controller.stats['calls'] - calls_before
+                    scheduler.record(unit, stored_count, calls=calls)
+                
+                time.sleep(job_delay)
+        except KeyboardInterrupt:
+            logger.info("🛑 Daemon stopped; schedule state is saved for the next start")
 
 if __name__ == "__main__":
-    weekly_collection()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Arrival Future Schedules collection")
+    parser.add_argument('--worker', action='store_true',
+                        help='Drain queued collection jobs instead of starting a weekly sweep')
+    parser.add_argument('--sweep', help='Only drain jobs of this sweep id (with --worker)')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Keep a rolling window of dates fresh until interrupted')
+    parser.add_argument('--airports', nargs='+',
+                        help='Airports for --daemon (default: COLLECTOR_AIRPORTS)')
+    parser.add_argument('--horizon', type=int,
+                        help='Last date kept fresh in days from today (default: COLLECTOR_HORIZON_DAYS or 28)')
+    parser.add_argument('--budget', type=int,
+                        help='API calls per day for all collectors (default: COLLECTOR_DAILY_BUDGET or 200)')
+    args = parser.parse_args()
+    
+    # Apply LOG_LEVEL / LOG_FILE / LOG_FORMAT from .env
+    configure_logging()
+    
+    if args.daemon:
+        airports = args.airports or [code for code in os.getenv('COLLECTOR_AIRPORTS', '').split(',') if code.strip()]
+        if not airports:
+            parser.error("--daemon needs --airports or COLLECTOR_AIRPORTS")
+        daemon_collection([code.strip().upper() for code in airports], args.horizon, args.budget)
+    elif args.worker:
+        job_worker(args.sweep)
+        refresh_after_collection()
+    else:
+        weekly_collection()
+        refresh_after_collection()
@@ -12,22 +12,185 @@ Date: September 2025
 import sqlite3
 import os
 import sys
-from typing import List, Dict, Optional, Tuple
-from datetime import datetime
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
+from datetime import date, datetime, timedelta
 import argparse
+import cmd
+import re
+import shlex
+import time
+from contextlib import contextmanager
+from itertools import groupby
+
+from aviation_edge_calendar import calendar_is_stale
+from aviation_edge_db import block_minutes, default_db_path, scheduled_time_to_minutes
+from aviation_edge_dimensions import aircraft_display_name, load_aircraft_display_names, load_airport_ids
+from aviation_edge_fts import autocomplete, has_text_index, match_expression
+from aviation_edge_logging import configure_logging
+from aviation_edge_storage import SQLiteStorage, analytics_storage
+
+# Route searches return these columns in this order
+ROUTE_COLUMNS = ['dep_iata_code', 'arr_iata_code', 'airline_iata_code', 'flight_iata_number',
+                 'dep_scheduled_time', 'arr_scheduled_time', 'weekdays', 'query_type', 'airport_code',
+                 'dep_terminal', 'arr_terminal', 'dep_gate', 'arr_gate',
+                 'aircraft_model_code', 'aircraft_model_text', 'airline_name',
+                 'created_at', 'updated_at', 'id']
+
+# Columns added by later schema migrations, selected when the database has them
+OPTIONAL_ROUTE_COLUMNS = ['aircraft_id', 'dep_minutes', 'arr_minutes', 'block_minutes']
+
+# Sort orders of route searches (ORDER BY columns)
+ROUTE_ORDERS = {
+    'flight': ('airline_iata_code', 'flight_iata_number', 'dep_iata_code', 'arr_iata_code'),
+    'departure': ('dep_minutes', 'airline_iata_code', 'flight_iata_number', 'dep_iata_code', 'arr_iata_code'),
+}
+
+# Collapsed codeshare groups show the operating flight, with weekdays merged over the group
+CODESHARE_COLUMNS = {
+    'airline_iata_code': 'operating_airline_iata',
+    'flight_iata_number': 'operating_flight_number',
+    'weekdays': 'group_concat(weekdays)',
+}
+
+# One physical flight: operating flight, route and scheduled departure
+CODESHARE_GROUP = ('codeshare_group_id', 'dep_iata_code', 'arr_iata_code', 'dep_scheduled_time')
+
+# The same key on an index table aliased {index} joined to flights f: departure- and
+# arrival-sourced rows and the marketing rows of a codeshare all share it
+PHYSICAL_FLIGHT_KEY = ("COALESCE(f.codeshare_group_id, f.airline_iata_code || f.flight_iata_number), "
+                       "{index}.dep_airport_id, {index}.arr_airport_id, {index}.dep_minutes")
+
+def _row_sort_key(columns: List[str], order: Tuple[str, ...]):
+    """Python equivalent of an ORDER BY for merging shard results (NULLs first, as in SQLite)"""
+    positions = [columns.index(column) for column in order]
+    return lambda row: tuple((row[p] is not None, row[p] if row[p] is not None else 0) for p in positions)
+
+DAY_NAMES = {1: 'Mon', 2: 'Tue', 3: 'Wed', 4: 'Thu', 5: 'Fri', 6: 'Sat', 7: 'Sun'}
+
+def parse_weekday(value) -> int:
+    """Weekday number 1-7 (Monday = 1) from a number or a day name such as 'Fri' or 'friday'"""
+    text = str(value).strip().lower()
+    if text.isdigit() and 1 <= int(text) <= 7:
+        return int(text)
+    for number, name in DAY_NAMES.items():
+        if text[:3] == name.lower():
+            return number
+    raise ValueError(f"Invalid weekday: {value} (use 1-7 or Mon-Sun)")
+
+def parse_time_window(window: str) -> Tuple[int, int]:
+    """(start, end) minutes since midnight from "HH:MM-HH:MM" (end may be past midnight, e.g. 22:00-02:00)"""
+    start_text, _, end_text = window.partition('-')
+    start, end = scheduled_time_to_minutes(start_text.strip()), scheduled_time_to_minutes(end_text.strip())
+    if start is None or end is None:
+        raise ValueError(f"Invalid time window: {window} (use HH:MM-HH:MM)")
+    return start, end
+
+def parse_since(value: str) -> str:
+    """ISO timestamp from a date/timestamp ('2025-10-01', '2025-10-01 08:00') or an age such as '7d' or '12h'"""
+    text = value.strip().lower()
+    match = re.fullmatch(r'(\d+)\s*([dh])', text)
+    if match:
+        amount = int(match.group(1))
+        delta = timedelta(days=amount) if match.group(2) == 'd' else timedelta(hours=amount)
+        return (datetime.now() - delta).isoformat()
+    try:
+        return datetime.fromisoformat(value.strip()).isoformat()
+    except ValueError:
+        raise ValueError(f"Invalid --changes-since value: {value} (use YYYY-MM-DD[ HH:MM], Nd or Nh)")
+
+def format_minutes(minutes: Optional[int]) -> str:
+    """Format a duration in minutes as e.g. 7h55m ('N/A' when unknown)"""
+    if minutes is None:
+        return "N/A"
+    return f"{minutes // 60}h{minutes % 60:02d}m"
+
+def format_week_minutes(minutes: int) -> str:
+    """Minutes since Monday 00:00 as e.g. 'Tue 06:45' (wraps past Sunday)"""
+    day, minute = divmod(int(minutes) % (7 * 24 * 60), 24 * 60)
+    return f"{DAY_NAMES[day + 1]} {minute // 60:02d}:{minute % 60:02d}"
+
+def parse_route_pairs(lines: Iterable[str]) -> List[Tuple[str, str]]:
+    """(origin, destination) pairs from lines like "MNL POM", "MNL-POM" or "MNL,POM" (# starts a comment)"""
+    pairs = []
+    for number, line in enumerate(lines, 1):
+        codes = re.split(r'[\s,;>\-→]+', line.split('#', 1)[0].strip())
+        codes = [code.upper() for code in codes if code]
+        if not codes:
+            continue
+        if len(codes) != 2:
+            raise ValueError(f"Line {number}: expected ORIGIN DESTINATION, got {line.strip()!r}")
+        pairs.append((codes[0], codes[1]))
+    return pairs
 
 class FlightSearchSystem:
     """Comprehensive flight search system focusing on actual routes"""
     
-    def __init__(self, db_path: str = None):
-        """Initialize the flight search system"""
+    def __init__(self, db_path: str = None, sharded: bool = False, shard_layout: str = None,
+                 parallel: bool = False, keep_connection: bool = False):
+        """
+        Initialize the flight search system
+        
+        Args:
+            db_path: Database path (defaults to DB/flight_schedules.db)
+            sharded: Answer route searches from the shard files built by aviation_edge_shards.py
+            shard_layout: 'airport' or 'month' (defaults to SHARD_LAYOUT)
+            parallel: Query relevant shards from a thread pool
+            keep_connection: Reuse one connection for all queries until close() (interactive sessions)
+        """
         if db_path is None:
-            # Default to project database location
-            project_root = os.path.dirname(__file__)
-            db_path = os.path.join(project_root, 'DB', 'flight_schedules.db')
+            db_path = default_db_path()
         
         self.db_path = db_path
+        self.storage = SQLiteStorage(db_path)
+        # GROUP BY-heavy analytics may run on the columnar backend (ANALYTICS_BACKEND)
+        self.analytics_storage = analytics_storage(db_path)
+        self.keep_connection = keep_connection
+        self._conn = None
         self._verify_database()
+        
+        self.shards = None
+        self.parallel = parallel
+        if sharded:
+            from aviation_edge_shards import ShardSet
+            shards = ShardSet(self.db_path, layout=shard_layout)
+            if len(shards):
+                self.shards = shards
+                print(f"🧩 Using {len(shards)} {shards.layout} shards")
+            else:
+                print(f"⚠️ No {shards.layout} shards built yet (run aviation_edge_shards.py), using main database")
+    
+    @contextmanager
+    def _analytics_connection(self):
+        """Connection for summary and analytics queries: the session connection on SQLite, else the columnar engine"""
+        if self.analytics_storage.name == self.storage.name:
+            with self._connection() as conn:
+                yield conn
+            return
+        conn = self.analytics_storage.connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Read connection: the kept-open session connection, or a fresh one closed afterwards"""
+        if self.keep_connection:
+            if self._conn is None:
+                self._conn = self.storage.connect()
+            yield self._conn
+            return
+        conn = self.storage.connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def close(self):
+        """Close the kept-open session connection"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
     
     def _verify_database(self):
         """Verify database exists and is accessible"""
@@ -35,48 +198,102 @@ class FlightSearchSystem:
             raise FileNotFoundError(f"Database not found: {self.db_path}")
         
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.storage.connect()
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM flights")
             count = cursor.fetchone()[0]
+            
+            # Dimension ids and schedule minutes exist once aviation_edge_migrate.py has run
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(flights)")}
+            self.route_columns = ROUTE_COLUMNS + [c for c in OPTIONAL_ROUTE_COLUMNS if c in columns]
+            self.has_dimensions = 'aircraft_id' in columns
+            self.aircraft_names = load_aircraft_display_names(conn) if self.has_dimensions else {}
+            self.airport_ids = load_airport_ids(conn) if self.has_dimensions else {}
+            # Generation the id map was last reloaded at (None: as read on startup)
+            self._airport_ids_generation = None
+            self.has_weekday_index = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'flight_weekdays'"
+            ).fetchone() is not None
+            self.has_text_index = has_text_index(conn)
             conn.close()
+            # Analytics results, each stored with the database generation it was computed from
+            self._analytics_cache = {}
             print(f"✅ Database connected: {count:,} flights available")
+            if self.analytics_storage.name != self.storage.name:
+                print(f"🧊 Analytics routed to {self.analytics_storage.name}")
         except Exception as e:
             raise Exception(f"Database connection failed: {e}")
     
+    def _airport_id(self, code: str, default: int = None) -> Optional[int]:
+        """
+        Dimension id of an airport, reloading the id map when the database generation changed
+        
+        A session kept open while a collector runs would otherwise never find airports
+        interned after it started. Ids never change once assigned, so only a miss checks.
+        """
+        airport_id = self.airport_ids.get(code.upper())
+        if airport_id is None and self.has_dimensions:
+            from aviation_edge_analytics import database_generation
+            
+            with self._connection() as conn:
+                generation = database_generation(conn)
+                if generation != self._airport_ids_generation:
+                    self.airport_ids = load_airport_ids(conn)
+                    self._airport_ids_generation = generation
+            airport_id = self.airport_ids.get(code.upper())
+        return default if airport_id is None else airport_id
+    
     def search_route(self, origin: str = None, destination: str = None, 
                     airline: str = None, flight_number: str = None, 
-                    limit: int = None) -> List[Dict]:
+                    limit: int = None, sort: str = 'flight',
+                    collapse_codeshares: bool = False) -> List[Dict]:
         """
         Search flights by actual route regardless of how data was collected
         
+        With collapse_codeshares the marketing rows of each physical flight are grouped
+        in SQL into one operating flight carrying a 'marketing_flights' list. Airline and
+        flight number filters then match any member of a group, so a marketing number
+        such as PR107 returns its operating flight. Collapsed searches read the main
+        database, because one group's rows can sit in different shards.
+        
         Args:
             origin: Departure airport IATA code (e.g., 'MNL')
             destination: Arrival airport IATA code (e.g., 'POM')
             airline: Airline IATA code (e.g., 'PR')
             flight_number: Flight number (e.g., '215' or 'PR215')
             limit: Maximum number of results to return
+            sort: 'flight' (airline and flight number) or 'departure' (scheduled departure time)
+            collapse_codeshares: One result per operating flight instead of per marketing number
             
         Returns:
             List of flight dictionaries with complete route information
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Build dynamic query
         conditions = []
         params = []
         
-        if origin:
-            conditions.append("dep_iata_code = ?")
-            params.append(origin.upper())
+        # Airports are matched on their integer ids when the dimension tables exist
+        for code, id_column, code_column in ((origin, 'dep_airport_id', 'dep_iata_code'),
+                                             (destination, 'arr_airport_id', 'arr_iata_code')):
+            if not code:
+                continue
+            if self.has_dimensions:
+                airport_id = self._airport_id(code)
+                if airport_id is None:
+                    return []
+                conditions.append(f"{id_column} = ?")
+                params.append(airport_id)
+            else:
+                conditions.append(f"{code_column} = ?")
+                params.append(code.upper())
         
-        if destination:
-            conditions.append("arr_iata_code = ?") 
-            params.append(destination.upper())
+        # Collapsed searches keep every member of a matching codeshare group
+        group_key = ', '.join(CODESHARE_GROUP)
+        member_filter = (f"({group_key}) IN (SELECT {group_key} FROM flights WHERE {{}} = ?)"
+                         if collapse_codeshares else "{} = ?")
         
         if airline:
-            conditions.append("airline_iata_code = ?")
+            conditions.append(member_filter.format('airline_iata_code'))
             params.append(airline.upper())
         
         if flight_number:
@@ -84,46 +301,167 @@ class FlightSearchSystem:
             flight_clean = flight_number.upper()
             if airline and not flight_clean.startswith(airline.upper()):
                 flight_clean = f"{airline.upper()}{flight_clean}"
-            conditions.append("flight_iata_number = ?")
+            conditions.append(member_filter.format('marketing_flight_number' if collapse_codeshares
+                                                   else 'flight_iata_number'))
             params.append(flight_clean)
         
-        base_query = """
-        SELECT dep_iata_code, arr_iata_code, airline_iata_code, flight_iata_number,
-               dep_scheduled_time, arr_scheduled_time, weekdays, query_type, airport_code,
-               dep_terminal, arr_terminal, dep_gate, arr_gate,
-               aircraft_model_code, aircraft_model_text, airline_name,
-               created_at, updated_at, id
-        FROM flights
-        """
+        columns = self.route_columns
+        order = ROUTE_ORDERS[sort]
+        if 'dep_minutes' in order and 'dep_minutes' not in columns:
+            raise ValueError("Sorting by departure time needs the dep_minutes column (run aviation_edge_migrate.py)")
         
-        if conditions:
-            query = base_query + " WHERE " + " AND ".join(conditions)
+        if collapse_codeshares:
+            # MIN(is_codeshare) makes SQLite take the other columns from an operating row when the group has one
+            select = ', '.join(f"{CODESHARE_COLUMNS[column]} AS {column}" if column in CODESHARE_COLUMNS else column
+                               for column in columns)
+            select += (", group_concat(DISTINCT CASE WHEN is_codeshare THEN marketing_flight_number END)"
+                       " AS marketing_flights, MIN(is_codeshare)")
+            columns = columns + ['marketing_flights']
         else:
-            query = base_query
+            select = ', '.join(columns)
+        query = f"SELECT {select} FROM {{table}}"
+        
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        
+        if collapse_codeshares:
+            query += f" GROUP BY {group_key}"
         
-        query += " ORDER BY airline_iata_code, flight_iata_number, dep_iata_code, arr_iata_code"
+        query += f" ORDER BY {', '.join(order)}"
         
         if limit:
-            query += f" LIMIT {limit}"
+            query += f" LIMIT {int(limit)}"
         
-        cursor.execute(query, params)
-        results = cursor.fetchall()
+        if self.shards is not None and not collapse_codeshares:
+            # Only shards holding the requested origin/destination are opened
+            results = self.shards.query(query, params, _row_sort_key(columns, order),
+                                        origin=origin.upper() if origin else None,
+                                        destination=destination.upper() if destination else None,
+                                        limit=limit, parallel=self.parallel)
+        else:
+            with self._connection() as conn:
+                results = conn.execute(query.format(table='flights'), params).fetchall()
         
         # Convert to dictionaries
-        columns = ['dep_iata_code', 'arr_iata_code', 'airline_iata_code', 'flight_iata_number',
-                  'dep_scheduled_time', 'arr_scheduled_time', 'weekdays', 'query_type', 'airport_code',
-                  'dep_terminal', 'arr_terminal', 'dep_gate', 'arr_gate',
-                  'aircraft_model_code', 'aircraft_model_text', 'airline_name',
-                  'created_at', 'updated_at', 'id']
-        
-        flights = []
-        for row in results:
-            flight_dict = dict(zip(columns, row))
-            flights.append(flight_dict)
-        
-        conn.close()
+        flights = [dict(zip(columns, row)) for row in results]
+        if collapse_codeshares:
+            for flight in flights:
+                flight['marketing_flights'] = sorted(set((flight['marketing_flights'] or '').split(',')) - {''})
+                # The group's weekdays arrive concatenated from all its rows
+                flight['weekdays'] = ','.join(sorted(set((flight['weekdays'] or '').split(',')) - {''}))
         return flights
     
+    def search_routes_bulk(self, pairs: Iterable[Tuple[str, str]], airline: str = None,
+                           sort: str = 'flight') -> Iterator[Tuple[Tuple[str, str], List[Dict]]]:
+        """
+        Search many origin/destination pairs with one query
+        
+        The pairs are loaded into a temp table and joined to flights in a single
+        statement on one connection (via the route index), instead of one connection,
+        query and conversion per search_route() call. Results are streamed pair by pair
+        in input order, so thousands of pairs never sit in memory at once. Always reads
+        the main database, also when sharded search is enabled.
+        
+        Args:
+            pairs: (origin, destination) IATA code pairs
+            airline: Airline IATA code filter
+            sort: 'flight' or 'departure', the order within each pair
+            
+        Yields:
+            ((origin, destination), flights) for every pair, with an empty list when
+            the route has no flights
+        """
+        columns = self.route_columns
+        order = ROUTE_ORDERS[sort]
+        if 'dep_minutes' in order and 'dep_minutes' not in columns:
+            raise ValueError("Sorting by departure time needs the dep_minutes column (run aviation_edge_migrate.py)")
+        
+        # Airports are joined on their integer ids when the dimension tables exist
+        if self.has_dimensions:
+            join = "f.dep_airport_id = p.dep_airport_id AND f.arr_airport_id = p.arr_airport_id"
+        else:
+            join = "f.dep_iata_code = p.origin AND f.arr_iata_code = p.destination"
+        params = []
+        if airline:
+            join += " AND f.airline_iata_code = ?"
+            params.append(airline.upper())
+        
+        # Resolved up front: a miss may reload the id map on the same connection
+        pair_rows = [(number, origin.upper(), destination.upper(),
+                      self._airport_id(origin), self._airport_id(destination))
+                     for number, (origin, destination) in enumerate(pairs)]
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS route_pairs (
+                    pair_no INTEGER PRIMARY KEY, origin TEXT, destination TEXT,
+                    dep_airport_id INTEGER, arr_airport_id INTEGER
+                )
+            """)
+            conn.execute("DELETE FROM route_pairs")
+            conn.executemany("INSERT INTO route_pairs VALUES (?, ?, ?, ?, ?)", pair_rows)
+            # End the implicit transaction so a kept-open connection holds no read snapshot
+            conn.commit()
+            
+            cursor = conn.execute(f"""
+                SELECT p.pair_no, p.origin, p.destination, {', '.join('f.' + column for column in columns)}
+                FROM route_pairs p LEFT JOIN flights f ON {join}
+                ORDER BY p.pair_no, {', '.join('f.' + column for column in order)}
+            """, params)
+            for (_, origin, destination), rows in groupby(cursor, key=lambda row: row[:3]):
+                flights = [dict(zip(columns, row[3:])) for row in rows]
+                # A pair without flights comes back as one all-NULL row from the LEFT JOIN
+                yield (origin, destination), [flight for flight in flights if flight['id'] is not None]
+    
+    def search_text(self, text: str, origin: str = None, destination: str = None,
+                    limit: int = None) -> List[Dict]:
+        """
+        Free-text flight search over airline names, aircraft models and flight numbers
+        
+        Every word matches as a prefix through the flights_fts index, so "philippine a321"
+        or "PR 21" work without exact codes. Results are in relevance (bm25) order.
+        
+        Args:
+            text: Words or word prefixes
+            origin: Departure airport IATA code
+            destination: Arrival airport IATA code
+            limit: Maximum number of results
+            
+        Returns:
+            List of flight dictionaries
+        """
+        if not self.has_text_index:
+            raise ValueError("Text search needs the flights_fts index (run aviation_edge_migrate.py)")
+        expression = match_expression(text)
+        if not expression:
+            return []
+        
+        conditions = ["flights_fts MATCH ?"]
+        params = [expression]
+        for code, column in ((origin, 'dep_iata_code'), (destination, 'arr_iata_code')):
+            if code:
+                conditions.append(f"f.{column} = ?")
+                params.append(code.upper())
+        
+        query = f"""
+            SELECT {', '.join('f.' + column for column in self.route_columns)}
+            FROM flights_fts JOIN flights f ON f.id = flights_fts.rowid
+            WHERE {' AND '.join(conditions)}
+            ORDER BY flights_fts.rank
+        """
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        
+        with self._connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [dict(zip(self.route_columns, row)) for row in rows]
+    
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[Tuple[str, str, int]]:
+        """Airline, aircraft and flight number completions for typed text, most flights first"""
+        if not self.has_text_index:
+            raise ValueError("Autocomplete needs the flights_fts index (run aviation_edge_migrate.py)")
+        with self._connection() as conn:
+            return autocomplete(conn, prefix, limit)
+    
     def get_route_summary(self, origin: str, destination: str) -> Dict:
         """Get comprehensive summary of a specific route"""
         flights = self.search_route(origin=origin, destination=destination)
@@ -193,6 +531,7 @@ class FlightSearchSystem:
                     route = f"{record['dep_iata_code']}→{record['arr_iata_code']}"
                     schedule = f"{record['dep_scheduled_time']}→{record['arr_scheduled_time']}"
                     aircraft = record['aircraft_model_text']
+                    dep_minutes, arr_minutes, _ = self._schedule_minutes(record)
                 
                 for day in record['weekdays'].split(','):
                     if day.strip():
@@ -202,7 +541,9 @@ class FlightSearchSystem:
                 'route': route,
                 'schedule': schedule,
                 'aircraft': aircraft,
-                'weekdays': sorted(all_weekdays)
+                'weekdays': sorted(all_weekdays),
+                'dep_minutes': dep_minutes,
+                'arr_minutes': arr_minutes
             }
         
         flight1_consolidated = consolidate_weekdays(flight1_data) if flight1_data else None
@@ -234,26 +575,13 @@ class FlightSearchSystem:
                 
                 # Calculate turnaround time if applicable
                 if route1_parts[1] == route2_parts[0]:  # Same intermediate airport
-                    try:
-                        arr_time = flight1_consolidated['schedule'].split('→')[1]
-                        dep_time = flight2_consolidated['schedule'].split('→')[0]
-                        
-                        arr_hour, arr_min = map(int, arr_time.split(':'))
-                        dep_hour, dep_min = map(int, dep_time.split(':'))
-                        
-                        arr_minutes = arr_hour * 60 + arr_min
-                        dep_minutes = dep_hour * 60 + dep_min
-                        
-                        if dep_minutes < arr_minutes:
-                            dep_minutes += 24 * 60
-                        
-                        turnaround = dep_minutes - arr_minutes
-                        turnaround_hours = turnaround // 60
-                        turnaround_mins = turnaround % 60
-                        
-                        analysis["turnaround_time"] = f"{turnaround_hours}h {turnaround_mins}m"
-                    except:
+                    # Ground time until the return departs, next day if it leaves earlier
+                    turnaround = block_minutes(flight1_consolidated['arr_minutes'],
+                                               flight2_consolidated['dep_minutes'])
+                    if turnaround is None:
                         analysis["turnaround_time"] = "Unable to calculate"
+                    else:
+                        analysis["turnaround_time"] = f"{turnaround // 60}h {turnaround % 60}m"
             else:
                 analysis["relationship"] = "different_routes"
         else:
@@ -261,8 +589,9 @@ class FlightSearchSystem:
         
         return analysis
     
-    def display_flight_table(self, flights: List[Dict], title: str = "Flight Search Results"):
-        """Display flights in clean table format"""
+    def display_flight_table(self, flights: List[Dict], title: str = "Flight Search Results",
+                             keep_order: bool = False):
+        """Display flights in clean table format (sorted by flight number unless keep_order)"""
         if not flights:
             print(f"\n{title}")
             print("=" * len(title))
@@ -282,8 +611,10 @@ class FlightSearchSystem:
                     'route': f"{flight['dep_iata_code']}→{flight['arr_iata_code']}",
                     'dep_time': flight['dep_scheduled_time'],
                     'arr_time': flight['arr_scheduled_time'],
-                    'aircraft': flight['aircraft_model_text'] or 'N/A',
+                    'aircraft': self._aircraft_name(flight),
+                    'block_minutes': self._schedule_minutes(flight)[2],
                     'weekdays': set(),
+                    'codeshares': set(),
                     'terminals': f"{flight['dep_terminal'] or '?'}→{flight['arr_terminal'] or '?'}"
                 }
             
@@ -291,6 +622,9 @@ class FlightSearchSystem:
             for day in flight['weekdays'].split(','):
                 if day.strip():
                     consolidated[flight_key]['weekdays'].add(int(day.strip()))
+            
+            # Marketing numbers of collapsed codeshare groups
+            consolidated[flight_key]['codeshares'].update(flight.get('marketing_flights', ()))
         
         print(f"\n{title}")
         print("=" * len(title))
@@ -301,39 +635,19 @@ class FlightSearchSystem:
         print("│ Number  │         │ Time  │ Time  │         │   Days   │             │")
         print("├─────────┼─────────┼───────┼───────┼─────────┼──────────┼─────────────┤")
         
-        day_names = {1: 'Mon', 2: 'Tue', 3: 'Wed', 4: 'Thu', 5: 'Fri', 6: 'Sat', 7: 'Sun'}
-        
-        for flight_key in sorted(consolidated.keys()):
+        for flight_key in (consolidated if keep_order else sorted(consolidated.keys())):
             flight = consolidated[flight_key]
             
-            # Calculate duration
-            try:
-                dep_hour, dep_min = map(int, flight['dep_time'].split(':'))
-                arr_hour, arr_min = map(int, flight['arr_time'].split(':'))
-                
-                dep_minutes = dep_hour * 60 + dep_min
-                arr_minutes = arr_hour * 60 + arr_min
-                
-                if arr_minutes < dep_minutes:
-                    arr_minutes += 24 * 60
-                
-                duration_minutes = arr_minutes - dep_minutes
-                duration_hours = duration_minutes // 60
-                duration_mins = duration_minutes % 60
-                duration_str = f"{duration_hours}h{duration_mins:02d}m"
-            except:
-                duration_str = "N/A"
+            # Block time is stored at ingest (overnight-adjusted)
+            duration_str = format_minutes(flight['block_minutes'])
             
             # Format operating days
             sorted_weekdays = sorted(flight['weekdays'])
-            operating_days = [day_names[day] for day in sorted_weekdays]
+            operating_days = [DAY_NAMES[day] for day in sorted_weekdays]
             days_str = ','.join(operating_days)
             
-            # Format aircraft (shorten if needed)
-            aircraft = flight['aircraft'].replace('AIRBUS ', 'A').replace('BOEING ', 'B')
-            aircraft = aircraft.replace('A321-271N', 'A321neo').replace('737-81M', '737-800')
-            if len(aircraft) > 11:
-                aircraft = aircraft[:11]
+            # Display names are precomputed in dim_aircraft; shorten if needed
+            aircraft = flight['aircraft'][:11]
             
             flight_display = f"{flight['airline']}{flight['flight_number'].replace(flight['airline'], '')}"
             
@@ -341,8 +655,443 @@ class FlightSearchSystem:
         
         print("└─────────┴─────────┴───────┴───────┴─────────┴──────────┴─────────────┘")
         
+        codeshared = [key for key in consolidated if consolidated[key]['codeshares']]
+        if codeshared:
+            print("\nCodeshares (operating flight: marketing flights)")
+            for flight_key in (codeshared if keep_order else sorted(codeshared)):
+                flight = consolidated[flight_key]
+                print(f"  {flight['flight_number']} {flight['route']}: {', '.join(sorted(flight['codeshares']))}")
+        
         print(f"\nTotal: {len(consolidated)} unique flights ({len(flights)} database records)")
     
+    @staticmethod
+    def _schedule_minutes(flight: Dict) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+        """Departure/arrival minutes and block time, parsed from the text for unmigrated databases"""
+        if 'block_minutes' in flight:
+            return flight['dep_minutes'], flight['arr_minutes'], flight['block_minutes']
+        dep_minutes = scheduled_time_to_minutes(flight['dep_scheduled_time'])
+        arr_minutes = scheduled_time_to_minutes(flight['arr_scheduled_time'])
+        return dep_minutes, arr_minutes, block_minutes(dep_minutes, arr_minutes)
+    
+    def _aircraft_name(self, flight: Dict) -> str:
+        """Precomputed aircraft display name, derived from the model text for legacy rows"""
+        name = self.aircraft_names.get(flight.get('aircraft_id'))
+        if name is None:
+            name = aircraft_display_name(flight['aircraft_model_text'], flight['aircraft_model_code'])
+        return name
+    
+    def search_departures(self, origin: str, weekday=None, window: str = None,
+                          destination: str = None, airline: str = None, limit: int = None) -> List[Dict]:
+        """
+        Departures from an airport by weekday and time window, in departure order
+        
+        Served by the flight_weekdays index on (dep_airport_id, weekday, dep_minutes),
+        e.g. "MNL departures between 06:00 and 09:00 on Fridays".
+        
+        Args:
+            origin: Departure airport IATA code
+            weekday: 1-7 or day name; all days when omitted
+            window: "HH:MM-HH:MM" local departure window (inclusive, may wrap past midnight)
+            destination: Arrival airport IATA code
+            airline: Airline IATA code
+            limit: Maximum number of departures
+            
+        Returns:
+            List of flight dictionaries, one per operating day, with 'weekday' set
+        """
+        conditions, params = [], []
+        if weekday is not None:
+            conditions.append("w.weekday = ?")
+            params.append(parse_weekday(weekday))
+        if window:
+            start, end = parse_time_window(window)
+            if start <= end:
+                conditions.append("w.dep_minutes BETWEEN ? AND ?")
+            else:
+                conditions.append("(w.dep_minutes >= ? OR w.dep_minutes <= ?)")
+            params += [start, end]
+        
+        return self._weekday_departures(origin, conditions, params, destination, airline, limit)
+    
+    def next_departures(self, origin: str, count: int = 10, after: datetime = None,
+                        destination: str = None, airline: str = None) -> List[Dict]:
+        """
+        The next N scheduled departures from an airport after a point in time
+        
+        Walks forward one weekday at a time through the (airport, weekday, minutes)
+        index, so each step is a single range scan that stops after `count` rows.
+        
+        Args:
+            origin: Departure airport IATA code
+            count: Number of departures to return
+            after: Local time at the airport to start from (defaults to now)
+            destination: Arrival airport IATA code
+            airline: Airline IATA code
+            
+        Returns:
+            List of flight dictionaries with 'weekday' and 'departure_date' set
+        """
+        after = after or datetime.now()
+        now_minutes = after.hour * 60 + after.minute
+        departures = []
+        
+        # Today from now, the following six days, then today's earlier departures next week
+        for offset in range(8):
+            weekday = (after.isoweekday() - 1 + offset) % 7 + 1
+            lower = now_minutes if offset == 0 else 0
+            upper = now_minutes - 1 if offset == 7 else 24 * 60 - 1
+            rows = self._weekday_departures(origin, ["w.weekday = ?", "w.dep_minutes BETWEEN ? AND ?"],
+                                            [weekday, lower, upper], destination, airline,
+                                            count - len(departures))
+            departure_date = (after.date() + timedelta(days=offset)).isoformat()
+            for row in rows:
+                row['departure_date'] = departure_date
+            departures.extend(rows)
+            if len(departures) >= count:
+                break
+        
+        return departures
+    
+    def _physical_select(self) -> str:
+        """
+        Route columns of a query grouped on PHYSICAL_FLIGHT_KEY, shown as the operating flight
+        
+        MIN(is_codeshare) makes SQLite take the other columns from an operating row when
+        the group has one; 'marketing_flights' lists the codeshare numbers.
+        """
+        select = ', '.join(f"f.{CODESHARE_COLUMNS[column]} AS {column}"
+                           if column in ('airline_iata_code', 'flight_iata_number') else f"f.{column}"
+                           for column in self.route_columns)
+        return (select + ", group_concat(DISTINCT CASE WHEN f.is_codeshare THEN f.marketing_flight_number END)"
+                         " AS marketing_flights, MIN(f.is_codeshare)")
+    
+    @staticmethod
+    def _physical_flights(columns: List[str], rows: List[Tuple]) -> List[Dict]:
+        """Rows of a _physical_select() query as dicts with a sorted 'marketing_flights' list"""
+        flights = [dict(zip(columns + ['marketing_flights'], row)) for row in rows]
+        for flight in flights:
+            flight['marketing_flights'] = sorted(set((flight['marketing_flights'] or '').split(',')) - {''})
+        return flights
+    
+    def _weekday_departures(self, origin: str, conditions: List[str], params: List,
+                            destination: str = None, airline: str = None, limit: int = None) -> List[Dict]:
+        """
+        Run a departure query against the flight_weekdays index, ordered by day and time
+        
+        One row per physical departure and weekday: the departure- and arrival-sourced
+        rows and the codeshare marketing rows of a flight collapse to its operating flight.
+        """
+        if not self.has_weekday_index:
+            raise ValueError("Time-window queries need the flight_weekdays index (run aviation_edge_migrate.py)")
+        
+        origin_id = self._airport_id(origin)
+        if origin_id is None:
+            return []
+        conditions = ["w.dep_airport_id = ?"] + conditions
+        params = [origin_id] + params
+        
+        if destination:
+            conditions.append("w.arr_airport_id = ?")
+            params.append(self._airport_id(destination, -1))
+        if airline:
+            conditions.append("f.airline_iata_code = ?")
+            params.append(airline.upper())
+        
+        query = f"""
+            SELECT w.weekday, {self._physical_select()}
+            FROM flight_weekdays w JOIN flights f ON f.id = w.flight_id
+            WHERE {' AND '.join(conditions)}
+            GROUP BY w.weekday, {PHYSICAL_FLIGHT_KEY.format(index='w')}
+            ORDER BY w.weekday, w.dep_minutes, airline_iata_code, flight_iata_number
+        """
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        
+        with self._connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return self._physical_flights(['weekday'] + self.route_columns, rows)
+    
+    @contextmanager
+    def _calendar_connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Connection for dated queries on flight_instances
+        
+        Searches never write: the calendar is built by the collectors after each run
+        or by aviation_edge_calendar.py, and a stale one is only reported.
+        """
+        if not self.has_weekday_index:
+            raise ValueError("Dated queries need the flight_weekdays index (run aviation_edge_migrate.py)")
+        with self._connection() as conn:
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'calendar_state'").fetchone():
+                raise ValueError("No flight calendar yet: build it with python aviation_edge_calendar.py")
+            if calendar_is_stale(conn):
+                print("⚠️ Flight calendar is out of date; refresh it with python aviation_edge_calendar.py")
+            yield conn
+    
+    def _calendar_bounds(self, conn: sqlite3.Connection, service_date: str):
+        """Raise if a date lies outside the materialised horizon"""
+        start, end = conn.execute("SELECT horizon_start, horizon_end FROM calendar_state WHERE id = 1").fetchone()
+        if not start <= service_date <= end:
+            raise ValueError(f"{service_date} is outside the calendar horizon {start} → {end} "
+                             f"(set CALENDAR_HORIZON_DAYS)")
+    
+    def departure_board(self, origin: str, service_date: str, destination: str = None,
+                        airline: str = None, limit: int = None) -> List[Dict]:
+        """
+        Departures from an airport on a calendar date, in departure order
+        
+        A range scan of flight_instances on (dep_airport_id, service_date, dep_minutes),
+        one row per physical departure shown as its operating flight.
+        
+        Args:
+            origin: Departure airport IATA code
+            service_date: Date as YYYY-MM-DD (within the calendar horizon)
+            destination: Arrival airport IATA code
+            airline: Airline IATA code
+            limit: Maximum number of departures
+            
+        Returns:
+            List of flight dictionaries with 'weekday' and 'departure_date' set
+        """
+        service_date = datetime.strptime(service_date, '%Y-%m-%d').date().isoformat()
+        origin_id = self._airport_id(origin)
+        if origin_id is None:
+            return []
+        
+        conditions = ["i.dep_airport_id = ?", "i.service_date = ?"]
+        params = [origin_id, service_date]
+        if destination:
+            conditions.append("i.arr_airport_id = ?")
+            params.append(self._airport_id(destination, -1))
+        if airline:
+            conditions.append("f.airline_iata_code = ?")
+            params.append(airline.upper())
+        
+        query = f"""
+            SELECT {self._physical_select()}
+            FROM flight_instances i JOIN flights f ON f.id = i.flight_id
+            WHERE {' AND '.join(conditions)}
+            GROUP BY {PHYSICAL_FLIGHT_KEY.format(index='i')}
+            ORDER BY i.dep_minutes, airline_iata_code, flight_iata_number
+        """
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        
+        with self._calendar_connection() as conn:
+            self._calendar_bounds(conn, service_date)
+            rows = conn.execute(query, params).fetchall()
+        
+        weekday = date.fromisoformat(service_date).isoweekday()
+        flights = self._physical_flights(self.route_columns, rows)
+        for flight in flights:
+            flight['weekday'] = weekday
+            flight['departure_date'] = service_date
+        return flights
+    
+    def daily_flight_counts(self, airport: str, arrivals: bool = False) -> List[Tuple[str, int]]:
+        """
+        Scheduled departures (or arrivals) per calendar date over the whole horizon
+        
+        Counts physical flights: source and codeshare rows of one departure count once.
+        
+        Args:
+            airport: Airport IATA code
+            arrivals: Count arrivals instead of departures
+            
+        Returns:
+            List of (YYYY-MM-DD, flights) for every date of the horizon, including empty days
+        """
+        airport_id = self._airport_id(airport, -1)
+        column = 'arr_airport_id' if arrivals else 'dep_airport_id'
+        
+        with self._calendar_connection() as conn:
+            start, end = conn.execute("SELECT horizon_start, horizon_end FROM calendar_state WHERE id = 1").fetchone()
+            counts = dict(conn.execute(f"""
+                SELECT service_date, COUNT(*) FROM (
+                    SELECT DISTINCT i.service_date, {PHYSICAL_FLIGHT_KEY.format(index='i')}
+                    FROM flight_instances i JOIN flights f ON f.id = i.flight_id
+                    WHERE i.{column} = ?
+                ) GROUP BY service_date
+            """, (airport_id,)))
+        
+        first, last = date.fromisoformat(start), date.fromisoformat(end)
+        days = [(first + timedelta(days=offset)).isoformat() for offset in range((last - first).days + 1)]
+        return [(day, counts.get(day, 0)) for day in days]
+    
+    def display_departures(self, flights: List[Dict], title: str = "Departures"):
+        """Display departures one line per operating day, in departure order"""
+        print(f"\n{title}")
+        print("=" * len(title))
+        if not flights:
+            print("No departures found matching criteria")
+            return
+        
+        print("┌───────────┬───────┬─────────┬─────────┬───────┬─────────┬─────────────┐")
+        print("│    Day    │ Depart│ Flight  │  Route  │ Arrive│Duration │   Aircraft  │")
+        print("├───────────┼───────┼─────────┼─────────┼───────┼─────────┼─────────────┤")
+        for flight in flights:
+            day = DAY_NAMES[flight['weekday']]
+            if flight.get('departure_date'):
+                day += ' ' + flight['departure_date'][5:]
+            route = f"{flight['dep_iata_code']}→{flight['arr_iata_code']}"
+            duration = format_minutes(self._schedule_minutes(flight)[2])
+            print(f"│ {day:<9} │ {flight['dep_scheduled_time']} │ {flight['flight_iata_number']:<7} │{route:^9}│ "
+                  f"{flight['arr_scheduled_time']} │ {duration:<7} │ {self._aircraft_name(flight)[:11]:<11} │")
+        print("└───────────┴───────┴─────────┴─────────┴───────┴─────────┴─────────────┘")
+        
+        codeshares = {(flight['flight_iata_number'], flight['dep_iata_code'], flight['arr_iata_code']):
+                      flight['marketing_flights'] for flight in flights if flight.get('marketing_flights')}
+        if codeshares:
+            print("\nCodeshares (operating flight: marketing flights)")
+            for (number, dep, arr), marketing in codeshares.items():
+                print(f"  {number} {dep}→{arr}: {', '.join(marketing)}")
+        print(f"\nTotal: {len(flights)} departures")
+    
+    def get_block_time_stats(self, origin: str = None, destination: str = None,
+                             airline: str = None) -> List[Dict]:
+        """
+        Scheduled block time per route, aggregated in SQL from the stored block_minutes
+        
+        Args:
+            origin: Departure airport IATA code
+            destination: Arrival airport IATA code
+            airline: Airline IATA code
+            
+        Returns:
+            List of dicts with route, flights, min/avg/max block minutes (longest first)
+        """
+        if 'block_minutes' not in self.route_columns:
+            raise ValueError("Block times need the block_minutes column (run aviation_edge_migrate.py)")
+        
+        conditions = ["block_minutes IS NOT NULL"]
+        params = []
+        for code, column in ((origin, 'dep_airport_id'), (destination, 'arr_airport_id')):
+            if code:
+                conditions.append(f"{column} = ?")
+                params.append(self._airport_id(code, -1))
+        if airline:
+            conditions.append("airline_iata_code = ?")
+            params.append(airline.upper())
+        
+        # Portable between SQLite and DuckDB: no bare columns outside the GROUP BY
+        with self._analytics_connection() as conn:
+            rows = conn.execute(f"""
+                SELECT MIN(dep_iata_code) AS dep, MIN(arr_iata_code) AS arr, COUNT(*), MIN(block_minutes),
+                       ROUND(AVG(block_minutes)), MAX(block_minutes)
+                FROM flights
+                WHERE {' AND '.join(conditions)}
+                GROUP BY dep_airport_id, arr_airport_id
+                ORDER BY MAX(block_minutes) DESC, dep, arr
+            """, params).fetchall()
+        
+        return [
+            {'route': f"{dep}→{arr}", 'flights': count, 'min_minutes': low,
+             'avg_minutes': int(average), 'max_minutes': high}
+            for dep, arr, count, low, average, high in rows
+        ]
+    
+    def _cached_analytics(self, key: Tuple, compute):
+        """
+        Result of compute(conn) for key, recomputed only when the database generation changed
+        
+        The generation is always read from SQLite; compute() gets an analytics connection,
+        which is DuckDB when ANALYTICS_BACKEND routes analytics to the columnar engine.
+        """
+        from aviation_edge_analytics import database_generation
+        
+        if not self.has_weekday_index:
+            raise ValueError("Analytics need the flight_weekdays index (run aviation_edge_migrate.py)")
+        with self._connection() as conn:
+            generation = database_generation(conn)
+        cached = self._analytics_cache.get(key)
+        if cached is None or cached[0] != generation:
+            with self._analytics_connection() as conn:
+                cached = (generation, compute(conn))
+            self._analytics_cache[key] = cached
+        return cached[1]
+    
+    def route_matrix(self, airline: str = None):
+        """
+        Airport x airport weekly-frequency matrix, cached per airline filter and database generation
+        
+        Args:
+            airline: Only flights operated by this airline
+            
+        Returns:
+            RouteMatrix (see aviation_edge_analytics.py)
+        """
+        from aviation_edge_analytics import RouteMatrix
+        
+        airline = airline.upper() if airline else None
+        return self._cached_analytics(('routes', airline),
+                                      lambda conn: RouteMatrix.from_database(conn, airline))
+    
+    def get_bank_histograms(self, airport: str, airline: str = None, resolution: int = 60) -> Dict:
+        """
+        Departure and arrival banks at an airport, cached per database generation
+        
+        Args:
+            airport: Airport IATA code
+            airline: Only flights operated by this airline
+            resolution: Slot size in minutes, 60 (7x24) or 15 (7x96)
+            
+        Returns:
+            Dict with 'departures' and 'arrivals' NumPy arrays of 7 weekdays x time slots
+        """
+        from aviation_edge_analytics import bank_histograms
+        
+        airport, airline = airport.upper(), airline.upper() if airline else None
+        return self._cached_analytics(('banks', airport, airline, resolution),
+                                      lambda conn: bank_histograms(conn, airport, airline, resolution))
+    
+    def get_rotations(self, airline: str, min_turn: int = 30, max_turn: int = 360) -> Dict:
+        """
+        Inferred aircraft rotations and turnaround distributions for a whole airline
+        
+        Every arrival is chained to the next feasible departure of the same aircraft type
+        at the same airport in one sweep (see aviation_edge_rotations.py), instead of
+        comparing hand-picked flight pairs. Cached per database generation.
+        
+        Args:
+            airline: Operating airline IATA code
+            min_turn: Minimum ground time in minutes
+            max_turn: Maximum ground time in minutes
+            
+        Returns:
+            Dict with 'legs', 'rotations', 'links' and 'turnarounds'
+        """
+        from aviation_edge_rotations import infer_rotations
+        
+        airline = airline.upper()
+        return self._cached_analytics(('rotations', airline, min_turn, max_turn),
+                                      lambda conn: infer_rotations(conn, airline, min_turn, max_turn))
+    
+    def get_changes(self, since: str, airline: str = None, origin: str = None,
+                    destination: str = None, limit: int = None) -> List[Dict]:
+        """
+        Schedule changes recorded by collection runs since a point in time
+        
+        Answered from the append-only flight_changes log written by the collectors
+        (see aviation_edge_history.py), so no snapshots are compared. Always reads the
+        main database, which is the only one collectors write to.
+        
+        Args:
+            since: Date, timestamp or age ('7d', '12h'), see parse_since()
+            airline: Only flights of this marketing or operating airline
+            origin: Only flights departing this airport
+            destination: Only flights arriving at this airport
+            limit: Maximum number of changes
+            
+        Returns:
+            List of changes, newest collection run first (field '' = added flight)
+        """
+        from aviation_edge_history import changes_since
+        
+        with self._connection() as conn:
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'flight_changes'").fetchone():
+                raise ValueError("No change history yet (it is recorded from the next collection on)")
+            return changes_since(conn, parse_since(since), airline, origin, destination, limit)
+    
     def get_airline_summary(self, airline: str) -> Dict:
         """Get summary of all flights for a specific airline"""
         flights = self.search_route(airline=airline)
@@ -373,8 +1122,8 @@ class FlightSearchSystem:
             "routes_list": sorted(routes)[:20]  # Top 20 routes
         }
 
-def main():
-    """Command line interface for flight search system"""
+def build_parser() -> argparse.ArgumentParser:
+    """Command line options, shared by the CLI and the interactive session"""
     parser = argparse.ArgumentParser(description='Aviation Edge Flight Search System')
     parser.add_argument('--origin', '-o', help='Origin airport IATA code (e.g., MNL)')
     parser.add_argument('--destination', '-d', help='Destination airport IATA code (e.g., POM)')
@@ -386,67 +1135,378 @@ def main():
                        help='Analyze flight pair (e.g., 215 216)')
     parser.add_argument('--airline-summary', '-s', help='Show airline summary')
     parser.add_argument('--limit', '-l', type=int, help='Limit number of results')
+    parser.add_argument('--sort', choices=['flight', 'departure'], default='flight',
+                       help='Order results by flight number or by departure time')
+    parser.add_argument('--collapse-codeshares', '-c', action='store_true',
+                       help='One row per operating flight with its marketing numbers (also resolves marketing numbers)')
+    parser.add_argument('--block-times', '-b', action='store_true',
+                       help='Show scheduled block time per route (filters: origin, destination, airline)')
+    parser.add_argument('--network-report', action='store_true',
+                       help='Whole-network report: busiest routes, hubs, reachability, airline share')
+    parser.add_argument('--max-stops', type=int, default=1,
+                       help='Connections allowed for reachability in --network-report (default: 1)')
+    parser.add_argument('--banks', action='store_true',
+                       help='Arrival and departure banks per weekday and time of day (requires origin)')
+    parser.add_argument('--resolution', type=int, choices=[60, 15], default=60,
+                       help='Bank slot size in minutes (default: 60)')
+    parser.add_argument('--rotations', action='store_true',
+                       help='Infer aircraft rotations and turnaround times (requires airline)')
+    parser.add_argument('--min-turn', type=int, default=30, help='Minimum turnaround in minutes (default: 30)')
+    parser.add_argument('--max-turn', type=int, default=360, help='Maximum turnaround in minutes (default: 360)')
+    parser.add_argument('--weekday', '-w', help='Departures on a weekday (1-7 or Mon-Sun, requires origin)')
+    parser.add_argument('--window', help='Departure time window HH:MM-HH:MM (requires origin)')
+    parser.add_argument('--next', '-n', type=int, metavar='N', help='Next N departures from origin')
+    parser.add_argument('--after', help='Start time for --next, "YYYY-MM-DD HH:MM" (default: now)')
+    parser.add_argument('--date', help='Departure board for a calendar date YYYY-MM-DD (requires origin)')
+    parser.add_argument('--daily-counts', action='store_true',
+                       help='Flights per calendar date over the horizon (requires origin)')
+    parser.add_argument('--changes-since', metavar='WHEN',
+                       help='Schedule changes since a date or age, e.g. 2025-10-01 or 7d (filters: airline, origin, destination)')
+    parser.add_argument('--routes-file', metavar='FILE',
+                       help='Summarise every ORIGIN DESTINATION pair listed in FILE with one bulk query')
+    parser.add_argument('--find', help='Free-text search of airline names, aircraft and flight numbers')
+    parser.add_argument('--complete', help='Autocomplete airline, aircraft and flight number prefixes')
+    parser.add_argument('--interactive', '-i', action='store_true',
+                       help='Interactive session keeping the database connection and caches warm')
+    parser.add_argument('--sharded', action='store_true',
+                       help='Search the shard files instead of the main database')
+    parser.add_argument('--shard-layout', choices=['airport', 'month'],
+                       help='Shard layout to search (default: SHARD_LAYOUT or airport)')
+    parser.add_argument('--parallel', action='store_true',
+                       help='Query relevant shards in parallel threads (with --sharded)')
+    return parser
+
+def run_command(searcher: FlightSearchSystem, args: argparse.Namespace):
+    """Answer one parsed command line"""
+    if args.route_summary:
+        if not args.origin or not args.destination:
+            print("Error: Route summary requires both --origin and --destination")
+            return
+        
+        summary = searcher.get_route_summary(args.origin, args.destination)
+        print(f"\nRoute Summary: {summary['route']}")
+        print(f"Unique flights: {summary['unique_flights']}")
+        print(f"Airlines: {', '.join(summary['airlines'])}")
+        print(f"Aircraft types: {', '.join(summary['aircraft_types'])}")
+        
+    elif args.flight_pair:
+        airline = args.airline or input("Enter airline code (e.g., PR): ").strip()
+        analysis = searcher.search_flight_pair(args.flight_pair[0], args.flight_pair[1], airline)
+        
+        print(f"\nFlight Pair Analysis: {args.flight_pair[0]} & {args.flight_pair[1]}")
+        print(f"Relationship: {analysis['relationship']}")
+        
+        if analysis['flight1']['data']:
+            f1 = analysis['flight1']['data']
+            print(f"{args.flight_pair[0]}: {f1['route']} - {f1['schedule']} - Weekdays: {f1['weekdays']}")
+        
+        if analysis['flight2']['data']:
+            f2 = analysis['flight2']['data']
+            print(f"{args.flight_pair[1]}: {f2['route']} - {f2['schedule']} - Weekdays: {f2['weekdays']}")
+        
+        if 'turnaround_time' in analysis:
+            print(f"Turnaround time: {analysis['turnaround_time']}")
+            
+    elif args.changes_since:
+        changes = searcher.get_changes(args.changes_since, args.airline, args.origin, args.destination, args.limit)
+        flights = len({change['flight_id'] for change in changes})
+        print(f"\nSchedule changes since {args.changes_since}: {len(changes)} changes on {flights} flights")
+        for run_id, run_changes in groupby(changes, key=lambda change: change['run_id']):
+            run_changes = list(run_changes)
+            print(f"\n{run_changes[0]['started_at'][:16]}  {run_changes[0]['run']}")
+            for change in run_changes:
+                flight = f"{change['flight']:<8} {change['route']} {change['dep_time']}"
+                if change['field']:
+                    print(f"  {flight}  {change['field']}: {change['old_value']} → {change['new_value']}")
+                else:
+                    print(f"  {flight}  added")
+        
+    elif args.routes_file:
+        with open(args.routes_file, encoding='utf-8') as handle:
+            pairs = parse_route_pairs(handle)
+        print(f"\nRoute Report ({len(pairs)} pairs)")
+        for (origin, destination), flights in searcher.search_routes_bulk(pairs, args.airline, args.sort):
+            airlines = sorted({flight['airline_iata_code'] for flight in flights})
+            unique_flights = len({flight['flight_iata_number'] for flight in flights})
+            print(f"{origin}→{destination:<5} {unique_flights:>4} flights  {','.join(airlines) or '-'}")
+        
+    elif args.find:
+        flights = searcher.search_text(args.find, args.origin, args.destination, args.limit)
+        searcher.display_flight_table(flights, f"Flights matching \"{args.find}\"", keep_order=True)
+        
+    elif args.complete:
+        completions = searcher.autocomplete(args.complete, args.limit or 10)
+        print(f"\nCompletions for \"{args.complete}\"")
+        for kind, value, flights in completions:
+            print(f"{kind:<9} {value:<40} {flights:>6} flights")
+        if not completions:
+            print("No matches")
+        
+    elif args.date or args.daily_counts:
+        if not args.origin:
+            print("Error: Calendar queries require --origin")
+            return
+        
+        if args.daily_counts:
+            counts = searcher.daily_flight_counts(args.origin)
+            print(f"\nDaily departures from {args.origin.upper()} ({counts[0][0]} → {counts[-1][0]})")
+            for day, flights in counts:
+                print(f"{day} {DAY_NAMES[date.fromisoformat(day).isoweekday()]}  {flights:>5}")
+        else:
+            flights = searcher.departure_board(args.origin, args.date, destination=args.destination,
+                                               airline=args.airline, limit=args.limit)
+            searcher.display_departures(flights, f"Departures from {args.origin.upper()} on {args.date}")
+        
+    elif args.next or args.weekday or args.window:
+        if not args.origin:
+            print("Error: Departure queries require --origin")
+            return
+        
+        if args.next:
+            after = datetime.strptime(args.after, '%Y-%m-%d %H:%M') if args.after else None
+            flights = searcher.next_departures(args.origin, args.next, after,
+                                               destination=args.destination, airline=args.airline)
+            title = f"Next {args.next} departures from {args.origin.upper()}"
+        else:
+            flights = searcher.search_departures(args.origin, args.weekday, args.window,
+                                                 destination=args.destination, airline=args.airline,
+                                                 limit=args.limit)
+            title = f"Departures from {args.origin.upper()}"
+            if args.weekday:
+                title += f" on {DAY_NAMES[parse_weekday(args.weekday)]}"
+            if args.window:
+                title += f" {args.window}"
+        searcher.display_departures(flights, title)
+        
+    elif args.block_times:
+        stats = searcher.get_block_time_stats(args.origin, args.destination, args.airline)
+        print(f"\nBlock Times ({len(stats)} routes)")
+        for route in stats[:args.limit or len(stats)]:
+            print(f"{route['route']:<9} {route['flights']:>5} flights  "
+                  f"min {format_minutes(route['min_minutes'])}  avg {format_minutes(route['avg_minutes'])}  "
+                  f"max {format_minutes(route['max_minutes'])}")
+        
+    elif args.banks:
+        if not args.origin:
+            print("Error: Bank histograms require --origin")
+            return
+        
+        banks = searcher.get_bank_histograms(args.origin, args.airline, args.resolution)
+        days = ' '.join(f"{DAY_NAMES[day]:>4}" for day in DAY_NAMES)
+        title = f"Banks at {args.origin.upper()}{' (' + args.airline.upper() + ')' if args.airline else ''}"
+        print(f"\n{title}")
+        print("=" * len(title))
+        print(f"{'Slot':<6} │ Departures{' ' * 25}│ Arrivals")
+        print(f"{'':<6} │ {days} │ {days}")
+        for slot in range(banks['departures'].shape[1]):
+            departures, arrivals = banks['departures'][:, slot], banks['arrivals'][:, slot]
+            if departures.any() or arrivals.any():
+                start = slot * args.resolution
+                print(f"{start // 60:02d}:{start % 60:02d}  │ {' '.join(f'{n:>4}' for n in departures)} │ "
+                      f"{' '.join(f'{n:>4}' for n in arrivals)}")
+        print(f"\nWeekly totals: {int(banks['departures'].sum())} departures, "
+              f"{int(banks['arrivals'].sum())} arrivals")
+        
+    elif args.rotations:
+        if not args.airline:
+            print("Error: Rotation inference requires --airline")
+            return
+        
+        result = searcher.get_rotations(args.airline, args.min_turn, args.max_turn)
+        limit = args.limit or 10
+        title = f"Rotations: {args.airline.upper()} (turns {args.min_turn}-{args.max_turn} min)"
+        print(f"\n{title}")
+        print("=" * len(title))
+        cyclic = sum(rotation['cyclic'] for rotation in result['rotations'])
+        print(f"{result['legs']:,} weekly legs, {len(result['links']):,} turnarounds, "
+              f"{len(result['rotations']):,} rotations ({cyclic} closed weekly loops)")
+        
+        print("\nTurnarounds (airport, aircraft: count, min / median / p90 / max)")
+        for turns in result['turnarounds'][:limit]:
+            print(f"  {turns['airport']:<4} {turns['aircraft'][:11]:<11} {turns['count']:>5}  "
+                  f"{format_minutes(turns['min'])} / {format_minutes(int(turns['median']))} / "
+                  f"{format_minutes(int(turns['p90']))} / {format_minutes(turns['max'])}")
+        
+        print(f"\nLongest rotations")
+        for rotation in result['rotations'][:limit]:
+            legs = rotation['legs']
+            loop = ' (loop)' if rotation['cyclic'] else ''
+            print(f"  {rotation['aircraft']}: {len(legs)} legs from {format_week_minutes(legs[0]['dep_time'])}{loop}")
+            print("    " + ' → '.join([legs[0]['dep']] + [f"{leg['flight']} {leg['arr']}" for leg in legs[:8]])
+                  + (' …' if len(legs) > 8 else ''))
+        
+    elif args.network_report:
+        matrix = searcher.route_matrix(args.airline)
+        limit = args.limit or 20
+        if args.origin:
+            reach = matrix.stops_from(args.origin, args.max_stops)
+            print(f"\nReachable from {args.origin.upper()} within {args.max_stops} stops: {len(reach)} airports")
+            for stops in range(args.max_stops + 1):
+                airports = sorted(code for code, count in reach.items() if count == stops)
+                print(f"  {stops} stops ({len(airports)}): {', '.join(airports)}")
+            print(f"\nAirline share of {args.origin.upper()} departures")
+            for airline, weekly, share in matrix.airline_shares(args.origin, args.destination)[:limit]:
+                print(f"  {airline:<3} {weekly:>6}/week {share:>6.1%}")
+            return
+        
+        report = matrix.network_report(limit, args.max_stops)
+        title = f"Network Report{' (' + args.airline.upper() + ')' if args.airline else ''}"
+        print(f"\n{title}")
+        print("=" * len(title))
+        print(f"{report['airports']:,} airports, {report['routes']:,} routes, "
+              f"{report['weekly_departures']:,} weekly departures")
+        print(f"\nBusiest routes (departures per week)")
+        for origin, destination, weekly in report['top_routes']:
+            print(f"  {origin}→{destination:<5} {weekly:>6}")
+        print(f"\nHubs (destinations / origins / weekly departures)")
+        for hub in report['hubs']:
+            print(f"  {hub['airport']:<4} {hub['destinations']:>4} {hub['origins']:>4} {hub['departures']:>7}")
+        print(f"\nAirports reachable within {args.max_stops} stops")
+        for airport, count in report['reachability']:
+            print(f"  {airport:<4} {count:>5}")
+        print(f"\nAirline share of weekly departures")
+        for airline, weekly, share in report['airline_shares']:
+            print(f"  {airline:<3} {weekly:>7} {share:>6.1%}")
+        
+    elif args.airline_summary:
+        summary = searcher.get_airline_summary(args.airline_summary)
+        print(f"\nAirline Summary: {summary['airline']}")
+        print(f"Total flights: {summary['total_flights']}")
+        print(f"Unique routes: {summary['unique_routes']}")
+        print(f"Destinations served: {summary['destinations']}")
+        print(f"Aircraft types: {summary['aircraft_types']}")
+        print(f"Top routes: {', '.join(summary['routes_list'][:10])}")
+        
+    else:
+        # Regular search
+        flights = searcher.search_route(
+            origin=args.origin,
+            destination=args.destination,
+            airline=args.airline,
+            flight_number=args.flight,
+            limit=args.limit,
+            sort=args.sort,
+            collapse_codeshares=args.collapse_codeshares
+        )
+        
+        title = "Flight Search Results"
+        if args.origin and args.destination:
+            title = f"Flights: {args.origin} → {args.destination}"
+        elif args.airline:
+            title = f"{args.airline} Flights"
+        
+        searcher.display_flight_table(flights, title, keep_order=args.sort == 'departure')
+
+class FlightSearchShell(cmd.Cmd):
+    """
+    Interactive session keeping one FlightSearchSystem (connection, caches) warm
+    
+    Verbs mirror the CLI: search, route-summary, flight-pair and airline-summary. Any
+    line of CLI options (e.g. "--origin MNL --next 5") also works. Every command
+    reports its elapsed time.
+    """
+    intro = "✈️  Flight Search interactive session (help for commands, quit to exit)"
+    prompt = "flights> "
+    
+    def __init__(self, searcher: FlightSearchSystem, parser: argparse.ArgumentParser):
+        super().__init__()
+        self.searcher = searcher
+        self.parser = parser
+    
+    def precmd(self, line: str) -> str:
+        # Hyphenated verbs as on the command line: route-summary -> route_summary
+        verb, _, rest = line.strip().partition(' ')
+        if verb == 'help':
+            rest = rest.replace('-', '_')
+        elif not verb.startswith('-'):
+            verb = verb.replace('-', '_')
+        return f"{verb} {rest}".strip()
+    
+    def _run(self, argv: List[str]):
+        """Parse CLI options and answer them, printing the elapsed time"""
+        try:
+            args = self.parser.parse_args(argv)
+        except SystemExit:
+            return  # argparse has printed the usage error
+        started = time.perf_counter()
+        try:
+            run_command(self.searcher, args)
+        except Exception as e:
+            print(f"Error: {e}")
+        print(f"⏱️  {(time.perf_counter() - started) * 1000:.1f} ms")
+    
+    def _words(self, arg: str, count: int, usage: str) -> Optional[List[str]]:
+        """Exactly `count` arguments, or None after printing the usage line"""
+        words = shlex.split(arg)
+        if len(words) != count:
+            print(f"Usage: {usage}")
+            return None
+        return words
+    
+    def do_search(self, arg: str):
+        """search [-o MNL] [-d POM] [-a PR] [-f 215] [-l N] [--sort departure]"""
+        self._run(shlex.split(arg))
+    
+    def do_route_summary(self, arg: str):
+        """route-summary ORIGIN DESTINATION"""
+        words = self._words(arg, 2, self.do_route_summary.__doc__)
+        if words:
+            self._run(['--route-summary', '--origin', words[0], '--destination', words[1]])
+    
+    def do_flight_pair(self, arg: str):
+        """flight-pair FLIGHT1 FLIGHT2 AIRLINE"""
+        words = self._words(arg, 3, self.do_flight_pair.__doc__)
+        if words:
+            self._run(['--flight-pair', words[0], words[1], '--airline', words[2]])
+    
+    def do_airline_summary(self, arg: str):
+        """airline-summary AIRLINE"""
+        words = self._words(arg, 1, self.do_airline_summary.__doc__)
+        if words:
+            self._run(['--airline-summary', words[0]])
+    
+    def do_reload(self, arg: str):
+        """reload: re-read flight count, schema features and dimension caches (after a collection)"""
+        started = time.perf_counter()
+        self.searcher._verify_database()
+        print(f"⏱️  {(time.perf_counter() - started) * 1000:.1f} ms")
+    
+    def do_quit(self, arg: str) -> bool:
+        """quit: end the session"""
+        return True
     
+    do_exit = do_quit
+    
+    def do_EOF(self, arg: str) -> bool:
+        print()
+        return True
+    
+    def default(self, line: str):
+        if line.startswith('-'):
+            self._run(shlex.split(line))
+        else:
+            print(f"Unknown command: {line.split()[0]} (type help)")
+    
+    def emptyline(self):
+        pass
+
+def main():
+    """Command line interface for flight search system"""
+    parser = build_parser()
     args = parser.parse_args()
+    configure_logging()
     
     try:
-        searcher = FlightSearchSystem()
+        searcher = FlightSearchSystem(sharded=args.sharded, shard_layout=args.shard_layout,
+                                      parallel=args.parallel, keep_connection=args.interactive)
         
-        if args.route_summary:
-            if not args.origin or not args.destination:
-                print("Error: Route summary requires both --origin and --destination")
-                return
-            
-            summary = searcher.get_route_summary(args.origin, args.destination)
-            print(f"\nRoute Summary: {summary['route']}")
-            print(f"Unique flights: {summary['unique_flights']}")
-            print(f"Airlines: {', '.join(summary['airlines'])}")
-            print(f"Aircraft types: {', '.join(summary['aircraft_types'])}")
-            
-        elif args.flight_pair:
-            airline = args.airline or input("Enter airline code (e.g., PR): ").strip()
-            analysis = searcher.search_flight_pair(args.flight_pair[0], args.flight_pair[1], airline)
-            
-            print(f"\nFlight Pair Analysis: {args.flight_pair[0]} & {args.flight_pair[1]}")
-            print(f"Relationship: {analysis['relationship']}")
-            
-            if analysis['flight1']['data']:
-                f1 = analysis['flight1']['data']
-                print(f"{args.flight_pair[0]}: {f1['route']} - {f1['schedule']} - Weekdays: {f1['weekdays']}")
-            
-            if analysis['flight2']['data']:
-                f2 = analysis['flight2']['data']
-                print(f"{args.flight_pair[1]}: {f2['route']} - {f2['schedule']} - Weekdays: {f2['weekdays']}")
-            
-            if 'turnaround_time' in analysis:
-                print(f"Turnaround time: {analysis['turnaround_time']}")
-                
-        elif args.airline_summary:
-            summary = searcher.get_airline_summary(args.airline_summary)
-            print(f"\nAirline Summary: {summary['airline']}")
-            print(f"Total flights: {summary['total_flights']}")
-            print(f"Unique routes: {summary['unique_routes']}")
-            print(f"Destinations served: {summary['destinations']}")
-            print(f"Aircraft types: {summary['aircraft_types']}")
-            print(f"Top routes: {', '.join(summary['routes_list'][:10])}")
-            
+        if args.interactive:
+            try:
+                FlightSearchShell(searcher, parser).cmdloop()
+            finally:
+                searcher.close()
         else:
-            # Regular search
-            flights = searcher.search_route(
-                origin=args.origin,
-                destination=args.destination,
-                airline=args.airline,
-                flight_number=args.flight,
-                limit=args.limit
-            )
-            
-            title = "Flight Search Results"
-            if args.origin and args.destination:
-                title = f"Flights: {args.origin} → {args.destination}"
-            elif args.airline:
-                title = f"{args.airline} Flights"
-            
-            searcher.display_flight_table(flights, title)
+            run_command(searcher, args)
             
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,262 @@
+"""
+Aviation Edge Network Analytics
+Airport x airport weekly-frequency matrix built from the consolidated schedule
+Vectorised top routes, hub degree, k-stop reachability and airline share
+Arrival/departure bank histograms per weekday and time of day
+"""
+
+import sqlite3
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from aviation_edge_logging import get_logger
+from aviation_edge_storage import read_frame
+
+logger = get_logger('analytics')
+
+# Weekly departures per route and operating airline. A departure is one physical flight
+# (codeshare group) at one scheduled time on one weekday, so codeshares and the
+# departure/arrival perspective rows of the same flight are counted once. Grouped
+# columns only (MIN() of the per-id code), so DuckDB runs the same text.
+_WEEKLY_FREQUENCY_SQL = """
+    SELECT MIN(f.dep_iata_code) AS dep, MIN(f.arr_iata_code) AS arr,
+           COALESCE(NULLIF(f.operating_airline_iata, ''), f.airline_iata_code) AS airline,
+           COUNT(DISTINCT COALESCE(f.codeshare_group_id, f.airline_iata_code || f.flight_iata_number)
+                          || ' ' || f.dep_scheduled_time || ' ' || w.weekday) AS weekly
+    FROM flight_weekdays w JOIN flights f ON f.id = w.flight_id
+    {where}
+    GROUP BY f.dep_airport_id, f.arr_airport_id, airline
+"""
+
+
+# Bank histogram slot sizes in minutes: hourly (7x24) or quarter-hourly (7x96)
+BANK_RESOLUTIONS = (60, 15)
+
+# Scheduled movements at an airport, one per physical flight, weekday and time
+_BANK_MOVEMENTS_SQL = """
+    SELECT DISTINCT COALESCE(f.codeshare_group_id, f.airline_iata_code || f.flight_iata_number) AS flight,
+           w.weekday, w.dep_minutes, w.arr_minutes
+    FROM flight_weekdays w JOIN flights f ON f.id = w.flight_id
+    WHERE w.{side}_airport_id = (SELECT id FROM dim_airports WHERE iata_code = ?) {airline}
+"""
+
+
+def database_generation(conn: sqlite3.Connection) -> Tuple:
+    """
+    Signature that changes whenever flights are inserted, merged or deleted
+
+    Cached analytics are keyed on it, so they are recomputed only after the data changed.
+    """
+    return tuple(conn.execute("SELECT COUNT(*), MAX(id), MAX(updated_at) FROM flights").fetchone())
+
+
+def bank_histograms(conn: sqlite3.Connection, airport: str, airline: str = None,
+                    resolution: int = 60) -> Dict[str, np.ndarray]:
+    """
+    Departure and arrival banks at an airport by weekday and time of day
+
+    Movements come from the flight_weekdays index, one per physical flight (codeshare
+    group), weekday and scheduled time. Arrivals that land after midnight are counted
+    on the following weekday.
+
+    Args:
+        conn: SQLite or DuckDB connection to the flights database (see aviation_edge_storage.py)
+        airport (str): Airport IATA code
+        airline (str): Only flights operated by this airline
+        resolution (int): Slot size in minutes, 60 (7x24) or 15 (7x96)
+
+    Returns:
+        Dict[str, np.ndarray]: 'departures' and 'arrivals', each 7 x slots (row 0 = Monday)
+    """
+    if resolution not in BANK_RESOLUTIONS:
+        raise ValueError(f"Resolution must be one of {BANK_RESOLUTIONS} minutes")
+    airline_filter, params = '', [airport.upper()]
+    if airline:
+        airline_filter = "AND COALESCE(NULLIF(f.operating_airline_iata, ''), f.airline_iata_code) = ?"
+        params.append(airline.upper())
+
+    histograms = {}
+    for name, side in (('departures', 'dep'), ('arrivals', 'arr')):
+        movements = read_frame(conn, _BANK_MOVEMENTS_SQL.format(side=side, airline=airline_filter), params)
+        movements = movements.dropna(subset=[f'{side}_minutes'])
+        day = movements['weekday'].to_numpy(dtype=np.int64) - 1
+        minutes = movements[f'{side}_minutes'].to_numpy(dtype=np.int64)
+        if side == 'arr':
+            # Weekdays are departure days; overnight flights arrive the next day
+            overnight = (movements['arr_minutes'] < movements['dep_minutes']).to_numpy()
+            day = (day + overnight) % 7
+        histogram = np.zeros((7, 24 * 60 // resolution), dtype=np.int64)
+        np.add.at(histogram, (day, minutes // resolution), 1)
+        histograms[name] = histogram
+    return histograms
+
+
+class RouteMatrix:
+    """
+    Weekly departures between every pair of airports as a dense NumPy matrix
+
+    frequency[i, j] counts scheduled departures per week from airports[i] to
+    airports[j] (index[code] gives i). The per-airline breakdown is kept sparse as
+    parallel arrays (one entry per route and airline), which is all airline share needs.
+    """
+
+    def __init__(self, routes: pd.DataFrame):
+        """
+        Args:
+            routes (pd.DataFrame): Columns dep, arr, airline, weekly (one row per route and airline)
+        """
+        codes, positions = pd.factorize(pd.concat([routes['dep'], routes['arr']], ignore_index=True),
+                                        sort=True)
+        self.airports: List[str] = list(positions)
+        self.index: Dict[str, int] = {code: i for i, code in enumerate(self.airports)}
+        self.route_dep = codes[:len(routes)]
+        self.route_arr = codes[len(routes):]
+        airline_codes, airlines = pd.factorize(routes['airline'], sort=True)
+        self.airlines: List[str] = list(airlines)
+        self.route_airline = airline_codes
+        self.route_weekly = routes['weekly'].to_numpy(dtype=np.int64)
+
+        size = len(self.airports)
+        self.frequency = np.zeros((size, size), dtype=np.int64)
+        np.add.at(self.frequency, (self.route_dep, self.route_arr), self.route_weekly)
+        self.adjacency = self.frequency > 0
+
+    @classmethod
+    def from_database(cls, conn: sqlite3.Connection, airline: str = None) -> 'RouteMatrix':
+        """
+        Load the weekly-frequency matrix from the flight_weekdays index
+
+        Args:
+            conn: SQLite or DuckDB connection to the flights database (see aviation_edge_storage.py)
+            airline (str): Only flights operated by this airline
+
+        Returns:
+            RouteMatrix: The network (empty when no flights match)
+        """
+        where, params = '', []
+        if airline:
+            where = "WHERE COALESCE(NULLIF(f.operating_airline_iata, ''), f.airline_iata_code) = ?"
+            params.append(airline.upper())
+        routes = read_frame(conn, _WEEKLY_FREQUENCY_SQL.format(where=where), params)
+        matrix = cls(routes)
+        logger.info(f"🕸️  Route matrix: {len(matrix.airports):,} airports, "
+                    f"{int(matrix.adjacency.sum()):,} routes, {int(matrix.frequency.sum()):,} weekly departures")
+        return matrix
+
+    def top_routes(self, limit: int = 20) -> List[Tuple[str, str, int]]:
+        """Busiest routes as (origin, destination, weekly departures), busiest first"""
+        flat = self.frequency.ravel()
+        limit = min(limit, int(np.count_nonzero(flat)))
+        if limit == 0:
+            return []
+        top = np.argpartition(flat, -limit)[-limit:]
+        top = top[np.lexsort((top, -flat[top]))]
+        size = len(self.airports)
+        return [(self.airports[i // size], self.airports[i % size], int(flat[i])) for i in top]
+
+    def hub_degrees(self, limit: int = None) -> List[Dict]:
+        """
+        Connectivity per airport, best connected first
+
+        Returns:
+            List[Dict]: airport, destinations (out-degree), origins (in-degree),
+                departures and arrivals per week
+        """
+        destinations = self.adjacency.sum(axis=1)
+        origins = self.adjacency.sum(axis=0)
+        departures = self.frequency.sum(axis=1)
+        arrivals = self.frequency.sum(axis=0)
+        order = np.lexsort((-departures, -destinations))[:limit]
+        return [{'airport': self.airports[i], 'destinations': int(destinations[i]), 'origins': int(origins[i]),
+                 'departures': int(departures[i]), 'arrivals': int(arrivals[i])} for i in order]
+
+    def stops_from(self, origin: str, max_stops: int = 1) -> Dict[str, int]:
+        """
+        Airports reachable from an origin with at most max_stops connections
+
+        A breadth-first search over the boolean adjacency matrix, one vectorised step
+        per additional leg. Schedules and connection times are not considered.
+
+        Returns:
+            Dict[str, int]: Airport code -> fewest stops (0 = nonstop), origin excluded
+        """
+        start = self.index.get(origin.upper())
+        if start is None:
+            return {}
+        stops = np.full(len(self.airports), -1)
+        stops[start] = -2  # Never reported as a destination
+        frontier = np.zeros(len(self.airports), dtype=bool)
+        frontier[start] = True
+        for leg in range(max_stops + 1):
+            reached = self.adjacency[frontier].any(axis=0) & (stops == -1)
+            stops[reached] = leg
+            frontier = reached
+            if not frontier.any():
+                break
+        return {self.airports[i]: int(stops[i]) for i in np.flatnonzero(stops >= 0)}
+
+    def reachable_counts(self, max_stops: int = 1) -> np.ndarray:
+        """
+        Number of airports each airport reaches within max_stops connections
+
+        Uses repeated boolean matrix products over the whole network at once.
+
+        Returns:
+            np.ndarray: Count per airport, aligned with self.airports
+        """
+        adjacency = self.adjacency.astype(np.float32)
+        reach = self.adjacency.copy()
+        legs = self.adjacency
+        for _ in range(max_stops):
+            legs = (legs.astype(np.float32) @ adjacency) > 0
+            reach |= legs
+        np.fill_diagonal(reach, False)
+        return reach.sum(axis=1)
+
+    def airline_shares(self, origin: str = None, destination: str = None) -> List[Tuple[str, int, float]]:
+        """
+        Weekly departures and share per operating airline, largest first
+
+        Args:
+            origin (str): Restrict to routes from this airport
+            destination (str): Restrict to routes to this airport
+
+        Returns:
+            List[Tuple]: (airline, weekly departures, share 0-1)
+        """
+        mask = np.ones(len(self.route_weekly), dtype=bool)
+        for code, positions in ((origin, self.route_dep), (destination, self.route_arr)):
+            if code:
+                mask &= positions == self.index.get(code.upper(), -1)
+        weekly = np.bincount(self.route_airline[mask], weights=self.route_weekly[mask],
+                             minlength=len(self.airlines))
+        total = weekly.sum()
+        if total == 0:
+            return []
+        order = np.argsort(-weekly, kind='stable')
+        return [(self.airlines[i], int(weekly[i]), float(weekly[i] / total)) for i in order if weekly[i] > 0]
+
+    def network_report(self, limit: int = 20, max_stops: int = 1) -> Dict:
+        """
+        Whole-network summary: size, busiest routes, hubs, reachability and airline share
+
+        Args:
+            limit (int): Entries per ranking
+            max_stops (int): Connections allowed for the reachability ranking
+
+        Returns:
+            Dict: airports, routes, weekly_departures, top_routes, hubs, reachability, airline_shares
+        """
+        reach = self.reachable_counts(max_stops)
+        order = np.lexsort((np.arange(len(reach)), -reach))[:limit]
+        return {
+            'airports': len(self.airports),
+            'routes': int(self.adjacency.sum()),
+            'weekly_departures': int(self.frequency.sum()),
+            'top_routes': self.top_routes(limit),
+            'hubs': self.hub_degrees(limit),
+            'reachability': [(self.airports[i], int(reach[i])) for i in order],
+            'airline_shares': self.airline_shares()[:limit],
+        }
@@ -0,0 +1,226 @@
+"""
+Aviation Edge Flight Calendar
+Dated flight instances expanded from the weekly patterns for a rolling horizon
+Date-specific departure boards and per-day counts become indexed range scans
+"""
+
+import argparse
+import os
+import sqlite3
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+
+from aviation_edge_db import AviationEdgeDB, default_db_path
+from aviation_edge_logging import configure_logging, get_logger
+
+logger = get_logger('calendar')
+
+CALENDAR_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS flight_instances (
+        flight_id INTEGER NOT NULL,
+        service_date TEXT NOT NULL,
+        dep_airport_id INTEGER,
+        dep_minutes INTEGER,
+        arr_airport_id INTEGER,
+        arr_minutes INTEGER,
+        PRIMARY KEY (flight_id, service_date)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_flight_instances_dep
+        ON flight_instances (dep_airport_id, service_date, dep_minutes);
+    CREATE INDEX IF NOT EXISTS idx_flight_instances_arr
+        ON flight_instances (arr_airport_id, service_date, arr_minutes);
+    CREATE INDEX IF NOT EXISTS idx_flight_instances_date
+        ON flight_instances (service_date);
+
+    CREATE TABLE IF NOT EXISTS calendar_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        horizon_start TEXT NOT NULL,
+        horizon_end TEXT NOT NULL,
+        patterns_as_of TEXT,
+        built_at TEXT NOT NULL
+    );
+
+    -- Finds flights whose weekly pattern changed since the last build
+    CREATE INDEX IF NOT EXISTS idx_flights_updated_at ON flights (updated_at);
+
+    CREATE TRIGGER IF NOT EXISTS trg_flight_instances_delete AFTER DELETE ON flights
+    BEGIN
+        DELETE FROM flight_instances WHERE flight_id = OLD.id;
+    END;
+"""
+
+# Every date of a range joined to the flights operating on its ISO weekday (Monday = 1).
+# The CTE sits inside the INSERT so sqlite3 reports the inserted rowcount.
+_EXPAND_SQL = """
+    INSERT OR REPLACE INTO flight_instances
+    WITH RECURSIVE dates(service_date) AS (
+        SELECT :first
+        UNION ALL
+        SELECT date(service_date, '+1 day') FROM dates WHERE service_date < :last
+    )
+    SELECT w.flight_id, d.service_date, w.dep_airport_id, w.dep_minutes, w.arr_airport_id, w.arr_minutes
+    FROM dates d
+    JOIN flight_weekdays w ON w.weekday = (CAST(strftime('%w', d.service_date) AS INTEGER) + 6) % 7 + 1
+"""
+
+
+def default_horizon_days() -> int:
+    """Days materialised from the horizon start (CALENDAR_HORIZON_DAYS, default 60)"""
+    return int(os.getenv('CALENDAR_HORIZON_DAYS', '60'))
+
+
+def ensure_calendar_schema(conn: sqlite3.Connection):
+    """Create the flight_instances table, its state row table and delete trigger"""
+    conn.executescript(CALENDAR_SCHEMA)
+
+
+def _patterns_as_of(conn: sqlite3.Connection) -> Optional[str]:
+    """Latest pattern change stored in flights (new rows carry updated_at = created_at)"""
+    return conn.execute("SELECT MAX(updated_at) FROM flights").fetchone()[0]
+
+
+def calendar_is_stale(conn: sqlite3.Connection, start: date = None) -> bool:
+    """True if patterns changed or the horizon no longer starts at `start` (default today)"""
+    start = (start or date.today()).isoformat()
+    try:
+        state = conn.execute("SELECT horizon_start, patterns_as_of FROM calendar_state WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return True
+    return state is None or state[0] != start or (state[1] or '') < (_patterns_as_of(conn) or '')
+
+
+def refresh_calendar(conn: sqlite3.Connection, horizon_days: int = None, start: date = None) -> Dict[str, int]:
+    """
+    Bring flight_instances up to date for [start, start + horizon_days)
+
+    Incremental: dates that left the horizon are dropped, only dates that entered it
+    are expanded for all flights, and only flights whose pattern changed since the
+    last build (updated_at newer than the recorded mark) are re-expanded. Deleted
+    flights lose their instances through a trigger. The caller's connection must
+    have the flight_weekdays index (AviationEdgeDB.connect() creates it).
+
+    Args:
+        conn (sqlite3.Connection): Connection to the flights database
+        horizon_days (int): Number of days to materialise (defaults to CALENDAR_HORIZON_DAYS)
+        start (date): First service date (defaults to today)
+
+    Returns:
+        Dict: 'dropped', 'added' and 'changed_flights' counts
+    """
+    ensure_calendar_schema(conn)
+    horizon_days = horizon_days or default_horizon_days()
+    first = start or date.today()
+    last = first + timedelta(days=horizon_days - 1)
+    first_text, last_text = first.isoformat(), last.isoformat()
+
+    # Read the mark before expanding, so rows written meanwhile are picked up next time
+    patterns_as_of = _patterns_as_of(conn)
+    state = conn.execute(
+        "SELECT horizon_start, horizon_end, patterns_as_of FROM calendar_state WHERE id = 1"
+    ).fetchone()
+
+    stats = {'dropped': 0, 'added': 0, 'changed_flights': 0}
+    # One explicit write transaction, whatever the caller's isolation level
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        stats['dropped'] = conn.execute(
+            "DELETE FROM flight_instances WHERE service_date < ? OR service_date > ?", (first_text, last_text)
+        ).rowcount
+
+        if state is None:
+            stats['added'] += conn.execute(_EXPAND_SQL, {'first': first_text, 'last': last_text}).rowcount
+        else:
+            old_first, old_last, old_mark = state
+            # Re-expand flights whose weekdays changed (or that are new) over the whole horizon
+            changed = [row[0] for row in conn.execute(
+                "SELECT id FROM flights WHERE updated_at > ?", (old_mark or '',)
+            )]
+            if changed:
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS calendar_changed (flight_id INTEGER PRIMARY KEY)")
+                conn.execute("DELETE FROM calendar_changed")
+                conn.executemany("INSERT INTO calendar_changed VALUES (?)", [(flight_id,) for flight_id in changed])
+                conn.execute("""
+                    DELETE FROM flight_instances WHERE flight_id IN (SELECT flight_id FROM calendar_changed)
+                """)
+                stats['added'] += conn.execute(
+                    _EXPAND_SQL + " WHERE w.flight_id IN (SELECT flight_id FROM calendar_changed)",
+                    {'first': first_text, 'last': last_text}
+                ).rowcount
+                stats['changed_flights'] = len(changed)
+
+            # Dates that entered the horizon, before and after the previously built range
+            for range_first, range_last in ((first_text, min(last_text, _day_before(old_first))),
+                                            (max(first_text, _day_after(old_last)), last_text)):
+                if range_first <= range_last:
+                    stats['added'] += conn.execute(_EXPAND_SQL, {'first': range_first, 'last': range_last}).rowcount
+
+        conn.execute("""
+            INSERT OR REPLACE INTO calendar_state (id, horizon_start, horizon_end, patterns_as_of, built_at)
+            VALUES (1, ?, ?, ?, ?)
+        """, (first_text, last_text, patterns_as_of, datetime.now().isoformat()))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.isolation_level = isolation_level
+
+    logger.info(f"📆 Calendar {first_text} → {last_text}: {stats['added']:,} instances added, "
+                f"{stats['dropped']:,} dropped, {stats['changed_flights']:,} changed flights re-expanded")
+    return stats
+
+
+def refresh_after_collection(db_path: str = None) -> Optional[Dict[str, int]]:
+    """
+    Refresh flight_instances if collections changed the patterns or the date rolled over
+
+    Called by the collectors when a run finishes (and by the daemon while idle), so
+    searches only ever read the calendar. A failure is logged, never raised: the
+    collected flights are already committed.
+
+    Returns:
+        Dict: refresh_calendar() counts, or None when nothing was refreshed
+    """
+    db = AviationEdgeDB(db_path or default_db_path())
+    if not db.connect():
+        return None
+    try:
+        if calendar_is_stale(db.conn):
+            return refresh_calendar(db.conn)
+        return None
+    except sqlite3.Error as e:
+        logger.error(f"❌ Calendar refresh failed (run aviation_edge_calendar.py): {e}")
+        return None
+    finally:
+        db.close()
+
+
+def _day_before(day: str) -> str:
+    return (date.fromisoformat(day) - timedelta(days=1)).isoformat()
+
+
+def _day_after(day: str) -> str:
+    return (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialise dated flight instances from the weekly patterns")
+    parser.add_argument('--horizon', type=int, help='Days to materialise (default: CALENDAR_HORIZON_DAYS or 60)')
+    parser.add_argument('--start', help='First service date YYYY-MM-DD (default: today)')
+    parser.add_argument('--db', help='Database path (default: DB/flight_schedules.db)')
+    args = parser.parse_args()
+    configure_logging()
+
+    db = AviationEdgeDB(args.db or default_db_path())
+    if not db.connect():
+        return
+    try:
+        refresh_calendar(db.conn, args.horizon, date.fromisoformat(args.start) if args.start else None)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,196 @@ Standardized database operations for all API collections
 Ensures compliance with uppercase formatting and schema requirements
 """
 
+import os
 import sqlite3
 import json
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+
+from aviation_edge_history import HISTORY_COLUMNS, UNREPORTED, open_run, record_added, record_changes
+from aviation_edge_logging import get_logger, EventSummary
+
+logger = get_logger('db')
+
+# Column order of prepared flight rows and of the INSERT statement
+FLIGHT_COLUMNS = (
+    'dep_iata_code', 'arr_iata_code', 'airline_iata_code', 'flight_iata_number',
+    'dep_scheduled_time', 'arr_scheduled_time', 'weekdays', 'query_type', 'airport_code',
+    'dep_terminal', 'arr_terminal', 'dep_gate', 'arr_gate',
+    'aircraft_model_code', 'aircraft_model_text', 'airline_name', 'raw_data',
+    'is_codeshare', 'operating_airline_iata', 'operating_flight_number',
+    'marketing_airline_iata', 'marketing_flight_number', 'codeshare_group_id',
+    'dep_minutes', 'arr_minutes', 'block_minutes',
+    'created_at', 'updated_at'
+)
+
+# Integer schedule columns derived from the HH:MM text at ingest: minutes since
+# midnight and overnight-adjusted block time (arrival - departure, modulo 24h)
+TIME_COLUMNS = ('dep_minutes', 'arr_minutes', 'block_minutes')
+
+# Columns identifying the same marketing flight (duplicate prevention)
+SIGNATURE_COLUMNS = (
+    'marketing_airline_iata', 'marketing_flight_number', 'dep_iata_code',
+    'arr_iata_code', 'dep_scheduled_time', 'query_type'
+)
+
+# Integer keys into the dim_* tables (see aviation_edge_dimensions.py)
+DIMENSION_COLUMNS = ('airline_id', 'dep_airport_id', 'arr_airport_id', 'aircraft_id')
+
+def busy_timeout_ms() -> int:
+    """How long a connection waits for another writer's lock (DB_BUSY_TIMEOUT_MS)"""
+    return int(os.getenv('DB_BUSY_TIMEOUT_MS', '30000'))
+
+
+def configure_connection(conn: sqlite3.Connection):
+    """
+    Prepare a connection for several collector processes sharing one database
+    
+    WAL lets readers and the single active writer proceed concurrently, NORMAL
+    sync is durable in WAL mode while avoiding an fsync per commit, and the busy
+    timeout makes writers queue for the lock instead of failing immediately.
+    """
+    conn.execute(f"PRAGMA busy_timeout = {busy_timeout_ms()}")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+
+
+def scheduled_time_to_minutes(value: Any) -> Optional[int]:
+    """
+    Minutes since midnight of an "HH:MM" / "HHMM" scheduled time
+    
+    Returns:
+        int: 0-1439 style minutes, or None when the time is missing or unparseable
+    """
+    digits = str(value or '').replace(':', '')
+    if len(digits) < 4 or not digits[:4].isdigit():
+        return None
+    return int(digits[:2]) * 60 + int(digits[2:4])
+
+
+def block_minutes(dep_minutes: Optional[int], arr_minutes: Optional[int]) -> Optional[int]:
+    """Scheduled block time in minutes, arrivals before departure counting as next day"""
+    if dep_minutes is None or arr_minutes is None:
+        return None
+    return (arr_minutes - dep_minutes) % (24 * 60)
+
+
+def ensure_time_columns(conn: sqlite3.Connection) -> int:
+    """
+    Add the integer schedule columns to flights and fill them for existing rows
+    
+    Returns:
+        int: Number of rows backfilled (0 when the columns already existed)
+    """
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(flights)")}
+    missing = [column for column in TIME_COLUMNS if column not in existing]
+    for column in missing:
+        conn.execute(f"ALTER TABLE flights ADD COLUMN {column} INTEGER")
+    
+    updated = 0
+    if missing:
+        # Same parsing as scheduled_time_to_minutes(), in one pass over the table
+        minutes_sql = """
+            CASE WHEN substr(replace({0}, ':', ''), 1, 4) GLOB '[0-9][0-9][0-9][0-9]'
+                 THEN CAST(substr(replace({0}, ':', ''), 1, 2) AS INTEGER) * 60
+                      + CAST(substr(replace({0}, ':', ''), 3, 2) AS INTEGER) END
+        """
+        updated = conn.execute(f"""
+            UPDATE flights SET dep_minutes = {minutes_sql.format('dep_scheduled_time')},
+                               arr_minutes = {minutes_sql.format('arr_scheduled_time')}
+        """).rowcount
+        conn.execute("UPDATE flights SET block_minutes = ((arr_minutes - dep_minutes) % 1440 + 1440) % 1440")
+    
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_flights_dep_minutes ON flights (dep_airport_id, dep_minutes)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_flights_arr_minutes ON flights (arr_airport_id, arr_minutes)")
+    return updated
+
+
+# Codeshare layer: rows of one physical flight share codeshare_group_id (operating
+# airline + flight), and marketing numbers resolve to their group
+CODESHARE_INDEXES = """
+    CREATE INDEX IF NOT EXISTS idx_flights_codeshare_group
+        ON flights (codeshare_group_id, dep_iata_code, arr_iata_code, dep_scheduled_time);
+    CREATE INDEX IF NOT EXISTS idx_flights_marketing_flight ON flights (marketing_flight_number);
+"""
+
+
+def ensure_codeshare_indexes(conn: sqlite3.Connection):
+    """Create the indexes behind codeshare collapse and marketing-number lookups"""
+    conn.executescript(CODESHARE_INDEXES)
+
+
+# One row per flight and operating weekday, ordered for "airport, day, time window"
+# lookups. Triggers keep it in step with every insert, weekday merge and delete.
+_WEEKDAY_DAYS_SQL = "(SELECT 1 AS day UNION ALL SELECT 2 UNION ALL SELECT 3 UNION ALL SELECT 4 " \
+                    "UNION ALL SELECT 5 UNION ALL SELECT 6 UNION ALL SELECT 7)"
+
+WEEKDAY_INDEX_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS flight_weekdays (
+        flight_id INTEGER NOT NULL,
+        weekday INTEGER NOT NULL,
+        dep_airport_id INTEGER,
+        dep_minutes INTEGER,
+        arr_airport_id INTEGER,
+        arr_minutes INTEGER,
+        PRIMARY KEY (flight_id, weekday)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_flight_weekdays_dep
+        ON flight_weekdays (dep_airport_id, weekday, dep_minutes);
+    CREATE INDEX IF NOT EXISTS idx_flight_weekdays_arr
+        ON flight_weekdays (arr_airport_id, weekday, arr_minutes);
+    
+    CREATE TRIGGER IF NOT EXISTS trg_flight_weekdays_insert AFTER INSERT ON flights
+    BEGIN
+        INSERT OR REPLACE INTO flight_weekdays
+        SELECT NEW.id, day, NEW.dep_airport_id, NEW.dep_minutes, NEW.arr_airport_id, NEW.arr_minutes
+        FROM {_WEEKDAY_DAYS_SQL}
+        WHERE ',' || replace(NEW.weekdays, ' ', '') || ',' LIKE '%,' || day || ',%';
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_flight_weekdays_update
+    AFTER UPDATE OF weekdays, dep_airport_id, dep_minutes, arr_airport_id, arr_minutes ON flights
+    BEGIN
+        DELETE FROM flight_weekdays WHERE flight_id = OLD.id;
+        INSERT INTO flight_weekdays
+        SELECT NEW.id, day, NEW.dep_airport_id, NEW.dep_minutes, NEW.arr_airport_id, NEW.arr_minutes
+        FROM {_WEEKDAY_DAYS_SQL}
+        WHERE ',' || replace(NEW.weekdays, ' ', '') || ',' LIKE '%,' || day || ',%';
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_flight_weekdays_delete AFTER DELETE ON flights
+    BEGIN
+        DELETE FROM flight_weekdays WHERE flight_id = OLD.id;
+    END;
+"""
+
+
+def ensure_weekday_index(conn: sqlite3.Connection) -> int:
+    """
+    Create the flight_weekdays index table and its triggers, filling it for existing flights
+    
+    Returns:
+        int: Number of (flight, weekday) rows created by the initial fill
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'flight_weekdays'"
+    ).fetchone()
+    conn.executescript(WEEKDAY_INDEX_SCHEMA)
+    if exists:
+        return 0
+    return conn.execute(f"""
+        INSERT OR REPLACE INTO flight_weekdays
+        SELECT f.id, day, f.dep_airport_id, f.dep_minutes, f.arr_airport_id, f.arr_minutes
+        FROM flights f JOIN {_WEEKDAY_DAYS_SQL}
+          ON ',' || replace(f.weekdays, ' ', '') || ',' LIKE '%,' || day || ',%'
+    """).rowcount
+
+
+def is_lock_error(error: Exception) -> bool:
+    """True for SQLite 'database is locked' / 'busy' errors worth retrying"""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in message or 'busy' in message)
+
 
 class AviationEdgeDB:
     """
@@ -15,25 +201,38 @@ class AviationEdgeDB:
     Ensures consistent data formatting and schema compliance
     """
     
-    def __init__(self, db_path: str = "DB/flight_schedules.db"):
+    def __init__(self, db_path: str = "DB/flight_schedules.db", storage=None):
         """
         Initialize database handler
         
         Args:
             db_path (str): Path to SQLite database file
+            storage: Storage backend providing connections (defaults to SQLiteStorage
+                on db_path, see aviation_edge_storage.py); writes always go to SQLite
         """
-        self.db_path = db_path
+        from aviation_edge_storage import SQLiteStorage
+        
+        self.storage = storage or SQLiteStorage(db_path)
+        self.db_path = self.storage.db_path
         self.conn = None
+        self.dimensions = None
+        self.lock_retries = int(os.getenv('DB_LOCK_RETRIES', '5'))
         
     def connect(self) -> bool:
         """
         Establish database connection and verify schema
         
+        The schema is never changed here: a database that still needs a migration
+        is reported and refused (apply it with aviation_edge_migrate.py).
+        
         Returns:
             bool: True if connection successful, False otherwise
         """
+        from aviation_edge_dimensions import DimensionCache
+        from aviation_edge_migrate import pending_migrations
+        
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            self.conn = self.storage.connect(writer=True)
             cursor = self.conn.cursor()
             
             # Verify schema exists
@@ -46,12 +245,19 @@ class AviationEdgeDB:
             # Check current record count
             cursor.execute("SELECT COUNT(*) FROM flights")
             count = cursor.fetchone()[0]
-            print(f"✅ Database connected: {count:,} flights available")
             
+            pending = pending_migrations(self.conn)
+            if pending:
+                raise Exception(f"schema needs migrations ({', '.join(pending)}), "
+                                f"run: python aviation_edge_migrate.py --db \"{self.db_path}\"")
+            
+            logger.info(f"✅ Database connected: {count:,} flights available")
+            self.dimensions = DimensionCache(self.conn)
             return True
             
         except Exception as e:
-            print(f"❌ Database connection error: {e}")
+            logger.error(f"❌ Database connection error: {e}")
+            self.close()
             return False
     
     def close(self):
@@ -59,17 +265,68 @@ class AviationEdgeDB:
         if self.conn:
             self.conn.close()
             self.conn = None
+            self.dimensions = None
+    
+    def rollback(self):
+        """Roll back the current transaction and drop dimension ids interned in it"""
+        if not self.conn:
+            return
+        self.conn.rollback()
+        if self.dimensions is not None:
+            self.dimensions.reload()
+    
+    @contextmanager
+    def savepoint(self, name: str = 'batch'):
+        """
+        Run a block inside the current transaction so a failure undoes only its own writes
+        
+        Opens the write transaction if none is open yet. On an exception the block is
+        rolled back to the savepoint, dimension ids interned in it are dropped from the
+        cache, and the exception is re-raised; earlier writes stay pending.
+        """
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.execute(f"SAVEPOINT {name}")
+        try:
+            yield
+        except Exception:
+            self.conn.execute(f"ROLLBACK TO {name}")
+            self.conn.execute(f"RELEASE {name}")
+            if self.dimensions is not None:
+                self.dimensions.reload()
+            raise
+        self.conn.execute(f"RELEASE {name}")
+    
+    def commit(self):
+        """Commit the current transaction, waiting out readers/checkpoints holding the lock"""
+        if not self.conn:
+            return
+        for attempt in range(self.lock_retries + 1):
+            try:
+                self.conn.commit()
+                return
+            except sqlite3.OperationalError as e:
+                # A failed COMMIT leaves the transaction open, so it can simply be retried
+                if not is_lock_error(e) or attempt == self.lock_retries:
+                    raise
+                time.sleep(min(30.0, 0.5 * 2 ** attempt))
     
     def insert_flight_batch(self, flights_data: List[Dict], query_type: str, 
-                          airport_code: str, collection_date: str) -> int:
+                          airport_code: str, collection_date: str, payload=None) -> int:
         """
         Insert batch of flights into database with standardized formatting
         
+        Without a payload the batch is treated as the complete API response: if its
+        fingerprint matches the last collection for the same airport/type/date it is
+        skipped without any writes, otherwise only new or changed rows are stored.
+        
         Args:
             flights_data (List[Dict]): List of flight data from API
             query_type (str): 'departure' or 'arrival'
             airport_code (str): Airport IATA code being queried
             collection_date (str): Date of collection (YYYY-MM-DD)
+            payload (LedgerPayload): Open payload when the response arrives in several
+                batches (see open_payload() / record_payload())
             
         Returns:
             int: Number of flights successfully inserted
@@ -77,42 +334,262 @@ class AviationEdgeDB:
         if not self.conn:
             raise Exception("Database not connected. Call connect() first.")
         
-        cursor = self.conn.cursor()
-        inserted_count = 0
-        updated_count = 0
+        prepared_flights = self.prepare_flight_batch(flights_data, query_type, airport_code, collection_date)
+        
+        if payload is not None:
+            return self.store_prepared_flights(payload.add(prepared_flights), payload=payload)
+        
+        payload = self.open_payload(query_type, airport_code, collection_date)
+        changed_flights = payload.add(prepared_flights)
+        if payload.unchanged:
+            logger.info(f"   ⏭️  Payload unchanged for {airport_code.upper()} {query_type.lower()} "
+                        f"{collection_date}, skipped {payload.row_count} flights")
+            return 0
+        
+        stored_count = self.store_prepared_flights(changed_flights, commit=False, payload=payload)
+        self.record_payload(payload)
+        return stored_count
+    
+    def open_payload(self, query_type: str, airport_code: str, collection_date: str,
+                     filters: Optional[Dict] = None):
+        """
+        Start fingerprinting one API payload in the ingestion ledger
+        
+        Args:
+            query_type (str): 'departure' or 'arrival'
+            airport_code (str): Airport IATA code being queried
+            collection_date (str): Target date of the query (YYYY-MM-DD)
+            filters (Dict): Extra API filters the payload was requested with
+            
+        Returns:
+            LedgerPayload: Pass to insert_flight_batch() / add() for each batch
+        """
+        from aviation_edge_ledger import LedgerPayload, format_filters
+        
+        if not self.conn:
+            raise Exception("Database not connected. Call connect() first.")
+        
+        return LedgerPayload(self.conn, airport_code, query_type, collection_date, format_filters(filters))
+    
+    def record_payload(self, payload, commit: bool = True):
+        """
+        Record a fully processed payload's fingerprints
+        
+        Args:
+            payload (LedgerPayload): Payload returned by open_payload()
+            commit (bool): Commit when done (False inside a larger transaction)
+        """
+        payload.record()
+        if commit:
+            self.commit()
+    
+    def prepare_flight_batch(self, flights_data: List[Dict], query_type: str,
+                             airport_code: str, collection_date: str) -> List[Tuple]:
+        """
+        Extract and standardize a batch of flights without touching the database
+        Safe to call from a transform stage running alongside the writer
+        
+        Args:
+            flights_data (List[Dict]): List of flight data from API
+            query_type (str): 'departure' or 'arrival'
+            airport_code (str): Airport IATA code being queried
+            collection_date (str): Date of collection (YYYY-MM-DD)
+            
+        Returns:
+            List[Tuple]: Standardized rows in FLIGHT_COLUMNS order for store_prepared_flights()
+        """
+        from aviation_edge_transform import flights_to_rows
+        
+        try:
+            # Vectorised normalisation of the whole batch (ALL UPPERCASE per requirements)
+            return flights_to_rows(flights_data, query_type, airport_code)
+        except Exception as e:
+            logger.warning(f"⚠️ Batch transform failed ({e}), falling back to per-flight extraction")
+        
+        # Per-flight fallback so one malformed flight cannot sink the whole batch
+        prepared_rows = []
+        errors = EventSummary(logger)
         
         for flight in flights_data:
             try:
-                # Extract and standardize flight data (ALL UPPERCASE per requirements)
                 flight_data = self._extract_flight_data(flight, query_type, airport_code, collection_date)
-                
-                # Check if flight already exists
-                flight_id, existing_weekdays = self._check_flight_exists(cursor, flight_data)
-                
-                if flight_id:
-                    # Flight exists - merge weekdays
-                    new_weekday = flight_data['weekdays']
-                    merged_weekdays = self._merge_weekdays(existing_weekdays, new_weekday)
-                    
-                    if merged_weekdays != existing_weekdays:
-                        # Update with merged weekdays
-                        self._update_flight_weekdays(cursor, flight_id, merged_weekdays)
-                        updated_count += 1
-                else:
-                    # New flight - insert
-                    self._insert_single_flight(cursor, flight_data)
-                    inserted_count += 1
-                
+                prepared_rows.append(tuple(flight_data[column] for column in FLIGHT_COLUMNS))
             except Exception as e:
                 flight_id = flight.get('flight', {}).get('iataNumber', 'Unknown')
-                print(f"⚠️ Error processing flight {flight_id}: {e}")
+                errors.record('Flight processing errors', example=(flight_id, e))
                 continue
         
-        # Commit all changes
-        self.conn.commit()
-        print(f"💾 Stored {inserted_count} new flights, updated {updated_count} flights in database")
+        errors.flush()
+        return prepared_rows
+    
+    def store_prepared_flights(self, prepared_rows: List[Tuple], commit: bool = True, payload=None) -> int:
+        """
+        Store standardized rows, merging weekdays into existing records
+        Existing records are looked up in one join and writes use executemany
+        
+        A re-collected flight's fields (HISTORY_COLUMNS) are compared with what the same
+        payload key reported last time, not with the merged weekly record, so fields that
+        differ between weekdays are not changes. Every added flight and changed field is
+        logged in flight_changes under the payload's collection run, in the same
+        transaction; the stored record takes a new value where it held the old one.
+        
+        Args:
+            prepared_rows (List[Tuple]): Output of prepare_flight_batch()
+            commit (bool): Commit when done; pass False to group several
+                batches into one larger transaction and call commit() later
+            payload (LedgerPayload): Payload the rows belong to; its batches share one
+                collection run (without it each call logs under its own run)
+            
+        Returns:
+            int: Number of flights inserted or updated
+        """
+        if not self.conn:
+            raise Exception("Database not connected. Call connect() first.")
+        
+        # A batch that starts its own transaction can be rolled back and replayed when
+        # another process holds the lock past the busy timeout; inside a caller's
+        # transaction the error is raised so earlier batches are not silently lost
+        owns_transaction = not self.conn.in_transaction
         
-        return inserted_count + updated_count
+        for attempt in range(self.lock_retries + 1):
+            try:
+                return self._store_prepared_rows(prepared_rows, commit, payload)
+            except sqlite3.OperationalError as e:
+                if not (owns_transaction and is_lock_error(e)) or attempt == self.lock_retries:
+                    raise
+                self.rollback()
+                delay = min(30.0, 0.5 * 2 ** attempt)
+                logger.warning(f"⚠️ Database locked, retrying batch of {len(prepared_rows)} flights in {delay:.1f}s "
+                               f"(attempt {attempt + 1}/{self.lock_retries})")
+                time.sleep(delay)
+    
+    def _store_prepared_rows(self, prepared_rows: List[Tuple], commit: bool, payload=None) -> int:
+        """Single attempt of store_prepared_flights()"""
+        cursor = self.conn.cursor()
+        if not self.conn.in_transaction:
+            # Take the write lock before reading existing flights, so concurrent collector
+            # processes queue up instead of deadlocking on a read -> write lock upgrade
+            cursor.execute("BEGIN IMMEDIATE")
+        weekday_pos = FLIGHT_COLUMNS.index('weekdays')
+        errors = EventSummary(logger)
+        
+        # Collapse duplicates within the batch, merging their weekdays
+        incoming = {}
+        for row in prepared_rows:
+            signature = self._row_signature(row)
+            if signature in incoming:
+                try:
+                    current = incoming[signature]
+                    merged_weekdays = self._merge_weekdays(current[weekday_pos], row[weekday_pos])
+                    incoming[signature] = current[:weekday_pos] + (merged_weekdays,) + current[weekday_pos + 1:]
+                except Exception as e:
+                    errors.record('Flight processing errors', example=(signature[1], e))
+            else:
+                incoming[signature] = row
+        
+        existing = self._find_existing_flights(cursor, incoming, payload)
+        
+        new_rows = []
+        updates = []
+        changes = []
+        now = datetime.now().isoformat()
+        
+        for signature, row in incoming.items():
+            if signature in existing:
+                # Flight exists - merge weekdays, apply this payload's own schedule changes
+                flight_id, current, previous = existing[signature]
+                try:
+                    merged_weekdays = self._merge_weekdays(current['weekdays'], row[weekday_pos])
+                except Exception as e:
+                    errors.record('Flight processing errors', example=(signature[1], e))
+                    continue
+                
+                values = dict(current, weekdays=merged_weekdays)
+                if merged_weekdays != current['weekdays']:
+                    changes.append((flight_id, 'weekdays', current['weekdays'], merged_weekdays))
+                
+                # A stored flight operating only on this payload's weekdays is this day's schedule;
+                # otherwise its fields may come from other weekdays and only the payload's own
+                # previous values tell whether something changed
+                basis = previous
+                if basis is None and _weekday_set(current['weekdays']) <= _weekday_set(row[weekday_pos]):
+                    basis = current
+                for column in HISTORY_COLUMNS[1:]:
+                    reported = row[_COLUMN_POSITIONS[column]]
+                    # Fields missing from this payload keep their stored value
+                    if reported in UNREPORTED:
+                        continue
+                    if current[column] in UNREPORTED:
+                        old_value = current[column]
+                    elif basis is not None and reported != basis[column]:
+                        old_value = basis[column]
+                    else:
+                        continue
+                    changes.append((flight_id, column, old_value, reported))
+                    # The weekly pattern follows the change only where it held this day's old value
+                    if current[column] == old_value:
+                        values[column] = reported
+                
+                if values != current:
+                    updates.append((flight_id, tuple(values.get(column, row[i])
+                                                     for i, column in enumerate(FLIGHT_COLUMNS))))
+            else:
+                # New flight - insert
+                new_rows.append(row)
+        
+        if updates:
+            # Derived minutes and the aircraft dimension follow the updated text fields
+            merged_rows = [row for _, row in updates]
+            aircraft_ids = [ids[3] for ids in self.dimensions.ids_for_rows(merged_rows)]
+            update_rows = []
+            for (flight_id, row), aircraft_id in zip(updates, aircraft_ids):
+                dep_minutes = scheduled_time_to_minutes(row[_COLUMN_POSITIONS['dep_scheduled_time']])
+                arr_minutes = scheduled_time_to_minutes(row[_COLUMN_POSITIONS['arr_scheduled_time']])
+                update_rows.append(tuple(row[_COLUMN_POSITIONS[column]] for column in HISTORY_COLUMNS) + (
+                    dep_minutes, arr_minutes, block_minutes(dep_minutes, arr_minutes),
+                    aircraft_id, now, flight_id
+                ))
+            cursor.executemany(_UPDATE_FLIGHT_SQL, update_rows)
+        
+        if new_rows or changes:
+            run_id = self._collection_run(payload, new_rows or list(incoming.values()))
+            record_changes(self.conn, run_id, changes)
+        if new_rows:
+            last_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM flights").fetchone()[0]
+            dimension_ids = self.dimensions.ids_for_rows(new_rows)
+            cursor.executemany(_INSERT_FLIGHT_SQL, [row + ids for row, ids in zip(new_rows, dimension_ids)])
+            record_added(self.conn, run_id, last_id)
+        
+        if commit:
+            # Commit all changes
+            self.commit()
+        errors.flush()
+        logger.debug(f"💾 Stored {len(new_rows)} new flights, updated {len(updates)} flights in database")
+        
+        return len(new_rows) + len(updates)
+    
+    def _collection_run(self, payload, rows: List[Tuple]) -> int:
+        """
+        Collection run that changes are logged under, opened in the current transaction
+        
+        A payload keeps one run across its batches; a run rolled back with its batch
+        (lock retry) is opened again.
+        """
+        run_id = getattr(payload, 'run_id', None)
+        if run_id is not None and self.conn.execute(
+                "SELECT 1 FROM collection_runs WHERE id = ?", (run_id,)).fetchone():
+            return run_id
+        
+        if payload is not None:
+            airport_code, query_type, target_date, _ = payload.key
+        else:
+            airport_code = rows[0][FLIGHT_COLUMNS.index('airport_code')]
+            query_type = rows[0][FLIGHT_COLUMNS.index('query_type')]
+            target_date = ''
+        run_id = open_run(self.conn, airport_code, query_type, target_date)
+        if payload is not None:
+            payload.run_id = run_id
+        return run_id
     
     def _extract_flight_data(self, flight: Dict, query_type: str, airport_code: str, collection_date: str) -> Dict:
         """
@@ -166,6 +643,9 @@ class AviationEdgeDB:
             # Group ID based on this flight
             codeshare_group_id = operating_airline_iata + operating_flight_number
         
+        dep_minutes = scheduled_time_to_minutes(departure.get('scheduledTime'))
+        arr_minutes = scheduled_time_to_minutes(arrival.get('scheduledTime'))
+        
         # Standardized flight data (ALL UPPERCASE per requirements)
         return {
             'dep_iata_code': str(departure.get('iataCode', '')).upper(),
@@ -191,45 +671,105 @@ class AviationEdgeDB:
             'marketing_airline_iata': marketing_airline_iata,
             'marketing_flight_number': marketing_flight_number,
             'codeshare_group_id': codeshare_group_id,
+            'dep_minutes': dep_minutes,
+            'arr_minutes': arr_minutes,
+            'block_minutes': block_minutes(dep_minutes, arr_minutes),
             'created_at': datetime.now().isoformat(),
             'updated_at': datetime.now().isoformat()
         }
     
-    def _check_flight_exists(self, cursor: sqlite3.Cursor, flight_data: Dict) -> tuple:
+    def _row_signature(self, row: Tuple) -> Tuple:
         """
-        Check if flight already exists and return ID and current weekdays
-        Now considers codeshare information to properly identify duplicates
+        Build the duplicate-detection signature of a prepared row
+        Codeshare flights are matched on their marketing details so the same
+        marketing flight is never stored twice
+        
+        Args:
+            row (Tuple): Prepared row in FLIGHT_COLUMNS order
+            
+        Returns:
+            Tuple: Values of SIGNATURE_COLUMNS
+        """
+        return tuple(row[position] for position in _SIGNATURE_POSITIONS)
+    
+    def _find_existing_flights(self, cursor: sqlite3.Cursor, incoming: Dict[Tuple, Tuple],
+                               payload=None) -> Dict[Tuple, Tuple]:
+        """
+        Look up existing records for a batch of signatures with a single join
+        
+        Flights are joined on number, route and query type. A stored record with the
+        same departure time is the match; failing that, a record at another time that
+        operates only on the incoming weekdays is the same flight, retimed, unless the
+        payload still reports that time too. A record that also operates on other
+        weekdays keeps its time, and the new time becomes a flight of its own.
         
         Args:
             cursor: Database cursor
-            flight_data (Dict): Flight data to check
+            incoming (Dict[Tuple, Tuple]): Signature built by _row_signature() -> prepared row
+            payload (LedgerPayload): Payload of the batch, which also knows the rows the
+                ledger skipped as unchanged and the values it last recorded per flight
             
         Returns:
-            tuple: (flight_id, current_weekdays) or (None, None) if not found
+            Dict: signature -> (flight_id, {column: value} for HISTORY_COLUMNS, the payload's
+                previous values of that flight or None) for flights already stored
         """
-        # For codeshare flights, we need to check based on marketing details
-        # to avoid duplicating the same marketing flight
-        cursor.execute("""
-            SELECT id, weekdays FROM flights 
-            WHERE marketing_airline_iata = ? 
-            AND marketing_flight_number = ?
-            AND dep_iata_code = ? 
-            AND arr_iata_code = ? 
-            AND dep_scheduled_time = ?
-            AND query_type = ?
-        """, (
-            flight_data['marketing_airline_iata'],
-            flight_data['marketing_flight_number'],
-            flight_data['dep_iata_code'],
-            flight_data['arr_iata_code'],
-            flight_data['dep_scheduled_time'],
-            flight_data['query_type']
-        ))
+        if not incoming:
+            return {}
         
-        result = cursor.fetchone()
-        if result:
-            return result[0], result[1]  # flight_id, weekdays
-        return None, None
+        cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS incoming_signatures ({', '.join(SIGNATURE_COLUMNS)})
+        """)
+        cursor.execute("DELETE FROM incoming_signatures")
+        cursor.executemany(
+            f"INSERT INTO incoming_signatures VALUES ({', '.join('?' for _ in SIGNATURE_COLUMNS)})",
+            list(incoming)
+        )
+        
+        time_position = SIGNATURE_COLUMNS.index('dep_scheduled_time')
+        join_condition = " AND ".join(f"f.{column} = i.{column}" for column in SIGNATURE_COLUMNS
+                                      if column != 'dep_scheduled_time')
+        cursor.execute(f"""
+            SELECT DISTINCT f.id, {', '.join('f.' + column for column in HISTORY_COLUMNS)},
+                   {', '.join('i.' + column for column in SIGNATURE_COLUMNS)}
+            FROM incoming_signatures i
+            JOIN flights f ON {join_condition}
+            ORDER BY f.id
+        """)
+        
+        candidates = {}
+        for flight_id, *values in cursor.fetchall():
+            current = dict(zip(HISTORY_COLUMNS, values[:len(HISTORY_COLUMNS)]))
+            candidates.setdefault(tuple(values[len(HISTORY_COLUMNS):]), []).append((flight_id, current))
+        
+        def previous_values(stored_signature):
+            return payload.previous_values(stored_signature) if payload is not None else None
+        
+        existing = {}
+        claimed = set()
+        for signature, records in candidates.items():
+            for flight_id, current in records:
+                # Keep the oldest record when legacy duplicates exist
+                if current['dep_scheduled_time'] == signature[time_position] and flight_id not in claimed:
+                    existing[signature] = (flight_id, current, previous_values(signature))
+                    claimed.add(flight_id)
+                    break
+        
+        weekday_position = _COLUMN_POSITIONS['weekdays']
+        for signature, records in candidates.items():
+            if signature in existing:
+                continue
+            weekdays = _weekday_set(incoming[signature][weekday_position])
+            for flight_id, current in records:
+                stored_signature = signature[:time_position] + (current['dep_scheduled_time'],) \
+                    + signature[time_position + 1:]
+                if flight_id in claimed or (payload is not None and payload.contains(stored_signature)):
+                    continue
+                if weekdays and _weekday_set(current['weekdays']) <= weekdays:
+                    existing[signature] = (flight_id, current, previous_values(stored_signature))
+                    claimed.add(flight_id)
+                    break
+        
+        return existing
     
     def _merge_weekdays(self, existing_weekdays: str, new_weekday: str) -> str:
         """
@@ -237,7 +777,7 @@ class AviationEdgeDB:
         
         Args:
             existing_weekdays (str): Existing weekdays (e.g., "1,2,3")
-            new_weekday (str): New weekday to add (e.g., "6")
+            new_weekday (str): New weekday(s) to add (e.g., "6" or "5,6")
             
         Returns:
             str: Merged weekdays (e.g., "1,2,3,6")
@@ -246,70 +786,9 @@ class AviationEdgeDB:
             return new_weekday
             
         existing_set = set(existing_weekdays.split(','))
-        existing_set.add(new_weekday)
+        existing_set.update(new_weekday.split(','))
         return ','.join(sorted(existing_set, key=int))
     
-    def _update_flight_weekdays(self, cursor: sqlite3.Cursor, flight_id: int, merged_weekdays: str):
-        """
-        Update flight record with merged weekdays
-        
-        Args:
-            cursor: Database cursor
-            flight_id (int): Flight record ID
-            merged_weekdays (str): Merged weekdays string
-        """
-        cursor.execute("""
-            UPDATE flights 
-            SET weekdays = ?, updated_at = ?
-            WHERE id = ?
-        """, (merged_weekdays, datetime.now().isoformat(), flight_id))
-    
-    def _insert_single_flight(self, cursor: sqlite3.Cursor, flight_data: Dict):
-        """
-        Insert single flight record into database with codeshare support
-        
-        Args:
-            cursor: Database cursor
-            flight_data (Dict): Standardized flight data
-        """
-        cursor.execute("""
-            INSERT INTO flights (
-                dep_iata_code, arr_iata_code, airline_iata_code, flight_iata_number,
-                dep_scheduled_time, arr_scheduled_time, weekdays, query_type, airport_code,
-                dep_terminal, arr_terminal, dep_gate, arr_gate,
-                aircraft_model_code, aircraft_model_text, airline_name, raw_data,
-                is_codeshare, operating_airline_iata, operating_flight_number,
-                marketing_airline_iata, marketing_flight_number, codeshare_group_id,
-                created_at, updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            flight_data['dep_iata_code'],
-            flight_data['arr_iata_code'],
-            flight_data['airline_iata_code'],
-            flight_data['flight_iata_number'],
-            flight_data['dep_scheduled_time'],
-            flight_data['arr_scheduled_time'],
-            flight_data['weekdays'],
-            flight_data['query_type'],
-            flight_data['airport_code'],
-            flight_data['dep_terminal'],
-            flight_data['arr_terminal'],
-            flight_data['dep_gate'],
-            flight_data['arr_gate'],
-            flight_data['aircraft_model_code'],
-            flight_data['aircraft_model_text'],
-            flight_data['airline_name'],
-            flight_data['raw_data'],
-            flight_data['is_codeshare'],
-            flight_data['operating_airline_iata'],
-            flight_data['operating_flight_number'],
-            flight_data['marketing_airline_iata'],
-            flight_data['marketing_flight_number'],
-            flight_data['codeshare_group_id'],
-            flight_data['created_at'],
-            flight_data['updated_at']
-        ))
-    
     def get_flight_count(self) -> int:
         """
         Get total number of flights in database
@@ -376,6 +855,80 @@ class AviationEdgeDB:
             'latest_record': result[4]
         }
 
+def default_db_path() -> str:
+    """
+    Get the production database path next to this module
+    
+    Returns:
+        str: Absolute path to DB/flight_schedules.db
+    """
+    import os
+    # Get the directory where this module is located
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(module_dir, "DB", "flight_schedules.db")
+
+_SIGNATURE_POSITIONS = tuple(FLIGHT_COLUMNS.index(column) for column in SIGNATURE_COLUMNS)
+
+# New rows carry their dimension ids after the FLIGHT_COLUMNS values
+_INSERT_COLUMNS = FLIGHT_COLUMNS + DIMENSION_COLUMNS
+
+_INSERT_FLIGHT_SQL = f"""
+    INSERT INTO flights ({', '.join(_INSERT_COLUMNS)})
+    VALUES ({', '.join('?' for _ in _INSERT_COLUMNS)})
+"""
+
+# Existing flights whose schedule fields changed on re-collection, with the derived columns
+_UPDATE_COLUMNS = HISTORY_COLUMNS + ('dep_minutes', 'arr_minutes', 'block_minutes', 'aircraft_id', 'updated_at')
+
+_UPDATE_FLIGHT_SQL = f"""
+    UPDATE flights SET {', '.join(column + ' = ?' for column in _UPDATE_COLUMNS)}
+    WHERE id = ?
+"""
+
+_COLUMN_POSITIONS = {column: position for position, column in enumerate(FLIGHT_COLUMNS)}
+
+
+def _weekday_set(weekdays: Optional[str]) -> set:
+    """Weekday numbers of a "1,3,5" weekdays value"""
+    return set(str(weekdays or '').replace(' ', '').split(',')) - {''}
+
+
+def open_flight_store(db_path: str = None):
+    """
+    Open the store a collection writes to
+    
+    Without an explicit path, collections go to the single-writer service when
+    DB_WRITER_ADDRESS is set (see aviation_edge_writer.py). If the service cannot
+    be reached they fall back to writing the production database directly.
+    
+    Args:
+        db_path (str): Database path (optional, will auto-detect if None)
+        
+    Returns:
+        WriterClient or AviationEdgeDB: Connected store offering insert_flight_batch(),
+            open_payload(), record_payload() and close()
+        
+    Raises:
+        RuntimeError: When the database cannot be opened
+    """
+    if db_path is None:
+        db_path = default_db_path()
+        
+        from aviation_edge_writer import WRITER_UNAVAILABLE, WriterClient, writer_address
+        address = writer_address()
+        if address is not None:
+            try:
+                return WriterClient(address)
+            except WRITER_UNAVAILABLE as e:
+                logger.warning(f"⚠️ Writer service unavailable at {address} ({e}), writing directly")
+    
+    db = AviationEdgeDB(db_path)
+    
+    if not db.connect():
+        raise RuntimeError(f"Database connection failed: {db_path}")
+    return db
+
+
 # Convenience function for standard usage
 def insert_api_flights(flights_data: List[Dict], query_type: str, 
                       airport_code: str, collection_date: str,
@@ -392,29 +945,31 @@ def insert_api_flights(flights_data: List[Dict], query_type: str,
         
     Returns:
         int: Number of flights inserted
+        
+    Raises:
+        RuntimeError: When the database cannot be opened, so callers never take the
+            failure for a collection with nothing new
     """
-    # Auto-detect database path if not provided
-    if db_path is None:
-        import os
-        # Get the directory where this module is located
-        module_dir = os.path.dirname(os.path.abspath(__file__))
-        db_path = os.path.join(module_dir, "DB", "flight_schedules.db")
-    
-    db = AviationEdgeDB(db_path)
-    
-    if not db.connect():
-        return 0
+    from aviation_edge_writer import WRITER_UNAVAILABLE, WriterClient
     
+    store = open_flight_store(db_path)
     try:
-        inserted_count = db.insert_flight_batch(
-            flights_data, query_type, airport_code, collection_date
-        )
-        return inserted_count
+        return store.insert_flight_batch(flights_data, query_type, airport_code, collection_date)
+    except WRITER_UNAVAILABLE as e:
+        if not isinstance(store, WriterClient):
+            raise
+        # The service went away mid-request; the ledger skips the batch if it was committed after all
+        logger.warning(f"⚠️ Writer service lost ({e}), writing directly")
     finally:
-        db.close()
+        store.close()
+    
+    return insert_api_flights(flights_data, query_type, airport_code, collection_date, default_db_path())
 
 if __name__ == "__main__":
+    from aviation_edge_logging import configure_logging
+    
     # Test the database handler
+    configure_logging()
     db = AviationEdgeDB()
     if db.connect():
         summary = db.get_collection_summary()
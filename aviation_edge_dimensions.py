@@ -0,0 +1,228 @@
+"""
+Aviation Edge Dimension Tables
+Interned integer ids for airlines, airports and aircraft with precomputed display names
+Flights reference them through airline_id, dep_airport_id, arr_airport_id and aircraft_id
+"""
+
+import re
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from aviation_edge_db import DIMENSION_COLUMNS, FLIGHT_COLUMNS
+
+DIMENSION_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS dim_airlines (
+        id INTEGER PRIMARY KEY,
+        iata_code TEXT NOT NULL,
+        name TEXT NOT NULL DEFAULT '',
+        UNIQUE (iata_code, name)
+    );
+    CREATE TABLE IF NOT EXISTS dim_airports (
+        id INTEGER PRIMARY KEY,
+        iata_code TEXT NOT NULL UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS dim_aircraft (
+        id INTEGER PRIMARY KEY,
+        model_code TEXT NOT NULL DEFAULT '',
+        model_text TEXT NOT NULL DEFAULT '',
+        display_name TEXT NOT NULL,
+        UNIQUE (model_code, model_text)
+    );
+"""
+
+DIMENSION_INDEXES = """
+    CREATE INDEX IF NOT EXISTS idx_flights_route_ids ON flights (dep_airport_id, arr_airport_id);
+    CREATE INDEX IF NOT EXISTS idx_flights_arr_airport_id ON flights (arr_airport_id);
+    CREATE INDEX IF NOT EXISTS idx_flights_airline_id ON flights (airline_id);
+"""
+
+# Manufacturer variant codes shown by their common name
+_AIRCRAFT_ALIASES = (
+    (re.compile(r'\bA(\d{3})-\d{3}N\b'), r'A\1neo'),            # neo engine options, e.g. A321-271N
+    (re.compile(r'(?<!\d)737-([89])\d[A-Z0-9]\b'), r'737-\g<1>00'),  # customer codes, e.g. 737-81M
+)
+
+_POSITIONS = {column: position for position, column in enumerate(FLIGHT_COLUMNS)}
+
+
+def aircraft_display_name(model_text: Optional[str], model_code: Optional[str] = None) -> str:
+    """
+    Short aircraft name for tables, e.g. "AIRBUS A321-271N" -> "A321neo"
+
+    Args:
+        model_text (str): Aircraft model text as stored (uppercase)
+        model_code (str): Model code, used when there is no text
+
+    Returns:
+        str: Display name ('N/A' when nothing is known)
+    """
+    name = (model_text or '').strip() or (model_code or '').strip()
+    if not name:
+        return 'N/A'
+    name = re.sub(r'^AIRBUS\s+(?=A\d)', '', name)
+    name = re.sub(r'^AIRBUS\s+', 'A', name)
+    name = re.sub(r'^BOEING\s+', 'B', name)
+    for pattern, replacement in _AIRCRAFT_ALIASES:
+        name = pattern.sub(replacement, name)
+    return name
+
+
+def ensure_dimension_schema(conn: sqlite3.Connection) -> bool:
+    """
+    Create the dimension tables and add their id columns to flights if missing
+
+    Returns:
+        bool: True if the flights table was migrated and existing rows need backfill_dimensions()
+    """
+    conn.executescript(DIMENSION_SCHEMA)
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(flights)")}
+    missing = [column for column in DIMENSION_COLUMNS if column not in existing]
+    for column in missing:
+        conn.execute(f"ALTER TABLE flights ADD COLUMN {column} INTEGER")
+    conn.executescript(DIMENSION_INDEXES)
+    return bool(missing)
+
+
+def backfill_dimensions(conn: sqlite3.Connection) -> int:
+    """
+    Intern every distinct airline, airport and aircraft of existing flights and fill their ids
+
+    Runs as set-based SQL, so it is cheap to call again; only rows still missing an
+    id are updated. The caller commits.
+
+    Returns:
+        int: Number of flights updated
+    """
+    conn.execute("""
+        INSERT OR IGNORE INTO dim_airlines (iata_code, name)
+        SELECT DISTINCT COALESCE(airline_iata_code, ''), COALESCE(airline_name, '')
+        FROM flights WHERE airline_id IS NULL
+    """)
+    conn.execute("""
+        INSERT OR IGNORE INTO dim_airports (iata_code)
+        SELECT COALESCE(dep_iata_code, '') FROM flights WHERE dep_airport_id IS NULL
+        UNION
+        SELECT COALESCE(arr_iata_code, '') FROM flights WHERE arr_airport_id IS NULL
+    """)
+    aircraft = conn.execute("""
+        SELECT DISTINCT COALESCE(aircraft_model_code, ''), COALESCE(aircraft_model_text, '')
+        FROM flights WHERE aircraft_id IS NULL
+    """).fetchall()
+    conn.executemany("""
+        INSERT OR IGNORE INTO dim_aircraft (model_code, model_text, display_name) VALUES (?, ?, ?)
+    """, [(code, text, aircraft_display_name(text, code)) for code, text in aircraft])
+
+    cursor = conn.execute("""
+        UPDATE flights SET
+            airline_id = (SELECT id FROM dim_airlines
+                          WHERE iata_code = COALESCE(flights.airline_iata_code, '')
+                            AND name = COALESCE(flights.airline_name, '')),
+            dep_airport_id = (SELECT id FROM dim_airports WHERE iata_code = COALESCE(flights.dep_iata_code, '')),
+            arr_airport_id = (SELECT id FROM dim_airports WHERE iata_code = COALESCE(flights.arr_iata_code, '')),
+            aircraft_id = (SELECT id FROM dim_aircraft
+                           WHERE model_code = COALESCE(flights.aircraft_model_code, '')
+                             AND model_text = COALESCE(flights.aircraft_model_text, ''))
+        WHERE airline_id IS NULL OR dep_airport_id IS NULL OR arr_airport_id IS NULL OR aircraft_id IS NULL
+    """)
+    return cursor.rowcount
+
+
+def load_aircraft_display_names(conn: sqlite3.Connection) -> Dict[int, str]:
+    """aircraft_id -> display name for rendering (empty if the table does not exist yet)"""
+    try:
+        return dict(conn.execute("SELECT id, display_name FROM dim_aircraft"))
+    except sqlite3.OperationalError:
+        return {}
+
+
+def load_airport_ids(conn: sqlite3.Connection) -> Dict[str, int]:
+    """IATA code -> airport id (empty if the table does not exist yet)"""
+    try:
+        return dict(conn.execute("SELECT iata_code, id FROM dim_airports"))
+    except sqlite3.OperationalError:
+        return {}
+
+
+class DimensionCache:
+    """
+    In-memory lookup of dimension ids, interning unseen values on first use
+
+    The dimension tables are small (hundreds of rows), so they are loaded once per
+    connection and new members are inserted in bulk per batch, inside the caller's
+    transaction. After a rollback call reload(): ids interned by the rolled-back
+    transaction no longer exist and may be handed out again.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.reload()
+
+    def reload(self):
+        """Re-read all dimension ids from the database"""
+        conn = self.conn
+        self.airlines: Dict[Tuple[str, str], int] = {
+            (code, name): id_ for id_, code, name in conn.execute("SELECT id, iata_code, name FROM dim_airlines")
+        }
+        self.airports: Dict[str, int] = load_airport_ids(conn)
+        self.aircraft: Dict[Tuple[str, str], int] = {
+            (code, text): id_ for id_, code, text in conn.execute("SELECT id, model_code, model_text FROM dim_aircraft")
+        }
+
+    def ids_for_rows(self, rows: List[Tuple]) -> List[Tuple[int, int, int, int]]:
+        """
+        Dimension ids for prepared flight rows
+
+        Args:
+            rows (List[Tuple]): Rows in FLIGHT_COLUMNS order
+
+        Returns:
+            List[Tuple]: (airline_id, dep_airport_id, arr_airport_id, aircraft_id) per row
+        """
+        positions = _POSITIONS
+        airline_keys = [(row[positions['airline_iata_code']] or '', row[positions['airline_name']] or '')
+                        for row in rows]
+        dep_keys = [row[positions['dep_iata_code']] or '' for row in rows]
+        arr_keys = [row[positions['arr_iata_code']] or '' for row in rows]
+        aircraft_keys = [(row[positions['aircraft_model_code']] or '', row[positions['aircraft_model_text']] or '')
+                         for row in rows]
+
+        self._intern_airlines(airline_keys)
+        self._intern_airports(dep_keys + arr_keys)
+        self._intern_aircraft(aircraft_keys)
+
+        return [
+            (self.airlines[airline], self.airports[dep], self.airports[arr], self.aircraft[aircraft])
+            for airline, dep, arr, aircraft in zip(airline_keys, dep_keys, arr_keys, aircraft_keys)
+        ]
+
+    def _intern_airlines(self, keys: List[Tuple[str, str]]):
+        missing = set(keys) - self.airlines.keys()
+        if missing:
+            self.conn.executemany("INSERT OR IGNORE INTO dim_airlines (iata_code, name) VALUES (?, ?)", missing)
+            for key in missing:
+                self.airlines[key] = self.conn.execute(
+                    "SELECT id FROM dim_airlines WHERE iata_code = ? AND name = ?", key
+                ).fetchone()[0]
+
+    def _intern_airports(self, keys: List[str]):
+        missing = set(keys) - self.airports.keys()
+        if missing:
+            self.conn.executemany("INSERT OR IGNORE INTO dim_airports (iata_code) VALUES (?)",
+                                  [(key,) for key in missing])
+            for key in missing:
+                self.airports[key] = self.conn.execute(
+                    "SELECT id FROM dim_airports WHERE iata_code = ?", (key,)
+                ).fetchone()[0]
+
+    def _intern_aircraft(self, keys: List[Tuple[str, str]]):
+        missing = set(keys) - self.aircraft.keys()
+        if missing:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO dim_aircraft (model_code, model_text, display_name) VALUES (?, ?, ?)",
+                [(code, text, aircraft_display_name(text, code)) for code, text in missing]
+            )
+            for key in missing:
+                self.aircraft[key] = self.conn.execute(
+                    "SELECT id FROM dim_aircraft WHERE model_code = ? AND model_text = ?", key
+                ).fetchone()[0]
+
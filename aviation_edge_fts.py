@@ -0,0 +1,167 @@
+"""
+Aviation Edge Text Search
+FTS5 index over airline names, aircraft models and flight numbers
+Supports prefix and autocomplete lookups such as "Philippine" or "A321" without LIKE scans
+"""
+
+import re
+import sqlite3
+from typing import List, Tuple
+
+from aviation_edge_logging import get_logger
+
+logger = get_logger('fts')
+
+# Indexed text per flight; flight_digits is the number without the airline prefix ("PR215" -> "215")
+TEXT_COLUMNS = ('airline_name', 'airline_iata_code', 'flight_iata_number', 'flight_digits',
+                'aircraft_model_text', 'aircraft_model_code')
+
+# Autocomplete kinds: which FTS columns to match and which flights column to suggest
+COMPLETION_FIELDS = {
+    'airline': (('airline_name', 'airline_iata_code'), 'airline_name'),
+    'aircraft': (('aircraft_model_text', 'aircraft_model_code'), 'aircraft_model_text'),
+    'flight': (('flight_iata_number', 'flight_digits'), 'flight_iata_number'),
+}
+
+
+def _text_values(alias: str) -> str:
+    """SQL expressions producing TEXT_COLUMNS from a flights row alias (NEW, OLD or f)"""
+    digits = (f"CASE WHEN {alias}.flight_iata_number LIKE {alias}.airline_iata_code || '%' "
+              f"THEN substr({alias}.flight_iata_number, length({alias}.airline_iata_code) + 1) "
+              f"ELSE {alias}.flight_iata_number END")
+    return ', '.join(digits if column == 'flight_digits' else f"{alias}.{column}" for column in TEXT_COLUMNS)
+
+
+# Contentless: the text lives in flights, the index only holds tokens keyed by flights.id.
+# Prefix indexes make 1-3 character autocomplete prefixes single index lookups.
+TEXT_INDEX_SCHEMA = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS flights_fts USING fts5(
+        {', '.join(TEXT_COLUMNS)},
+        content = '', prefix = '1 2 3', tokenize = 'unicode61'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS trg_flights_fts_insert AFTER INSERT ON flights
+    BEGIN
+        INSERT INTO flights_fts (rowid, {', '.join(TEXT_COLUMNS)}) VALUES (NEW.id, {_text_values('NEW')});
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_flights_fts_update
+    AFTER UPDATE OF airline_name, airline_iata_code, flight_iata_number,
+                    aircraft_model_text, aircraft_model_code ON flights
+    BEGIN
+        INSERT INTO flights_fts (flights_fts, rowid, {', '.join(TEXT_COLUMNS)})
+        VALUES ('delete', OLD.id, {_text_values('OLD')});
+        INSERT INTO flights_fts (rowid, {', '.join(TEXT_COLUMNS)}) VALUES (NEW.id, {_text_values('NEW')});
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_flights_fts_delete AFTER DELETE ON flights
+    BEGIN
+        INSERT INTO flights_fts (flights_fts, rowid, {', '.join(TEXT_COLUMNS)})
+        VALUES ('delete', OLD.id, {_text_values('OLD')});
+    END;
+"""
+
+
+def fts5_available(conn: sqlite3.Connection) -> bool:
+    """True if the SQLite library was compiled with FTS5"""
+    return bool(conn.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0])
+
+
+def has_text_index(conn: sqlite3.Connection) -> bool:
+    """True if flights_fts exists in the database"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'flights_fts'"
+    ).fetchone() is not None
+
+
+def ensure_text_index(conn: sqlite3.Connection) -> int:
+    """
+    Create flights_fts and its sync triggers, indexing existing flights on first creation
+
+    The triggers keep the index in step with every insert, text update and delete made
+    by insert_flight_batch and the merge path. Without FTS5 the index is skipped.
+
+    Returns:
+        int: Number of flights indexed by the initial fill (0 if it already existed)
+    """
+    if not fts5_available(conn):
+        logger.warning("⚠️  SQLite has no FTS5, text search disabled")
+        return 0
+    exists = has_text_index(conn)
+    conn.executescript(TEXT_INDEX_SCHEMA)
+    if exists:
+        return 0
+    return conn.execute(f"""
+        INSERT INTO flights_fts (rowid, {', '.join(TEXT_COLUMNS)})
+        SELECT f.id, {_text_values('f')} FROM flights f
+    """).rowcount
+
+
+def match_expression(text: str, columns: Tuple[str, ...] = None) -> str:
+    """
+    FTS5 MATCH expression for free text: every word must match as a prefix
+
+    Punctuation is dropped, so "A321-271N" and "PR 215" are safe to pass through.
+
+    Args:
+        text (str): User input, e.g. "philippine a321"
+        columns (Tuple[str]): Restrict matching to these TEXT_COLUMNS
+
+    Returns:
+        str: MATCH expression ('' when the text has no words)
+    """
+    words = re.findall(r'[0-9A-Za-z]+', text)
+    if not words:
+        return ''
+    expression = ' AND '.join(f'"{word.lower()}"*' for word in words)
+    if columns:
+        expression = f"{{{' '.join(columns)}}} : ({expression})"
+    return expression
+
+
+def search_flight_ids(conn: sqlite3.Connection, text: str, limit: int = None) -> List[int]:
+    """
+    Flight ids matching free text, best bm25 match first
+
+    Args:
+        conn (sqlite3.Connection): Connection to the flights database
+        text (str): Words or word prefixes, e.g. "philippine a321"
+        limit (int): Maximum number of ids
+
+    Returns:
+        List[int]: flights.id values
+    """
+    expression = match_expression(text)
+    if not expression:
+        return []
+    query = "SELECT rowid FROM flights_fts WHERE flights_fts MATCH ? ORDER BY rank"
+    if limit:
+        query += f" LIMIT {int(limit)}"
+    return [row[0] for row in conn.execute(query, (expression,))]
+
+
+def autocomplete(conn: sqlite3.Connection, prefix: str, limit: int = 10) -> List[Tuple[str, str, int]]:
+    """
+    Airline, aircraft and flight number completions for a prefix
+
+    Args:
+        conn (sqlite3.Connection): Connection to the flights database
+        prefix (str): Typed text, e.g. "phil" or "a32"
+        limit (int): Maximum completions per kind
+
+    Returns:
+        List[Tuple]: (kind, value, flights) with the most frequent values of each kind first
+    """
+    if not match_expression(prefix):
+        return []
+    completions = []
+    for kind, (columns, value_column) in COMPLETION_FIELDS.items():
+        expression = match_expression(prefix, columns)
+        rows = conn.execute(f"""
+            SELECT f.{value_column}, COUNT(*) AS flights
+            FROM flights_fts JOIN flights f ON f.id = flights_fts.rowid
+            WHERE flights_fts MATCH ?
+            GROUP BY f.{value_column}
+            ORDER BY flights DESC, f.{value_column}
+            LIMIT ?
+        """, (expression, limit)).fetchall()
+        completions.extend((kind, value, flights) for value, flights in rows)
+    return completions
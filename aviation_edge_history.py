@@ -0,0 +1,149 @@
+"""
+Aviation Edge Schedule History
+Append-only log of field-level flight changes, keyed by collection run
+Written in the same transaction as the upsert, so "what changed since" never compares snapshots
+"""
+
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+HISTORY_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS collection_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        airport_code TEXT NOT NULL,
+        query_type TEXT NOT NULL,
+        target_date TEXT NOT NULL DEFAULT '',
+        started_at TEXT NOT NULL,
+        added INTEGER NOT NULL DEFAULT 0,
+        changed INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_collection_runs_started ON collection_runs (started_at);
+
+    -- field = '' records a newly added flight; otherwise one row per changed field
+    CREATE TABLE IF NOT EXISTS flight_changes (
+        run_id INTEGER NOT NULL,
+        flight_id INTEGER NOT NULL,
+        field TEXT NOT NULL,
+        old_value TEXT,
+        new_value TEXT,
+        PRIMARY KEY (run_id, flight_id, field)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_flight_changes_flight ON flight_changes (flight_id, run_id);
+"""
+
+# Schedule fields compared on re-collection, against the values the same payload key
+# reported last time. A retimed departure is matched to the stored flight with the same
+# number and route when that flight operates only on the payload's weekdays.
+HISTORY_COLUMNS = (
+    'weekdays', 'dep_scheduled_time', 'arr_scheduled_time', 'dep_terminal', 'arr_terminal', 'dep_gate', 'arr_gate',
+    'aircraft_model_code', 'aircraft_model_text'
+)
+
+# Values meaning "not in this payload" (missing API fields normalise to 'NONE');
+# they never overwrite a stored value
+UNREPORTED = (None, '', 'NONE')
+
+Change = Tuple[int, str, Optional[str], Optional[str]]  # (flight_id, field, old_value, new_value)
+
+
+def ensure_history_schema(conn: sqlite3.Connection):
+    """Create the collection run and flight change tables if they do not exist yet"""
+    conn.executescript(HISTORY_SCHEMA)
+
+
+def open_run(conn: sqlite3.Connection, airport_code: str, query_type: str, target_date: str = '') -> int:
+    """Start a collection run in the caller's transaction and return its id"""
+    return conn.execute("""
+        INSERT INTO collection_runs (airport_code, query_type, target_date, started_at) VALUES (?, ?, ?, ?)
+    """, (airport_code.upper(), query_type.lower(), target_date or '', datetime.now().isoformat())).lastrowid
+
+
+def record_added(conn: sqlite3.Connection, run_id: int, after_id: int) -> int:
+    """
+    Log every flight inserted after after_id as added in this run
+
+    The store holds the write lock, so ids above the pre-insert maximum are its own rows.
+    """
+    added = conn.execute("""
+        INSERT OR IGNORE INTO flight_changes (run_id, flight_id, field)
+        SELECT ?, id, '' FROM flights WHERE id > ?
+    """, (run_id, after_id)).rowcount
+    conn.execute("UPDATE collection_runs SET added = added + ? WHERE id = ?", (added, run_id))
+    return added
+
+
+def record_changes(conn: sqlite3.Connection, run_id: int, changes: List[Change]):
+    """
+    Log field changes in this run; a field changed twice in one run keeps its first old value
+
+    Args:
+        conn (sqlite3.Connection): Connection inside the store transaction
+        run_id (int): Run returned by open_run()
+        changes (List[Change]): (flight_id, field, old_value, new_value)
+    """
+    if not changes:
+        return
+    conn.executemany("""
+        INSERT INTO flight_changes (run_id, flight_id, field, old_value, new_value) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (run_id, flight_id, field) DO UPDATE SET new_value = excluded.new_value
+    """, [(run_id,) + change for change in changes])
+    conn.execute("UPDATE collection_runs SET changed = changed + ? WHERE id = ?",
+                 (len({change[0] for change in changes}), run_id))
+
+
+def changes_since(conn: sqlite3.Connection, since: str, airline: str = None, origin: str = None,
+                  destination: str = None, limit: int = None) -> List[Dict]:
+    """
+    Changes logged by collection runs started at or after `since`, newest run first
+
+    Run ids grow with time, so the log is read as one range on the flight_changes
+    primary key from the first run at or after `since`.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the flights database
+        since (str): ISO date or timestamp
+        airline (str): Only flights of this marketing or operating airline
+        origin (str): Only flights departing this airport
+        destination (str): Only flights arriving at this airport
+        limit (int): Maximum number of change rows
+
+    Returns:
+        List[Dict]: run_id, started_at, run (airport/type/date), flight_id, flight, route,
+            dep_time, field ('' = added flight), old_value and new_value
+    """
+    first_run = conn.execute(
+        "SELECT MIN(id) FROM collection_runs WHERE started_at >= ?", (since,)
+    ).fetchone()[0]
+    if first_run is None:
+        return []
+
+    conditions, params = ["c.run_id >= ?"], [first_run]
+    if airline:
+        conditions.append("(f.airline_iata_code = ? OR f.operating_airline_iata = ?)")
+        params += [airline.upper(), airline.upper()]
+    if origin:
+        conditions.append("f.dep_iata_code = ?")
+        params.append(origin.upper())
+    if destination:
+        conditions.append("f.arr_iata_code = ?")
+        params.append(destination.upper())
+    query = f"""
+        SELECT c.run_id, r.started_at, r.airport_code, r.query_type, r.target_date,
+               c.flight_id, f.flight_iata_number, f.dep_iata_code, f.arr_iata_code, f.dep_scheduled_time,
+               c.field, c.old_value, c.new_value
+        FROM flight_changes c
+        JOIN collection_runs r ON r.id = c.run_id
+        JOIN flights f ON f.id = c.flight_id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY c.run_id DESC, f.flight_iata_number, c.field
+    """
+    if limit:
+        query += f" LIMIT {int(limit)}"
+
+    return [{
+        'run_id': run_id, 'started_at': started_at, 'run': f"{airport} {query_type} {target_date}".strip(),
+        'flight_id': flight_id, 'flight': flight, 'route': f"{dep}→{arr}", 'dep_time': dep_time,
+        'field': field, 'old_value': old_value, 'new_value': new_value,
+    } for (run_id, started_at, airport, query_type, target_date, flight_id, flight, dep, arr, dep_time,
+           field, old_value, new_value) in conn.execute(query, params)]
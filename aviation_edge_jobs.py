@@ -0,0 +1,320 @@
+"""
+Aviation Edge Collection Jobs
+Durable, resumable job queue of (airport, type, date) collection units
+Stored in the flights database so several worker processes can drain one sweep
+"""
+
+import os
+import socket
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from aviation_edge_db import busy_timeout_ms, configure_connection, default_db_path
+
+JOBS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS collection_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sweep_id TEXT NOT NULL,
+        airport_code TEXT NOT NULL,
+        query_type TEXT NOT NULL,
+        target_date TEXT NOT NULL,
+        state TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL DEFAULT 3,
+        worker_id TEXT,
+        lease_expires_at TEXT,
+        last_error TEXT,
+        retrieved INTEGER,
+        stored INTEGER,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        started_at TEXT,
+        finished_at TEXT,
+        UNIQUE (sweep_id, airport_code, query_type, target_date)
+    );
+    CREATE INDEX IF NOT EXISTS idx_collection_jobs_claim
+        ON collection_jobs (state, query_type, target_date);
+"""
+
+# pending -> running -> done, or back to pending until max_attempts, then failed
+JOB_STATES = ('pending', 'running', 'done', 'failed')
+
+_JOB_FIELDS = ('id', 'sweep_id', 'airport_code', 'query_type', 'target_date', 'attempts')
+
+
+def default_worker_id() -> str:
+    """Identify this worker process in the job table"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _process_exists(pid: int) -> bool:
+    """Check whether a local process is still running (errs on the side of 'running')"""
+    if os.name == 'nt':
+        # os.kill(pid, 0) would send CTRL_C_EVENT on Windows, so ask the kernel instead
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return kernel32.GetLastError() != 87  # ERROR_INVALID_PARAMETER: no such process
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class JobQueue:
+    """
+    Collection job queue backed by the collection_jobs table
+
+    Claims run inside BEGIN IMMEDIATE, so concurrent workers never receive the
+    same job. A claimed job carries a lease; if its worker dies the lease expires
+    and the job becomes claimable again, up to max_attempts in total.
+    """
+
+    def __init__(self, db_path: str = None, lease_seconds: int = None, max_attempts: int = 3):
+        """
+        Initialize the job queue
+
+        Args:
+            db_path (str): Database path (defaults to the production database)
+            lease_seconds (int): How long a claim stays valid (defaults to JOB_LEASE_SECONDS)
+            max_attempts (int): Attempts per job before it is marked failed
+        """
+        self.db_path = db_path or default_db_path()
+        self.lease_seconds = lease_seconds or int(os.getenv('JOB_LEASE_SECONDS', '1800'))
+        self.max_attempts = max_attempts
+
+        # Autocommit mode: every multi-statement change opens its own explicit transaction
+        self.conn = sqlite3.connect(self.db_path, timeout=busy_timeout_ms() / 1000, isolation_level=None)
+        configure_connection(self.conn)
+        self.conn.executescript(JOBS_SCHEMA)
+
+    def close(self):
+        """Close the queue connection"""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def enqueue(self, sweep_id: str, units: Iterable[Tuple[str, str, str]]) -> int:
+        """
+        Add collection units to a sweep; units already in the sweep are left untouched
+
+        Args:
+            sweep_id (str): Sweep the units belong to (re-enqueueing resumes it)
+            units (Iterable): (airport_code, query_type, target_date) tuples
+
+        Returns:
+            int: Number of newly queued jobs
+        """
+        now = _now()
+        rows = [
+            (sweep_id, airport.upper(), query_type.lower(), target_date, self.max_attempts, now, now)
+            for airport, query_type, target_date in units
+        ]
+
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self.conn.total_changes
+            self.conn.executemany("""
+                INSERT OR IGNORE INTO collection_jobs
+                (sweep_id, airport_code, query_type, target_date, max_attempts, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            added = self.conn.total_changes - before
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        return added
+
+    def done_units(self, units: Iterable[Tuple[str, str, str]]) -> Set[Tuple[str, str, str]]:
+        """
+        Units already collected by a completed job of any sweep
+
+        Sweep ids name the run that created them, so a sweep restarted on another day
+        checks here to avoid spending API calls on dates an earlier sweep finished.
+
+        Args:
+            units (Iterable): (airport_code, query_type, target_date) tuples
+
+        Returns:
+            Set: The given units (airport uppercase, type lowercase) that have a done job
+        """
+        units = [(airport.upper(), query_type.lower(), target_date) for airport, query_type, target_date in units]
+        if not units:
+            return set()
+        rows = self.conn.execute(f"""
+            SELECT DISTINCT airport_code, query_type, target_date FROM collection_jobs
+            WHERE state = 'done'
+              AND (airport_code, query_type, target_date) IN (VALUES {', '.join('(?, ?, ?)' for _ in units)})
+        """, [value for unit in units for value in unit]).fetchall()
+        return set(rows)
+
+    def claim(self, worker_id: str, query_type: str = None, sweep_id: str = None) -> Optional[Dict]:
+        """
+        Atomically claim the next runnable job
+
+        Args:
+            worker_id (str): Claiming worker (see default_worker_id())
+            query_type (str): Only claim 'departure' or 'arrival' jobs
+            sweep_id (str): Only claim jobs of this sweep
+
+        Returns:
+            Dict: Claimed job (id, sweep_id, airport_code, query_type, target_date, attempts),
+                or None when nothing is runnable
+        """
+        now = _now()
+        lease_expires_at = (datetime.now() + timedelta(seconds=self.lease_seconds)).isoformat(timespec='seconds')
+
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Expired leases that already used their last attempt are given up on
+            self.conn.execute("""
+                UPDATE collection_jobs
+                SET state = 'failed', last_error = COALESCE(last_error, 'lease expired'),
+                    finished_at = ?, updated_at = ?
+                WHERE state = 'running' AND lease_expires_at < ? AND attempts >= max_attempts
+            """, (now, now, now))
+
+            row = self.conn.execute(f"""
+                UPDATE collection_jobs
+                SET state = 'running', attempts = attempts + 1, worker_id = ?,
+                    lease_expires_at = ?, started_at = ?, updated_at = ?
+                WHERE id = (
+                    SELECT id FROM collection_jobs
+                    WHERE (state = 'pending' OR (state = 'running' AND lease_expires_at < ?))
+                      AND attempts < max_attempts
+                      AND (? IS NULL OR query_type = ?)
+                      AND (? IS NULL OR sweep_id = ?)
+                    ORDER BY target_date, id
+                    LIMIT 1
+                )
+                RETURNING {', '.join(_JOB_FIELDS)}
+            """, (worker_id, lease_expires_at, now, now, now,
+                  query_type, query_type, sweep_id, sweep_id)).fetchone()
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        return dict(zip(_JOB_FIELDS, row)) if row else None
+
+    def recover_orphans(self) -> int:
+        """
+        Requeue jobs claimed by worker processes on this host that no longer exist
+
+        Lets a restarted sweep resume immediately instead of waiting for the lease
+        of a crashed run to expire. Jobs from other hosts still rely on their lease.
+
+        Returns:
+            int: Number of jobs returned to the queue
+        """
+        host = socket.gethostname()
+        orphans = []
+        for job_id, worker_id in self.conn.execute(
+            "SELECT id, worker_id FROM collection_jobs WHERE state = 'running' AND worker_id LIKE ?",
+            (f"{host}:%",)
+        ).fetchall():
+            try:
+                pid = int(worker_id.rsplit(':', 1)[1])
+            except ValueError:
+                continue
+            if not _process_exists(pid):
+                orphans.append((job_id, worker_id))
+
+        now = _now()
+        recovered = 0
+        for job_id, worker_id in orphans:
+            cursor = self.conn.execute("""
+                UPDATE collection_jobs
+                SET state = CASE WHEN attempts < max_attempts THEN 'pending' ELSE 'failed' END,
+                    last_error = 'worker process exited', lease_expires_at = NULL, updated_at = ?
+                WHERE id = ? AND state = 'running' AND worker_id = ?
+            """, (now, job_id, worker_id))
+            recovered += cursor.rowcount
+
+        return recovered
+
+    def complete(self, job: Dict, worker_id: str, retrieved: int = 0, stored: int = 0) -> bool:
+        """
+        Mark a claimed job done
+
+        Returns:
+            bool: False if the claim was lost (lease expired and another worker took it)
+        """
+        now = _now()
+        cursor = self.conn.execute("""
+            UPDATE collection_jobs
+            SET state = 'done', retrieved = ?, stored = ?, last_error = NULL,
+                lease_expires_at = NULL, finished_at = ?, updated_at = ?
+            WHERE id = ? AND state = 'running' AND worker_id = ?
+        """, (retrieved, stored, now, now, job['id'], worker_id))
+        return cursor.rowcount == 1
+
+    def fail(self, job: Dict, worker_id: str, error: str, retry: bool = True) -> str:
+        """
+        Record a failed attempt; the job is retried until it runs out of attempts
+
+        Args:
+            job (Dict): Job returned by claim()
+            worker_id (str): Worker that claimed it
+            error (str): Error description
+            retry (bool): False to fail permanently (e.g. the date entered the 8-day window)
+
+        Returns:
+            str: New job state ('pending' or 'failed'), or '' if the claim was lost
+        """
+        now = _now()
+        row = self.conn.execute("""
+            UPDATE collection_jobs
+            SET state = CASE WHEN ? AND attempts < max_attempts THEN 'pending' ELSE 'failed' END,
+                last_error = ?, lease_expires_at = NULL, updated_at = ?,
+                finished_at = CASE WHEN ? AND attempts < max_attempts THEN NULL ELSE ? END
+            WHERE id = ? AND state = 'running' AND worker_id = ?
+            RETURNING state
+        """, (retry, str(error)[:500], now, retry, now, job['id'], worker_id)).fetchone()
+        return row[0] if row else ''
+
+    def progress(self, sweep_id: str = None, query_type: str = None) -> Dict[str, int]:
+        """
+        Count jobs per state
+
+        Returns:
+            Dict: state -> job count (every state present, zero if unused)
+        """
+        counts = dict.fromkeys(JOB_STATES, 0)
+        counts.update(self.conn.execute("""
+            SELECT state, COUNT(*) FROM collection_jobs
+            WHERE (? IS NULL OR sweep_id = ?) AND (? IS NULL OR query_type = ?)
+            GROUP BY state
+        """, (sweep_id, sweep_id, query_type, query_type)).fetchall())
+        return counts
+
+    def failed_jobs(self, sweep_id: str) -> List[Dict]:
+        """Jobs of a sweep that gave up, with their last error"""
+        rows = self.conn.execute("""
+            SELECT airport_code, query_type, target_date, attempts, last_error
+            FROM collection_jobs WHERE sweep_id = ? AND state = 'failed'
+            ORDER BY target_date, airport_code
+        """, (sweep_id,)).fetchall()
+        return [dict(zip(('airport_code', 'query_type', 'target_date', 'attempts', 'last_error'), row))
+                for row in rows]
@@ -0,0 +1,206 @@
+"""
+Aviation Edge Ingestion Ledger
+Content fingerprints per collected payload and per normalised row
+Lets re-collections skip unchanged payloads and only store rows that differ
+"""
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from aviation_edge_db import FLIGHT_COLUMNS, SIGNATURE_COLUMNS, TIME_COLUMNS
+from aviation_edge_history import HISTORY_COLUMNS
+
+LEDGER_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS ingestion_ledger (
+        airport_code TEXT NOT NULL,
+        query_type TEXT NOT NULL,
+        target_date TEXT NOT NULL,
+        filters TEXT NOT NULL DEFAULT '',
+        payload_hash TEXT NOT NULL,
+        row_count INTEGER NOT NULL,
+        recorded_at TEXT NOT NULL,
+        PRIMARY KEY (airport_code, query_type, target_date, filters)
+    );
+    CREATE TABLE IF NOT EXISTS ingestion_rows (
+        airport_code TEXT NOT NULL,
+        query_type TEXT NOT NULL,
+        target_date TEXT NOT NULL,
+        filters TEXT NOT NULL DEFAULT '',
+        signature_hash TEXT NOT NULL,
+        row_hash TEXT NOT NULL,
+        row_values TEXT,
+        PRIMARY KEY (airport_code, query_type, target_date, filters, signature_hash)
+    ) WITHOUT ROWID;
+"""
+
+# Row fingerprints cover the normalised fields; timestamps change on every run and
+# raw_data carries volatile API fields that are never written back to existing rows.
+# Derived schedule minutes add nothing beyond the HH:MM text, so fingerprints
+# recorded before those columns existed stay valid
+_ROW_HASH_POSITIONS = tuple(
+    i for i, column in enumerate(FLIGHT_COLUMNS)
+    if column not in ('created_at', 'updated_at', 'raw_data') + TIME_COLUMNS
+)
+_PAYLOAD_HASH_POSITIONS = tuple(
+    i for i, column in enumerate(FLIGHT_COLUMNS) if column not in ('created_at', 'updated_at') + TIME_COLUMNS
+)
+_SIGNATURE_POSITIONS = tuple(FLIGHT_COLUMNS.index(column) for column in SIGNATURE_COLUMNS)
+
+# Schedule fields each payload last reported per flight, so re-collections are diffed
+# against the same payload key rather than the flight's merged weekly pattern
+_VALUE_COLUMNS = HISTORY_COLUMNS[1:]
+_VALUE_POSITIONS = tuple(FLIGHT_COLUMNS.index(column) for column in _VALUE_COLUMNS)
+
+# Payload hashes are an order-independent sum of row digests, so streamed batches
+# and bulk responses of the same data produce the same fingerprint
+_PAYLOAD_MODULUS = 1 << 128
+
+
+def ensure_ledger_schema(conn: sqlite3.Connection):
+    """Create the ingestion ledger tables if they do not exist yet"""
+    conn.executescript(LEDGER_SCHEMA)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(ingestion_rows)")}
+    if 'row_values' not in columns:
+        conn.execute("ALTER TABLE ingestion_rows ADD COLUMN row_values TEXT")
+
+
+def fingerprint(values) -> str:
+    """Stable 128-bit hex digest of a sequence of values"""
+    return hashlib.blake2b('\x1f'.join(map(str, values)).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def format_filters(filters: Optional[Dict] = None) -> str:
+    """Canonical text form of extra API filters (empty when unfiltered)"""
+    if not filters:
+        return ''
+    return '&'.join(f"{key}={filters[key]}" for key in sorted(filters))
+
+
+class LedgerPayload:
+    """
+    Fingerprint of one (airport, type, date, filters) payload, built batch by batch
+
+    add() returns only the rows that are new or differ from the last recorded
+    payload; record() persists the new fingerprints in the caller's transaction.
+    Nothing is written when the payload turns out to be unchanged. The schedule
+    fields each flight had in the last recorded payload are kept with its row
+    fingerprint, so the store can tell this payload's own changes from values
+    that merely differ between the weekdays of one flight.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, airport_code: str, query_type: str,
+                 target_date: str, filters: str = ''):
+        self.conn = conn
+        self.key = (airport_code.upper(), query_type.lower(), target_date, filters)
+        self.row_count = 0
+
+        row = conn.execute("""
+            SELECT payload_hash, row_count FROM ingestion_ledger
+            WHERE airport_code = ? AND query_type = ? AND target_date = ? AND filters = ?
+        """, self.key).fetchone()
+        self.previous_hash, self.previous_count = row if row else (None, None)
+
+        self._known: Optional[Dict[str, Tuple[str, Optional[str]]]] = None
+        self._seen = set()
+        self._changed: Dict[str, Tuple[str, str]] = {}
+        self._digest = 0
+        # Collection run the store logs this payload's flight changes under (aviation_edge_history)
+        self.run_id: Optional[int] = None
+
+    def _load_known(self) -> Dict[str, Tuple[str, Optional[str]]]:
+        """Row fingerprints and field values recorded for this payload key by the previous collection"""
+        if self._known is None:
+            self._known = {signature_hash: (row_hash, row_values) for signature_hash, row_hash, row_values in
+                           self.conn.execute("""
+                SELECT signature_hash, row_hash, row_values FROM ingestion_rows
+                WHERE airport_code = ? AND query_type = ? AND target_date = ? AND filters = ?
+            """, self.key)}
+        return self._known
+
+    def add(self, rows: List[Tuple]) -> List[Tuple]:
+        """
+        Fold prepared rows into the payload fingerprint
+
+        Args:
+            rows (List[Tuple]): Rows from AviationEdgeDB.prepare_flight_batch()
+
+        Returns:
+            List[Tuple]: Rows whose fingerprint is new or changed
+        """
+        known = self._load_known()
+        changed_rows = []
+
+        for row in rows:
+            self._digest = (self._digest + int(fingerprint(row[i] for i in _PAYLOAD_HASH_POSITIONS), 16)) \
+                % _PAYLOAD_MODULUS
+            self.row_count += 1
+
+            signature_hash = fingerprint(row[i] for i in _SIGNATURE_POSITIONS)
+            if signature_hash in self._seen:
+                # Repeated signature within the payload: let the store merge its weekdays
+                changed_rows.append(row)
+                continue
+            self._seen.add(signature_hash)
+
+            row_hash = fingerprint(row[i] for i in _ROW_HASH_POSITIONS)
+            if known.get(signature_hash, (None,))[0] != row_hash:
+                self._changed[signature_hash] = (row_hash, json.dumps([row[i] for i in _VALUE_POSITIONS]))
+                changed_rows.append(row)
+
+        return changed_rows
+
+    def contains(self, signature: Tuple) -> bool:
+        """True when a row with this signature (SIGNATURE_COLUMNS values) was added, changed or not"""
+        return fingerprint(signature) in self._seen
+
+    def previous_values(self, signature: Tuple) -> Optional[Dict[str, str]]:
+        """
+        Schedule fields this payload key last reported for a flight
+
+        Returns:
+            Dict: HISTORY_COLUMNS (except weekdays) -> value, or None when the flight was
+                not in the last recorded payload (or was recorded before values were kept)
+        """
+        row_values = self._load_known().get(fingerprint(signature), (None, None))[1]
+        return dict(zip(_VALUE_COLUMNS, json.loads(row_values))) if row_values else None
+
+    @property
+    def payload_hash(self) -> str:
+        """Fingerprint of everything added so far"""
+        return f"{self._digest:032x}"
+
+    @property
+    def unchanged(self) -> bool:
+        """True when the payload matches the last recorded one exactly"""
+        return self.payload_hash == self.previous_hash and self.row_count == self.previous_count
+
+    def record(self):
+        """Persist the payload and changed row fingerprints, dropping flights it no longer has (caller commits)"""
+        if self.unchanged:
+            return
+
+        known = self._load_known()
+        dropped = [signature_hash for signature_hash in known if signature_hash not in self._seen]
+        self.conn.executemany("""
+            DELETE FROM ingestion_rows
+            WHERE airport_code = ? AND query_type = ? AND target_date = ? AND filters = ? AND signature_hash = ?
+        """, [self.key + (signature_hash,) for signature_hash in dropped])
+        self.conn.executemany("""
+            INSERT OR REPLACE INTO ingestion_rows
+            (airport_code, query_type, target_date, filters, signature_hash, row_hash, row_values)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [self.key + (signature_hash,) + item for signature_hash, item in self._changed.items()])
+        self.conn.execute("""
+            INSERT OR REPLACE INTO ingestion_ledger
+            (airport_code, query_type, target_date, filters, payload_hash, row_count, recorded_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, self.key + (self.payload_hash, self.row_count, datetime.now().isoformat()))
+
+        self.previous_hash, self.previous_count = self.payload_hash, self.row_count
+        for signature_hash in dropped:
+            del known[signature_hash]
+        known.update(self._changed)
+        self._changed = {}
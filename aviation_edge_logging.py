@@ -0,0 +1,201 @@
+"""
+Aviation Edge Logging
+Leveled logging for the collectors and database handler
+Asynchronous queue output, optional JSON lines and rate-limited event summaries
+Importing a module never configures logging; each script's main() calls configure_logging()
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, FrozenSet, Optional
+
+# All project loggers live under this name so one configuration covers them
+ROOT_LOGGER = 'aviation_edge'
+
+_config_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        # Structured fields passed as extra={'event': ..., 'fields': {...}}
+        event = getattr(record, 'event', None)
+        if event:
+            entry['event'] = event
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _resolve_log_file(log_file: str) -> str:
+    """Resolve relative LOG_FILE paths against the project root"""
+    if not os.path.isabs(log_file):
+        log_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), log_file)
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    return log_file
+
+
+def configure_logging(level: str = None, log_file: str = None, log_format: str = None,
+                      force: bool = False) -> logging.Logger:
+    """
+    Configure the project logger from LOG_LEVEL / LOG_FILE / LOG_FORMAT
+
+    Records are put on an in-memory queue by the calling thread and formatted and
+    written by a background listener, so hot loops never block on console or file I/O.
+
+    Args:
+        level (str): Log level name (defaults to LOG_LEVEL, then INFO)
+        log_file (str): Optional log file path (defaults to LOG_FILE; empty disables)
+        log_format (str): 'text' or 'json' (defaults to LOG_FORMAT, then text)
+        force (bool): Reconfigure even if logging is already set up
+
+    Returns:
+        logging.Logger: The configured project root logger
+    """
+    global _listener
+
+    root = logging.getLogger(ROOT_LOGGER)
+    with _config_lock:
+        if _listener is not None and not force:
+            return root
+
+        level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+        log_file = log_file if log_file is not None else os.getenv('LOG_FILE', '')
+        log_format = (log_format or os.getenv('LOG_FORMAT', 'text')).lower()
+
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+        # Console keeps the existing emoji message style; the file gets timestamps
+        console = logging.StreamHandler(sys.stdout)
+        handlers = [console]
+        if log_format == 'json':
+            console.setFormatter(JsonFormatter())
+        else:
+            console.setFormatter(logging.Formatter('%(message)s'))
+
+        file_error = None
+        if log_file:
+            try:
+                file_handler = logging.FileHandler(_resolve_log_file(log_file), encoding='utf-8')
+                if log_format == 'json':
+                    file_handler.setFormatter(JsonFormatter())
+                else:
+                    file_handler.setFormatter(logging.Formatter(
+                        '%(asctime)s %(levelname)s %(name)s: %(message)s'))
+                handlers.append(file_handler)
+            except OSError as e:
+                file_error = e
+
+        log_queue = queue.SimpleQueue()
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        root.setLevel(getattr(logging, level, logging.INFO))
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
+    if file_error is not None:
+        root.warning(f"⚠️ Could not open log file {log_file}: {file_error}")
+    return root
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background listener"""
+    global _listener
+    with _config_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Get a project logger
+
+    Nothing is configured here: until a script calls configure_logging(), records
+    propagate to Python's root logger like any library's.
+
+    Args:
+        name (str): Component name (e.g. 'db', 'collector.departure')
+
+    Returns:
+        logging.Logger: Logger under the 'aviation_edge' hierarchy
+    """
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def trace_flights() -> FrozenSet[str]:
+    """
+    Flight numbers to trace in detail, from LOG_TRACE_FLIGHTS (e.g. "PX11,PR100")
+
+    Replaces hard-coded debug branches: only listed flights get per-row DEBUG output.
+    """
+    value = os.getenv('LOG_TRACE_FLIGHTS', '')
+    return frozenset(code.strip().upper() for code in value.split(',') if code.strip())
+
+
+class EventSummary:
+    """
+    Count repetitive per-row events and log one summary line per event type
+
+    record() only increments a counter (plus keeps the first example), so no
+    message formatting happens per row. Summaries are emitted by flush(), or
+    by maybe_flush() at most once per interval during long loops.
+    """
+
+    def __init__(self, logger: logging.Logger, level: int = logging.WARNING, interval: float = 30.0):
+        self.logger = logger
+        self.level = level
+        self.interval = interval
+        self._counts: Dict[str, int] = {}
+        self._examples: Dict[str, object] = {}
+        self._last_flush = time.monotonic()
+
+    def record(self, event: str, count: int = 1, example: object = None):
+        """Count an occurrence of an event, remembering the first example"""
+        self._counts[event] = self._counts.get(event, 0) + count
+        if example is not None and event not in self._examples:
+            self._examples[event] = example
+
+    def maybe_flush(self):
+        """Flush if the rate-limit interval has elapsed since the last summary"""
+        if self._counts and time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def flush(self):
+        """Log one line per recorded event and reset the counters"""
+        if self._counts and self.logger.isEnabledFor(self.level):
+            for event, count in self._counts.items():
+                example = self._examples.get(event)
+                suffix = f" (first: {example})" if example is not None else ""
+                self.logger.log(self.level, f"   ⚠️  {event}: {count} occurrence(s){suffix}",
+                                extra={'event': event, 'fields': {'count': count}})
+        self._counts.clear()
+        self._examples.clear()
+        self._last_flush = time.monotonic()
@@ -0,0 +1,143 @@
+"""
+Aviation Edge Schema Migrations
+Explicit, confirmed upgrade of the flights database to the schema the collectors expect
+AviationEdgeDB.connect() only detects pending migrations; this command applies them
+"""
+
+import argparse
+import re
+import sqlite3
+import sys
+from typing import Callable, Dict, List, Set, Tuple
+
+from aviation_edge_db import (CODESHARE_INDEXES, DIMENSION_COLUMNS, TIME_COLUMNS, WEEKDAY_INDEX_SCHEMA,
+                              configure_connection, default_db_path, ensure_codeshare_indexes,
+                              ensure_time_columns, ensure_weekday_index)
+from aviation_edge_dimensions import DIMENSION_INDEXES, DIMENSION_SCHEMA, backfill_dimensions, ensure_dimension_schema
+from aviation_edge_fts import TEXT_INDEX_SCHEMA, ensure_text_index, fts5_available
+from aviation_edge_history import HISTORY_SCHEMA, ensure_history_schema
+from aviation_edge_ledger import LEDGER_SCHEMA, ensure_ledger_schema
+from aviation_edge_logging import configure_logging, get_logger
+
+logger = get_logger('migrate')
+
+_SCHEMA_OBJECT = re.compile(r'CREATE\s+(?:VIRTUAL\s+)?(?:TABLE|INDEX|TRIGGER)\s+IF\s+NOT\s+EXISTS\s+(\w+)', re.I)
+
+
+def schema_objects(*scripts: str) -> Set[str]:
+    """Names of the tables, indexes and triggers a schema script creates"""
+    return {name for script in scripts for name in _SCHEMA_OBJECT.findall(script)}
+
+
+def _existing_objects(conn: sqlite3.Connection) -> Set[str]:
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> Set[str]:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _apply_dimensions(conn: sqlite3.Connection) -> int:
+    ensure_dimension_schema(conn)
+    return backfill_dimensions(conn)
+
+
+# Ordered steps: (name, what it does, pending check, apply returning rows filled).
+# Dimension ids and schedule minutes come first, the weekday index copies both.
+MIGRATIONS: List[Tuple[str, str, Callable[[sqlite3.Connection], bool], Callable[[sqlite3.Connection], int]]] = [
+    ('dimensions', "dim_* tables and flights.airline_id/dep_airport_id/arr_airport_id/aircraft_id",
+     lambda conn: not (schema_objects(DIMENSION_SCHEMA, DIMENSION_INDEXES) <= _existing_objects(conn)
+                       and set(DIMENSION_COLUMNS) <= _columns(conn, 'flights')),
+     _apply_dimensions),
+    ('schedule_minutes', "flights.dep_minutes/arr_minutes/block_minutes and their indexes",
+     lambda conn: not (set(TIME_COLUMNS) <= _columns(conn, 'flights')
+                       and {'idx_flights_dep_minutes', 'idx_flights_arr_minutes'} <= _existing_objects(conn)),
+     ensure_time_columns),
+    ('weekday_index', "flight_weekdays table and its sync triggers",
+     lambda conn: not schema_objects(WEEKDAY_INDEX_SCHEMA) <= _existing_objects(conn),
+     ensure_weekday_index),
+    ('codeshare_indexes', "codeshare group and marketing flight indexes",
+     lambda conn: not schema_objects(CODESHARE_INDEXES) <= _existing_objects(conn),
+     lambda conn: ensure_codeshare_indexes(conn) or 0),
+    ('text_index', "flights_fts text search index and its sync triggers",
+     lambda conn: fts5_available(conn) and not schema_objects(TEXT_INDEX_SCHEMA) <= _existing_objects(conn),
+     ensure_text_index),
+    ('history', "collection_runs and flight_changes tables",
+     lambda conn: not schema_objects(HISTORY_SCHEMA) <= _existing_objects(conn),
+     lambda conn: ensure_history_schema(conn) or 0),
+    ('ledger', "ingestion_ledger and ingestion_rows tables",
+     lambda conn: not (schema_objects(LEDGER_SCHEMA) <= _existing_objects(conn)
+                       and 'row_values' in _columns(conn, 'ingestion_rows')),
+     lambda conn: ensure_ledger_schema(conn) or 0),
+]
+
+
+def pending_migrations(conn: sqlite3.Connection) -> List[str]:
+    """
+    Names of the migrations the database still needs, in the order they apply
+
+    Only reads sqlite_master and table_info, so it is safe on every connect.
+    """
+    return [name for name, _, pending, _ in MIGRATIONS if pending(conn)]
+
+
+def apply_migrations(conn: sqlite3.Connection) -> Dict[str, int]:
+    """
+    Apply every pending migration and commit
+
+    Args:
+        conn (sqlite3.Connection): Connection to a database with a flights table
+
+    Returns:
+        Dict[str, int]: Rows filled per applied migration (0 for schema-only steps)
+    """
+    applied = {}
+    for name, description, pending, apply in MIGRATIONS:
+        if not pending(conn):
+            continue
+        # Schema changes run outside any open transaction (executescript commits first)
+        applied[name] = apply(conn)
+        conn.commit()
+        logger.info(f"🛠️  Migrated {name}: {description} ({applied[name]:,} rows filled)")
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upgrade the flights database schema (asks for confirmation)")
+    parser.add_argument('--db', help='Database path (default: DB/flight_schedules.db)')
+    parser.add_argument('--check', action='store_true',
+                        help='Only list pending migrations (exit status 1 if there are any)')
+    parser.add_argument('--yes', action='store_true', help='Apply without asking')
+    args = parser.parse_args()
+    configure_logging()
+
+    db_path = args.db or default_db_path()
+    conn = sqlite3.connect(db_path)
+    try:
+        configure_connection(conn)
+        if not _columns(conn, 'flights'):
+            logger.error(f"❌ {db_path} has no flights table")
+            sys.exit(2)
+
+        pending = pending_migrations(conn)
+        if not pending:
+            print(f"✅ {db_path} is up to date")
+            return
+        print(f"Pending migrations for {db_path}:")
+        for name, description, _, _ in MIGRATIONS:
+            if name in pending:
+                print(f"  {name:<18} {description}")
+        if args.check:
+            sys.exit(1)
+
+        if not args.yes and input(f"\nApply {len(pending)} migrations? [y/N] ").strip().lower() != 'y':
+            print("Nothing changed")
+            return
+        apply_migrations(conn)
+        print(f"✅ {db_path} migrated")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
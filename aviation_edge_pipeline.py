@@ -0,0 +1,288 @@
+"""
+Aviation Edge Collection Pipeline
+Staged fetch -> transform -> write pipeline for API collections
+Overlaps network waits with database commits using bounded queues for backpressure
+"""
+
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from aviation_edge_db import AviationEdgeDB, default_db_path
+from aviation_edge_logging import get_logger
+
+logger = get_logger('pipeline')
+
+# A collection unit: (airport_code, query_type, target_date)
+CollectionUnit = Tuple[str, str, str]
+
+# Queue sentinel marking the end of a stage's input
+_STOP = object()
+
+
+class CollectionPipeline:
+    """
+    Run collection units through fetch workers, a transform stage and one DB writer
+
+    - Fetch workers pull units and push raw flight batches downstream
+    - The transform stage applies weekday correction and standardized formatting
+    - A single writer owns the SQLite connection and commits in large transactions,
+      storing only rows whose ledger fingerprint changed
+
+    Every hand-off is a bounded queue, so a slow writer throttles fetching instead
+    of letting parsed batches pile up in memory.
+    """
+
+    def __init__(self, fetch: Callable[[str, str, str], Iterable[List[Dict]]],
+                 enhance: Optional[Callable[[List[Dict]], List[Dict]]] = None,
+                 db_path: str = None, fetch_workers: int = 4, queue_size: int = 8,
+                 transaction_rows: int = 5000):
+        """
+        Initialize the pipeline
+
+        Args:
+            fetch (Callable): fetch(airport, query_type, date) -> iterable of raw flight batches
+            enhance (Callable): Batch weekday correction, returns the flights to keep
+            db_path (str): Database path (defaults to the production database)
+            fetch_workers (int): Number of concurrent fetch threads
+            queue_size (int): Maximum batches waiting between stages
+            transaction_rows (int): Rows written before the writer commits
+
+        API pacing is left to the fetch callable (the collectors' shared rate controller).
+        """
+        self.fetch = fetch
+        self.enhance = enhance
+        self.db_path = db_path or default_db_path()
+        self.fetch_workers = max(1, fetch_workers)
+        self.queue_size = max(1, queue_size)
+        self.transaction_rows = max(1, transaction_rows)
+
+        self._formatter = AviationEdgeDB(self.db_path)
+        self._stats_lock = threading.Lock()
+        self._writer_failed = threading.Event()
+
+    def run(self, units: List[CollectionUnit]) -> Dict[CollectionUnit, Dict]:
+        """
+        Collect all units and block until everything is written
+
+        Args:
+            units (List[CollectionUnit]): (airport_code, query_type, target_date) tuples
+
+        Returns:
+            Dict: Per-unit stats with 'retrieved', 'stored', 'error' and 'committed' keys.
+                'committed' is True only when every row of the unit is durably in the
+                database; a unit that was not is always reported with an error.
+        """
+        stats = {unit: {'retrieved': 0, 'stored': 0, 'error': None, 'committed': False} for unit in units}
+        self._writer_failed.clear()
+        if os.getenv('DB_WRITER_ADDRESS', '').strip():
+            # The write stage groups many units per transaction, which the service's
+            # one-batch requests cannot express; it stays the only writer of this run
+            logger.warning("⚠️ Pipeline mode writes through its own connection, DB_WRITER_ADDRESS is not used")
+
+        unit_queue = queue.Queue()
+        for unit in units:
+            unit_queue.put(unit)
+
+        transform_queue = queue.Queue(maxsize=self.queue_size)
+        write_queue = queue.Queue(maxsize=self.queue_size)
+
+        fetchers = [
+            threading.Thread(target=self._fetch_worker, args=(unit_queue, transform_queue, stats),
+                             name=f"fetch-{i}", daemon=True)
+            for i in range(min(self.fetch_workers, max(1, len(units))))
+        ]
+        transformer = threading.Thread(target=self._transform_stage,
+                                       args=(transform_queue, write_queue, len(fetchers), stats),
+                                       name="transform", daemon=True)
+        writer = threading.Thread(target=self._write_stage, args=(write_queue, stats),
+                                  name="db-writer", daemon=True)
+
+        started = time.time()
+        for thread in fetchers + [transformer, writer]:
+            thread.start()
+        for thread in fetchers + [transformer, writer]:
+            thread.join()
+
+        if self._writer_failed.is_set():
+            # Units never fetched, dropped while draining or lost with a failed commit
+            for unit, unit_stats in stats.items():
+                if not unit_stats['committed']:
+                    self._fail_unit(stats, unit, "not written: database writer stopped")
+
+        total_retrieved = sum(s['retrieved'] for s in stats.values())
+        total_stored = sum(s['stored'] for s in stats.values())
+        logger.info(f"🚀 Pipeline finished {len(units)} units in {time.time() - started:.1f}s: "
+                    f"{total_retrieved} retrieved, {total_stored} stored")
+
+        return stats
+
+    def _fetch_worker(self, unit_queue: queue.Queue, transform_queue: queue.Queue, stats: Dict):
+        """Fetch stage: pull units and push raw batches (blocks when downstream is full)"""
+        try:
+            while not self._writer_failed.is_set():
+                try:
+                    unit = unit_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                try:
+                    for raw_batch in self.fetch(*unit):
+                        with self._stats_lock:
+                            stats[unit]['retrieved'] += len(raw_batch)
+                        transform_queue.put((unit, raw_batch))
+                        if self._writer_failed.is_set():
+                            self._fail_unit(stats, unit, "fetch stopped: database writer stopped")
+                            break
+                    # Done fetching; the writer marks the unit committed once its rows are durable
+                    transform_queue.put((unit, None))
+                except Exception as e:
+                    with self._stats_lock:
+                        stats[unit]['error'] = str(e)
+                    logger.error(f"   ❌ Fetch failed for {unit[0]} {unit[1]} {unit[2]}: {e}")
+        finally:
+            transform_queue.put(_STOP)
+
+    def _transform_stage(self, transform_queue: queue.Queue, write_queue: queue.Queue,
+                         producers: int, stats: Dict):
+        """Transform stage: weekday correction and standardized formatting"""
+        stopped = 0
+        try:
+            while stopped < producers:
+                item = transform_queue.get()
+                if item is _STOP:
+                    stopped += 1
+                    continue
+
+                unit, raw_batch = item
+                if raw_batch is None:
+                    write_queue.put(item)
+                    continue
+                airport_code, query_type, target_date = unit
+                try:
+                    if self.enhance:
+                        raw_batch = self.enhance(raw_batch)
+                    prepared = self._formatter.prepare_flight_batch(
+                        raw_batch, query_type, airport_code, target_date
+                    )
+                except Exception as e:
+                    with self._stats_lock:
+                        stats[unit]['error'] = str(e)
+                    logger.error(f"   ❌ Transform failed for {airport_code} {query_type} {target_date}: {e}")
+                    continue
+
+                if prepared:
+                    write_queue.put((unit, prepared))
+        finally:
+            write_queue.put(_STOP)
+
+    def _write_stage(self, write_queue: queue.Queue, stats: Dict):
+        """
+        Writer stage: the only thread touching SQLite, committing in large transactions
+
+        A unit is marked committed once the end of its fetch has passed the writer and
+        the transaction holding its last rows was committed. Units in a transaction
+        that fails to commit, and every unit arriving after the writer stopped, are
+        marked failed.
+        """
+        db = AviationEdgeDB(self.db_path)
+        connected = db.connect()
+        if not connected:
+            self._writer_failed.set()
+
+        pending_rows = 0
+        pending_units = set()   # units with rows or a completed fetch in the open transaction
+        payloads = {}
+        try:
+            while True:
+                item = write_queue.get()
+                if item is _STOP:
+                    break
+                unit, prepared = item
+                if not connected:
+                    # Keep draining so upstream stages never block on a dead writer
+                    self._fail_unit(stats, unit, "not written: database writer stopped")
+                    continue
+
+                if prepared is None:
+                    # Every batch of the unit has been handled; it is durable with the next commit
+                    pending_units.add((unit, True))
+                    if write_queue.empty():
+                        connected = self._commit(db, pending_units, stats)
+                        pending_rows = 0
+                    continue
+
+                airport_code, query_type, target_date = unit
+                try:
+                    if unit not in payloads:
+                        payloads[unit] = db.open_payload(query_type, airport_code, target_date)
+                    # Only rows that differ from the last collection of this unit are stored;
+                    # a batch failing partway is undone without touching the rest of the transaction
+                    with db.savepoint('unit_batch'):
+                        stored = db.store_prepared_flights(payloads[unit].add(prepared), commit=False,
+                                                         payload=payloads[unit])
+                    with self._stats_lock:
+                        stats[unit]['stored'] += stored
+                    pending_rows += len(prepared)
+                    pending_units.add((unit, False))
+                except Exception as e:
+                    self._fail_unit(stats, unit, str(e))
+                    logger.error(f"   ❌ Write failed for {unit[0]} {unit[1]} {unit[2]}: {e}")
+
+                # Commit when the transaction is large enough or the writer has caught up
+                if pending_rows >= self.transaction_rows or write_queue.empty():
+                    connected = self._commit(db, pending_units, stats)
+                    pending_rows = 0
+            if connected:
+                self._record_payloads(db, payloads, stats)
+                self._commit(db, pending_units, stats)
+        finally:
+            # Only reached with pending units when the loop itself raised
+            for unit, _ in pending_units:
+                self._fail_unit(stats, unit, "not written: writer stage stopped before commit")
+            db.close()
+
+    def _fail_unit(self, stats: Dict, unit: CollectionUnit, error: str):
+        """Mark a unit failed, keeping the first error it reported"""
+        with self._stats_lock:
+            stats[unit]['committed'] = False
+            if stats[unit]['error'] is None:
+                stats[unit]['error'] = error
+
+    def _record_payloads(self, db: AviationEdgeDB, payloads: Dict, stats: Dict):
+        """Record ledger fingerprints for units that were written without errors"""
+        for unit, payload in payloads.items():
+            # A failed unit may have rows that never reached the database; leave it
+            # unrecorded so the next collection compares against the old fingerprints
+            if stats[unit]['error']:
+                continue
+            try:
+                db.record_payload(payload, commit=False)
+            except Exception as e:
+                logger.error(f"   ❌ Ledger update failed for {unit[0]} {unit[1]} {unit[2]}: {e}")
+
+    def _commit(self, db: AviationEdgeDB, pending_units: set, stats: Dict) -> bool:
+        """
+        Commit the writer transaction, stopping the pipeline if it cannot be committed
+
+        pending_units holds (unit, fetch_done) entries for the open transaction; on success
+        units whose fetch is done become committed, on failure all of them are failed.
+        """
+        try:
+            db.commit()
+        except Exception as e:
+            logger.error(f"   ❌ Commit failed, stopping pipeline: {e}")
+            self._writer_failed.set()
+            for unit, _ in pending_units:
+                self._fail_unit(stats, unit, f"not written: commit failed ({e})")
+            pending_units.clear()
+            return False
+
+        with self._stats_lock:
+            for unit, fetch_done in pending_units:
+                if fetch_done and stats[unit]['error'] is None:
+                    stats[unit]['committed'] = True
+        pending_units.clear()
+        return True
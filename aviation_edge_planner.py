@@ -0,0 +1,244 @@
+"""
+Aviation Edge Call Planner
+Dry-run planning of the smallest (airport, type, date) call set covering a target airport set
+A departure call at A already returns A->B, so B's arrival call is only needed for routes not covered
+"""
+
+import argparse
+import os
+import sqlite3
+from collections import defaultdict, deque
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Set, Tuple
+
+from aviation_edge_db import AviationEdgeDB, default_db_path
+from aviation_edge_logging import configure_logging, get_logger
+from aviation_edge_rate import MIN_CALL_INTERVAL
+
+logger = get_logger('planner')
+
+# Routes between airports, per operating weekday, from the flight_weekdays index
+_ROUTES_SQL = """
+    SELECT DISTINCT dep.iata_code, arr.iata_code, w.weekday
+    FROM flight_weekdays w
+    JOIN dim_airports dep ON dep.id = w.dep_airport_id
+    JOIN dim_airports arr ON arr.id = w.arr_airport_id
+    WHERE dep.iata_code IN ({airports}) AND arr.iata_code IN ({airports})
+"""
+
+Route = Tuple[str, str]
+Call = Tuple[str, str, str]  # (airport, query_type, target_date)
+
+
+def configured_rate() -> float:
+    """Planned call starts per second (REQUESTS_PER_SECOND, capped like the rate controller)"""
+    return min(float(os.getenv('REQUESTS_PER_SECOND', '10')), 1 / MIN_CALL_INTERVAL)
+
+
+def minimum_cover(routes: Iterable[Route]) -> Tuple[Set[str], Set[str]]:
+    """
+    Smallest set of departure and arrival queries that returns every route
+
+    Routes form a bipartite graph between departure queries (left) and arrival
+    queries (right); a route is covered when either end is queried, so the answer
+    is a minimum vertex cover. By König's theorem it is read off a maximum matching:
+    with Z the vertices reachable from unmatched departure queries along alternating
+    paths, the cover is (departures not in Z) + (arrivals in Z).
+
+    Args:
+        routes (Iterable[Route]): (origin, destination) pairs
+
+    Returns:
+        Tuple[Set[str], Set[str]]: Airports to query for departures, airports to query for arrivals
+    """
+    adjacency: Dict[str, List[str]] = defaultdict(list)
+    for origin, destination in routes:
+        adjacency[origin].append(destination)
+
+    match_left: Dict[str, str] = {}
+    match_right: Dict[str, str] = {}
+    for start in sorted(adjacency):
+        # Breadth-first search for an augmenting path from this departure query
+        found_from: Dict[str, str] = {}  # arrival query -> departure query it was reached from
+        queue = deque([start])
+        end = None
+        while queue and end is None:
+            left = queue.popleft()
+            for right in adjacency[left]:
+                if right in found_from:
+                    continue
+                found_from[right] = left
+                if right not in match_right:
+                    end = right
+                    break
+                queue.append(match_right[right])
+        # Flip the path: every departure query on it takes the arrival query it reached
+        while end is not None:
+            left = found_from[end]
+            previous = match_left.get(left)
+            match_left[left], match_right[end] = end, left
+            end = previous
+
+    # Alternating reachability from unmatched departure queries
+    reached_left = {left for left in adjacency if left not in match_left}
+    reached_right = set()
+    queue = deque(reached_left)
+    while queue:
+        left = queue.popleft()
+        for right in adjacency[left]:
+            if right in reached_right:
+                continue
+            reached_right.add(right)
+            partner = match_right.get(right)
+            if partner is not None and partner not in reached_left:
+                reached_left.add(partner)
+                queue.append(partner)
+
+    return set(adjacency) - reached_left, reached_right
+
+
+def load_routes(conn: sqlite3.Connection, airports: List[str]) -> Dict[int, Set[Route]]:
+    """Known routes among the airports, keyed by ISO weekday (Monday = 1)"""
+    routes: Dict[int, Set[Route]] = defaultdict(set)
+    placeholders = ', '.join('?' * len(airports))
+    for origin, destination, weekday in conn.execute(_ROUTES_SQL.format(airports=placeholders),
+                                                     airports + airports):
+        if origin != destination:
+            routes[weekday].add((origin, destination))
+    return routes
+
+
+def load_fresh_calls(conn: sqlite3.Connection, airports: List[str], dates: List[str],
+                     max_age_hours: float) -> Dict[Call, str]:
+    """Unfiltered calls recorded in the ingestion ledger within max_age_hours, with their recorded_at"""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ingestion_ledger'").fetchone():
+        return {}
+    cutoff = (datetime.now() - timedelta(hours=max_age_hours)).isoformat()
+    rows = conn.execute(f"""
+        SELECT airport_code, query_type, target_date, recorded_at FROM ingestion_ledger
+        WHERE filters = '' AND recorded_at >= ?
+          AND airport_code IN ({', '.join('?' * len(airports))})
+          AND target_date IN ({', '.join('?' * len(dates))})
+    """, [cutoff] + airports + dates)
+    return {(airport, query_type, target_date): recorded_at for airport, query_type, target_date, recorded_at in rows}
+
+
+def plan_calls(conn: sqlite3.Connection, airports: List[str], dates: List[str],
+               max_age_hours: float = 24) -> Dict:
+    """
+    Plan the minimal call set for target airports and dates without calling the API
+
+    For each date, the routes known to operate on its weekday among the airports are
+    covered with minimum_cover(), after dropping routes already returned by a fresh
+    ledger entry (either end queried within max_age_hours). Airports with no known
+    route to or from the others get a departure call so their routes are discovered.
+    Dates inside the 8-day window are skipped. Routes are matched on departure
+    weekday, so overnight flights are assumed to be returned by the arrival query of
+    their departure date like the rest of the flight.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the flights database
+        airports (List[str]): Target airport IATA codes
+        dates (List[str]): Target dates YYYY-MM-DD
+        max_age_hours (float): Ledger entries newer than this count as fresh
+
+    Returns:
+        Dict: 'calls' (planned (airport, type, date) list), 'fresh' (ledger calls still
+            fresh, with recorded_at), 'skipped_dates' (inside the 8-day window),
+            'routes' and 'covered_routes' totals, 'naive_calls' (both types for every
+            airport and date) and 'duration_seconds' at configured_rate()
+    """
+    airports = sorted({airport.upper() for airport in airports})
+    earliest = (date.today() + timedelta(days=8)).isoformat()
+    skipped = [target for target in dates if target < earliest]
+    dates = sorted({target for target in dates if target >= earliest})
+
+    routes = load_routes(conn, airports) if airports else {}
+    fresh = load_fresh_calls(conn, airports, dates, max_age_hours) if airports and dates else {}
+    connected = {airport for weekday_routes in routes.values() for route in weekday_routes for airport in route}
+
+    calls: List[Call] = []
+    total_routes = covered_routes = 0
+    for target in dates:
+        weekday = date.fromisoformat(target).isoweekday()
+        pending = [(origin, destination) for origin, destination in routes.get(weekday, ())
+                   if (origin, 'departure', target) not in fresh and (destination, 'arrival', target) not in fresh]
+        total_routes += len(routes.get(weekday, ()))
+        covered_routes += len(routes.get(weekday, ())) - len(pending)
+
+        departures, arrivals = minimum_cover(pending)
+        departures |= {airport for airport in airports
+                       if airport not in connected and (airport, 'departure', target) not in fresh}
+        calls.extend((airport, 'departure', target) for airport in sorted(departures))
+        calls.extend((airport, 'arrival', target) for airport in sorted(arrivals))
+
+    rate = configured_rate()
+    plan = {
+        'calls': calls,
+        'fresh': fresh,
+        'skipped_dates': skipped,
+        'routes': total_routes,
+        'covered_routes': covered_routes,
+        'naive_calls': 2 * len(airports) * len(dates),
+        'rate': rate,
+        'duration_seconds': len(calls) / rate,
+    }
+    logger.info(f"🗺️  Planned {len(calls):,} calls for {len(airports)} airports x {len(dates)} dates "
+                f"(naive {plan['naive_calls']:,}), {covered_routes:,}/{total_routes:,} route-days already fresh")
+    return plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan the minimal Future Schedules call set (dry run)")
+    parser.add_argument('airports', nargs='+', help='Target airport IATA codes')
+    parser.add_argument('--start', help='First target date YYYY-MM-DD (default: today + 8 days)')
+    parser.add_argument('--days', type=int, default=7, help='Number of consecutive dates (default: 7)')
+    parser.add_argument('--max-age', type=float, default=24,
+                        help='Hours a ledger entry stays fresh (default: 24)')
+    parser.add_argument('--enqueue', metavar='SWEEP_ID',
+                        help='Queue the planned calls as a collection_jobs sweep for the collector workers')
+    parser.add_argument('--db', help='Database path (default: DB/flight_schedules.db)')
+    args = parser.parse_args()
+    configure_logging()
+
+    start = date.fromisoformat(args.start) if args.start else date.today() + timedelta(days=8)
+    dates = [(start + timedelta(days=offset)).isoformat() for offset in range(args.days)]
+
+    db = AviationEdgeDB(args.db or default_db_path())
+    if not db.connect():
+        return
+    try:
+        plan = plan_calls(db.conn, args.airports, dates, args.max_age)
+    finally:
+        db.close()
+
+    if plan['skipped_dates']:
+        logger.warning(f"⚠️  Skipped {len(plan['skipped_dates'])} dates inside the 8-day window: "
+                       f"{', '.join(plan['skipped_dates'])}")
+    by_type = defaultdict(int)
+    for _, query_type, _ in plan['calls']:
+        by_type[query_type] += 1
+
+    print(f"\nCall plan: {len(plan['calls']):,} calls "
+          f"({by_type['departure']:,} departure, {by_type['arrival']:,} arrival) "
+          f"instead of {plan['naive_calls']:,}")
+    print(f"Estimated duration: {timedelta(seconds=round(plan['duration_seconds']))} at {plan['rate']:g} calls/s")
+    print(f"Routes: {plan['routes']:,} route-days, {plan['covered_routes']:,} already fresh in the DB")
+    if plan['fresh']:
+        print(f"\nFresh in DB ({len(plan['fresh']):,} calls, max age {args.max_age:g}h)")
+        for (airport, query_type, target), recorded_at in sorted(plan['fresh'].items()):
+            print(f"  {target} {airport:<4} {query_type:<9} recorded {recorded_at[:16]}")
+    if plan['calls']:
+        print("\nPlanned calls")
+        for airport, query_type, target in plan['calls']:
+            print(f"  {target} {airport:<4} {query_type}")
+
+    if args.enqueue and plan['calls']:
+        from aviation_edge_jobs import JobQueue
+        with JobQueue(args.db) as job_queue:
+            added = job_queue.enqueue(args.enqueue, plan['calls'])
+        logger.info(f"📥 Queued {added:,} planned calls as sweep {args.enqueue}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Aviation Edge Rate Control
+Adaptive request pacing shared by every API call in a collector process
+AIMD concurrency, Retry-After handling and jittered backoff per error class
+"""
+
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+import requests
+
+from aviation_edge_logging import get_logger
+
+logger = get_logger('rate')
+
+# Error classes with their base backoff in seconds; anything else is not retried
+THROTTLED = 'throttled'   # 429 - the plan's limit was hit
+SERVER = 'server'         # 5xx - transient upstream failure
+NETWORK = 'network'       # timeouts and connection errors
+BASE_BACKOFF = {THROTTLED: 2.0, SERVER: 1.0, NETWORK: 0.5}
+
+RETRYABLE_STATUS = {429: THROTTLED, 500: SERVER, 502: SERVER, 503: SERVER, 504: SERVER}
+
+# Mandatory safety delay between call starts, whatever REQUESTS_PER_SECOND allows
+MIN_CALL_INTERVAL = 0.5
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header into seconds to wait
+
+    Args:
+        value (str): Either delay-seconds ("120") or an HTTP-date
+
+    Returns:
+        float: Seconds from now (never negative), or None if absent/unparseable
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def classify_response(status_code: int) -> Optional[str]:
+    """Error class of an HTTP status, or None if the response should be returned as is"""
+    return RETRYABLE_STATUS.get(status_code)
+
+
+class AdaptiveRateController:
+    """
+    Pace API calls close to the plan's limit without bursts of throttled calls
+
+    - Call starts are paced at the current rate across all threads, never closer
+      than MIN_CALL_INTERVAL apart. The rate starts at the plan's rate, is cut multiplicatively on every 429 and creeps back up
+      additively on success, so it settles just under the effective limit
+    - In-flight calls are capped by a concurrency limit that halves on every 429.
+      The halved value is remembered as the learned limit: below it the limit
+      recovers by one slot per success, above it only additively (about +1 per
+      limit's worth of successes), so probing past the plan's limit stays gentle
+    - A Retry-After from the API pauses all callers until it has passed
+    - Retries back off with full jitter, scaled per error class
+    """
+
+    def __init__(self, rate: float = None, max_concurrency: int = None, min_concurrency: int = 1,
+                 decrease_factor: float = 0.5, max_retries: int = None, max_backoff: float = 60.0,
+                 min_interval: float = MIN_CALL_INTERVAL):
+        """
+        Initialize the controller
+
+        Args:
+            rate (float): Maximum call starts per second (defaults to REQUESTS_PER_SECOND)
+            max_concurrency (int): Upper bound for in-flight calls (defaults to API_MAX_CONCURRENCY)
+            min_concurrency (int): Lower bound the limit never drops below
+            decrease_factor (float): Multiplier applied to the limit on throttling
+            max_retries (int): Retries per call for retryable errors (defaults to MAX_RETRIES)
+            max_backoff (float): Cap for a single backoff sleep in seconds
+            min_interval (float): Minimum seconds between call starts
+        """
+        self.rate = rate or float(os.getenv('REQUESTS_PER_SECOND', '10'))
+        self.max_concurrency = max_concurrency or int(os.getenv('API_MAX_CONCURRENCY', '4'))
+        self.min_concurrency = max(1, min_concurrency)
+        self.decrease_factor = decrease_factor
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('MAX_RETRIES', '3'))
+        self.max_backoff = max_backoff
+        self.min_interval = min_interval
+
+        # Start cautiously and let successes open the window
+        self.current_rate = self.rate
+        self.rate_step = max(0.01, self.rate / 100)
+        self.limit = float(self.min_concurrency)
+        self.learned_limit = float(self.max_concurrency)
+        self.in_flight = 0
+
+        self._cond = threading.Condition()
+        self._next_start = 0.0
+        self._paused_until = 0.0
+        self.stats: Dict[str, int] = {'calls': 0, THROTTLED: 0, SERVER: 0, NETWORK: 0}
+
+    def _acquire(self):
+        """Wait for a free concurrency slot and the next paced start, then take the slot"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = max(self._paused_until, self._next_start) - now
+                if self.in_flight < int(self.limit) and wait <= 0:
+                    break
+                self._cond.wait(timeout=wait if wait > 0 else None)
+            self.in_flight += 1
+            self._next_start = max(now, self._next_start) + max(self.min_interval, 1.0 / self.current_rate)
+            self.stats['calls'] += 1
+
+    def _release(self):
+        """Give a concurrency slot back"""
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Hold one concurrency slot for the duration of a call"""
+        self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    def on_success(self):
+        """Grow the limit: quickly up to the learned limit, additively beyond it"""
+        with self._cond:
+            self.current_rate = min(self.rate, self.current_rate + self.rate_step)
+            if self.limit < self.max_concurrency:
+                step = 1.0 if self.limit < self.learned_limit else 1.0 / self.limit
+                self.limit = min(float(self.max_concurrency), self.limit + step)
+                self._cond.notify_all()
+
+    def on_throttled(self, retry_after: Optional[float]):
+        """Multiplicative decrease and a shared pause honouring Retry-After"""
+        with self._cond:
+            self.stats[THROTTLED] += 1
+            self.limit = max(float(self.min_concurrency), self.limit * self.decrease_factor)
+            self.learned_limit = self.limit
+            self.current_rate = max(self.rate_step, self.current_rate * self.decrease_factor)
+            if retry_after is not None:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            self._cond.notify_all()
+        logger.warning(f"   🐢 Throttled (429): {self.current_rate:.2f} calls/s, concurrency limit {int(self.limit)}"
+                       f"{f', pausing {retry_after:.1f}s (Retry-After)' if retry_after else ''}")
+
+    def backoff(self, error_class: str, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Seconds to wait before retry number `attempt` (0-based)
+
+        Full jitter spreads retries from concurrent callers; a Retry-After wins over
+        the computed delay, with a little jitter so paused callers do not restart together.
+        """
+        if retry_after is not None:
+            return retry_after + random.uniform(0, min(1.0, retry_after * 0.1 + 0.1))
+        ceiling = min(self.max_backoff, BASE_BACKOFF.get(error_class, 1.0) * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def request(self, send: Callable[[], requests.Response], description: str = '') -> requests.Response:
+        """
+        Perform a call with pacing, adaptive concurrency and retries
+
+        Args:
+            send (Callable): Performs one HTTP request and returns the response
+            description (str): Short label for log messages
+
+        Returns:
+            requests.Response: Final response (success, non-retryable status, or the
+                last retryable one once retries are exhausted)
+
+        Raises:
+            requests.exceptions.RequestException: If the last attempt failed at network level
+        """
+        response = self._call(send, description)
+        self._release()
+        return response
+
+    @contextmanager
+    def stream(self, send: Callable[[], requests.Response], description: str = ''):
+        """
+        Perform a streamed call (stream=True) like request(), holding its slot until the body is read
+
+        A streamed call is still transferring after the headers arrive, so the slot is
+        only released, and the response closed, when the with block exits.
+
+        Yields:
+            requests.Response: Final response, as returned by request()
+        """
+        response = self._call(send, description)
+        try:
+            with response:
+                yield response
+        finally:
+            self._release()
+
+    def _call(self, send: Callable[[], requests.Response], description: str) -> requests.Response:
+        """Retry loop of request(); the final response is returned with its slot still held"""
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            self._acquire()
+            try:
+                response = send()
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                self._release()
+                error_class = NETWORK
+                with self._cond:
+                    self.stats[NETWORK] += 1
+                if attempt == self.max_retries:
+                    raise
+                logger.warning(f"   ⚠️  {description or 'Request'} network error (attempt {attempt + 1}): {e}")
+            except BaseException:
+                self._release()
+                raise
+            else:
+                error_class = classify_response(response.status_code)
+                if error_class is None:
+                    self.on_success()
+                    return response
+                if error_class == THROTTLED:
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    self.on_throttled(retry_after)
+                else:
+                    with self._cond:
+                        self.stats[error_class] += 1
+                if attempt == self.max_retries:
+                    return response
+                logger.warning(f"   ⚠️  {description or 'Request'} returned {response.status_code} "
+                               f"(attempt {attempt + 1}), retrying")
+                response.close()
+                self._release()
+
+            time.sleep(self.backoff(error_class, attempt, retry_after))
+
+
+_shared_controller: Optional[AdaptiveRateController] = None
+_shared_lock = threading.Lock()
+
+
+def shared_controller() -> AdaptiveRateController:
+    """The process-wide controller, so all collectors and pipeline workers share one limit"""
+    global _shared_controller
+    with _shared_lock:
+        if _shared_controller is None:
+            _shared_controller = AdaptiveRateController()
+        return _shared_controller
@@ -0,0 +1,250 @@
+"""
+Aviation Edge Source Reconciliation
+Hash-joins departure-sourced and arrival-sourced rows of the same operating flight
+Reports weekday/time/aircraft mismatches and one-sided coverage, optionally writing canonical rows
+"""
+
+import argparse
+import sqlite3
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from aviation_edge_db import AviationEdgeDB, default_db_path
+from aviation_edge_logging import configure_logging, get_logger
+
+logger = get_logger('reconcile')
+
+# Operating flight key: one physical flight regardless of marketing number or source query
+KEY_COLUMNS = ('codeshare_group_id', 'dep_iata_code', 'arr_iata_code', 'dep_scheduled_time')
+
+CANONICAL_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS flights_reconciled (
+        codeshare_group_id TEXT NOT NULL,
+        dep_iata_code TEXT NOT NULL,
+        arr_iata_code TEXT NOT NULL,
+        dep_scheduled_time TEXT NOT NULL,
+        operating_airline_iata TEXT,
+        operating_flight_number TEXT,
+        arr_scheduled_time TEXT,
+        weekdays TEXT,
+        aircraft_model_text TEXT,
+        sources TEXT NOT NULL,
+        status TEXT NOT NULL,
+        reconciled_at TEXT NOT NULL,
+        PRIMARY KEY (codeshare_group_id, dep_iata_code, arr_iata_code, dep_scheduled_time)
+    ) WITHOUT ROWID;
+"""
+
+_STREAM_SQL = """
+    SELECT COALESCE(codeshare_group_id, airline_iata_code || flight_iata_number),
+           dep_iata_code, arr_iata_code, dep_scheduled_time, query_type,
+           COALESCE(NULLIF(operating_airline_iata, ''), airline_iata_code),
+           COALESCE(NULLIF(operating_flight_number, ''), flight_iata_number),
+           arr_scheduled_time, weekdays, aircraft_model_text
+    FROM flights
+"""
+
+
+class _Side:
+    """Everything one source query type says about an operating flight"""
+    __slots__ = ('weekdays', 'arrival_times', 'aircraft', 'rows')
+
+    def __init__(self):
+        self.weekdays: Set[int] = set()
+        self.arrival_times: Set[str] = set()
+        self.aircraft: Set[str] = set()
+        self.rows = 0
+
+
+def _parse_weekdays(weekdays: Optional[str]) -> Set[int]:
+    return {int(day) for day in (weekdays or '').replace(' ', '').split(',') if day.isdigit()}
+
+
+def _shifted(weekdays: Set[int], days: int) -> Set[int]:
+    return {(day - 1 + days) % 7 + 1 for day in weekdays}
+
+
+def classify(departure: Optional[_Side], arrival: Optional[_Side]) -> List[str]:
+    """
+    Reconciliation status of one operating flight
+
+    Returns:
+        List[str]: ['departure_only'] / ['arrival_only'] for one-sided coverage,
+            ['match'] when both sources agree, otherwise the disagreeing fields:
+            'weekday_shift' (arrival weekdays are the departure weekdays moved by one day,
+            i.e. the overnight correction went the other way), 'weekdays',
+            'arrival_time' and 'aircraft'
+    """
+    if arrival is None:
+        return ['departure_only']
+    if departure is None:
+        return ['arrival_only']
+
+    issues = []
+    if departure.weekdays != arrival.weekdays:
+        if arrival.weekdays in (_shifted(departure.weekdays, 1), _shifted(departure.weekdays, -1)):
+            issues.append('weekday_shift')
+        else:
+            issues.append('weekdays')
+    if departure.arrival_times != arrival.arrival_times:
+        issues.append('arrival_time')
+    if departure.aircraft - {''} and arrival.aircraft - {''} and departure.aircraft != arrival.aircraft:
+        issues.append('aircraft')
+    return issues or ['match']
+
+
+class Reconciler:
+    """
+    One streaming pass over flights, hash-joining the two source perspectives
+
+    Every row is folded into an in-memory hash table keyed on the operating flight key
+    (codeshare group, route, scheduled departure), with one side per query_type. Only
+    the aggregated sides are kept, never the raw rows.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.flights: Dict[tuple, Dict] = {}
+
+    def run(self) -> Dict:
+        """
+        Build the join and classify every operating flight
+
+        Returns:
+            Dict: 'rows' read, 'flights' joined, 'status' counts and 'coverage'
+                (one-sided flights per airport of the missing side)
+        """
+        rows = 0
+        cursor = self.conn.execute(_STREAM_SQL)
+        cursor.arraysize = 5000
+        while True:
+            batch = cursor.fetchmany()
+            if not batch:
+                break
+            rows += len(batch)
+            for (group, dep, arr, dep_time, query_type, airline, flight,
+                 arr_time, weekdays, aircraft) in batch:
+                # A row from neither source would leave an entry with no side at all
+                if query_type not in ('departure', 'arrival'):
+                    continue
+                entry = self.flights.get((group, dep, arr, dep_time))
+                if entry is None:
+                    entry = self.flights[(group, dep, arr, dep_time)] = {
+                        'airline': airline, 'flight': flight, 'departure': None, 'arrival': None
+                    }
+                side = entry[query_type]
+                if side is None:
+                    side = entry[query_type] = _Side()
+                side.weekdays |= _parse_weekdays(weekdays)
+                side.arrival_times.add(arr_time or '')
+                side.aircraft.add(aircraft or '')
+                side.rows += 1
+
+        status = Counter()
+        coverage = Counter()
+        for (group, dep, arr, dep_time), entry in self.flights.items():
+            entry['status'] = classify(entry['departure'], entry['arrival'])
+            status.update(entry['status'])
+            if entry['status'] == ['departure_only']:
+                coverage[f"{arr} arrivals"] += 1
+            elif entry['status'] == ['arrival_only']:
+                coverage[f"{dep} departures"] += 1
+
+        logger.info(f"🔀 Reconciled {rows:,} rows into {len(self.flights):,} operating flights: "
+                    + ', '.join(f"{name} {count:,}" for name, count in status.most_common()))
+        return {'rows': rows, 'flights': len(self.flights), 'status': dict(status), 'coverage': dict(coverage)}
+
+    def mismatches(self, limit: int = None) -> List[Dict]:
+        """Operating flights whose two sources disagree (after run())"""
+        found = []
+        for (group, dep, arr, dep_time), entry in self.flights.items():
+            if entry['status'][0] in ('match', 'departure_only', 'arrival_only'):
+                continue
+            departure, arrival = entry['departure'], entry['arrival']
+            found.append({
+                'flight': entry['flight'], 'route': f"{dep}→{arr}", 'dep_time': dep_time,
+                'status': entry['status'],
+                'departure_weekdays': sorted(departure.weekdays), 'arrival_weekdays': sorted(arrival.weekdays),
+                'departure_arrival_times': sorted(departure.arrival_times),
+                'arrival_arrival_times': sorted(arrival.arrival_times),
+            })
+            if limit and len(found) >= limit:
+                break
+        return found
+
+    def write_canonical(self) -> int:
+        """
+        Replace flights_reconciled with one canonical row per operating flight (after run())
+
+        Departure-sourced values win where both sources exist: weekdays follow the
+        project's departure-day reference, and the arrival time and aircraft come from
+        the departure side unless it has none. flights itself is never modified.
+
+        Returns:
+            int: Number of canonical rows written
+        """
+        now = datetime.now().isoformat()
+        rows = []
+        for (group, dep, arr, dep_time), entry in self.flights.items():
+            primary = entry['departure'] or entry['arrival']
+            secondary = entry['arrival'] or entry['departure']
+            arrival_times = (primary.arrival_times - {''}) or (secondary.arrival_times - {''})
+            aircraft = (primary.aircraft - {''}) or (secondary.aircraft - {''})
+            sources = 'both' if entry['departure'] and entry['arrival'] else \
+                ('departure' if entry['departure'] else 'arrival')
+            rows.append((group, dep, arr, dep_time, entry['airline'], entry['flight'],
+                         min(arrival_times) if arrival_times else None,
+                         ','.join(str(day) for day in sorted(primary.weekdays or secondary.weekdays)),
+                         min(aircraft) if aircraft else None,
+                         sources, ','.join(entry['status']), now))
+
+        self.conn.executescript(CANONICAL_SCHEMA)
+        with self.conn:
+            self.conn.execute("DELETE FROM flights_reconciled")
+            self.conn.executemany(
+                "INSERT INTO flights_reconciled VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        logger.info(f"💾 Wrote {len(rows):,} canonical rows to flights_reconciled")
+        return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile departure- and arrival-sourced flight rows")
+    parser.add_argument('--db', help='Database path (default: DB/flight_schedules.db)')
+    parser.add_argument('--write', action='store_true', help='Write canonical rows to flights_reconciled')
+    parser.add_argument('--limit', type=int, default=20, help='Mismatch examples to list (default: 20)')
+    args = parser.parse_args()
+    configure_logging()
+
+    db = AviationEdgeDB(args.db or default_db_path())
+    if not db.connect():
+        return
+    try:
+        reconciler = Reconciler(db.conn)
+        summary = reconciler.run()
+
+        print(f"\nReconciliation: {summary['rows']:,} rows, {summary['flights']:,} operating flights")
+        for name, count in sorted(summary['status'].items(), key=lambda item: -item[1]):
+            print(f"  {name:<15} {count:>8,}")
+        if summary['coverage']:
+            print("\nOne-sided coverage (missing side)")
+            for name, count in sorted(summary['coverage'].items(), key=lambda item: -item[1])[:args.limit]:
+                print(f"  {name:<15} {count:>8,}")
+        examples = reconciler.mismatches(args.limit)
+        if examples:
+            print("\nMismatches")
+            for example in examples:
+                print(f"  {example['flight']:<8} {example['route']} {example['dep_time']}  "
+                      f"{','.join(example['status'])}: weekdays {example['departure_weekdays']} vs "
+                      f"{example['arrival_weekdays']}, arrives {example['departure_arrival_times']} vs "
+                      f"{example['arrival_arrival_times']}")
+
+        if args.write:
+            reconciler.write_canonical()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
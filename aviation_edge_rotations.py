@@ -0,0 +1,198 @@
+"""
+Aviation Edge Rotation Inference
+Chains each arrival to the next feasible departure of the same airline and aircraft type
+Produces inferred aircraft rotations and turnaround distributions for a whole airline
+"""
+
+import sqlite3
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from aviation_edge_logging import get_logger
+from aviation_edge_storage import read_frame
+
+logger = get_logger('rotations')
+
+WEEK_MINUTES = 7 * 24 * 60
+
+# Turnaround histogram bucket size in minutes
+TURN_BUCKET_MINUTES = 15
+
+# One leg per physical flight and operating weekday, with its aircraft type
+# (every non-grouped column aggregated, so DuckDB runs the same text). Ordered, so
+# turnaround ties are chained the same way whichever backend returned the legs.
+_LEGS_SQL = """
+    SELECT MIN(COALESCE(NULLIF(f.operating_flight_number, ''), f.flight_iata_number)) AS flight,
+           MIN(f.dep_iata_code) AS dep, MIN(f.arr_iata_code) AS arr, w.weekday,
+           w.dep_minutes, MIN(f.block_minutes) AS block,
+           COALESCE(MIN(a.display_name), 'N/A') AS aircraft
+    FROM flight_weekdays w
+    JOIN flights f ON f.id = w.flight_id
+    LEFT JOIN dim_aircraft a ON a.id = f.aircraft_id
+    WHERE COALESCE(NULLIF(f.operating_airline_iata, ''), f.airline_iata_code) = ?
+      AND w.dep_minutes IS NOT NULL AND f.block_minutes IS NOT NULL
+    GROUP BY COALESCE(f.codeshare_group_id, f.airline_iata_code || f.flight_iata_number),
+             f.dep_airport_id, f.arr_airport_id, w.weekday, w.dep_minutes
+    ORDER BY w.weekday, w.dep_minutes, flight, dep, arr
+"""
+
+
+def load_legs(conn: sqlite3.Connection, airline: str) -> pd.DataFrame:
+    """
+    Weekly legs operated by an airline on a minutes-of-week timeline
+
+    Returns:
+        pd.DataFrame: flight, dep, arr, aircraft, dep_time, arr_time (minutes since Monday 00:00;
+            arrivals past the end of the week run beyond WEEK_MINUTES)
+    """
+    legs = read_frame(conn, _LEGS_SQL, [airline.upper()])
+    legs['dep_time'] = (legs['weekday'] - 1) * 24 * 60 + legs['dep_minutes']
+    legs['arr_time'] = legs['dep_time'] + legs['block']
+    return legs.drop(columns=['weekday', 'dep_minutes', 'block'])
+
+
+def chain_turnarounds(arrivals: np.ndarray, departures: np.ndarray, min_turn: int,
+                      max_turn: int) -> List[Tuple[int, int, int]]:
+    """
+    Link arrivals to departures at one airport for one aircraft type (sweep line)
+
+    Both timelines are swept in time order: each arrival takes the earliest departure
+    not yet taken that leaves at least min_turn and at most max_turn minutes later
+    (first in, first out). Departure times are repeated one week later so a late
+    Sunday arrival can turn onto a Monday departure.
+
+    Args:
+        arrivals (np.ndarray): Arrival times in minutes of week
+        departures (np.ndarray): Departure times in minutes of week
+        min_turn (int): Minimum ground time in minutes
+        max_turn (int): Maximum ground time in minutes
+
+    Returns:
+        List[Tuple]: (arrival position, departure position, turn minutes)
+    """
+    arrival_order = np.argsort(arrivals, kind='stable')
+    departure_times = np.concatenate([departures, departures + WEEK_MINUTES])
+    departure_order = np.argsort(departure_times, kind='stable')
+    taken = np.zeros(len(departures), dtype=bool)
+
+    links = []
+    pointer = 0
+    for arrival in arrival_order:
+        earliest = arrivals[arrival] + min_turn
+        # Departures before this arrival's earliest time are too early for every later arrival too
+        while pointer < len(departure_order) and departure_times[departure_order[pointer]] < earliest:
+            pointer += 1
+        candidate = pointer
+        while candidate < len(departure_order) and taken[departure_order[candidate] % len(departures)]:
+            candidate += 1
+        if candidate == len(departure_order):
+            continue
+        turn = int(departure_times[departure_order[candidate]] - arrivals[arrival])
+        if turn <= max_turn:
+            departure = departure_order[candidate] % len(departures)
+            taken[departure] = True
+            links.append((int(arrival), int(departure), turn))
+    return links
+
+
+def infer_rotations(conn: sqlite3.Connection, airline: str, min_turn: int = 30,
+                    max_turn: int = 360) -> Dict:
+    """
+    Infer aircraft rotations and turnaround distributions for an airline in one pass
+
+    Legs are grouped into per-airport arrival and departure timelines by aircraft type,
+    each timeline pair is chained with chain_turnarounds(), and the links are followed
+    into rotations. A rotation that closes on itself within the week is marked cyclic.
+
+    Args:
+        conn: SQLite or DuckDB connection to the flights database (see aviation_edge_storage.py)
+        airline (str): Operating airline IATA code
+        min_turn (int): Minimum ground time in minutes
+        max_turn (int): Maximum ground time in minutes
+
+    Returns:
+        Dict: 'legs' (count), 'rotations' (list of {'aircraft', 'cyclic', 'legs'}), 'links'
+            (list of turnarounds) and 'turnarounds' (per airport and aircraft type: count,
+            min, median, p90, max minutes and a histogram in TURN_BUCKET_MINUTES buckets)
+    """
+    legs = load_legs(conn, airline)
+    records = legs.to_dict('records')
+    next_leg: Dict[int, int] = {}
+    links = []
+
+    timelines = defaultdict(lambda: ([], []))
+    for position, (dep, arr, aircraft) in enumerate(zip(legs['dep'], legs['arr'], legs['aircraft'])):
+        timelines[(arr, aircraft)][0].append(position)
+        timelines[(dep, aircraft)][1].append(position)
+
+    for (airport, aircraft), (inbound, outbound) in timelines.items():
+        if not inbound or not outbound:
+            continue
+        inbound, outbound = np.array(inbound), np.array(outbound)
+        arrival_times = legs['arr_time'].to_numpy()[inbound]
+        departure_times = legs['dep_time'].to_numpy()[outbound]
+        for arrival, departure, turn in chain_turnarounds(arrival_times, departure_times, min_turn, max_turn):
+            next_leg[int(inbound[arrival])] = int(outbound[departure])
+            links.append({'airport': airport, 'aircraft': aircraft, 'turn_minutes': turn,
+                          'arriving': records[inbound[arrival]]['flight'],
+                          'departing': records[outbound[departure]]['flight']})
+
+    rotations = _follow_links(records, next_leg)
+    logger.info(f"🔁 {airline.upper()}: {len(records):,} weekly legs chained into {len(rotations):,} rotations "
+                f"({len(links):,} turnarounds)")
+    return {'legs': len(records), 'rotations': rotations, 'links': links,
+            'turnarounds': turnaround_distributions(links)}
+
+
+def _follow_links(records: List[Dict], next_leg: Dict[int, int]) -> List[Dict]:
+    """Walk leg -> next leg links into rotations, starting from legs nothing turns onto"""
+    has_previous = set(next_leg.values())
+    visited = set()
+    rotations = []
+
+    starts = [leg for leg in range(len(records)) if leg not in has_previous]
+    # Legs left over after the open chains all sit on closed weekly loops
+    for start in starts + list(range(len(records))):
+        if start in visited:
+            continue
+        chain, leg = [], start
+        while leg is not None and leg not in visited:
+            visited.add(leg)
+            chain.append(leg)
+            leg = next_leg.get(leg)
+        cyclic = leg == start
+        rotations.append({
+            'aircraft': records[start]['aircraft'],
+            'cyclic': cyclic,
+            'legs': [{key: records[position][key] for key in ('flight', 'dep', 'arr', 'dep_time', 'arr_time')}
+                     for position in chain],
+        })
+    rotations.sort(key=lambda rotation: (-len(rotation['legs']), rotation['legs'][0]['dep_time']))
+    return rotations
+
+
+def turnaround_distributions(links: List[Dict]) -> List[Dict]:
+    """
+    Turnaround statistics per airport and aircraft type, most turnarounds first
+
+    Returns:
+        List[Dict]: airport, aircraft, count, min, median, p90, max and histogram
+            (counts per TURN_BUCKET_MINUTES bucket from 0)
+    """
+    if not links:
+        return []
+    frame = pd.DataFrame(links)
+    distributions = []
+    for (airport, aircraft), turns in frame.groupby(['airport', 'aircraft'])['turn_minutes']:
+        values = turns.to_numpy()
+        distributions.append({
+            'airport': airport, 'aircraft': aircraft, 'count': len(values),
+            'min': int(values.min()), 'median': float(np.median(values)),
+            'p90': float(np.percentile(values, 90)), 'max': int(values.max()),
+            'histogram': np.bincount(values // TURN_BUCKET_MINUTES).tolist(),
+        })
+    distributions.sort(key=lambda row: (-row['count'], row['airport'], row['aircraft']))
+    return distributions
@@ -0,0 +1,254 @@
+"""
+Aviation Edge Rolling-Horizon Scheduler
+Keeps (airport, type, date) units between today+8 and today+N days fresh under a daily call budget
+Units are prioritised by staleness and observed change rate; state lives in the flights database
+"""
+
+import os
+import sqlite3
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from aviation_edge_db import busy_timeout_ms, configure_connection, default_db_path
+
+SCHEDULER_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS collector_schedule (
+        airport_code TEXT NOT NULL,
+        query_type TEXT NOT NULL,
+        target_date TEXT NOT NULL,
+        collections INTEGER NOT NULL DEFAULT 0,
+        changes INTEGER NOT NULL DEFAULT 0,
+        last_collected_at TEXT,
+        last_attempt_at TEXT,
+        last_error TEXT,
+        PRIMARY KEY (airport_code, query_type, target_date)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS collector_budget (
+        day TEXT NOT NULL,
+        query_type TEXT NOT NULL,
+        calls INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, query_type)
+    ) WITHOUT ROWID;
+"""
+
+_UNIT_FIELDS = ('airport_code', 'query_type', 'target_date', 'collections', 'changes',
+                'last_collected_at', 'last_attempt_at')
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _hours_since(timestamp: Optional[str], now: datetime) -> float:
+    return (now - datetime.fromisoformat(timestamp)).total_seconds() / 3600
+
+
+def unit_priority(unit: Dict, now: datetime) -> float:
+    """
+    Expected value of re-collecting a unit now: hours since it was last collected
+    times its smoothed change rate ((changes + 1) / (collections + 2))
+
+    A unit that changed on most re-collections is refreshed often; one that never
+    changes drifts down the queue until its staleness outweighs that.
+    """
+    change_rate = (unit['changes'] + 1) / (unit['collections'] + 2)
+    return _hours_since(unit['last_collected_at'], now) * change_rate
+
+
+class CollectionScheduler:
+    """
+    Rolling-horizon schedule for one collector type, persisted in collector_schedule
+
+    The window slides with the calendar: dates entering today+N are added, dates
+    falling inside the 8-day window are dropped. Never-collected units go first
+    (nearest date first), then units by unit_priority(). A unit is not retried
+    within min_age_hours of its last attempt. collector_budget counts calls per day
+    and type; the daily budget is shared by the departure and arrival collectors.
+    A claim reserves one call and record() replaces it with the HTTP attempts the
+    collection actually made, retries included.
+    """
+
+    def __init__(self, query_type: str, airports: List[str], db_path: str = None, horizon_days: int = None,
+                 daily_budget: int = None, min_age_hours: float = None):
+        """
+        Initialize the scheduler
+
+        Args:
+            query_type (str): 'departure' or 'arrival'
+            airports (List[str]): Airport IATA codes to keep fresh
+            db_path (str): Database path (defaults to the production database)
+            horizon_days (int): Last date kept fresh, in days from today (defaults to COLLECTOR_HORIZON_DAYS)
+            daily_budget (int): API calls per day for all collectors (defaults to COLLECTOR_DAILY_BUDGET)
+            min_age_hours (float): Minimum hours between attempts per unit (defaults to COLLECTOR_MIN_AGE_HOURS)
+        """
+        self.query_type = query_type.lower()
+        self.airports = sorted({airport.upper() for airport in airports})
+        self.horizon_days = horizon_days or int(os.getenv('COLLECTOR_HORIZON_DAYS', '28'))
+        self.daily_budget = daily_budget or int(os.getenv('COLLECTOR_DAILY_BUDGET', '200'))
+        self.min_age_hours = min_age_hours if min_age_hours is not None else \
+            float(os.getenv('COLLECTOR_MIN_AGE_HOURS', '12'))
+        if self.horizon_days < 8:
+            raise ValueError("Horizon must reach at least 8 days ahead (8-day rule)")
+
+        self.db_path = db_path or default_db_path()
+        # Autocommit mode: every multi-statement change opens its own explicit transaction
+        self.conn = sqlite3.connect(self.db_path, timeout=busy_timeout_ms() / 1000, isolation_level=None)
+        configure_connection(self.conn)
+        self.conn.executescript(SCHEDULER_SCHEMA)
+
+    def close(self):
+        """Close the scheduler connection"""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def window(self, today: date = None) -> List[str]:
+        """Target dates from today + 8 to today + horizon_days"""
+        today = today or date.today()
+        return [(today + timedelta(days=offset)).isoformat() for offset in range(8, self.horizon_days + 1)]
+
+    def sync(self, today: date = None) -> Dict[str, int]:
+        """
+        Slide the window: add units for new dates and airports, drop dates inside the 8-day window
+
+        Returns:
+            Dict: 'added' and 'dropped' unit counts
+        """
+        dates = self.window(today)
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self.conn.total_changes
+            self.conn.executemany("""
+                INSERT OR IGNORE INTO collector_schedule (airport_code, query_type, target_date) VALUES (?, ?, ?)
+            """, [(airport, self.query_type, target) for airport in self.airports for target in dates])
+            added = self.conn.total_changes - before
+            dropped = self.conn.execute("""
+                DELETE FROM collector_schedule WHERE query_type = ? AND target_date < ?
+            """, (self.query_type, dates[0])).rowcount
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return {'added': added, 'dropped': dropped}
+
+    def calls_today(self, today: date = None) -> int:
+        """API calls made today by all collectors"""
+        return self.conn.execute(
+            "SELECT COALESCE(SUM(calls), 0) FROM collector_budget WHERE day = ?", ((today or date.today()).isoformat(),)
+        ).fetchone()[0]
+
+    def _candidates(self, now: datetime, today: date) -> List[Dict]:
+        """Units in the current window for this type and airport list"""
+        if not self.airports:
+            return []
+        dates = self.window(today)
+        placeholders = ', '.join('?' * len(self.airports))
+        rows = self.conn.execute(f"""
+            SELECT {', '.join(_UNIT_FIELDS)} FROM collector_schedule
+            WHERE query_type = ? AND target_date BETWEEN ? AND ? AND airport_code IN ({placeholders})
+        """, [self.query_type, dates[0], dates[-1]] + self.airports).fetchall()
+        return [dict(zip(_UNIT_FIELDS, row)) for row in rows]
+
+    def _due(self, unit: Dict, now: datetime) -> bool:
+        return unit['last_attempt_at'] is None or _hours_since(unit['last_attempt_at'], now) >= self.min_age_hours
+
+    def claim_next(self, now: datetime = None) -> Optional[Dict]:
+        """
+        Reserve one call of today's budget for the highest-priority due unit
+
+        Returns:
+            Dict: Unit (airport_code, query_type, target_date, ..., budget_day) or None
+                when the budget is spent or no unit is due
+        """
+        now = now or datetime.now()
+        today = now.date()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.calls_today(today) >= self.daily_budget:
+                self.conn.execute("COMMIT")
+                return None
+            due = [unit for unit in self._candidates(now, today) if self._due(unit, now)]
+            if not due:
+                self.conn.execute("COMMIT")
+                return None
+            fresh = [unit for unit in due if unit['last_collected_at'] is None]
+            if fresh:
+                unit = min(fresh, key=lambda item: (item['target_date'], item['airport_code']))
+            else:
+                unit = max(due, key=lambda item: (unit_priority(item, now), item['target_date']))
+            self.conn.execute("""
+                INSERT INTO collector_budget (day, query_type, calls) VALUES (?, ?, 1)
+                ON CONFLICT (day, query_type) DO UPDATE SET calls = calls + 1
+            """, (today.isoformat(), self.query_type))
+            self.conn.execute("""
+                UPDATE collector_schedule SET last_attempt_at = ?
+                WHERE airport_code = ? AND query_type = ? AND target_date = ?
+            """, (now.isoformat(timespec='seconds'), unit['airport_code'], unit['query_type'], unit['target_date']))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        unit['budget_day'] = today.isoformat()
+        return unit
+
+    def record(self, unit: Dict, stored: int = 0, error: str = None, calls: int = 1):
+        """
+        Record the outcome of a claimed unit and charge its API calls to the budget
+
+        Args:
+            unit (Dict): Unit returned by claim_next()
+            stored (int): Flights stored or updated; a payload the ingestion ledger
+                found unchanged stores nothing, so stored > 0 counts as a change
+            error (str): Failure message (the unit keeps its last successful state)
+            calls (int): HTTP attempts made for the unit (the rate controller's
+                stats['calls'] delta); replaces the one call claim_next() reserved
+        """
+        key = (unit['airport_code'], unit['query_type'], unit['target_date'])
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if calls != 1:
+                self.conn.execute("""
+                    UPDATE collector_budget SET calls = MAX(0, calls + ?) WHERE day = ? AND query_type = ?
+                """, (calls - 1, unit.get('budget_day', date.today().isoformat()), unit['query_type']))
+            if error is not None:
+                self.conn.execute("""
+                    UPDATE collector_schedule SET last_error = ?
+                    WHERE airport_code = ? AND query_type = ? AND target_date = ?
+                """, (error,) + key)
+            else:
+                self.conn.execute("""
+                    UPDATE collector_schedule
+                    SET collections = collections + 1, changes = changes + ?, last_collected_at = ?, last_error = NULL
+                    WHERE airport_code = ? AND query_type = ? AND target_date = ?
+                """, (1 if stored else 0, _now()) + key)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def seconds_until_due(self, now: datetime = None) -> float:
+        """Seconds until the budget resets or the next unit becomes due, whichever applies"""
+        now = now or datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        if self.calls_today(now.date()) >= self.daily_budget:
+            return (midnight - now).total_seconds()
+        waits = [self.min_age_hours * 3600 - _hours_since(unit['last_attempt_at'], now) * 3600
+                 for unit in self._candidates(now, now.date()) if unit['last_attempt_at'] is not None]
+        # The window slides at midnight, which brings new never-collected dates
+        return max(0.0, min(waits + [(midnight - now).total_seconds()]))
+
+    def status(self, today: date = None) -> Dict:
+        """Window size, never-collected units and today's budget use for this type"""
+        units = self._candidates(datetime.now(), today or date.today())
+        return {
+            'units': len(units),
+            'never_collected': sum(1 for unit in units if unit['last_collected_at'] is None),
+            'calls_today': self.calls_today(today),
+            'daily_budget': self.daily_budget,
+        }
@@ -0,0 +1,341 @@
+"""
+Aviation Edge Sharded Storage
+Optional read partitions of the flights table, one SQLite file per collected airport or collection month
+The production database stays the single source of truth; shards are rebuilt from it
+"""
+
+import argparse
+import heapq
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from aviation_edge_db import configure_connection, default_db_path
+from aviation_edge_ledger import fingerprint
+from aviation_edge_logging import configure_logging, get_logger
+
+logger = get_logger('shards')
+
+MANIFEST_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS shard_manifest (
+        layout TEXT NOT NULL,
+        shard_key TEXT NOT NULL,
+        path TEXT NOT NULL,
+        row_count INTEGER NOT NULL,
+        source_signature TEXT NOT NULL,
+        built_at TEXT NOT NULL,
+        PRIMARY KEY (layout, shard_key)
+    );
+    CREATE TABLE IF NOT EXISTS shard_routes (
+        layout TEXT NOT NULL,
+        dep_iata_code TEXT NOT NULL,
+        arr_iata_code TEXT NOT NULL,
+        shard_key TEXT NOT NULL,
+        PRIMARY KEY (layout, dep_iata_code, arr_iata_code, shard_key)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_shard_routes_arr
+        ON shard_routes (layout, arr_iata_code, dep_iata_code);
+"""
+
+# Shard key expressions per layout: airport = the airport whose departure/arrival query
+# collected the row, month = month the row was first collected
+SHARD_LAYOUTS = {
+    'airport': "COALESCE(NULLIF(airport_code, ''), '_')",
+    'month': "COALESCE(substr(created_at, 1, 7), 'unknown')",
+}
+
+# SQLite's default limit on attached databases per connection
+MAX_ATTACHED = 10
+
+
+def default_shard_dir() -> str:
+    """Shard directory next to the production database (SHARD_DIRECTORY overrides)"""
+    return os.getenv('SHARD_DIRECTORY') or os.path.join(os.path.dirname(default_db_path()), 'shards')
+
+
+def default_layout() -> str:
+    """Shard layout used by sharded searches (SHARD_LAYOUT, default airport)"""
+    return os.getenv('SHARD_LAYOUT', 'airport')
+
+
+def _check_layout(layout: str):
+    if layout not in SHARD_LAYOUTS:
+        raise ValueError(f"Unknown shard layout {layout!r} (expected one of {', '.join(SHARD_LAYOUTS)})")
+
+
+def ensure_manifest_schema(conn: sqlite3.Connection):
+    """Create the shard manifest tables if they do not exist yet"""
+    conn.executescript(MANIFEST_SCHEMA)
+
+
+class ShardBuilder:
+    """
+    Split the production flights table into shard files and record them in the manifest
+
+    Each shard gets the flights table with the same DDL and indexes as the source.
+    A shard is only rewritten when its slice of the source changed since the last
+    build (row count, highest id, latest update or the table layout), so refreshes stay cheap.
+    """
+
+    def __init__(self, db_path: str = None, shard_dir: str = None):
+        self.db_path = db_path or default_db_path()
+        self.shard_dir = shard_dir or default_shard_dir()
+
+    def build(self, layout: str = 'airport', force: bool = False) -> Dict[str, int]:
+        """
+        Build or refresh all shards of a layout
+
+        Args:
+            layout (str): 'airport' or 'month'
+            force (bool): Rewrite every shard even if its source slice is unchanged
+
+        Returns:
+            Dict: counts of 'built', 'unchanged' and 'removed' shards
+        """
+        _check_layout(layout)
+        key_expr = SHARD_LAYOUTS[layout]
+        os.makedirs(self.shard_dir, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path)
+        configure_connection(conn)
+        try:
+            ensure_manifest_schema(conn)
+            flights_ddl, index_ddl = self._flights_ddl(conn)
+            layout_hash = fingerprint([flights_ddl] + index_ddl)[:8]
+
+            signatures = {
+                key: f"{count}:{max_id}:{last_update}:{layout_hash}"
+                for key, count, max_id, last_update in conn.execute(f"""
+                    SELECT {key_expr} AS shard_key, COUNT(*), MAX(id), MAX(COALESCE(updated_at, created_at))
+                    FROM flights GROUP BY shard_key
+                """)
+            }
+            recorded = dict(conn.execute(
+                "SELECT shard_key, source_signature FROM shard_manifest WHERE layout = ?", (layout,)
+            ).fetchall())
+
+            stats = {'built': 0, 'unchanged': 0, 'removed': 0}
+            for shard_key, signature in sorted(signatures.items()):
+                path = self.shard_path(layout, shard_key)
+                if not force and recorded.get(shard_key) == signature and os.path.exists(path):
+                    stats['unchanged'] += 1
+                    continue
+                rows = self._write_shard(path, flights_ddl, index_ddl, key_expr, shard_key)
+                with conn:
+                    conn.execute("DELETE FROM shard_routes WHERE layout = ? AND shard_key = ?", (layout, shard_key))
+                    conn.execute(f"""
+                        INSERT INTO shard_routes (layout, dep_iata_code, arr_iata_code, shard_key)
+                        SELECT DISTINCT ?, COALESCE(dep_iata_code, ''), COALESCE(arr_iata_code, ''), ?
+                        FROM flights WHERE {key_expr} = ?
+                    """, (layout, shard_key, shard_key))
+                    conn.execute("""
+                        INSERT OR REPLACE INTO shard_manifest
+                        (layout, shard_key, path, row_count, source_signature, built_at)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, (layout, shard_key, os.path.relpath(path, self.shard_dir), rows, signature,
+                          datetime.now().isoformat()))
+                stats['built'] += 1
+                logger.info(f"🧩 Shard {layout}/{shard_key}: {rows:,} flights")
+
+            # Slices that no longer exist in the source (e.g. after cleanup) drop their shard
+            for shard_key in set(recorded) - set(signatures):
+                with conn:
+                    conn.execute("DELETE FROM shard_routes WHERE layout = ? AND shard_key = ?", (layout, shard_key))
+                    conn.execute("DELETE FROM shard_manifest WHERE layout = ? AND shard_key = ?", (layout, shard_key))
+                path = self.shard_path(layout, shard_key)
+                if os.path.exists(path):
+                    os.remove(path)
+                stats['removed'] += 1
+        finally:
+            conn.close()
+
+        logger.info(f"✅ {layout} shards: {stats['built']} built, {stats['unchanged']} unchanged, "
+                    f"{stats['removed']} removed")
+        return stats
+
+    def shard_path(self, layout: str, shard_key: str) -> str:
+        """File of one shard"""
+        safe_key = ''.join(c if c.isalnum() or c in '-_' else '_' for c in shard_key)
+        return os.path.join(self.shard_dir, f"flights_{layout}_{safe_key}.db")
+
+    @staticmethod
+    def _flights_ddl(conn: sqlite3.Connection) -> Tuple[str, List[str]]:
+        """CREATE statements of the source flights table and its indexes"""
+        rows = conn.execute(
+            "SELECT type, sql FROM sqlite_master WHERE tbl_name = 'flights' AND sql IS NOT NULL"
+        ).fetchall()
+        table_ddl = next((sql for kind, sql in rows if kind == 'table'), None)
+        if table_ddl is None:
+            raise RuntimeError("Source database has no flights table")
+        return table_ddl, [sql for kind, sql in rows if kind == 'index']
+
+    def _write_shard(self, path: str, flights_ddl: str, index_ddl: List[str],
+                     key_expr: str, shard_key: str) -> int:
+        """Write one shard to a temporary file and swap it in atomically"""
+        temp_path = path + '.tmp'
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+        shard = sqlite3.connect(temp_path)
+        try:
+            shard.execute(flights_ddl)
+            shard.execute("ATTACH DATABASE ? AS source", (self.db_path,))
+            with shard:
+                shard.execute(f"INSERT INTO flights SELECT * FROM source.flights WHERE {key_expr} = ?",
+                              (shard_key,))
+            shard.execute("DETACH DATABASE source")
+            # Indexes are built after the bulk copy, which is much faster than maintaining them per row
+            for ddl in index_ddl:
+                shard.execute(ddl)
+            shard.commit()
+            rows = shard.execute("SELECT COUNT(*) FROM flights").fetchone()[0]
+        finally:
+            shard.close()
+
+        os.replace(temp_path, path)
+        return rows
+
+
+class ShardSet:
+    """
+    Read side of a shard layout: prune shards by route and fan queries out to them
+
+    Pruning uses the manifest's (departure, arrival) pairs, so a query for one
+    origin and/or destination only opens the shards that actually hold that route.
+    """
+
+    def __init__(self, db_path: str = None, layout: str = None, shard_dir: str = None):
+        self.db_path = db_path or default_db_path()
+        self.layout = layout or default_layout()
+        self.shard_dir = shard_dir or default_shard_dir()
+        _check_layout(self.layout)
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            ensure_manifest_schema(conn)
+            self.shards = {
+                key: os.path.join(self.shard_dir, path)
+                for key, path in conn.execute(
+                    "SELECT shard_key, path FROM shard_manifest WHERE layout = ? ORDER BY shard_key", (self.layout,)
+                )
+            }
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        return len(self.shards)
+
+    def prune(self, origin: str = None, destination: str = None) -> List[str]:
+        """
+        Shards that can hold flights for a route filter
+
+        Returns:
+            List[str]: Shard file paths (all shards when neither airport is given)
+        """
+        if not origin and not destination:
+            return list(self.shards.values())
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            keys = [row[0] for row in conn.execute("""
+                SELECT DISTINCT shard_key FROM shard_routes
+                WHERE layout = ? AND (? IS NULL OR dep_iata_code = ?) AND (? IS NULL OR arr_iata_code = ?)
+            """, (self.layout, origin, origin, destination, destination))]
+        finally:
+            conn.close()
+        return [self.shards[key] for key in sorted(keys) if key in self.shards]
+
+    def query(self, sql: str, params: Iterable, sort_key: Callable[[Tuple], Tuple],
+              origin: str = None, destination: str = None, limit: int = None,
+              parallel: bool = False, max_workers: int = None) -> List[Tuple]:
+        """
+        Run a SELECT over the flights table of every relevant shard and merge the results
+
+        Args:
+            sql (str): Query reading from the placeholder table `{table}`, ending with its
+                ORDER BY (and LIMIT, if any) so each shard returns sorted rows
+            params (Iterable): Query parameters
+            sort_key (Callable): Key matching the query's ORDER BY, used to merge shard results
+            origin (str): Departure airport filter used for pruning
+            destination (str): Arrival airport filter used for pruning
+            limit (int): Maximum rows returned after merging
+            parallel (bool): Query shards from a thread pool instead of one attached connection
+            max_workers (int): Thread pool size (defaults to SHARD_WORKERS, then 4)
+
+        Returns:
+            List[Tuple]: Merged rows in ORDER BY order
+        """
+        paths = self.prune(origin, destination)
+        if not paths:
+            return []
+        params = tuple(params)
+
+        if parallel and len(paths) > 1:
+            workers = min(len(paths), max_workers or int(os.getenv('SHARD_WORKERS', '4')))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(lambda path: self._query_shard(path, sql, params), paths))
+        else:
+            parts = [self._query_attached(paths[i:i + MAX_ATTACHED], sql, params)
+                     for i in range(0, len(paths), MAX_ATTACHED)]
+
+        merged = heapq.merge(*parts, key=sort_key)
+        if limit:
+            return [row for _, row in zip(range(limit), merged)]
+        return list(merged)
+
+    @staticmethod
+    def _connect_readonly(path: str) -> sqlite3.Connection:
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+    def _query_shard(self, path: str, sql: str, params: Tuple) -> List[Tuple]:
+        """Run the query on one shard (one connection per worker thread)"""
+        conn = self._connect_readonly(path)
+        try:
+            return conn.execute(sql.format(table='flights'), params).fetchall()
+        finally:
+            conn.close()
+
+    def _query_attached(self, paths: List[str], sql: str, params: Tuple) -> List[Tuple]:
+        """Run the query over up to MAX_ATTACHED shards as one UNION ALL on a single connection"""
+        if len(paths) == 1:
+            return self._query_shard(paths[0], sql, params)
+
+        conn = sqlite3.connect('file::memory:', uri=True)
+        try:
+            for i, path in enumerate(paths):
+                conn.execute(f"ATTACH DATABASE ? AS shard{i}", (f"file:{path}?mode=ro",))
+            # ORDER BY / LIMIT stay on the outer query; each branch only filters its shard
+            body, tail = _split_order_by(sql)
+            union = " UNION ALL ".join(
+                f"SELECT * FROM ({body.format(table=f'shard{i}.flights')})" for i in range(len(paths))
+            )
+            return conn.execute(f"SELECT * FROM ({union}) {tail}", params * len(paths)).fetchall()
+        finally:
+            conn.close()
+
+
+def _split_order_by(sql: str) -> Tuple[str, str]:
+    """Split a query into its body and trailing ORDER BY/LIMIT clause"""
+    position = sql.upper().rfind(' ORDER BY ')
+    if position < 0:
+        return sql, ''
+    return sql[:position], sql[position:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build sharded read copies of the flights database")
+    parser.add_argument('--layout', choices=sorted(SHARD_LAYOUTS), default=default_layout(),
+                        help='Shard by collected airport or by collection month (default: SHARD_LAYOUT or airport)')
+    parser.add_argument('--db', help='Source database (default: DB/flight_schedules.db)')
+    parser.add_argument('--shard-dir', help='Output directory (default: DB/shards)')
+    parser.add_argument('--force', action='store_true', help='Rebuild shards even if unchanged')
+    args = parser.parse_args()
+    configure_logging()
+
+    ShardBuilder(args.db, args.shard_dir).build(args.layout, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Aviation Edge Storage Backends
+Where AviationEdgeDB and FlightSearchSystem get their connections from
+SQLite stays the default and the only write path; DuckDB is an optional columnar engine for analytics
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Sequence
+
+import pandas as pd
+
+from aviation_edge_db import busy_timeout_ms, configure_connection, default_db_path
+from aviation_edge_logging import configure_logging, get_logger
+
+try:
+    import duckdb
+except ImportError:  # optional: analytics fall back to SQLite
+    duckdb = None
+
+logger = get_logger('storage')
+
+# Tables read by the routed GROUP BY workloads (route matrix, banks, rotations, block times)
+ANALYTICS_TABLES = ('flights', 'flight_weekdays', 'dim_airports', 'dim_aircraft')
+
+# Backends selectable with ANALYTICS_BACKEND; 'auto' picks DuckDB when it is installed
+ANALYTICS_BACKENDS = ('sqlite', 'duckdb', 'auto')
+
+_MANIFEST = 'manifest.json'
+
+
+def duckdb_available() -> bool:
+    """True when the optional duckdb package is installed"""
+    return duckdb is not None
+
+
+def default_snapshot_dir() -> str:
+    """Parquet snapshot directory next to the production database (COLUMNAR_DIRECTORY overrides)"""
+    return os.getenv('COLUMNAR_DIRECTORY') or os.path.join(os.path.dirname(default_db_path()), 'columnar')
+
+
+def _literal(path: str) -> str:
+    """Path as a quoted SQL string literal (DuckDB takes no parameters in ATTACH, COPY or views)"""
+    return "'" + path.replace("'", "''") + "'"
+
+
+def read_frame(conn, sql: str, params: Sequence = ()) -> pd.DataFrame:
+    """
+    Run a query on either backend's connection and return the result as a DataFrame
+
+    Both drivers take positional '?' parameters, so the same SQL text serves both
+    as long as it sticks to the dialect they share.
+    """
+    if isinstance(conn, sqlite3.Connection):
+        return pd.read_sql_query(sql, conn, params=list(params))
+    return conn.execute(sql, list(params)).df()
+
+
+class SQLiteStorage:
+    """Row store behind every read and write: the production SQLite database"""
+
+    name = 'sqlite'
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or default_db_path()
+
+    def connect(self, writer: bool = False) -> sqlite3.Connection:
+        """
+        Open a connection to the database
+
+        Args:
+            writer (bool): Configure for concurrent collectors (WAL, busy timeout);
+                readers get a plain connection
+        """
+        if not writer:
+            return sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, timeout=busy_timeout_ms() / 1000)
+        configure_connection(conn)
+        return conn
+
+
+class DuckDBStorage:
+    """
+    Columnar read-only engine over the same data, for summary and analytics queries
+
+    A connection reads Parquet snapshots of ANALYTICS_TABLES when the snapshot was
+    taken at the current database generation (see snapshot()). Otherwise it attaches
+    the SQLite file read-only and DuckDB scans it directly, so results are never stale.
+    """
+
+    name = 'duckdb'
+
+    def __init__(self, db_path: str = None, snapshot_dir: str = None):
+        if duckdb is None:
+            raise RuntimeError("DuckDB backend needs the duckdb package (pip install duckdb)")
+        self.db_path = db_path or default_db_path()
+        self.snapshot_dir = snapshot_dir or default_snapshot_dir()
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.snapshot_dir, _MANIFEST)
+
+    def _parquet(self, table: str) -> str:
+        return os.path.join(self.snapshot_dir, f"{table}.parquet")
+
+    def _attach(self, conn):
+        """Attach the SQLite database read-only as flights_db"""
+        conn.execute("INSTALL sqlite")
+        conn.execute("LOAD sqlite")
+        conn.execute(f"ATTACH {_literal(self.db_path)} AS flights_db (TYPE SQLITE, READ_ONLY)")
+
+    def _current_generation(self) -> List:
+        from aviation_edge_analytics import database_generation
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return list(database_generation(conn))
+        finally:
+            conn.close()
+
+    def snapshot_is_current(self) -> bool:
+        """True when Parquet snapshots exist for the current database generation"""
+        try:
+            with open(self._manifest_path(), encoding='utf-8') as handle:
+                manifest = json.load(handle)
+        except (OSError, ValueError):
+            return False
+        return manifest.get('generation') == self._current_generation() and all(
+            os.path.exists(self._parquet(table)) for table in ANALYTICS_TABLES
+        )
+
+    def connect(self):
+        """In-memory DuckDB connection exposing the analytics tables under their SQLite names"""
+        conn = duckdb.connect(':memory:')
+        if self.snapshot_is_current():
+            for table in ANALYTICS_TABLES:
+                conn.execute(f"CREATE VIEW {table} AS SELECT * FROM read_parquet({_literal(self._parquet(table))})")
+        else:
+            self._attach(conn)
+            conn.execute("USE flights_db")
+        return conn
+
+    def snapshot(self) -> Dict:
+        """
+        Write ANALYTICS_TABLES as Parquet files and record the database generation they match
+
+        Returns:
+            Dict: 'generation', 'tables' (row count per table) and 'built_at'
+        """
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        generation = self._current_generation()
+        conn = duckdb.connect(':memory:')
+        try:
+            self._attach(conn)
+            tables = {}
+            for table in ANALYTICS_TABLES:
+                conn.execute(f"COPY (SELECT * FROM flights_db.{table}) TO {_literal(self._parquet(table))} "
+                             "(FORMAT PARQUET)")
+                # Counted from the file: the SQLite scanner cannot COUNT(*) WITHOUT ROWID tables
+                tables[table] = conn.execute(
+                    f"SELECT COUNT(*) FROM read_parquet({_literal(self._parquet(table))})").fetchone()[0]
+        finally:
+            conn.close()
+
+        manifest = {'generation': generation, 'tables': tables, 'built_at': datetime.now().isoformat()}
+        # Written last, so an interrupted snapshot is never taken for a current one
+        with open(self._manifest_path(), 'w', encoding='utf-8') as handle:
+            json.dump(manifest, handle, indent=2)
+        logger.info(f"🧊 Columnar snapshot: {', '.join(f'{t} {n:,}' for t, n in tables.items())} "
+                    f"→ {self.snapshot_dir}")
+        return manifest
+
+
+def analytics_backend() -> str:
+    """Configured analytics backend (ANALYTICS_BACKEND: sqlite, duckdb or auto; default sqlite)"""
+    backend = os.getenv('ANALYTICS_BACKEND', 'sqlite').lower()
+    if backend not in ANALYTICS_BACKENDS:
+        raise ValueError(f"Unknown analytics backend {backend!r} (expected one of {', '.join(ANALYTICS_BACKENDS)})")
+    return backend
+
+
+def analytics_storage(db_path: str = None, backend: str = None):
+    """
+    Storage that GROUP BY-heavy analytics are routed to
+
+    'auto' uses DuckDB when the package is installed and SQLite otherwise; 'duckdb'
+    without the package logs a warning and also falls back to SQLite.
+    """
+    backend = backend or analytics_backend()
+    if backend != 'sqlite' and duckdb_available():
+        return DuckDBStorage(db_path)
+    if backend == 'duckdb':
+        logger.warning("⚠️  ANALYTICS_BACKEND=duckdb but duckdb is not installed, using SQLite")
+    return SQLiteStorage(db_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar analytics storage (DuckDB over Parquet snapshots)")
+    parser.add_argument('--snapshot', action='store_true', help='Write Parquet snapshots of the analytics tables')
+    parser.add_argument('--status', action='store_true', help='Show whether the snapshot is current')
+    parser.add_argument('--db', help='Database path (default: DB/flight_schedules.db)')
+    parser.add_argument('--dir', help='Snapshot directory (default: DB/columnar or COLUMNAR_DIRECTORY)')
+    args = parser.parse_args()
+    configure_logging()
+
+    if not duckdb_available():
+        logger.error("❌ The columnar backend needs the duckdb package (pip install duckdb)")
+        return
+    storage = DuckDBStorage(args.db, args.dir)
+    if args.snapshot:
+        storage.snapshot()
+    if args.status or not args.snapshot:
+        state = 'current' if storage.snapshot_is_current() else 'missing or stale (DuckDB scans SQLite directly)'
+        print(f"Columnar snapshot in {storage.snapshot_dir}: {state}")
+
+
+if __name__ == "__main__":
+    main()
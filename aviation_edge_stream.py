@@ -0,0 +1,180 @@
+"""
+Aviation Edge Streaming Helpers
+Incremental parsing of large flightsFuture responses
+Keeps memory bounded by handling one flight at a time instead of buffering the whole body
+"""
+
+import codecs
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Union
+
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_json_array(chunks: Iterable[Union[bytes, str]]) -> Iterator[Any]:
+    """
+    Incrementally parse a top-level JSON array, yielding one element at a time
+
+    Only the current, not-yet-parsed tail of the body is held in memory, so the
+    peak footprint is one flight plus one network chunk regardless of response size.
+
+    Args:
+        chunks (Iterable): Raw response chunks (bytes are decoded as UTF-8)
+
+    Yields:
+        Any: Each decoded array element in order
+
+    Raises:
+        ValueError: If the body is not a JSON array or is truncated
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    source = iter(chunks)
+    buffer = ''
+    pos = 0
+    started = False
+    exhausted = False
+    need_more = False
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+
+        if need_more or pos >= len(buffer):
+            if exhausted:
+                if not started:
+                    raise ValueError("Empty response body, expected JSON array")
+                raise ValueError("Truncated JSON array in response body")
+
+            chunk = next(source, None)
+            if chunk is None:
+                exhausted = True
+                text = text_decoder.decode(b'', final=True)
+            elif isinstance(chunk, bytes):
+                text = text_decoder.decode(chunk)
+            else:
+                text = chunk
+
+            # Drop everything already parsed so the buffer never grows with the body
+            buffer = buffer[pos:] + text
+            pos = 0
+            need_more = False
+            continue
+
+        char = buffer[pos]
+
+        if not started:
+            if char != '[':
+                # Not an array (e.g. an error object) - surface a short preview
+                preview = buffer[pos:]
+                for chunk in source:
+                    if len(preview) >= 200:
+                        break
+                    preview += chunk.decode('utf-8', 'replace') if isinstance(chunk, bytes) else chunk
+                raise ValueError(f"Expected JSON array response, got: {preview[:200]}")
+            started = True
+            pos += 1
+            continue
+
+        if char == ']':
+            return
+
+        if char == ',':
+            pos += 1
+            continue
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            need_more = True
+            continue
+
+        # A scalar at the very end of the buffer may continue in the next chunk
+        if end >= len(buffer) and not exhausted:
+            need_more = True
+            continue
+
+        yield item
+        pos = end
+
+
+def iter_batches(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    """
+    Group an iterable into fixed-size lists without materialising it
+
+    Args:
+        items (Iterable): Source items
+        batch_size (int): Maximum items per batch
+
+    Yields:
+        List: Consecutive batches (the last one may be shorter)
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class RawFlightSink:
+    """
+    Write raw flights into a JSON document one element at a time
+
+    The document has the same shape as a json.dump of the metadata dict with the
+    flights list under array_key, plus a trailing count, without ever holding the list.
+    """
+
+    def __init__(self, path: str, metadata: Dict, array_key: str = 'raw_flights_data',
+                 count_key: str = 'total_flights', mode: str = 'w',
+                 preamble: str = '', postamble: str = ''):
+        """
+        Open the sink and write the document header
+
+        Args:
+            path (str): Output file path
+            metadata (Dict): Fields written before the flights array
+            array_key (str): Key holding the streamed flights
+            count_key (str): Key for the flight count written after the array
+            mode (str): File mode ('w' to overwrite, 'a' to append)
+            preamble (str): Plain text written before the JSON document
+            postamble (str): Plain text written after the JSON document
+        """
+        self.path = path
+        self.array_key = array_key
+        self.count_key = count_key
+        self.postamble = postamble
+        self.count = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, mode, encoding='utf-8')
+        self._file.write(preamble)
+        self._file.write('{\n')
+        for key, value in metadata.items():
+            self._file.write(f"  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},\n")
+        self._file.write(f"  {json.dumps(array_key)}: [")
+
+    def write(self, flight: Any):
+        """Append one flight to the streamed array"""
+        separator = ',\n    ' if self.count else '\n    '
+        self._file.write(separator + json.dumps(flight, ensure_ascii=False))
+        self.count += 1
+
+    def close(self):
+        """Finish the array, write the trailing count and close the file"""
+        if self._file is None:
+            return
+        closing = '\n  ]' if self.count else ']'
+        self._file.write(f"{closing},\n  {json.dumps(self.count_key)}: {self.count}\n}}")
+        self._file.write(self.postamble)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,217 @@
+"""
+Aviation Edge Batch Transform
+Vectorised weekday correction and field normalisation for whole API responses
+Produces ready-to-insert row tuples in FLIGHT_COLUMNS order for executemany
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from aviation_edge_db import FLIGHT_COLUMNS
+from aviation_edge_logging import get_logger, trace_flights
+
+logger = get_logger('transform')
+
+
+def _column(flights: List[Dict], section: str, field: str) -> pd.Series:
+    """
+    Pull one nested field out of every flight as an object column
+
+    Missing sections or fields become '' like the per-flight extraction; explicit
+    nulls are kept as None so they normalise to 'NONE' exactly as str(None).upper() did.
+    """
+    values = []
+    for flight in flights:
+        part = flight.get(section)
+        values.append(part.get(field, '') if isinstance(part, dict) else '')
+    return pd.Series(values, dtype=object)
+
+
+def _upper(column: pd.Series) -> pd.Series:
+    """Vectorised str(value).upper() over a whole column (None becomes 'NONE')"""
+    return column.fillna('None').astype(str).str.upper().astype(object)
+
+
+def time_to_minutes(times: pd.Series) -> pd.Series:
+    """
+    Convert "HH:MM" / "HHMM" scheduled times to minutes since midnight
+
+    Args:
+        times (pd.Series): Scheduled time strings
+
+    Returns:
+        pd.Series: Float minutes, NaN where the time is missing or unparseable
+    """
+    digits = times.astype(str).str.replace(':', '', regex=False)
+    hours = pd.to_numeric(digits.str[:2], errors='coerce')
+    minutes = pd.to_numeric(digits.str[2:4], errors='coerce')
+    return (hours * 60 + minutes).where(digits.str.len() >= 4)
+
+
+def _weekday_number(value) -> float:
+    """
+    API weekday as a number: ints and digit strings only, NaN for anything else
+
+    Matches the per-flight check (weekday_str.isdigit()), so "1.0", " 3" or True
+    never pass as a weekday.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str) and value.isascii() and value.isdigit():
+        return float(value)
+    return np.nan
+
+
+def _nullable_int(values: pd.Series) -> pd.Series:
+    """Float column with NaN -> object column of Python ints and None (bindable by sqlite3)"""
+    return values.fillna(-1).astype(int).astype(object).where(values.notna(), None)
+
+
+def annotate_weekdays(flights: List[Dict], correct_overnight: bool = False) -> List[Dict]:
+    """
+    Validate API weekdays and attach extracted_weekday to a whole batch of flights
+
+    For arrival data the Aviation Edge weekday is arrival-based. When departure time
+    is later than arrival time the flight crossed midnight, so one day is subtracted
+    to get the departure weekday reference (Monday (1) - 1 wraps to Sunday (7)).
+
+    Args:
+        flights (List[Dict]): Raw flights from the API (annotated in place)
+        correct_overnight (bool): Apply the overnight arrival correction
+
+    Returns:
+        List[Dict]: Flights with a valid weekday, carrying 'extracted_weekday'
+            (and 'api_original_weekday' when corrected)
+    """
+    if not flights:
+        return []
+
+    api_weekday = pd.Series([_weekday_number(f.get('weekday', '')) for f in flights], dtype=float)
+    valid = api_weekday.between(1, 7).to_numpy()
+    weekday = api_weekday.fillna(0).astype(int).to_numpy()
+
+    if correct_overnight:
+        dep_minutes = time_to_minutes(_column(flights, 'departure', 'scheduledTime'))
+        arr_minutes = time_to_minutes(_column(flights, 'arrival', 'scheduledTime'))
+        # NaN comparisons are False, so flights without both times keep their weekday
+        overnight = (dep_minutes > arr_minutes).to_numpy() & valid
+        weekday = np.where(overnight, (weekday - 2) % 7 + 1, weekday)
+
+        if overnight.any():
+            logger.info(f"   🌃 {int(overnight.sum())} overnight flights detected, weekday corrected (overnight -1)")
+
+    invalid_count = int((~valid).sum())
+    if invalid_count:
+        logger.warning(f"   ⚠️  Skipped {invalid_count} flights without a valid weekday")
+
+    traced = trace_flights()
+    if traced and logger.isEnabledFor(logging.DEBUG):
+        _log_traced_flights(flights, traced, weekday, overnight if correct_overnight else None)
+
+    annotated = []
+    original = api_weekday.fillna(0).astype(int).to_numpy()
+    for flight, ok, corrected, api_value in zip(flights, valid, weekday, original):
+        if ok:
+            flight['extracted_weekday'] = int(corrected)
+            if correct_overnight:
+                flight['api_original_weekday'] = int(api_value)  # Keep original for reference
+            annotated.append(flight)
+
+    return annotated
+
+
+def _log_traced_flights(flights: List[Dict], traced: FrozenSet[str], weekday: np.ndarray,
+                        overnight: Optional[np.ndarray]):
+    """DEBUG detail for flights listed in LOG_TRACE_FLIGHTS (only those rows are formatted)"""
+    flight_numbers = _upper(_column(flights, 'flight', 'iataNumber'))
+    for position in np.flatnonzero(flight_numbers.isin(traced).to_numpy()):
+        flight = flights[position]
+        corrected = overnight is not None and overnight[position]
+        logger.debug(
+            f"   🔎 {flight_numbers.iat[position]}: "
+            f"dep {flight.get('departure', {}).get('scheduledTime')}, "
+            f"arr {flight.get('arrival', {}).get('scheduledTime')}, "
+            f"API weekday {flight.get('weekday')} -> {int(weekday[position])}"
+            f"{' (overnight -1)' if corrected else ''}",
+            extra={'event': 'trace_flight', 'fields': {'flight': flight_numbers.iat[position]}}
+        )
+
+
+def flights_to_rows(flights: List[Dict], query_type: str, airport_code: str) -> List[Tuple]:
+    """
+    Normalise a batch of flights into insert-ready tuples
+    ALL TEXT FIELDS CONVERTED TO UPPERCASE per copilot instructions
+
+    Produces exactly the values AviationEdgeDB._extract_flight_data builds per flight,
+    but with one column-wise upper() per field instead of ~20 str().upper() per row.
+
+    Args:
+        flights (List[Dict]): Flights from the API (optionally with extracted_weekday)
+        query_type (str): 'departure' or 'arrival'
+        airport_code (str): Airport code being queried
+
+    Returns:
+        List[Tuple]: Rows in FLIGHT_COLUMNS order
+    """
+    if not flights:
+        return []
+
+    airline_iata = _upper(_column(flights, 'airline', 'iataCode'))
+    flight_iata = _upper(_column(flights, 'flight', 'iataNumber'))
+
+    # Codeshare (marketing) flights point at their operating flight
+    codeshares = [flight.get('codeshared') or {} for flight in flights]
+    is_codeshare = pd.Series([bool(codeshare) for codeshare in codeshares], dtype=object)
+    codeshare_airline = _upper(_column(codeshares, 'airline', 'iataCode'))
+    codeshare_flight = _upper(_column(codeshares, 'flight', 'iataNumber'))
+
+    mask = is_codeshare.astype(bool)
+    operating_airline = codeshare_airline.where(mask, airline_iata)
+    operating_flight = codeshare_flight.where(mask, flight_iata)
+
+    dep_time = _upper(_column(flights, 'departure', 'scheduledTime'))
+    arr_time = _upper(_column(flights, 'arrival', 'scheduledTime'))
+    dep_minutes = time_to_minutes(dep_time)
+    arr_minutes = time_to_minutes(arr_time)
+
+    now = datetime.now().isoformat()
+    frame = pd.DataFrame({
+        'dep_iata_code': _upper(_column(flights, 'departure', 'iataCode')),
+        'arr_iata_code': _upper(_column(flights, 'arrival', 'iataCode')),
+        'airline_iata_code': airline_iata,
+        'flight_iata_number': flight_iata,
+        'dep_scheduled_time': dep_time,
+        'arr_scheduled_time': arr_time,
+        # Corrected weekday if available, otherwise the original API weekday
+        'weekdays': pd.Series([str(f.get('extracted_weekday', f.get('weekday', ''))) for f in flights],
+                              dtype=object),
+        'query_type': query_type.lower(),  # Lowercase as per schema requirement
+        'airport_code': airport_code.upper(),
+        'dep_terminal': _upper(_column(flights, 'departure', 'terminal')),
+        'arr_terminal': _upper(_column(flights, 'arrival', 'terminal')),
+        'dep_gate': _upper(_column(flights, 'departure', 'gate')),
+        'arr_gate': _upper(_column(flights, 'arrival', 'gate')),
+        'aircraft_model_code': _upper(_column(flights, 'aircraft', 'modelCode')),
+        'aircraft_model_text': _upper(_column(flights, 'aircraft', 'modelText')),
+        'airline_name': _upper(_column(flights, 'airline', 'name')),
+        'raw_data': pd.Series([json.dumps(flight) for flight in flights], dtype=object),
+        'is_codeshare': is_codeshare,
+        'operating_airline_iata': operating_airline,
+        'operating_flight_number': operating_flight,
+        'marketing_airline_iata': airline_iata,
+        'marketing_flight_number': flight_iata,
+        'codeshare_group_id': operating_airline + operating_flight,
+        'dep_minutes': _nullable_int(dep_minutes),
+        'arr_minutes': _nullable_int(arr_minutes),
+        # Overnight-adjusted block time; NaN propagates when either time is missing
+        'block_minutes': _nullable_int((arr_minutes - dep_minutes) % (24 * 60)),
+        'created_at': now,
+        'updated_at': now
+    })
+
+    return list(frame[list(FLIGHT_COLUMNS)].itertuples(index=False, name=None))
@@ -0,0 +1,314 @@
+"""
+Aviation Edge Writer Service
+Optional local process that owns the database connection for many collectors
+Collectors send flight batches over an authenticated socket; one thread writes them in order
+"""
+
+import argparse
+import ipaddress
+import itertools
+import os
+import queue
+import threading
+from multiprocessing.connection import Client, Listener
+from typing import Dict, List, Optional, Tuple, Union
+
+from aviation_edge_db import AviationEdgeDB, default_db_path
+from aviation_edge_logging import configure_logging, get_logger
+
+logger = get_logger('writer')
+
+Address = Union[str, Tuple[str, int]]
+
+
+# Former built-in authkey, published in .env.example; never accepted as a secret
+_KNOWN_AUTHKEYS = {b'aviation-edge-writer'}
+
+MIN_AUTHKEY_BYTES = 16
+
+# Errors meaning the service could not be reached or dropped the connection (refused,
+# missing socket, reset, timeout, handshake cut off); a wrong authkey is not among them
+WRITER_UNAVAILABLE = (OSError, EOFError)
+
+
+def parse_writer_address(value: str) -> Address:
+    """
+    Parse a writer address, accepting only local endpoints
+
+    "host:port" selects TCP and the host must be loopback (127.0.0.1 or localhost);
+    anything else is a Unix socket path or a Windows named pipe
+    (\\\\.\\pipe\\aviation-edge-writer). The service unpickles what it receives, so it
+    must never be reachable from other hosts.
+
+    Raises:
+        ValueError: If a TCP address is not on the loopback interface
+    """
+    host, _, port = value.rpartition(':')
+    if not (host and port.isdigit()):
+        return value
+    return local_address((host.strip('[]'), int(port)))
+
+
+def local_address(address: Address) -> Address:
+    """Return the address if it is a socket path, a pipe or a loopback TCP address, else raise ValueError"""
+    if isinstance(address, str):
+        return parse_writer_address(address)
+    host = address[0]
+    try:
+        loopback = host == 'localhost' or ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        loopback = False
+    if not loopback:
+        raise ValueError(f"Writer host {host!r} is not local: use a Unix socket or a loopback address")
+    return address
+
+
+def writer_address() -> Optional[Address]:
+    """Writer service address from DB_WRITER_ADDRESS, or None when the service is not used"""
+    value = os.getenv('DB_WRITER_ADDRESS', '').strip()
+    if not value:
+        return None
+    return parse_writer_address(value)
+
+
+def writer_authkey() -> bytes:
+    """
+    Shared secret authenticating collectors to the writer (DB_WRITER_AUTHKEY)
+
+    There is no default: both ends refuse to start without a secret of at least
+    MIN_AUTHKEY_BYTES, e.g. from `python -c "import secrets; print(secrets.token_hex(32))"`.
+
+    Raises:
+        ValueError: If DB_WRITER_AUTHKEY is unset, too short or the former default
+    """
+    authkey = os.getenv('DB_WRITER_AUTHKEY', '').strip().encode('utf-8')
+    check_authkey(authkey)
+    return authkey
+
+
+def check_authkey(authkey: bytes):
+    """Reject missing, short or publicly known writer secrets"""
+    if not authkey:
+        raise ValueError("DB_WRITER_AUTHKEY is not set; the writer service needs a shared secret")
+    if authkey in _KNOWN_AUTHKEYS:
+        raise ValueError("DB_WRITER_AUTHKEY is the published example value; generate a new secret")
+    if len(authkey) < MIN_AUTHKEY_BYTES:
+        raise ValueError(f"DB_WRITER_AUTHKEY must be at least {MIN_AUTHKEY_BYTES} characters")
+
+
+class WriterClient:
+    """
+    Collector-side connection to the writer service
+
+    insert_flight_batch(), open_payload() and record_payload() have the same
+    signatures and results as the AviationEdgeDB methods, so callers can switch
+    between direct writes and the service (see aviation_edge_db.open_flight_store()).
+    A streamed payload is a token naming the LedgerPayload held by the service.
+    """
+
+    def __init__(self, address: Address = None, authkey: bytes = None):
+        self.address = local_address(address or writer_address())
+        authkey = authkey or writer_authkey()
+        check_authkey(authkey)
+        self.conn = Client(self.address, authkey=authkey)
+
+    def _request(self, kind: str, *args):
+        """Send one request and wait for its result"""
+        self.conn.send((kind,) + args)
+        status, result = self.conn.recv()
+        if status != 'ok':
+            raise RuntimeError(f"Writer service failed to store batch: {result}")
+        return result
+
+    def insert_flight_batch(self, flights_data: List[Dict], query_type: str,
+                            airport_code: str, collection_date: str, payload: int = None) -> int:
+        """
+        Send a batch to the writer and wait until it is committed
+
+        Without a payload the batch is one complete API response; with one it is
+        the next part of a streamed response opened by open_payload().
+
+        Returns:
+            int: Number of flights inserted or updated
+
+        Raises:
+            RuntimeError: If the writer failed to store the batch
+        """
+        return self._request('insert', flights_data, query_type, airport_code, collection_date, payload)
+
+    def open_payload(self, query_type: str, airport_code: str, collection_date: str) -> int:
+        """Start a streamed payload on the service and return its token"""
+        return self._request('open', query_type, airport_code, collection_date)
+
+    def record_payload(self, payload: int):
+        """Record a fully streamed payload's fingerprints in the ingestion ledger"""
+        self._request('record', payload)
+
+    def close(self):
+        """Close the connection to the writer"""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class WriterService:
+    """
+    Serialise flight batches from many collectors through a single DB connection
+
+    Each client connection gets a small reader thread; all requests go through one
+    queue to the writer thread, so SQLite only ever sees one writer and collectors
+    never compete for the database lock.
+    """
+
+    def __init__(self, address: Address, db_path: str = None, authkey: bytes = None):
+        self.address = local_address(address)
+        self.db_path = db_path or default_db_path()
+        self.authkey = authkey or writer_authkey()
+        check_authkey(self.authkey)
+        self._requests = queue.Queue()
+        # Streamed payloads by token; only the writer thread touches them
+        self._payloads = {}
+        self._tokens = itertools.count(1)
+        self.stats = {'batches': 0, 'stored': 0, 'errors': 0}
+
+    def serve_forever(self):
+        """Accept collectors until interrupted"""
+        ready = threading.Event()
+        writer = threading.Thread(target=self._write_loop, args=(ready,), name="db-writer", daemon=True)
+        writer.start()
+        ready.wait()
+        if not writer.is_alive():
+            raise RuntimeError(f"Writer could not open database {self.db_path}")
+
+        with Listener(self.address, authkey=self.authkey) as listener:
+            logger.info(f"🖊️  Writer service listening on {self.address} for {self.db_path}")
+            try:
+                while True:
+                    try:
+                        conn = listener.accept()
+                    except Exception as e:
+                        # Failed handshakes (wrong authkey) must not stop the service
+                        logger.warning(f"⚠️ Rejected writer client: {e}")
+                        continue
+                    threading.Thread(target=self._client_loop, args=(conn,), daemon=True).start()
+            except KeyboardInterrupt:
+                logger.info("🛑 Writer service stopping")
+            finally:
+                self._requests.put(None)
+                writer.join()
+                logger.info(f"📊 Writer stored {self.stats['stored']} flights from {self.stats['batches']} batches "
+                            f"({self.stats['errors']} failed)")
+
+    def _client_loop(self, conn):
+        """Forward one collector's requests to the writer thread and return the results"""
+        replies = queue.Queue(maxsize=1)
+        open_payloads = set()
+        try:
+            while True:
+                try:
+                    request = conn.recv()
+                except EOFError:
+                    break
+                self._requests.put((request, replies))
+                reply = replies.get()
+                if reply[0] == 'ok' and request[0] == 'open':
+                    open_payloads.add(reply[1])
+                elif request[0] == 'record':
+                    open_payloads.discard(request[1])
+                conn.send(reply)
+        except OSError as e:
+            logger.warning(f"⚠️ Writer client disconnected: {e}")
+        finally:
+            conn.close()
+            # A collector that stopped mid-stream never records its payload
+            for token in open_payloads:
+                self._requests.put((('discard', token), None))
+
+    def _write_loop(self, ready: threading.Event):
+        """The only thread touching SQLite: store batches strictly one after another"""
+        db = AviationEdgeDB(self.db_path)
+        connected = db.connect()
+        ready.set()
+        if not connected:
+            return
+
+        try:
+            self._drain_requests(db)
+        finally:
+            db.close()
+
+    def _drain_requests(self, db: AviationEdgeDB):
+        """Process queued requests until the shutdown sentinel arrives"""
+        while True:
+            item = self._requests.get()
+            if item is None:
+                break
+            request, replies = item
+            try:
+                result = self._handle(db, request[0], request[1:])
+                if replies is not None:
+                    replies.put(('ok', result))
+            except Exception as e:
+                self.stats['errors'] += 1
+                if db.conn and db.conn.in_transaction:
+                    db.rollback()
+                logger.error(f"❌ Writer failed to store batch: {e}")
+                if replies is not None:
+                    replies.put(('error', str(e)))
+
+    def _handle(self, db: AviationEdgeDB, kind: str, args: tuple):
+        """Run one request on the writer connection and return its result"""
+        if kind == 'insert':
+            flights_data, query_type, airport_code, collection_date, token = args
+            payload = self._payload(token) if token is not None else None
+            stored = db.insert_flight_batch(flights_data, query_type, airport_code, collection_date, payload=payload)
+            self.stats['batches'] += 1
+            self.stats['stored'] += stored
+            return stored
+        if kind == 'open':
+            token = next(self._tokens)
+            self._payloads[token] = db.open_payload(*args)
+            return token
+        if kind == 'record':
+            payload = self._payload(args[0])
+            del self._payloads[args[0]]
+            db.record_payload(payload)
+            return None
+        if kind == 'discard':
+            self._payloads.pop(args[0], None)
+            return None
+        raise ValueError(f"unknown request {kind!r}")
+
+    def _payload(self, token: int):
+        """Open streamed payload for a token"""
+        if token not in self._payloads:
+            raise ValueError(f"unknown payload {token!r}")
+        return self._payloads[token]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-writer service for the flights database")
+    parser.add_argument('--address', help='host:port, Unix socket path or Windows pipe (default: DB_WRITER_ADDRESS)')
+    parser.add_argument('--db', help='Database path (default: DB/flight_schedules.db)')
+    args = parser.parse_args()
+    configure_logging()
+
+    try:
+        address = parse_writer_address(args.address) if args.address else writer_address()
+        if address is None:
+            parser.error("no address given: pass --address or set DB_WRITER_ADDRESS")
+        service = WriterService(address, args.db)
+    except ValueError as e:
+        parser.error(str(e))
+
+    service.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Shared fixtures: a throwaway flights database and API-shaped flight payloads
+"""
+
+import importlib.util
+import os
+import random
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aviation_edge_db import AviationEdgeDB  # noqa: E402
+from aviation_edge_migrate import apply_migrations  # noqa: E402
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Base flights table as created for DB/flight_schedules.db; aviation_edge_migrate adds
+# everything else (dimensions, time columns, weekday and text indexes, history, ledger)
+FLIGHTS_TABLE = """
+    CREATE TABLE flights (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        weekdays TEXT, airport_code TEXT,
+        dep_iata_code TEXT, dep_icao_code TEXT, dep_terminal TEXT, dep_gate TEXT, dep_scheduled_time TEXT,
+        arr_iata_code TEXT, arr_icao_code TEXT, arr_terminal TEXT, arr_gate TEXT, arr_scheduled_time TEXT,
+        aircraft_model_code TEXT, aircraft_model_text TEXT, airline_name TEXT, airline_iata_code TEXT,
+        airline_icao_code TEXT, flight_number TEXT, flight_iata_number TEXT, flight_icao_number TEXT,
+        raw_data TEXT, created_at TIMESTAMP, updated_at TIMESTAMP, query_type TEXT,
+        is_codeshare BOOLEAN, operating_airline_iata TEXT, operating_flight_number TEXT,
+        marketing_airline_iata TEXT, marketing_flight_number TEXT, codeshare_group_id TEXT
+    )
+"""
+
+AIRPORTS = ['MNL', 'POM', 'HND', 'SYD', 'CEB', 'DVO']
+AIRLINES = [('PR', 'Philippine Airlines'), ('PX', 'Air Niugini'), ('5J', 'Cebu Pacific')]
+
+
+def make_flights(count: int = 20, seed: int = 1, weekday: str = '3', airport: str = 'MNL',
+                 query_type: str = 'departure'):
+    """Flights shaped like a flightsFuture response (lowercase codes, every 7th a codeshare)"""
+    rng = random.Random(seed)
+    flights = []
+    for i in range(count):
+        airline, name = rng.choice(AIRLINES)
+        other = rng.choice([code for code in AIRPORTS if code != airport])
+        dep, arr = (airport, other) if query_type == 'departure' else (other, airport)
+        dep_minutes = rng.randrange(24) * 60 + rng.choice([0, 15, 30, 45])
+        arr_minutes = (dep_minutes + rng.randrange(60, 600)) % 1440
+        flight = {
+            'weekday': weekday,
+            'departure': {'iataCode': dep.lower(), 'terminal': rng.choice(['1', '2', None]), 'gate': None,
+                          'scheduledTime': f"{dep_minutes // 60:02d}:{dep_minutes % 60:02d}"},
+            'arrival': {'iataCode': arr.lower(), 'terminal': '1', 'gate': None,
+                        'scheduledTime': f"{arr_minutes // 60:02d}:{arr_minutes % 60:02d}"},
+            'aircraft': {'modelCode': 'a321', 'modelText': rng.choice(['Airbus A321-271N', 'Boeing 737-81M'])},
+            'airline': {'name': name, 'iataCode': airline.lower()},
+            'flight': {'number': str(100 + i), 'iataNumber': f"{airline}{100 + i}".lower()},
+        }
+        if i % 7 == 0:
+            flight['codeshared'] = {'airline': {'iataCode': 'px'}, 'flight': {'iataNumber': f"px{500 + i}"}}
+        flights.append(flight)
+    return flights
+
+
+def api_flight(number: str, dep: str, arr: str, dep_time: str, arr_time: str, weekday: str = '1',
+               aircraft: str = 'Airbus A321-271N', operated_by: str = None):
+    """One flightsFuture record; operated_by makes it a codeshare of that operating flight"""
+    flight = {
+        'weekday': weekday,
+        'departure': {'iataCode': dep.lower(), 'terminal': '1', 'gate': None, 'scheduledTime': dep_time},
+        'arrival': {'iataCode': arr.lower(), 'terminal': '1', 'gate': None, 'scheduledTime': arr_time},
+        'aircraft': {'modelCode': 'a321', 'modelText': aircraft},
+        'airline': {'name': f"{number[:2]} Airline", 'iataCode': number[:2].lower()},
+        'flight': {'number': number[2:], 'iataNumber': number.lower()},
+    }
+    if operated_by:
+        flight['codeshared'] = {'airline': {'iataCode': operated_by[:2].lower()},
+                                'flight': {'iataNumber': operated_by.lower()}}
+    return flight
+
+
+def load_script(relative_path: str):
+    """Import a hyphenated script (API/Departure-Future-Schedules.py, Flight-Search.py) as a module"""
+    name = os.path.splitext(os.path.basename(relative_path))[0].replace('-', '_').lower()
+    spec = importlib.util.spec_from_file_location(name, os.path.join(REPO_DIR, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def base_db_path(tmp_path):
+    """Path of an empty flights database that has not been migrated yet"""
+    path = str(tmp_path / 'flight_schedules.db')
+    conn = sqlite3.connect(path)
+    conn.execute(FLIGHTS_TABLE)
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def db_path(base_db_path):
+    """Path of an empty, fully migrated flights database"""
+    conn = sqlite3.connect(base_db_path)
+    apply_migrations(conn)
+    conn.close()
+    return base_db_path
+
+
+@pytest.fixture
+def db(db_path):
+    """Connected AviationEdgeDB on the empty database"""
+    handler = AviationEdgeDB(db_path)
+    assert handler.connect()
+    yield handler
+    handler.close()
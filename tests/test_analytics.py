@@ -0,0 +1,86 @@
+"""
+NumPy analytics on the SQLite backend: route matrix and bank histograms
+"""
+
+import numpy as np
+import pytest
+
+from aviation_edge_analytics import RouteMatrix, bank_histograms
+from conftest import api_flight
+
+
+@pytest.fixture
+def network_db(db):
+    """MNL->POM: PX500 Mon/Wed (PR7500 codeshare, also collected at POM) and PR215 Mon/Tue; one weekly flight
+    on POM->MNL, MNL->HND and HND->SYD"""
+    for weekday, target_date in (('1', '2026-11-09'), ('3', '2026-11-11')):
+        db.insert_flight_batch([
+            api_flight('PX500', 'MNL', 'POM', '23:30', '05:10', weekday),
+            api_flight('PR7500', 'MNL', 'POM', '23:30', '05:10', weekday, operated_by='PX500'),
+        ], 'departure', 'MNL', target_date)
+    for weekday, target_date in (('1', '2026-11-09'), ('2', '2026-11-10')):
+        db.insert_flight_batch([api_flight('PR215', 'MNL', 'POM', '08:00', '13:40', weekday)],
+                               'departure', 'MNL', target_date)
+    db.insert_flight_batch([api_flight('PX500', 'MNL', 'POM', '23:30', '05:10', '1')], 'arrival', 'POM', '2026-11-10')
+    db.insert_flight_batch([api_flight('PR101', 'POM', 'MNL', '10:15', '14:40', '5'),
+                            api_flight('PR431', 'MNL', 'HND', '09:00', '14:20', '1'),
+                            api_flight('JL78', 'HND', 'SYD', '20:00', '07:30', '1')],
+                           'departure', 'POM', '2026-11-13')
+    return db
+
+
+def test_route_matrix_counts_each_physical_departure_once(network_db):
+    matrix = RouteMatrix.from_database(network_db.conn)
+    assert matrix.airports == ['HND', 'MNL', 'POM', 'SYD']
+    assert matrix.frequency.sum() == 7
+    assert matrix.top_routes(1) == [('MNL', 'POM', 4)]
+    assert matrix.top_routes() == [('MNL', 'POM', 4), ('HND', 'SYD', 1), ('MNL', 'HND', 1), ('POM', 'MNL', 1)]
+    assert matrix.hub_degrees(1) == [{'airport': 'MNL', 'destinations': 2, 'origins': 1,
+                                      'departures': 5, 'arrivals': 1}]
+    assert RouteMatrix.from_database(network_db.conn, airline='px').frequency.sum() == 2
+
+
+def test_reachability_and_airline_shares(network_db):
+    matrix = RouteMatrix.from_database(network_db.conn)
+    assert matrix.stops_from('pom', max_stops=2) == {'HND': 1, 'MNL': 0, 'SYD': 2}
+    assert matrix.stops_from('GUM') == {}
+    assert matrix.reachable_counts(1).tolist() == [1, 3, 2, 0]
+    assert [(airline, weekly) for airline, weekly, _ in matrix.airline_shares()] == [('PR', 4), ('PX', 2),
+                                                                                     ('JL', 1)]
+    assert matrix.airline_shares(origin='MNL', destination='POM') == [('PR', 2, 0.5), ('PX', 2, 0.5)]
+
+    report = matrix.network_report(limit=2)
+    assert (report['airports'], report['routes'], report['weekly_departures']) == (4, 4, 7)
+    assert report['reachability'] == [('MNL', 3), ('POM', 2)]
+
+
+@pytest.fixture
+def banks_db(db):
+    """PX500 MNL->POM 23:30-05:10 on Mondays and Wednesdays with a PR codeshare, PR101 POM->MNL on Fridays"""
+    for weekday, target_date in (('1', '2026-11-09'), ('3', '2026-11-11')):
+        db.insert_flight_batch([
+            api_flight('PX500', 'MNL', 'POM', '23:30', '05:10', weekday),
+            api_flight('PR7500', 'MNL', 'POM', '23:30', '05:10', weekday, operated_by='PX500'),
+        ], 'departure', 'MNL', target_date)
+    db.insert_flight_batch([api_flight('PR101', 'POM', 'MNL', '10:15', '14:40', '5')],
+                           'departure', 'POM', '2026-11-13')
+    return db
+
+
+def test_departure_banks_count_each_physical_flight_once(banks_db):
+    departures = bank_histograms(banks_db.conn, 'mnl')['departures']
+    assert departures.shape == (7, 24) and departures.sum() == 2
+    assert departures[0, 23] == 1 and departures[2, 23] == 1
+
+
+def test_overnight_arrivals_land_on_the_next_weekday(banks_db):
+    arrivals = bank_histograms(banks_db.conn, 'POM', resolution=15)['arrivals']
+    assert arrivals.shape == (7, 96)
+    assert np.argwhere(arrivals).tolist() == [[1, 20], [3, 20]]
+
+
+def test_airline_filter_and_resolution(banks_db):
+    assert bank_histograms(banks_db.conn, 'MNL', airline='PR')['arrivals'][4, 14] == 1
+    assert bank_histograms(banks_db.conn, 'MNL', airline='PR')['departures'].sum() == 0
+    with pytest.raises(ValueError, match='Resolution'):
+        bank_histograms(banks_db.conn, 'MNL', resolution=30)
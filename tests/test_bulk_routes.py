@@ -0,0 +1,43 @@
+"""
+Bulk route search: many origin/destination pairs answered by one query
+"""
+
+import pytest
+
+from conftest import load_script, make_flights
+
+TARGET_DATE = '2026-11-11'
+
+
+@pytest.fixture(scope='module')
+def search_module():
+    return load_script('Flight-Search.py')
+
+
+@pytest.fixture
+def searcher(search_module, db):
+    db.insert_flight_batch(make_flights(40, seed=8), 'departure', 'MNL', TARGET_DATE)
+    db.insert_flight_batch(make_flights(20, seed=9, airport='CEB'), 'departure', 'CEB', TARGET_DATE)
+    system = search_module.FlightSearchSystem(db.db_path, keep_connection=True)
+    yield system
+    system.close()
+
+
+PAIRS = [('mnl', 'POM'), ('GUM', 'MNL'), ('CEB', 'SYD'), ('MNL', 'POM'), ('MNL', 'HND')]
+
+
+@pytest.mark.parametrize('airline, sort', [(None, 'flight'), ('pr', 'flight'), (None, 'departure')])
+def test_each_pair_matches_a_single_route_search(searcher, airline, sort):
+    results = list(searcher.search_routes_bulk(PAIRS, airline=airline, sort=sort))
+    assert [pair for pair, _ in results] == [(origin.upper(), destination) for origin, destination in PAIRS]
+    for (origin, destination), flights in results:
+        assert flights == searcher.search_route(origin, destination, airline=airline, sort=sort)
+    assert results[1][1] == [] and results[0][1]
+
+
+def test_route_pairs_file_format(search_module):
+    lines = ["# weekly report", "MNL POM", "mnl-hnd  # Tokyo", "", "CEB,SYD", "DVO → MNL"]
+    assert search_module.parse_route_pairs(lines) == [('MNL', 'POM'), ('MNL', 'HND'), ('CEB', 'SYD'),
+                                                      ('DVO', 'MNL')]
+    with pytest.raises(ValueError, match='Line 2'):
+        search_module.parse_route_pairs(["MNL POM", "MNL"])
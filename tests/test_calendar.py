@@ -0,0 +1,116 @@
+"""
+Flight calendar: refreshed by collectors only, dated boards count each departure once
+"""
+
+import importlib.util
+import os
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+from aviation_edge_calendar import calendar_is_stale, refresh_after_collection, refresh_calendar
+from conftest import make_flights
+
+_SEARCH_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Flight-Search.py')
+
+
+def _flight_search():
+    spec = importlib.util.spec_from_file_location('flight_search', _SEARCH_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _physical_departure(weekday: str):
+    """PR100 MNL→POM as collected from both airports, plus its NH5 codeshare"""
+    operating = {
+        'weekday': weekday,
+        'departure': {'iataCode': 'mnl', 'scheduledTime': '08:00'},
+        'arrival': {'iataCode': 'pom', 'scheduledTime': '13:00'},
+        'airline': {'iataCode': 'pr', 'name': 'Philippine Airlines'},
+        'flight': {'iataNumber': 'pr100'},
+    }
+    codeshare = dict(operating, airline={'iataCode': 'nh', 'name': 'ANA'}, flight={'iataNumber': 'nh5'},
+                     codeshared={'airline': {'iataCode': 'pr'}, 'flight': {'iataNumber': 'pr100'}})
+    return [operating, codeshare]
+
+
+def _expected_instances(conn, first: date, days: int):
+    patterns = conn.execute("SELECT flight_id, weekday FROM flight_weekdays").fetchall()
+    return {(flight_id, (first + timedelta(days=offset)).isoformat())
+            for offset in range(days) for flight_id, weekday in patterns
+            if (first + timedelta(days=offset)).isoweekday() == weekday}
+
+
+def test_refresh_expands_patterns_and_follows_the_horizon(db):
+    for weekday in ('1', '5'):
+        db.insert_flight_batch(make_flights(10, seed=3, weekday=weekday), 'departure', 'MNL', f'2026-11-0{weekday}')
+    conn, start = db.conn, date(2026, 11, 2)
+
+    refresh_calendar(conn, 14, start)
+    instances = set(conn.execute("SELECT flight_id, service_date FROM flight_instances"))
+    assert instances == _expected_instances(conn, start, 14)
+    assert not calendar_is_stale(conn, start)
+
+    later = start + timedelta(days=3)
+    assert calendar_is_stale(conn, later)
+    stats = refresh_calendar(conn, 14, later)
+    assert stats['dropped'] > 0 and stats['changed_flights'] == 0
+    assert set(conn.execute("SELECT flight_id, service_date FROM flight_instances")) == \
+        _expected_instances(conn, later, 14)
+
+
+def test_changed_and_deleted_flights_are_re_expanded(db):
+    db.insert_flight_batch(make_flights(10, seed=3, weekday='1'), 'departure', 'MNL', '2026-11-02')
+    conn, start = db.conn, date(2026, 11, 2)
+    refresh_calendar(conn, 14, start)
+
+    db.insert_flight_batch(make_flights(10, seed=3, weekday='2'), 'departure', 'MNL', '2026-11-03')
+    conn.execute("DELETE FROM flights WHERE id = 1")
+    conn.commit()
+    assert calendar_is_stale(conn, start)
+    assert refresh_calendar(conn, 14, start)['changed_flights'] == 9
+    assert set(conn.execute("SELECT flight_id, service_date FROM flight_instances")) == \
+        _expected_instances(conn, start, 14)
+
+
+def test_refresh_after_collection_only_when_stale(db_path, db):
+    db.insert_flight_batch(make_flights(5, seed=3), 'departure', 'MNL', '2026-11-04')
+    assert refresh_after_collection(db_path)['added'] > 0
+    assert refresh_after_collection(db_path) is None
+
+    db.insert_flight_batch(make_flights(5, seed=3, weekday='6'), 'departure', 'MNL', '2026-11-07')
+    assert refresh_after_collection(db_path)['changed_flights'] == 5
+
+
+def test_refresh_after_collection_logs_instead_of_raising(tmp_path):
+    broken = str(tmp_path / 'broken.db')
+    sqlite3.connect(broken).close()   # no flights table
+    assert refresh_after_collection(broken) is None
+
+
+def test_searches_do_not_build_the_calendar(db_path, db):
+    db.insert_flight_batch(make_flights(5, seed=3), 'departure', 'MNL', '2026-11-04')
+    search = _flight_search().FlightSearchSystem(db_path)
+    with pytest.raises(ValueError, match='No flight calendar'):
+        search.daily_flight_counts('MNL')
+    tables = {row[0] for row in db.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 'calendar_state' not in tables
+
+
+def test_dated_board_lists_each_physical_departure_once(db_path, db):
+    today = date.today()
+    weekday = str(today.isoweekday())
+    db.insert_flight_batch(_physical_departure(weekday), 'departure', 'MNL', today.isoformat())
+    db.insert_flight_batch(_physical_departure(weekday), 'arrival', 'POM', today.isoformat())
+    assert db.get_flight_count() == 4
+    refresh_after_collection(db_path)
+
+    search = _flight_search().FlightSearchSystem(db_path)
+    board = search.departure_board('MNL', today.isoformat())
+    assert len(board) == 1
+    assert (board[0]['airline_iata_code'], board[0]['flight_iata_number']) == ('PR', 'PR100')
+    assert board[0]['marketing_flights'] == ['NH5']
+    assert dict(search.daily_flight_counts('MNL'))[today.isoformat()] == 1
+    assert dict(search.daily_flight_counts('POM', arrivals=True))[today.isoformat()] == 1
@@ -0,0 +1,45 @@
+"""
+Codeshare-aware search: one result per operating flight with its marketing numbers
+"""
+
+import pytest
+
+from conftest import api_flight, load_script
+
+
+@pytest.fixture
+def searcher(db):
+    """PX500 MNL->POM 23:30 marketed as PR7500 and 5J9500, plus PR215 operated by PR itself"""
+    for weekday, target_date in (('1', '2026-11-09'), ('3', '2026-11-11')):
+        db.insert_flight_batch([
+            api_flight('PX500', 'MNL', 'POM', '23:30', '05:10', weekday),
+            api_flight('PR7500', 'MNL', 'POM', '23:30', '05:10', weekday, operated_by='PX500'),
+            api_flight('5J9500', 'MNL', 'POM', '23:30', '05:10', weekday, operated_by='PX500'),
+        ], 'departure', 'MNL', target_date)
+    db.insert_flight_batch([api_flight('PR7500', 'MNL', 'POM', '23:30', '05:10', '5', operated_by='PX500')],
+                           'departure', 'MNL', '2026-11-13')
+    db.insert_flight_batch([api_flight('PX500', 'MNL', 'POM', '23:30', '05:10', '1')], 'arrival', 'POM',
+                           '2026-11-10')
+    db.insert_flight_batch([api_flight('PR215', 'MNL', 'POM', '08:00', '13:40')], 'departure', 'MNL', '2026-11-09')
+    system = load_script('Flight-Search.py').FlightSearchSystem(db.db_path, keep_connection=True)
+    yield system
+    system.close()
+
+
+def _collapsed(flights):
+    return [(flight['flight_iata_number'], flight['weekdays'], flight['marketing_flights']) for flight in flights]
+
+
+def test_marketing_rows_collapse_into_the_operating_flight(searcher):
+    assert len(searcher.search_route('MNL', 'POM')) == 5
+    assert _collapsed(searcher.search_route('MNL', 'POM', collapse_codeshares=True)) == [
+        ('PR215', '1', []), ('PX500', '1,3,5', ['5J9500', 'PR7500'])]
+
+
+@pytest.mark.parametrize('filters', [{'airline': '5j'}, {'airline': 'PR', 'flight_number': '7500'},
+                                     {'flight_number': 'PX500'}])
+def test_any_member_number_finds_the_whole_group(searcher, filters):
+    flights = searcher.search_route(origin='MNL', collapse_codeshares=True, **filters)
+    assert [flight for flight in _collapsed(flights) if flight[0] == 'PX500'] == [
+        ('PX500', '1,3,5', ['5J9500', 'PR7500'])]
+    assert searcher.search_route(origin='MNL', collapse_codeshares=True, airline='QF') == []
@@ -0,0 +1,80 @@
+"""
+Lock retry: a batch that owns its transaction is replayed after another writer releases the lock
+"""
+
+import sqlite3
+
+import pytest
+
+import aviation_edge_db
+from aviation_edge_db import AviationEdgeDB, is_lock_error
+from conftest import make_flights
+
+
+@pytest.fixture
+def locked_db(db_path, monkeypatch):
+    """Handler with a short busy timeout, plus a second connection holding the write lock"""
+    monkeypatch.setenv('DB_BUSY_TIMEOUT_MS', '50')
+    monkeypatch.setenv('DB_LOCK_RETRIES', '2')
+    handler = AviationEdgeDB(db_path)
+    assert handler.connect()
+    blocker = sqlite3.connect(db_path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    yield handler, blocker
+    if blocker.in_transaction:
+        blocker.execute("ROLLBACK")
+    blocker.close()
+    handler.close()
+
+
+def test_is_lock_error():
+    assert is_lock_error(sqlite3.OperationalError('database is locked'))
+    assert is_lock_error(sqlite3.OperationalError('database table is busy'))
+    assert not is_lock_error(sqlite3.OperationalError('no such table: flights'))
+    assert not is_lock_error(ValueError('database is locked'))
+
+
+def test_locked_batch_is_retried_once_the_lock_is_released(locked_db, monkeypatch):
+    handler, blocker = locked_db
+    sleeps = []
+
+    def release_lock(seconds):
+        sleeps.append(seconds)
+        blocker.execute("COMMIT")
+
+    monkeypatch.setattr(aviation_edge_db.time, 'sleep', release_lock)
+    rows = handler.prepare_flight_batch(make_flights(10), 'departure', 'MNL', '2026-11-04')
+    assert handler.store_prepared_flights(rows) == 10
+    assert len(sleeps) == 1
+    assert handler.get_flight_count() == 10
+    # The rolled-back attempt left no partial history behind
+    assert handler.conn.execute("SELECT COUNT(*) FROM collection_runs").fetchone()[0] == 1
+
+
+def test_lock_error_is_raised_when_retries_run_out(locked_db, monkeypatch):
+    handler, _ = locked_db
+    sleeps = []
+    monkeypatch.setattr(aviation_edge_db.time, 'sleep', sleeps.append)
+    rows = handler.prepare_flight_batch(make_flights(5), 'departure', 'MNL', '2026-11-04')
+    with pytest.raises(sqlite3.OperationalError, match='locked'):
+        handler.store_prepared_flights(rows)
+    assert len(sleeps) == 2
+    assert not handler.conn.in_transaction
+
+
+def test_lock_error_inside_a_callers_transaction_is_not_replayed(locked_db, monkeypatch):
+    handler, blocker = locked_db
+    blocker.execute("COMMIT")
+    rows = handler.prepare_flight_batch(make_flights(5), 'departure', 'MNL', '2026-11-04')
+    handler.store_prepared_flights(rows[:2], commit=False)   # handler now holds the write lock
+
+    other = AviationEdgeDB(handler.db_path)
+    assert other.connect()
+    try:
+        other.conn.execute("BEGIN")   # e.g. the pipeline writer's open transaction
+        monkeypatch.setattr(aviation_edge_db.time, 'sleep', lambda seconds: pytest.fail("batch was replayed"))
+        with pytest.raises(sqlite3.OperationalError, match='locked'):
+            other.store_prepared_flights(other.prepare_flight_batch(make_flights(5, seed=2), 'departure',
+                                                                    'POM', '2026-11-04'), commit=False)
+    finally:
+        other.close()
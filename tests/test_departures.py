@@ -0,0 +1,69 @@
+"""
+Departure queries on the flight_weekdays index: weekday and time windows, next departures across the week
+"""
+
+from datetime import datetime
+
+import pytest
+
+from conftest import api_flight, load_script
+
+
+@pytest.fixture(scope='module')
+def search_module():
+    return load_script('Flight-Search.py')
+
+
+@pytest.fixture
+def searcher(search_module, db):
+    """MNL: PR103 Mon 01:15, PX500 Mon/Wed 23:30 (PR7500 codeshare, also collected at POM), PR101 Fri 07:00"""
+    for weekday, target_date in (('1', '2026-11-09'), ('3', '2026-11-11')):
+        db.insert_flight_batch([
+            api_flight('PX500', 'MNL', 'POM', '23:30', '05:10', weekday),
+            api_flight('PR7500', 'MNL', 'POM', '23:30', '05:10', weekday, operated_by='PX500'),
+        ], 'departure', 'MNL', target_date)
+    db.insert_flight_batch([api_flight('PR103', 'MNL', 'SYD', '01:15', '11:40', '1')], 'departure', 'MNL',
+                           '2026-11-09')
+    db.insert_flight_batch([api_flight('PR101', 'MNL', 'HND', '07:00', '12:20', '5')], 'departure', 'MNL',
+                           '2026-11-13')
+    db.insert_flight_batch([api_flight('PX500', 'MNL', 'POM', '23:30', '05:10', '1')], 'arrival', 'POM',
+                           '2026-11-10')
+    system = search_module.FlightSearchSystem(db.db_path, keep_connection=True)
+    yield system
+    system.close()
+
+
+def _departures(flights):
+    return [(flight['weekday'], flight['flight_iata_number']) for flight in flights]
+
+
+def test_each_physical_departure_is_listed_once_per_weekday(searcher):
+    flights = searcher.search_departures('mnl')
+    assert _departures(flights) == [(1, 'PR103'), (1, 'PX500'), (3, 'PX500'), (5, 'PR101')]
+    assert flights[1]['marketing_flights'] == ['PR7500']
+
+
+def test_weekday_and_time_window_filters(searcher):
+    assert _departures(searcher.search_departures('MNL', weekday='Mon', window='00:00-06:00')) == [(1, 'PR103')]
+    assert _departures(searcher.search_departures('MNL', window='22:00-02:00')) == [
+        (1, 'PR103'), (1, 'PX500'), (3, 'PX500')]
+    assert _departures(searcher.search_departures('MNL', destination='HND', airline='pr')) == [(5, 'PR101')]
+    assert searcher.search_departures('GUM') == []
+    with pytest.raises(ValueError, match='weekday'):
+        searcher.search_departures('MNL', weekday='Someday')
+
+
+def test_next_departures_wrap_into_next_week(searcher):
+    flights = searcher.next_departures('MNL', count=10, after=datetime(2026, 11, 16, 23, 45))
+    assert [(flight['departure_date'], flight['flight_iata_number']) for flight in flights] == [
+        ('2026-11-18', 'PX500'), ('2026-11-20', 'PR101'), ('2026-11-23', 'PR103'), ('2026-11-23', 'PX500')]
+
+    flights = searcher.next_departures('MNL', count=2, after=datetime(2026, 11, 15, 23, 0))
+    assert [(flight['departure_date'], flight['flight_iata_number']) for flight in flights] == [
+        ('2026-11-16', 'PR103'), ('2026-11-16', 'PX500')]
+
+
+def test_merged_weekdays_reach_the_index(searcher, db):
+    db.insert_flight_batch([api_flight('PR101', 'MNL', 'HND', '07:00', '12:20', '6')], 'departure', 'MNL',
+                           '2026-11-14')
+    assert _departures(searcher.search_departures('MNL', weekday=6)) == [(6, 'PR101')]
@@ -0,0 +1,71 @@
+"""
+Dimension tables: display names and interned airline, airport and aircraft ids on flights
+"""
+
+import pytest
+
+from aviation_edge_dimensions import aircraft_display_name
+from conftest import api_flight, make_flights
+
+TARGET_DATE = '2026-11-11'
+
+
+def _dimension_names(db):
+    return db.conn.execute("""
+        SELECT a.iata_code, d.iata_code, r.iata_code, c.display_name
+        FROM flights f
+        JOIN dim_airlines a ON a.id = f.airline_id
+        JOIN dim_airports d ON d.id = f.dep_airport_id
+        JOIN dim_airports r ON r.id = f.arr_airport_id
+        JOIN dim_aircraft c ON c.id = f.aircraft_id
+        ORDER BY f.flight_iata_number
+    """).fetchall()
+
+
+@pytest.mark.parametrize('model_text, model_code, expected', [
+    ('AIRBUS A321-271N', 'A321', 'A321neo'),
+    ('BOEING 737-81M', 'B738', 'B737-800'),
+    ('AIRBUS A330-300', None, 'A330-300'),
+    (None, 'DH8D', 'DH8D'),
+    ('  ', '', 'N/A'),
+])
+def test_aircraft_display_name(model_text, model_code, expected):
+    assert aircraft_display_name(model_text, model_code) == expected
+
+
+def test_new_flights_reference_their_dimension_rows(db):
+    db.insert_flight_batch([
+        api_flight('PX500', 'MNL', 'POM', '23:30', '05:10'),
+        api_flight('PR101', 'POM', 'MNL', '10:15', '14:40', aircraft='Boeing 737-81M'),
+    ], 'departure', 'MNL', TARGET_DATE)
+    assert _dimension_names(db) == [('PR', 'POM', 'MNL', 'B737-800'), ('PX', 'MNL', 'POM', 'A321neo')]
+    assert db.conn.execute("SELECT COUNT(*) FROM dim_airports").fetchone() == (2,)
+
+
+def test_each_member_is_interned_once(db):
+    db.insert_flight_batch(make_flights(20, seed=6), 'departure', 'MNL', TARGET_DATE)
+    db.insert_flight_batch(make_flights(20, seed=7, weekday='5'), 'departure', 'MNL', '2026-11-13')
+    assert db.conn.execute("SELECT iata_code FROM dim_airports ORDER BY iata_code").fetchall() == [
+        (code,) for code in ('CEB', 'DVO', 'HND', 'MNL', 'POM', 'SYD')]
+    assert db.conn.execute("SELECT iata_code FROM dim_airlines ORDER BY iata_code").fetchall() == [
+        ('5J',), ('PR',), ('PX',)]
+    assert db.conn.execute("SELECT COUNT(*) FROM flights WHERE aircraft_id IS NULL").fetchone() == (0,)
+
+
+def test_schedule_update_moves_the_aircraft_id(db):
+    db.insert_flight_batch([api_flight('PX500', 'MNL', 'POM', '23:30', '05:10')], 'departure', 'MNL', TARGET_DATE)
+    db.insert_flight_batch([api_flight('PX500', 'MNL', 'POM', '23:30', '05:10', aircraft='Boeing 737-81M')],
+                           'departure', 'MNL', '2026-11-18')
+    assert _dimension_names(db) == [('PX', 'MNL', 'POM', 'B737-800')]
+
+
+def test_rollback_forgets_ids_interned_in_the_transaction(db):
+    rows = db.prepare_flight_batch([api_flight('PX500', 'MNL', 'POM', '23:30', '05:10')], 'departure', 'MNL',
+                                   TARGET_DATE)
+    db.store_prepared_flights(rows, commit=False)
+    assert 'POM' in db.dimensions.airports
+    db.rollback()
+    assert db.dimensions.airports == {}
+
+    db.insert_flight_batch([api_flight('PR101', 'POM', 'SYD', '10:15', '14:40')], 'departure', 'POM', TARGET_DATE)
+    assert _dimension_names(db) == [('PR', 'POM', 'SYD', 'A321neo')]
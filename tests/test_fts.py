@@ -0,0 +1,66 @@
+"""
+Text search: prefix matching over airline names, aircraft and flight numbers, and autocomplete
+"""
+
+import sqlite3
+
+import pytest
+
+from aviation_edge_fts import fts5_available, match_expression
+from conftest import api_flight, load_script
+
+pytestmark = pytest.mark.skipif(not fts5_available(sqlite3.connect(':memory:')), reason='SQLite without FTS5')
+
+TARGET_DATE = '2026-11-11'
+
+
+def _flight(number, dep, arr, airline_name, aircraft, model_code):
+    flight = api_flight(number, dep, arr, '08:00', '12:00', '3', aircraft=aircraft)
+    flight['airline']['name'] = airline_name
+    flight['aircraft']['modelCode'] = model_code
+    return flight
+
+
+@pytest.fixture
+def searcher(db):
+    db.insert_flight_batch([
+        _flight('PR215', 'MNL', 'POM', 'Philippine Airlines', 'Airbus A321-271N', 'A321'),
+        _flight('PR2150', 'MNL', 'SYD', 'Philippine Airlines', 'Airbus A330-300', 'A333'),
+        _flight('PX21', 'MNL', 'POM', 'Air Niugini', 'Boeing 737-81M', 'B738'),
+        _flight('5J241', 'MNL', 'CEB', 'Cebu Pacific', 'Airbus A321-271N', 'A321'),
+    ], 'departure', 'MNL', TARGET_DATE)
+    system = load_script('Flight-Search.py').FlightSearchSystem(db.db_path, keep_connection=True)
+    yield system
+    system.close()
+
+
+def _numbers(flights):
+    return sorted(flight['flight_iata_number'] for flight in flights)
+
+
+def test_every_word_matches_as_a_prefix(searcher):
+    assert _numbers(searcher.search_text('philippine a321')) == ['PR215']
+    assert _numbers(searcher.search_text('PR 21')) == ['PR215', 'PR2150']
+    assert _numbers(searcher.search_text('a321-271n', destination='ceb')) == ['5J241']
+    assert _numbers(searcher.search_text('21', origin='MNL')) == ['PR215', 'PR2150', 'PX21']
+    assert searcher.search_text('--') == []
+    assert match_expression('PR "215"') == '"pr"* AND "215"*'
+
+
+def test_autocomplete_suggests_each_kind_most_flights_first(searcher):
+    assert searcher.autocomplete('phil') == [('airline', 'PHILIPPINE AIRLINES', 2)]
+    assert searcher.autocomplete('a3') == [('aircraft', 'AIRBUS A321-271N', 2), ('aircraft', 'AIRBUS A330-300', 1)]
+    assert [value for kind, value, _ in searcher.autocomplete('21') if kind == 'flight'] == [
+        'PR215', 'PR2150', 'PX21']
+    assert searcher.autocomplete('') == []
+
+
+def test_index_follows_updates_and_deletes(searcher, db):
+    db.insert_flight_batch([_flight('PX21', 'MNL', 'POM', 'Air Niugini', 'De Havilland Dash 8', 'DH8D')],
+                           'departure', 'MNL', '2026-11-18')
+    assert _numbers(searcher.search_text('dash')) == ['PX21']
+    assert searcher.search_text('boeing') == []
+
+    db.conn.execute("DELETE FROM flights WHERE flight_iata_number = 'PX21'")
+    db.conn.commit()
+    assert searcher.search_text('niugini') == []
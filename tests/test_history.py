@@ -0,0 +1,141 @@
+"""
+Schedule history: field changes of re-collected flights are applied and logged per run
+"""
+
+import copy
+
+from aviation_edge_history import changes_since
+from conftest import make_flights
+
+
+def _single_flight(**departure):
+    flight = make_flights(1, seed=9)[0]
+    flight.pop('codeshared', None)
+    flight['departure'].update(departure)
+    return flight
+
+
+def _logged(db):
+    return {(change['field'], change['old_value'], change['new_value'])
+            for change in changes_since(db.conn, '2000-01-01')}
+
+
+def test_added_flights_are_logged(db):
+    db.insert_flight_batch(make_flights(5, seed=1), 'departure', 'MNL', '2026-11-04')
+    changes = changes_since(db.conn, '2000-01-01')
+    assert len(changes) == 5 and all(change['field'] == '' for change in changes)
+    assert changes[0]['run'] == 'MNL departure 2026-11-04'
+
+
+def test_changed_fields_are_updated_and_logged(db):
+    flight = _single_flight(terminal='1', scheduledTime='08:00')
+    flight['arrival']['scheduledTime'] = '10:00'
+    db.insert_flight_batch([flight], 'departure', 'MNL', '2026-11-04')
+
+    changed = copy.deepcopy(flight)
+    changed['departure']['terminal'] = '3'
+    changed['arrival']['scheduledTime'] = '10:30'
+    changed['arrival']['terminal'] = None      # not reported: keeps the stored value
+    assert db.insert_flight_batch([changed], 'departure', 'MNL', '2026-11-04') == 1
+
+    assert {('dep_terminal', '1', '3'), ('arr_scheduled_time', '10:00', '10:30')} <= _logged(db)
+    row = db.conn.execute("SELECT dep_terminal, arr_terminal, arr_minutes, block_minutes FROM flights").fetchone()
+    assert row == ('3', '1', 630, 150)
+
+
+def test_weekday_merge_is_logged(db):
+    flight = _single_flight()
+    db.insert_flight_batch([flight], 'departure', 'MNL', '2026-11-04')
+    thursday = dict(copy.deepcopy(flight), weekday='4')
+    db.insert_flight_batch([thursday], 'departure', 'MNL', '2026-11-05')
+    assert ('weekdays', '3', '3,4') in _logged(db)
+    assert db.get_flight_count() == 1
+
+
+def test_retimed_departure_updates_the_stored_flight(db):
+    flight = _single_flight(scheduledTime='08:00')
+    flight['arrival']['scheduledTime'] = '10:00'
+    db.insert_flight_batch([flight], 'departure', 'MNL', '2026-11-04')
+
+    retimed = copy.deepcopy(flight)
+    retimed['departure']['scheduledTime'] = '08:45'
+    assert db.insert_flight_batch([retimed], 'departure', 'MNL', '2026-11-11') == 1
+
+    assert db.get_flight_count() == 1
+    assert ('dep_scheduled_time', '08:00', '08:45') in _logged(db)
+    row = db.conn.execute("SELECT dep_scheduled_time, dep_minutes, block_minutes FROM flights").fetchone()
+    assert row == ('08:45', 525, 75)
+    assert db.conn.execute("SELECT weekday, dep_minutes FROM flight_weekdays").fetchall() == [(3, 525)]
+
+
+def test_other_time_on_another_weekday_is_a_separate_flight(db):
+    flight = _single_flight(scheduledTime='08:00')
+    db.insert_flight_batch([flight], 'departure', 'MNL', '2026-11-04')
+    saturday = dict(copy.deepcopy(flight), weekday='6')
+    saturday['departure']['scheduledTime'] = '14:00'
+    db.insert_flight_batch([saturday], 'departure', 'MNL', '2026-11-07')
+
+    rows = db.conn.execute("SELECT dep_scheduled_time, weekdays FROM flights ORDER BY id").fetchall()
+    assert rows == [('08:00', '3'), ('14:00', '6')]
+
+
+def test_both_times_in_one_payload_are_kept(db):
+    flight = _single_flight(scheduledTime='08:00')
+    db.insert_flight_batch([flight], 'departure', 'MNL', '2026-11-04')
+    second = copy.deepcopy(flight)
+    second['departure']['scheduledTime'] = '18:00'
+    db.insert_flight_batch([copy.deepcopy(flight), second], 'departure', 'MNL', '2026-11-04')
+
+    times = [row[0] for row in db.conn.execute("SELECT dep_scheduled_time FROM flights ORDER BY id")]
+    assert times == ['08:00', '18:00']
+
+
+def _two_weekday_payloads():
+    """One flight with an A321 on Mondays and an A330 on Wednesdays"""
+    monday = _single_flight(terminal='1', scheduledTime='08:00')
+    monday.update(weekday='1', aircraft={'modelCode': 'a321', 'modelText': 'Airbus A321'})
+    wednesday = copy.deepcopy(monday)
+    wednesday.update(weekday='3', aircraft={'modelCode': 'a333', 'modelText': 'Airbus A330-300'})
+    return monday, wednesday
+
+
+def test_weekdays_with_different_values_are_not_changes(db):
+    monday, wednesday = _two_weekday_payloads()
+    for _ in range(3):
+        db.insert_flight_batch([copy.deepcopy(monday)], 'departure', 'MNL', '2026-11-02')
+        db.insert_flight_batch([copy.deepcopy(wednesday)], 'departure', 'MNL', '2026-11-04')
+
+    assert _logged(db) == {('', None, None), ('weekdays', '1', '1,3')}
+    row = db.conn.execute("SELECT weekdays, aircraft_model_text FROM flights").fetchone()
+    assert row == ('1,3', 'AIRBUS A321')
+
+
+def test_change_on_one_weekday_is_logged_against_that_days_values(db):
+    monday, wednesday = _two_weekday_payloads()
+    db.insert_flight_batch([monday], 'departure', 'MNL', '2026-11-02')
+    db.insert_flight_batch([wednesday], 'departure', 'MNL', '2026-11-04')
+
+    wednesday = copy.deepcopy(wednesday)
+    wednesday['aircraft']['modelText'] = 'Airbus A350-900'
+    db.insert_flight_batch([wednesday], 'departure', 'MNL', '2026-11-04')
+    assert ('aircraft_model_text', 'AIRBUS A330-300', 'AIRBUS A350-900') in _logged(db)
+    # The Monday-sourced pattern value stays
+    assert db.conn.execute("SELECT aircraft_model_text FROM flights").fetchone()[0] == 'AIRBUS A321'
+
+    monday = copy.deepcopy(monday)
+    monday['aircraft']['modelText'] = 'Airbus A321neo'
+    assert db.insert_flight_batch([monday], 'departure', 'MNL', '2026-11-02') == 1
+    assert db.conn.execute("SELECT aircraft_model_text FROM flights").fetchone()[0] == 'AIRBUS A321NEO'
+
+
+def test_retime_on_one_weekday_does_not_move_the_pattern(db):
+    monday, wednesday = _two_weekday_payloads()
+    db.insert_flight_batch([monday], 'departure', 'MNL', '2026-11-02')
+    db.insert_flight_batch([wednesday], 'departure', 'MNL', '2026-11-04')
+
+    retimed = copy.deepcopy(wednesday)
+    retimed['departure']['scheduledTime'] = '09:15'
+    db.insert_flight_batch([retimed], 'departure', 'MNL', '2026-11-04')
+
+    rows = db.conn.execute("SELECT dep_scheduled_time, weekdays FROM flights ORDER BY id").fetchall()
+    assert rows == [('08:00', '1,3'), ('09:15', '3')]
@@ -0,0 +1,118 @@
+"""
+Collection job queue: exclusive claims, retries and lease expiry
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+import aviation_edge_db
+from aviation_edge_jobs import JobQueue
+from conftest import load_script, make_flights
+
+UNITS = [('pom', 'departure', '2026-11-12'), ('mnl', 'departure', '2026-11-11'), ('mnl', 'arrival', '2026-11-11')]
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'), max_attempts=2)
+    queue.enqueue('sweep-1', UNITS)
+    yield queue
+    queue.close()
+
+
+def _expire_leases(queue):
+    queue.conn.execute("UPDATE collection_jobs SET lease_expires_at = '2000-01-01T00:00:00' WHERE state = 'running'")
+
+
+def test_enqueue_ignores_units_already_in_the_sweep(jobs):
+    assert jobs.enqueue('sweep-1', UNITS) == 0
+    assert jobs.enqueue('sweep-2', UNITS[:1]) == 1
+    assert jobs.progress('sweep-1')['pending'] == 3
+
+
+def test_done_units_span_sweeps(jobs):
+    job = jobs.claim('host:1', query_type='arrival')
+    jobs.complete(job, 'host:1', 10, 10)
+    # A sweep restarted on another day only queues what no sweep has finished
+    units = [('MNL', 'arrival', '2026-11-11'), ('mnl', 'arrival', '2026-11-12')]
+    assert jobs.done_units(units) == {('MNL', 'arrival', '2026-11-11')}
+    assert jobs.done_units([]) == set()
+
+
+def test_claims_are_exclusive_and_ordered_by_date(jobs):
+    first = jobs.claim('host:1')
+    second = jobs.claim('host:2')
+    third = jobs.claim('host:3')
+    assert [job['target_date'] for job in (first, second, third)] == ['2026-11-11', '2026-11-11', '2026-11-12']
+    assert len({job['id'] for job in (first, second, third)}) == 3
+    assert first['airport_code'] == 'MNL' and first['attempts'] == 1
+    assert jobs.claim('host:4') is None
+
+
+def test_claim_filters_by_query_type_and_sweep(jobs):
+    assert jobs.claim('host:1', query_type='arrival')['query_type'] == 'arrival'
+    assert jobs.claim('host:1', query_type='arrival') is None
+    assert jobs.claim('host:1', sweep_id='other') is None
+
+
+def test_failed_attempts_are_retried_until_max_attempts(jobs):
+    job = jobs.claim('host:1', query_type='arrival')
+    assert jobs.fail(job, 'host:1', 'HTTP 500') == 'pending'
+    job = jobs.claim('host:1', query_type='arrival')
+    assert job['attempts'] == 2
+    assert jobs.fail(job, 'host:1', 'HTTP 500') == 'failed'
+    assert jobs.claim('host:1', query_type='arrival') is None
+    assert jobs.failed_jobs('sweep-1') == [{'airport_code': 'MNL', 'query_type': 'arrival',
+                                            'target_date': '2026-11-11', 'attempts': 2, 'last_error': 'HTTP 500'}]
+
+
+def test_fail_without_retry_is_final(jobs):
+    job = jobs.claim('host:1')
+    assert jobs.fail(job, 'host:1', 'inside the 8-day window', retry=False) == 'failed'
+    assert jobs.progress('sweep-1')['failed'] == 1
+
+
+def test_expired_lease_is_reclaimed_and_the_old_claim_is_lost(jobs):
+    job = jobs.claim('host:1', query_type='arrival')
+    _expire_leases(jobs)
+    reclaimed = jobs.claim('host:2', query_type='arrival')
+    assert reclaimed['id'] == job['id'] and reclaimed['attempts'] == 2
+
+    assert jobs.complete(job, 'host:1', 10, 10) is False
+    assert jobs.fail(job, 'host:1', 'late') == ''
+    assert jobs.complete(reclaimed, 'host:2', 10, 8) is True
+    assert jobs.progress('sweep-1', 'arrival')['done'] == 1
+
+
+def test_expired_lease_on_the_last_attempt_fails_the_job(jobs):
+    job = jobs.claim('host:1', query_type='arrival')
+    jobs.fail(job, 'host:1', 'timeout')
+    jobs.claim('host:1', query_type='arrival')
+    _expire_leases(jobs)
+    assert jobs.claim('host:2', query_type='arrival') is None
+    assert jobs.failed_jobs('sweep-1')[0]['last_error'] == 'timeout'
+
+
+@pytest.mark.parametrize('script, collector_class, query_type', [
+    ('API/Departure-Future-Schedules.py', 'FutureSchedules', 'departure'),
+    ('API/Arrival-Future-Schedules.py', 'ArrivalFutureSchedules', 'arrival'),
+])
+@pytest.mark.parametrize('collection_mode', ['batch', 'stream'])
+def test_database_failure_fails_the_job_instead_of_completing_it(tmp_path, monkeypatch, script, collector_class,
+                                                                 query_type, collection_mode):
+    collector = load_script(script)
+    missing = str(tmp_path / 'missing.db')
+    monkeypatch.setattr(aviation_edge_db, 'default_db_path', lambda: missing)
+    monkeypatch.delenv('DB_WRITER_ADDRESS', raising=False)
+    monkeypatch.setenv('JOB_DELAY_SECONDS', '0')
+    schedules = getattr(collector, collector_class)()
+    monkeypatch.setattr(schedules, 'get_aviation_edge_flights', lambda *args: make_flights(5))
+    monkeypatch.setattr(schedules, 'stream_aviation_edge_flights', lambda *args, **kwargs: iter([make_flights(5)]))
+
+    target_date = (date.today() + timedelta(days=20)).isoformat()
+    with JobQueue(str(tmp_path / 'jobs.db'), max_attempts=1) as queue:
+        queue.enqueue('sweep-1', [('MNL', query_type, target_date)])
+        counts = schedules.drain_collection_jobs(queue, 'host:1', collection_mode=collection_mode)
+        assert counts == {'done': 0, 'retried': 0, 'failed': 1}
+        assert queue.failed_jobs('sweep-1')[0]['last_error'].startswith('Database connection failed')
@@ -0,0 +1,73 @@
+"""
+Ingestion ledger: unchanged payloads and rows are skipped, each date diffed against its own last payload
+"""
+
+import copy
+
+from conftest import make_flights
+
+
+def _aircraft(db, flight_number):
+    return db.conn.execute("SELECT aircraft_model_text FROM flights WHERE flight_iata_number = ?",
+                           (flight_number,)).fetchone()[0]
+
+
+def test_identical_payload_is_skipped(db):
+    flights = make_flights(20, seed=2)
+    assert db.insert_flight_batch(flights, 'departure', 'MNL', '2026-11-04') == 20
+    assert db.insert_flight_batch(copy.deepcopy(flights), 'departure', 'MNL', '2026-11-04') == 0
+    assert db.get_flight_count() == 20
+
+
+def test_only_changed_rows_are_stored(db):
+    flights = make_flights(20, seed=2)
+    db.insert_flight_batch(flights, 'departure', 'MNL', '2026-11-04')
+    changed = copy.deepcopy(flights)
+    changed[3]['aircraft']['modelText'] = 'Airbus A350-900'
+    assert db.insert_flight_batch(changed, 'departure', 'MNL', '2026-11-04') == 1
+    assert _aircraft(db, changed[3]['flight']['iataNumber'].upper()) == 'AIRBUS A350-900'
+
+
+def test_payloads_are_keyed_by_date_and_filters(db):
+    flights = make_flights(5, seed=2)
+    db.insert_flight_batch(flights, 'departure', 'MNL', '2026-11-04')
+    payload = db.open_payload('departure', 'MNL', '2026-11-11')
+    payload.add(db.prepare_flight_batch(flights, 'departure', 'MNL', '2026-11-11'))
+    assert not payload.unchanged
+    filtered = db.open_payload('departure', 'MNL', '2026-11-04', filters={'airline_iata': 'PR'})
+    filtered.add(db.prepare_flight_batch(flights, 'departure', 'MNL', '2026-11-04'))
+    assert not filtered.unchanged
+
+
+def test_later_date_changes_a_single_day_flight_once(db):
+    original = make_flights(10, seed=5)
+    flight_number = original[0]['flight']['iataNumber'].upper()
+    db.insert_flight_batch(original, 'departure', 'MNL', '2026-11-04')
+
+    next_week = copy.deepcopy(original)
+    next_week[0]['aircraft']['modelText'] = 'Airbus A350-900'
+    assert db.insert_flight_batch(next_week, 'departure', 'MNL', '2026-11-11') == 1
+    assert _aircraft(db, flight_number) == 'AIRBUS A350-900'
+
+    # Each date is compared with its own last payload, so neither re-collection writes
+    assert db.insert_flight_batch(copy.deepcopy(original), 'departure', 'MNL', '2026-11-04') == 0
+    assert db.insert_flight_batch(copy.deepcopy(next_week), 'departure', 'MNL', '2026-11-11') == 0
+    assert _aircraft(db, flight_number) == 'AIRBUS A350-900'
+
+
+def test_flights_missing_from_a_payload_are_dropped_from_its_fingerprints(db):
+    flights = make_flights(10, seed=5)
+    db.insert_flight_batch(flights, 'departure', 'MNL', '2026-11-04')
+    db.insert_flight_batch(flights[:8], 'departure', 'MNL', '2026-11-04')
+    assert db.conn.execute("SELECT COUNT(*) FROM ingestion_rows").fetchone()[0] == 8
+    # Back in the payload, they are fingerprinted again
+    assert db.insert_flight_batch(copy.deepcopy(flights), 'departure', 'MNL', '2026-11-04') == 0
+    assert db.conn.execute("SELECT COUNT(*) FROM ingestion_rows").fetchone()[0] == 10
+
+
+def test_weekday_merge_does_not_invalidate_other_payloads(db):
+    wednesday = make_flights(10, seed=5, weekday='3')
+    thursday = make_flights(10, seed=5, weekday='4')
+    db.insert_flight_batch(wednesday, 'departure', 'MNL', '2026-11-04')
+    assert db.insert_flight_batch(thursday, 'departure', 'MNL', '2026-11-05') == 10
+    assert db.insert_flight_batch(copy.deepcopy(wednesday), 'departure', 'MNL', '2026-11-04') == 0
@@ -0,0 +1,59 @@
+"""
+Logging setup: nothing is configured on import, scripts configure it from main()
+"""
+
+import json
+import logging
+import subprocess
+import sys
+
+import pytest
+
+import aviation_edge_logging
+from aviation_edge_logging import ROOT_LOGGER, configure_logging, shutdown_logging
+from conftest import REPO_DIR
+
+MODULES = ['aviation_edge_analytics', 'aviation_edge_calendar', 'aviation_edge_db', 'aviation_edge_jobs',
+           'aviation_edge_migrate', 'aviation_edge_pipeline', 'aviation_edge_planner', 'aviation_edge_rate',
+           'aviation_edge_reconcile', 'aviation_edge_rotations', 'aviation_edge_scheduler', 'aviation_edge_shards',
+           'aviation_edge_storage', 'aviation_edge_transform', 'aviation_edge_writer']
+SCRIPTS = ['API/Departure-Future-Schedules.py', 'API/Arrival-Future-Schedules.py', 'Flight-Search.py']
+
+
+@pytest.fixture
+def project_logger():
+    root = logging.getLogger(ROOT_LOGGER)
+    yield root
+    shutdown_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.propagate = True
+    root.setLevel(logging.NOTSET)
+
+
+def test_importing_modules_and_scripts_configures_nothing():
+    check = f"""
+import logging, sys
+sys.path.insert(0, {REPO_DIR!r})
+sys.path.insert(0, {REPO_DIR + '/tests'!r})
+from conftest import load_script
+for module in {MODULES!r}:
+    __import__(module)
+for script in {SCRIPTS!r}:
+    load_script(script)
+import aviation_edge_logging
+assert aviation_edge_logging._listener is None, 'listener started'
+assert not logging.getLogger('aviation_edge').handlers, 'handlers installed'
+"""
+    result = subprocess.run([sys.executable, '-c', check], cwd=REPO_DIR, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_unwritable_log_file_is_reported_through_logging(project_logger, tmp_path, capsys):
+    blocker = tmp_path / 'logs'
+    blocker.write_text('not a directory')
+    configure_logging(level='INFO', log_file=str(blocker / 'collector.log'), log_format='json', force=True)
+    assert aviation_edge_logging._listener is not None
+    shutdown_logging()
+    record = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert record['level'] == 'WARNING' and 'Could not open log file' in record['message']
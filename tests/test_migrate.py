@@ -0,0 +1,82 @@
+"""
+Schema migrations: detected on connect, applied only by the explicit, confirmed command
+"""
+
+import sqlite3
+import sys
+
+import pytest
+
+import aviation_edge_migrate
+from aviation_edge_db import AviationEdgeDB
+from aviation_edge_migrate import MIGRATIONS, apply_migrations, pending_migrations
+
+ALL_MIGRATIONS = [name for name, _, _, _ in MIGRATIONS]
+
+
+def _schema(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall()
+    finally:
+        conn.close()
+
+
+def _run_main(monkeypatch, path, *args, answer=None):
+    monkeypatch.setattr(sys, 'argv', ['aviation_edge_migrate.py', '--db', path, *args])
+    monkeypatch.setattr('builtins.input', lambda prompt: answer)
+    monkeypatch.setattr(aviation_edge_migrate, 'configure_logging', lambda: None)
+    aviation_edge_migrate.main()
+
+
+def test_connect_reports_pending_migrations_without_changing_the_schema(base_db_path):
+    before = _schema(base_db_path)
+    db = AviationEdgeDB(base_db_path)
+    assert not db.connect()
+    assert db.conn is None
+    assert _schema(base_db_path) == before
+
+
+def test_migration_backfills_existing_flights(base_db_path):
+    conn = sqlite3.connect(base_db_path)
+    conn.execute("""
+        INSERT INTO flights (weekdays, airport_code, dep_iata_code, arr_iata_code, dep_scheduled_time,
+                             arr_scheduled_time, airline_name, airline_iata_code, flight_iata_number, query_type)
+        VALUES ('1,3', 'MNL', 'MNL', 'POM', '23:30', '05:10', 'PHILIPPINE AIRLINES', 'PR', 'PR215', 'departure')
+    """)
+    conn.commit()
+    assert pending_migrations(conn) == ALL_MIGRATIONS
+
+    applied = apply_migrations(conn)
+    assert applied['dimensions'] == 1 and applied['schedule_minutes'] == 1 and applied['weekday_index'] == 2
+    assert conn.execute("SELECT block_minutes FROM flights").fetchone() == (340,)
+    assert conn.execute("SELECT COUNT(*) FROM flights WHERE dep_airport_id IS NULL").fetchone() == (0,)
+    assert pending_migrations(conn) == []
+    assert apply_migrations(conn) == {}
+    conn.close()
+
+    db = AviationEdgeDB(base_db_path)
+    assert db.connect()
+    db.close()
+
+
+def test_a_single_missing_column_is_detected(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("ALTER TABLE ingestion_rows DROP COLUMN row_values")
+    assert pending_migrations(conn) == ['ledger']
+    conn.close()
+
+
+def test_command_asks_before_changing_anything(base_db_path, monkeypatch):
+    before = _schema(base_db_path)
+    with pytest.raises(SystemExit) as exit_info:
+        _run_main(monkeypatch, base_db_path, '--check')
+    assert exit_info.value.code == 1
+
+    _run_main(monkeypatch, base_db_path, answer='n')
+    assert _schema(base_db_path) == before
+
+    _run_main(monkeypatch, base_db_path, answer='y')
+    conn = sqlite3.connect(base_db_path)
+    assert pending_migrations(conn) == []
+    conn.close()
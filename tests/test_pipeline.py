@@ -0,0 +1,102 @@
+"""
+Collection pipeline: a unit is reported committed only when its rows are durable
+"""
+
+import sqlite3
+
+import aviation_edge_db
+from aviation_edge_pipeline import CollectionPipeline
+from conftest import make_flights
+
+UNITS = [('MNL', 'departure', '2026-12-01'), ('POM', 'departure', '2026-12-01'), ('SYD', 'departure', '2026-12-02')]
+
+
+def fetch(airport, query_type, target_date):
+    """Two raw batches per unit, different flights per airport and date"""
+    flights = make_flights(30, seed=sum(map(ord, airport + target_date)), weekday='1',
+                           airport=airport, query_type=query_type)
+    yield flights[:15]
+    yield flights[15:]
+
+
+def _stored_per_airport(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(conn.execute("SELECT airport_code, COUNT(*) FROM flights GROUP BY airport_code"))
+    finally:
+        conn.close()
+
+
+def test_all_units_committed(db_path):
+    stats = CollectionPipeline(fetch, db_path=db_path, transaction_rows=20).run(UNITS)
+    for unit in UNITS:
+        assert stats[unit] == {'retrieved': 30, 'stored': 30, 'error': None, 'committed': True}
+    assert _stored_per_airport(db_path) == {'MNL': 30, 'POM': 30, 'SYD': 30}
+
+
+def test_unchanged_units_store_nothing_but_are_committed(db_path):
+    CollectionPipeline(fetch, db_path=db_path).run(UNITS)
+    stats = CollectionPipeline(fetch, db_path=db_path).run(UNITS)
+    assert all(s['stored'] == 0 and s['committed'] for s in stats.values())
+
+
+def test_missing_database_fails_every_unit(tmp_path):
+    stats = CollectionPipeline(fetch, db_path=str(tmp_path / 'missing.db')).run(UNITS)
+    for unit_stats in stats.values():
+        assert not unit_stats['committed']
+        # Fetchers that see the writer stop first fail the unit themselves
+        assert unit_stats['error'].endswith('database writer stopped')
+
+
+def test_fetch_error_fails_only_that_unit(db_path):
+    def flaky_fetch(airport, query_type, target_date):
+        if airport == 'POM':
+            raise RuntimeError('API Error: 500')
+        return fetch(airport, query_type, target_date)
+
+    stats = CollectionPipeline(flaky_fetch, db_path=db_path, fetch_workers=1).run(UNITS)
+    assert stats[UNITS[1]]['error'] == 'API Error: 500' and not stats[UNITS[1]]['committed']
+    assert stats[UNITS[0]]['committed'] and stats[UNITS[2]]['committed']
+
+
+def test_commit_failure_fails_uncommitted_units(db_path, monkeypatch):
+    commit = aviation_edge_db.AviationEdgeDB.commit
+    calls = {'count': 0}
+
+    def failing_commit(self):
+        calls['count'] += 1
+        if calls['count'] == 3:
+            raise sqlite3.OperationalError('disk I/O error')
+        return commit(self)
+
+    monkeypatch.setattr(aviation_edge_db.AviationEdgeDB, 'commit', failing_commit)
+    units = [(airport, 'departure', '2026-12-09') for airport in ('MNL', 'POM', 'SYD', 'HND', 'CEB')]
+    stats = CollectionPipeline(fetch, db_path=db_path, transaction_rows=20, fetch_workers=1).run(units)
+
+    failed = [unit for unit in units if not stats[unit]['committed']]
+    assert failed, "a failed commit must not leave every unit reported as committed"
+    for unit in failed:
+        assert stats[unit]['error'].startswith(('not written', 'fetch stopped'))
+    committed = [unit for unit in units if stats[unit]['committed']]
+    stored = _stored_per_airport(db_path)
+    assert all(stored.get(airport) == 30 for airport, _, _ in committed)
+
+
+def test_failed_batch_is_rolled_back_without_touching_other_units(db_path, monkeypatch):
+    record_added = aviation_edge_db.record_added
+
+    def failing_record_added(conn, run_id, after_id):
+        # Fails after the POM rows were inserted, inside the shared transaction
+        added = record_added(conn, run_id, after_id)
+        airport = conn.execute("SELECT airport_code FROM collection_runs WHERE id = ?", (run_id,)).fetchone()[0]
+        if airport == 'POM':
+            raise RuntimeError('boom after partial write')
+        return added
+
+    monkeypatch.setattr(aviation_edge_db, 'record_added', failing_record_added)
+    units = UNITS[:2]
+    stats = CollectionPipeline(fetch, db_path=db_path, fetch_workers=1, transaction_rows=100).run(units)
+
+    assert stats[units[0]]['committed'] and not stats[units[1]]['committed']
+    assert stats[units[1]]['error'] == 'boom after partial write'
+    assert _stored_per_airport(db_path) == {'MNL': 30}
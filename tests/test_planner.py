@@ -0,0 +1,67 @@
+"""
+Call planner: minimum departure/arrival call sets covering the known routes
+"""
+
+import itertools
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from aviation_edge_planner import minimum_cover, plan_calls
+from conftest import api_flight
+
+
+def _smallest_cover_size(routes):
+    """Brute-force minimum vertex cover of a small bipartite route graph"""
+    nodes = sorted({('dep', origin) for origin, _ in routes} | {('arr', destination) for _, destination in routes})
+    for size in range(len(nodes) + 1):
+        for cover in itertools.combinations(nodes, size):
+            if all(('dep', origin) in cover or ('arr', destination) in cover for origin, destination in routes):
+                return size
+
+
+@pytest.mark.parametrize('routes, expected', [
+    ([('MNL', 'POM'), ('MNL', 'HND'), ('MNL', 'SYD')], ({'MNL'}, set())),
+    ([('POM', 'MNL'), ('HND', 'MNL'), ('SYD', 'MNL')], (set(), {'MNL'})),
+    ([], (set(), set())),
+])
+def test_hub_routes_are_covered_by_the_hub(routes, expected):
+    assert minimum_cover(routes) == expected
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_cover_is_minimal_and_covers_every_route(seed):
+    rng = random.Random(seed)
+    airports = ['MNL', 'POM', 'HND', 'SYD', 'CEB']
+    routes = {tuple(rng.sample(airports, 2)) for _ in range(rng.randrange(1, 9))}
+    departures, arrivals = minimum_cover(routes)
+    assert all(origin in departures or destination in arrivals for origin, destination in routes)
+    assert len(departures) + len(arrivals) == _smallest_cover_size(routes)
+
+
+def test_plan_skips_fresh_calls_and_the_8_day_window(db, monkeypatch):
+    monkeypatch.setenv('REQUESTS_PER_SECOND', '1')
+    target = date.today() + timedelta(days=10)
+    weekday, week_later = str(target.isoweekday()), (target + timedelta(days=7)).isoformat()
+    db.insert_flight_batch([api_flight('PR215', 'MNL', 'POM', '08:00', '13:40', weekday),
+                            api_flight('PR431', 'MNL', 'HND', '09:00', '14:20', weekday)],
+                           'departure', 'MNL', week_later)
+    db.insert_flight_batch([api_flight('PX10', 'POM', 'MNL', '10:15', '14:40', weekday)], 'departure', 'POM',
+                           week_later)
+    airports = ['mnl', 'POM', 'HND', 'GUM']
+    too_soon = (date.today() + timedelta(days=3)).isoformat()
+
+    plan = plan_calls(db.conn, airports, [target.isoformat(), too_soon])
+    assert plan['calls'] == [('GUM', 'departure', target.isoformat()), ('MNL', 'departure', target.isoformat()),
+                             ('POM', 'departure', target.isoformat())]
+    assert plan['skipped_dates'] == [too_soon]
+    assert (plan['routes'], plan['covered_routes'], plan['naive_calls']) == (3, 0, 8)
+    assert plan['duration_seconds'] == 3
+
+    db.insert_flight_batch([api_flight('PR215', 'MNL', 'POM', '08:00', '13:40', weekday)], 'departure', 'MNL',
+                           target.isoformat())
+    plan = plan_calls(db.conn, airports, [target.isoformat()])
+    assert list(plan['fresh']) == [('MNL', 'departure', target.isoformat())]
+    assert plan['calls'] == [('GUM', 'departure', target.isoformat()), ('POM', 'departure', target.isoformat())]
+    assert plan['covered_routes'] == 2
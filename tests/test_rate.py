@@ -0,0 +1,83 @@
+"""
+Adaptive rate control: retries, and streamed calls holding their concurrency slot
+"""
+
+import pytest
+
+import aviation_edge_rate
+from aviation_edge_rate import AdaptiveRateController, parse_retry_after
+
+
+class FakeResponse:
+    """Just enough of requests.Response for the controller"""
+
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    monkeypatch.setattr(aviation_edge_rate.time, 'sleep', lambda seconds: None)
+    return AdaptiveRateController(rate=1000, max_concurrency=2, max_retries=2, min_interval=0)
+
+
+def _sender(*responses):
+    pending = list(responses)
+    return lambda: pending.pop(0)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after('-5') == 0.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+
+def test_request_retries_server_errors_and_releases_slots(controller):
+    failed = FakeResponse(503)
+    response = controller.request(_sender(failed, FakeResponse(200)))
+    assert response.status_code == 200 and failed.closed
+    assert controller.in_flight == 0
+    assert controller.stats['server'] == 1 and controller.stats['calls'] == 2
+
+
+def test_throttling_halves_the_limit(controller):
+    controller.limit = 2.0
+    controller.request(_sender(FakeResponse(429, {'Retry-After': '0'}), FakeResponse(200)))
+    assert controller.stats['throttled'] == 1
+    assert controller.learned_limit == 1.0
+
+
+def test_streamed_call_holds_its_slot_until_the_body_is_read(controller):
+    body = FakeResponse(200)
+    with controller.stream(_sender(FakeResponse(500), body)) as response:
+        assert response is body
+        assert controller.in_flight == 1
+    assert controller.in_flight == 0 and body.closed
+
+
+def test_streamed_call_releases_its_slot_when_reading_fails(controller):
+    with pytest.raises(ValueError):
+        with controller.stream(_sender(FakeResponse(200))):
+            raise ValueError('Truncated JSON array in response body')
+    assert controller.in_flight == 0
+
+
+def test_call_starts_keep_the_mandatory_interval(monkeypatch):
+    monkeypatch.setattr(aviation_edge_rate.time, 'monotonic', lambda: 100.0)
+    controller = AdaptiveRateController(rate=1000)
+    with controller.slot():
+        pass
+    assert controller._next_start == 100.0 + aviation_edge_rate.MIN_CALL_INTERVAL
@@ -0,0 +1,61 @@
+"""
+Source reconciliation: departure- and arrival-sourced rows joined per operating flight
+"""
+
+from collections import defaultdict
+
+from aviation_edge_reconcile import Reconciler, classify, _Side
+from conftest import make_flights
+
+TARGET_DATE = '2026-11-11'
+
+
+def _store_both_sides(db, flights):
+    """Store flights as the departure query at MNL and as each destination's arrival query"""
+    db.insert_flight_batch(flights, 'departure', 'MNL', TARGET_DATE)
+    by_destination = defaultdict(list)
+    for flight in flights:
+        by_destination[flight['arrival']['iataCode'].upper()].append(flight)
+    for airport, arriving in by_destination.items():
+        db.insert_flight_batch(arriving, 'arrival', airport, TARGET_DATE)
+
+
+def _side(weekdays, arrival_time='10:00', aircraft='A321'):
+    side = _Side()
+    side.weekdays, side.arrival_times, side.aircraft = set(weekdays), {arrival_time}, {aircraft}
+    return side
+
+
+def test_classify():
+    assert classify(_side([1, 3]), None) == ['departure_only']
+    assert classify(None, _side([1, 3])) == ['arrival_only']
+    assert classify(_side([1, 3]), _side([1, 3])) == ['match']
+    assert classify(_side([1, 7]), _side([2, 1])) == ['weekday_shift']
+    assert classify(_side([1, 3]), _side([1, 4], '11:00')) == ['weekdays', 'arrival_time']
+    assert classify(_side([1]), _side([1], aircraft='B738')) == ['aircraft']
+
+
+def test_both_sources_join_on_the_operating_flight(db):
+    flights = make_flights(8, seed=4)
+    _store_both_sides(db, flights)
+    db.insert_flight_batch(make_flights(2, seed=9, airport='CEB'), 'departure', 'CEB', TARGET_DATE)
+
+    summary = Reconciler(db.conn).run()
+    assert summary['status'].get('departure_only') == 2
+    assert summary['status']['match'] == summary['flights'] - 2
+    assert sum(summary['coverage'].values()) == 2
+
+
+def test_rows_from_neither_source_are_skipped(db):
+    _store_both_sides(db, make_flights(3, seed=4))
+    db.conn.execute("UPDATE flights SET query_type = 'route' WHERE query_type = 'departure'")
+    db.conn.execute("""
+        INSERT INTO flights (dep_iata_code, arr_iata_code, dep_scheduled_time, flight_iata_number, query_type)
+        VALUES ('MNL', 'HND', '08:00', 'PR999', NULL)
+    """)
+
+    reconciler = Reconciler(db.conn)
+    summary = reconciler.run()
+    assert set(summary['status']) == {'arrival_only'}
+    assert reconciler.write_canonical() == summary['flights']
+    assert db.conn.execute("SELECT DISTINCT sources FROM flights_reconciled").fetchall() == [('arrival',)]
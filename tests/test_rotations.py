@@ -0,0 +1,50 @@
+"""
+Rotation inference: chaining arrivals to departures into aircraft rotations and turnarounds
+"""
+
+import numpy as np
+
+from aviation_edge_rotations import WEEK_MINUTES, chain_turnarounds, infer_rotations
+from conftest import api_flight
+
+BOEING = 'Boeing 737-81M'
+
+
+def _flights(rotation):
+    return [leg['flight'] for leg in rotation['legs']]
+
+
+def test_each_arrival_takes_the_earliest_feasible_departure():
+    links = chain_turnarounds(np.array([100, 110]), np.array([150, 120, 500]), min_turn=30, max_turn=360)
+    assert links == [(0, 0, 50)]
+    assert chain_turnarounds(np.array([110]), np.array([120, 500]), 30, 400) == [(0, 1, 390)]
+    assert chain_turnarounds(np.array([WEEK_MINUTES - 30]), np.array([60]), 30, 360) == [(0, 0, 90)]
+
+
+def test_rotations_follow_one_aircraft_type_through_the_day(db):
+    db.insert_flight_batch([
+        api_flight('PX1', 'MNL', 'POM', '06:00', '09:00'),
+        api_flight('PR7001', 'MNL', 'POM', '06:00', '09:00', operated_by='PX1'),
+        api_flight('PX3', 'MNL', 'CEB', '14:00', '15:30'),
+        api_flight('PX9', 'MNL', 'HND', '09:30', '14:00', aircraft=BOEING),
+    ], 'departure', 'MNL', '2026-11-09')
+    db.insert_flight_batch([api_flight('PX2', 'POM', 'MNL', '10:00', '13:00'),
+                            api_flight('PX8', 'POM', 'MNL', '09:10', '12:00', aircraft=BOEING)],
+                           'departure', 'POM', '2026-11-09')
+
+    result = infer_rotations(db.conn, 'px')
+    assert result['legs'] == 5
+    assert [(_flights(rotation), rotation['aircraft'], rotation['cyclic']) for rotation in result['rotations']] == [
+        (['PX1', 'PX2', 'PX3'], 'A321neo', False), (['PX8'], 'B737-800', False), (['PX9'], 'B737-800', False)]
+    assert [(row['airport'], row['aircraft'], row['count'], row['min'], row['histogram'])
+            for row in result['turnarounds']] == [('MNL', 'A321neo', 1, 60, [0, 0, 0, 0, 1]),
+                                                  ('POM', 'A321neo', 1, 60, [0, 0, 0, 0, 1])]
+
+
+def test_weekly_loop_is_cyclic(db):
+    db.insert_flight_batch([api_flight('JL1', 'HND', 'ITM', '08:00', '09:00'),
+                            api_flight('JL2', 'ITM', 'HND', '10:00', '11:00')], 'departure', 'HND', '2026-11-09')
+    rotations = infer_rotations(db.conn, 'JL', max_turn=WEEK_MINUTES)['rotations']
+    assert [(_flights(rotation), rotation['cyclic']) for rotation in rotations] == [(['JL1', 'JL2'], True)]
+    assert [_flights(rotation) for rotation in infer_rotations(db.conn, 'JL')['rotations']] == [['JL1', 'JL2']]
+    assert not infer_rotations(db.conn, 'JL')['rotations'][0]['cyclic']
@@ -0,0 +1,102 @@
+"""
+Rolling-horizon scheduler: window selection, priorities and the shared daily call budget
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from aviation_edge_scheduler import CollectionScheduler, unit_priority
+
+TODAY = date(2026, 11, 2)
+NOW = datetime(2026, 11, 2, 9, 0)
+
+
+@pytest.fixture
+def schedule_path(tmp_path):
+    return str(tmp_path / 'schedule.db')
+
+
+def _scheduler(schedule_path, query_type='departure', airports=('MNL', 'pom'), **options):
+    options.setdefault('horizon_days', 10)
+    options.setdefault('daily_budget', 5)
+    options.setdefault('min_age_hours', 12)
+    scheduler = CollectionScheduler(query_type, list(airports), db_path=schedule_path, **options)
+    scheduler.sync(TODAY)
+    return scheduler
+
+
+def test_window_starts_after_the_8_day_rule(schedule_path):
+    with _scheduler(schedule_path) as scheduler:
+        assert scheduler.window(TODAY) == ['2026-11-10', '2026-11-11', '2026-11-12']
+        assert scheduler.status(TODAY)['units'] == 6
+    with pytest.raises(ValueError, match='8-day rule'):
+        CollectionScheduler('departure', ['MNL'], db_path=schedule_path, horizon_days=7)
+
+
+def test_sync_slides_the_window(schedule_path):
+    with _scheduler(schedule_path) as scheduler:
+        assert scheduler.sync(TODAY) == {'added': 0, 'dropped': 0}
+        assert scheduler.sync(TODAY + timedelta(days=2)) == {'added': 4, 'dropped': 4}
+
+
+def test_never_collected_units_go_first_nearest_date_first(schedule_path):
+    with _scheduler(schedule_path) as scheduler:
+        claimed = [scheduler.claim_next(NOW) for _ in range(3)]
+        assert [(unit['airport_code'], unit['target_date']) for unit in claimed] == [
+            ('MNL', '2026-11-10'), ('POM', '2026-11-10'), ('MNL', '2026-11-11')]
+
+
+def test_collected_units_wait_for_min_age_then_go_by_priority(schedule_path):
+    with _scheduler(schedule_path, airports=['MNL'], daily_budget=20) as scheduler:
+        for changed in (True, False, False):
+            unit = scheduler.claim_next(NOW)
+            scheduler.record(unit, stored=10 if changed else 0)
+        assert scheduler.claim_next(NOW + timedelta(hours=1)) is None
+        # Same staleness: the date whose collection changed something is refreshed first
+        assert scheduler.claim_next(NOW + timedelta(hours=13))['target_date'] == '2026-11-10'
+
+
+def test_unit_priority_weights_staleness_by_change_rate():
+    stale = {'changes': 0, 'collections': 2, 'last_collected_at': '2026-11-01T09:00:00'}
+    volatile = dict(stale, changes=2)
+    assert unit_priority(stale, NOW) == pytest.approx(24 * 1 / 4)
+    assert unit_priority(volatile, NOW) == pytest.approx(24 * 3 / 4)
+
+
+def test_budget_is_charged_with_actual_calls(schedule_path):
+    with _scheduler(schedule_path) as scheduler:
+        unit = scheduler.claim_next(NOW)
+        assert scheduler.calls_today(TODAY) == 1
+        scheduler.record(unit, stored=3, calls=3)   # two retries
+        assert scheduler.calls_today(TODAY) == 3
+
+        unit = scheduler.claim_next(NOW)
+        scheduler.record(unit, error='Database connection failed', calls=0)
+        assert scheduler.calls_today(TODAY) == 3
+
+        unit = scheduler.claim_next(NOW)
+        scheduler.record(unit, calls=2)
+        assert scheduler.calls_today(TODAY) == 5
+        assert scheduler.claim_next(NOW) is None
+
+
+def test_budget_is_shared_by_departure_and_arrival_collectors(schedule_path):
+    with _scheduler(schedule_path, daily_budget=2) as departures, \
+            _scheduler(schedule_path, query_type='arrival', daily_budget=2) as arrivals:
+        departures.record(departures.claim_next(NOW))
+        arrivals.record(arrivals.claim_next(NOW))
+        assert departures.claim_next(NOW) is None and arrivals.claim_next(NOW) is None
+        assert departures.claim_next(NOW + timedelta(days=1)) is not None
+
+
+def test_failed_unit_keeps_its_last_successful_state(schedule_path):
+    with _scheduler(schedule_path, airports=['MNL']) as scheduler:
+        unit = scheduler.claim_next(NOW)
+        scheduler.record(unit, error='API Error: 500')
+        row = scheduler.conn.execute("""
+            SELECT collections, last_collected_at, last_error FROM collector_schedule
+            WHERE airport_code = 'MNL' AND target_date = '2026-11-10'
+        """).fetchone()
+        assert row == (0, None, 'API Error: 500')
+        assert scheduler.status(TODAY)['never_collected'] == 3
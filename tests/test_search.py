@@ -0,0 +1,41 @@
+"""
+Flight search: route lookups on dimension ids from a long-lived session
+"""
+
+import pytest
+
+from aviation_edge_db import AviationEdgeDB
+from conftest import load_script, make_flights
+
+TARGET_DATE = '2026-11-11'
+
+
+@pytest.fixture(scope='module')
+def search_module():
+    return load_script('Flight-Search.py')
+
+
+@pytest.fixture
+def searcher(search_module, db):
+    db.insert_flight_batch(make_flights(20, seed=2), 'departure', 'MNL', TARGET_DATE)
+    system = search_module.FlightSearchSystem(db.db_path, keep_connection=True)
+    yield system
+    system.close()
+
+
+def test_defaults_to_the_production_database_path(search_module, db_path, monkeypatch):
+    monkeypatch.setattr(search_module, 'default_db_path', lambda: db_path)
+    assert search_module.FlightSearchSystem().db_path == db_path
+
+
+def test_airports_added_after_the_session_started_are_found(searcher, db_path):
+    assert searcher.search_route(origin='GUM') == []
+
+    collector = AviationEdgeDB(db_path)
+    assert collector.connect()
+    collector.insert_flight_batch(make_flights(5, seed=3, airport='GUM'), 'departure', 'GUM', TARGET_DATE)
+    collector.close()
+
+    flights = searcher.search_route(origin='GUM')
+    assert len(flights) == 5 and {flight['dep_iata_code'] for flight in flights} == {'GUM'}
+    assert dict(searcher.search_routes_bulk([('GUM', flights[0]['arr_iata_code'])]))
@@ -0,0 +1,64 @@
+"""
+Sharded storage: building shards from the main database and fanning route searches out to them
+"""
+
+import os
+import sqlite3
+
+import pytest
+
+from aviation_edge_shards import ShardBuilder, ShardSet
+from conftest import load_script, make_flights
+
+TARGET_DATE = '2026-11-11'
+
+
+@pytest.fixture
+def collected_db(db):
+    """Departures collected at MNL and CEB"""
+    db.insert_flight_batch(make_flights(30, seed=4), 'departure', 'MNL', TARGET_DATE)
+    db.insert_flight_batch(make_flights(20, seed=5, airport='CEB'), 'departure', 'CEB', TARGET_DATE)
+    return db
+
+
+@pytest.fixture
+def shard_dir(collected_db, tmp_path):
+    path = str(tmp_path / 'shards')
+    ShardBuilder(collected_db.db_path, path).build('airport')
+    return path
+
+
+def test_build_writes_one_shard_per_airport_and_skips_unchanged_ones(collected_db, shard_dir):
+    builder = ShardBuilder(collected_db.db_path, shard_dir)
+    for code, rows in (('MNL', 30), ('CEB', 20)):
+        conn = sqlite3.connect(builder.shard_path('airport', code))
+        assert conn.execute("SELECT COUNT(*) FROM flights").fetchone() == (rows,)
+        conn.close()
+    assert builder.build('airport') == {'built': 0, 'unchanged': 2, 'removed': 0}
+
+    collected_db.conn.execute("DELETE FROM flights WHERE airport_code = 'CEB'")
+    collected_db.conn.commit()
+    assert builder.build('airport') == {'built': 0, 'unchanged': 1, 'removed': 1}
+    assert not os.path.exists(builder.shard_path('airport', 'CEB'))
+
+
+def test_prune_only_opens_shards_holding_the_route(collected_db, shard_dir):
+    shards = ShardSet(collected_db.db_path, layout='airport', shard_dir=shard_dir)
+    assert len(shards) == 2
+    assert [os.path.basename(path) for path in shards.prune(origin='CEB')] == ['flights_airport_CEB.db']
+    assert len(shards.prune()) == 2
+    assert shards.prune(origin='SYD', destination='HND') == []
+
+
+@pytest.mark.parametrize('parallel', [False, True])
+def test_sharded_search_matches_the_main_database(collected_db, shard_dir, monkeypatch, parallel):
+    search_module = load_script('Flight-Search.py')
+    monkeypatch.setenv('SHARD_DIRECTORY', shard_dir)
+    direct = search_module.FlightSearchSystem(collected_db.db_path)
+    sharded = search_module.FlightSearchSystem(collected_db.db_path, sharded=True, shard_layout='airport',
+                                               parallel=parallel)
+    assert sharded.shards is not None
+
+    for kwargs in ({}, {'destination': 'SYD'}, {'origin': 'CEB', 'limit': 5}):
+        assert sharded.search_route(**kwargs) == direct.search_route(**kwargs)
+    assert len(sharded.search_route()) == 50
@@ -0,0 +1,59 @@
+"""
+Interactive session: CLI verbs and options answered by one warm FlightSearchSystem
+"""
+
+import sys
+
+import pytest
+
+from conftest import api_flight, load_script
+
+
+@pytest.fixture(scope='module')
+def search_module():
+    return load_script('Flight-Search.py')
+
+
+@pytest.fixture
+def shell(search_module, db):
+    db.insert_flight_batch([
+        api_flight('PX500', 'MNL', 'POM', '23:30', '05:10'),
+        api_flight('PR215', 'MNL', 'POM', '08:00', '13:40', aircraft='Boeing 737-81M'),
+    ], 'departure', 'MNL', '2026-11-09')
+    searcher = search_module.FlightSearchSystem(db.db_path, keep_connection=True)
+    yield search_module.FlightSearchShell(searcher, search_module.build_parser())
+    searcher.close()
+
+
+def _run(shell, capsys, line):
+    capsys.readouterr()
+    shell.stdout = sys.stdout
+    stop = shell.onecmd(shell.precmd(line))
+    return stop, capsys.readouterr().out
+
+
+def test_verbs_and_option_lines_reuse_one_connection(shell, capsys):
+    _, output = _run(shell, capsys, 'route-summary MNL POM')
+    assert 'Route Summary: MNL→POM' in output and 'Unique flights: 2' in output and ' ms' in output
+    connection = shell.searcher._conn
+
+    _, output = _run(shell, capsys, '--origin MNL --sort departure')
+    assert output.index('PR215') < output.index('PX500')
+    _, output = _run(shell, capsys, 'airline-summary PX')
+    assert 'Error' not in output
+    assert shell.searcher._conn is connection
+
+
+def test_mistakes_keep_the_session_running(shell, capsys):
+    assert 'Usage: route-summary ORIGIN DESTINATION' in _run(shell, capsys, 'route-summary MNL')[1]
+    assert 'Unknown command: fly' in _run(shell, capsys, 'fly MNL')[1]
+    _, output = _run(shell, capsys, 'search --sort sideways')
+    assert ' ms' not in output
+    assert _run(shell, capsys, 'help route-summary')[1].strip() == 'route-summary ORIGIN DESTINATION'
+    assert _run(shell, capsys, 'quit')[0] is True
+
+
+def test_reload_sees_new_collections(shell, db, capsys):
+    db.insert_flight_batch([api_flight('PR101', 'CEB', 'MNL', '10:15', '11:40')], 'departure', 'CEB', '2026-11-09')
+    _, output = _run(shell, capsys, 'reload')
+    assert '3 flights available' in output
@@ -0,0 +1,93 @@
+"""
+Storage backends: backend selection, and the DuckDB analytics matching SQLite
+"""
+
+import importlib.util
+import os
+
+import pytest
+
+import aviation_edge_storage
+from aviation_edge_storage import SQLiteStorage, analytics_backend, analytics_storage, read_frame
+from conftest import make_flights
+
+_SEARCH_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Flight-Search.py')
+
+
+def _flight_search():
+    spec = importlib.util.spec_from_file_location('flight_search', _SEARCH_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def network_db(db_path, db):
+    """A week of departures and arrivals at several airports"""
+    for airport in ('MNL', 'POM', 'SYD'):
+        for weekday in ('1', '3', '5', '7'):
+            for query_type in ('departure', 'arrival'):
+                flights = make_flights(25, seed=sum(map(ord, airport + query_type)), weekday=weekday,
+                                       airport=airport, query_type=query_type)
+                db.insert_flight_batch(flights, query_type, airport, f'2026-11-0{weekday}')
+    return db_path
+
+
+def test_analytics_backend_setting(monkeypatch):
+    monkeypatch.delenv('ANALYTICS_BACKEND', raising=False)
+    assert analytics_backend() == 'sqlite'
+    monkeypatch.setenv('ANALYTICS_BACKEND', 'DuckDB')
+    assert analytics_backend() == 'duckdb'
+    monkeypatch.setenv('ANALYTICS_BACKEND', 'parquet')
+    with pytest.raises(ValueError, match='Unknown analytics backend'):
+        analytics_backend()
+
+
+@pytest.mark.parametrize('backend', ['duckdb', 'auto'])
+def test_without_duckdb_analytics_fall_back_to_sqlite(db_path, monkeypatch, backend):
+    monkeypatch.setattr(aviation_edge_storage, 'duckdb', None)
+    assert isinstance(analytics_storage(db_path, backend), SQLiteStorage)
+
+
+def test_read_frame_on_sqlite(network_db):
+    conn = SQLiteStorage(network_db).connect()
+    try:
+        frame = read_frame(conn, "SELECT COUNT(*) AS flights FROM flights WHERE airport_code = ?", ['MNL'])
+    finally:
+        conn.close()
+    assert int(frame['flights'][0]) > 0
+
+
+def _analytics(search):
+    matrix = search.route_matrix()
+    return {
+        'report': matrix.network_report(limit=50),
+        'shares': matrix.airline_shares('MNL'),
+        'pr_routes': search.route_matrix('PR').top_routes(50),
+        'banks': {name: histogram.tolist() for name, histogram in search.get_bank_histograms('MNL').items()},
+        'banks_15': {name: histogram.tolist()
+                     for name, histogram in search.get_bank_histograms('SYD', 'PX', 15).items()},
+        'rotations': search.get_rotations('PR'),
+        'block_times': search.get_block_time_stats(),
+        'block_times_route': search.get_block_time_stats('MNL', 'POM'),
+    }
+
+
+def test_duckdb_analytics_match_sqlite(network_db, tmp_path, monkeypatch):
+    pytest.importorskip('duckdb')
+    flight_search = _flight_search()
+    monkeypatch.setenv('COLUMNAR_DIRECTORY', str(tmp_path / 'columnar'))
+
+    monkeypatch.setenv('ANALYTICS_BACKEND', 'sqlite')
+    expected = _analytics(flight_search.FlightSearchSystem(network_db))
+
+    monkeypatch.setenv('ANALYTICS_BACKEND', 'duckdb')
+    attached = flight_search.FlightSearchSystem(network_db)
+    assert attached.analytics_storage.name == 'duckdb'
+    assert not attached.analytics_storage.snapshot_is_current()
+    assert _analytics(attached) == expected
+
+    attached.analytics_storage.snapshot()
+    from_snapshot = flight_search.FlightSearchSystem(network_db)
+    assert from_snapshot.analytics_storage.snapshot_is_current()
+    assert _analytics(from_snapshot) == expected
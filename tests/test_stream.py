@@ -0,0 +1,102 @@
+"""
+Streaming JSON array parser (aviation_edge_stream.iter_json_array)
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+import aviation_edge_db
+import aviation_edge_rate
+from aviation_edge_stream import iter_batches, iter_json_array
+from conftest import load_script, make_flights
+
+
+def _chunks(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+PAYLOAD = [
+    {'flight': {'iataNumber': 'pr100'}, 'airline': {'name': 'Philippine Airlines'}, 'weekday': '1'},
+    {'flight': {'iataNumber': 'px7'}, 'note': 'quote " and bracket ] inside', 'gate': None},
+    {'flight': {'iataNumber': 'nh9'}, 'airline': {'name': 'Ñandú Aéreo 航空'}, 'weekday': 7},
+]
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, 100000])
+def test_any_chunking_matches_json_loads(size):
+    body = json.dumps(PAYLOAD, ensure_ascii=False, indent=1).encode('utf-8')
+    assert list(iter_json_array(_chunks(body, size))) == PAYLOAD
+
+
+def test_text_chunks_and_empty_array():
+    assert list(iter_json_array(['[', '1,', ' 2', ']'])) == [1, 2]
+    assert list(iter_json_array([b' [ ] '])) == []
+
+
+@pytest.mark.parametrize('body', [b'', b'   '])
+def test_empty_body_raises(body):
+    with pytest.raises(ValueError, match='Empty'):
+        list(iter_json_array([body]))
+
+
+def test_truncated_body_raises_after_complete_elements():
+    parsed = []
+    with pytest.raises(ValueError, match='Truncated'):
+        for item in iter_json_array(_chunks(b'[{"a": 1}, {"b": 2}, {"c"', 4)):
+            parsed.append(item)
+    assert parsed == [{'a': 1}, {'b': 2}]
+
+
+def test_error_object_is_not_an_array():
+    with pytest.raises(ValueError, match='Expected JSON array'):
+        list(iter_json_array([b'{"error": "No Record Found"}']))
+
+
+def test_iter_batches():
+    assert list(iter_batches(iter(range(7)), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(iter_batches([], 3)) == []
+
+
+class _StreamedResponse:
+    """Just enough of a streamed requests.Response for the collectors"""
+
+    status_code = 200
+    headers = {}
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def iter_content(self, chunk_size):
+        return iter(_chunks(self.body, 50))
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+@pytest.mark.parametrize('raise_errors', [False, True])
+def test_cut_off_stream_raises_and_leaves_the_ledger_alone(db_path, monkeypatch, raise_errors):
+    collector = load_script('API/Departure-Future-Schedules.py')
+    monkeypatch.setattr(aviation_edge_db, 'default_db_path', lambda: db_path)
+    monkeypatch.delenv('DB_WRITER_ADDRESS', raising=False)
+    monkeypatch.setattr(aviation_edge_rate.time, 'sleep', lambda seconds: None)
+    schedules = collector.FutureSchedules()
+    body = json.dumps(make_flights(5)).encode('utf-8')
+    responses = [_StreamedResponse(body), _StreamedResponse(body[:len(body) * 2 // 3])]
+    monkeypatch.setattr(collector.requests, 'get', lambda *args, **kwargs: responses.pop(0))
+
+    assert schedules.collect_aviation_edge_flights_streaming('MNL', 'departure', '2026-11-11') == (5, 5)
+    with pytest.raises(ValueError, match='Truncated'):
+        schedules.collect_aviation_edge_flights_streaming('MNL', 'departure', '2026-11-11',
+                                                          batch_size=1, raise_errors=raise_errors)
+    # The partial payload must not drop the flights it never reached from the fingerprints
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM ingestion_rows").fetchone()[0] == 5
+    conn.close()
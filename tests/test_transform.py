@@ -0,0 +1,69 @@
+"""
+Batch transform parity with the per-flight extraction it replaces
+"""
+
+import copy
+
+import pytest
+
+from aviation_edge_db import FLIGHT_COLUMNS, AviationEdgeDB
+from aviation_edge_transform import annotate_weekdays, flights_to_rows
+from conftest import make_flights
+
+# Timestamps are taken at call time and never compared
+_COMPARED = [i for i, column in enumerate(FLIGHT_COLUMNS) if column not in ('created_at', 'updated_at')]
+
+ODD_FLIGHTS = [
+    {'weekday': '2'},                                                    # every section missing
+    {'weekday': '4', 'departure': {'gate': None}, 'arrival': {'scheduledTime': None}, 'aircraft': {}},
+    {'weekday': '5', 'departure': {'iataCode': 'mnl', 'scheduledTime': '0730', 'terminal': 3},
+     'arrival': {'iataCode': 'pom', 'scheduledTime': '7:30'}, 'flight': {'iataNumber': None}},
+    {'weekday': '6', 'airline': {'iataCode': 'pr'}, 'flight': {'iataNumber': 'pr1'},
+     'codeshared': {'airline': {}, 'flight': {'iataNumber': 'nh1'}}},
+    {'weekday': '7', 'extracted_weekday': 6, 'airline': {'name': 'Ünïcode Air'},
+     'codeshared': {'airline': {'iataCode': None}}},
+]
+
+
+def _per_flight_rows(flights, query_type, airport):
+    db = AviationEdgeDB(':memory:')
+    rows = []
+    for flight in flights:
+        data = db._extract_flight_data(flight, query_type, airport, '2026-11-04')
+        rows.append(tuple(data[column] for column in FLIGHT_COLUMNS))
+    return rows
+
+
+@pytest.mark.parametrize('flights', [make_flights(60, seed=4), ODD_FLIGHTS], ids=['sample', 'odd'])
+@pytest.mark.parametrize('query_type', ['departure', 'arrival'])
+def test_flights_to_rows_matches_extract_flight_data(flights, query_type):
+    batch = flights_to_rows(copy.deepcopy(flights), query_type, 'mnl')
+    expected = _per_flight_rows(copy.deepcopy(flights), query_type, 'mnl')
+    assert len(batch) == len(expected)
+    for got, want in zip(batch, expected):
+        assert [got[i] for i in _COMPARED] == [want[i] for i in _COMPARED]
+
+
+def test_rows_are_uppercase_with_lowercase_query_type():
+    row = dict(zip(FLIGHT_COLUMNS, flights_to_rows(make_flights(1), 'DEPARTURE', 'mnl')[0]))
+    assert row['dep_iata_code'] == 'MNL' and row['airport_code'] == 'MNL'
+    assert row['flight_iata_number'] == row['flight_iata_number'].upper()
+    assert row['query_type'] == 'departure'
+
+
+def test_annotate_weekdays_accepts_only_integer_weekdays():
+    values = ['1', 7, '1.0', ' 3', '8', '0', True, None, '', 2.0, 'x']
+    flights = [{'weekday': value} for value in values]
+    kept = annotate_weekdays(flights)
+    assert [flight['extracted_weekday'] for flight in kept] == [1, 7]
+
+
+def test_annotate_weekdays_overnight_arrival_correction():
+    flights = [
+        {'weekday': '1', 'departure': {'scheduledTime': '23:10'}, 'arrival': {'scheduledTime': '05:40'}},
+        {'weekday': '3', 'departure': {'scheduledTime': '08:00'}, 'arrival': {'scheduledTime': '10:00'}},
+        {'weekday': '4', 'departure': {}, 'arrival': {'scheduledTime': '01:00'}},
+    ]
+    kept = annotate_weekdays(flights, correct_overnight=True)
+    assert [flight['extracted_weekday'] for flight in kept] == [7, 3, 4]
+    assert [flight['api_original_weekday'] for flight in kept] == [1, 3, 4]
@@ -0,0 +1,116 @@
+"""
+Single-writer service: batch and streamed collections, and falling back to direct writes
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import aviation_edge_db
+import aviation_edge_writer
+from aviation_edge_db import insert_api_flights, open_flight_store
+from aviation_edge_writer import WriterClient, WriterService, check_authkey, parse_writer_address
+from conftest import make_flights
+
+AUTHKEY = 'test-writer-secret-0123456789'
+
+
+def _flight_count(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM flights").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def production_db(db_path, monkeypatch):
+    """The migrated test database standing in for DB/flight_schedules.db"""
+    monkeypatch.setattr(aviation_edge_db, 'default_db_path', lambda: db_path)
+    monkeypatch.setenv('DB_WRITER_AUTHKEY', AUTHKEY)
+    return db_path
+
+
+@pytest.fixture
+def service(production_db, tmp_path, monkeypatch):
+    """A running writer service on a Unix socket, with DB_WRITER_ADDRESS pointing at it"""
+    address = str(tmp_path / 'writer.sock')
+    writer = WriterService(address, production_db)
+    threading.Thread(target=writer.serve_forever, daemon=True).start()
+    for _ in range(100):
+        if os.path.exists(address):
+            break
+        time.sleep(0.02)
+    monkeypatch.setenv('DB_WRITER_ADDRESS', address)
+    return writer
+
+
+def test_batches_go_through_the_service(service, production_db):
+    flights = make_flights(12)
+    assert insert_api_flights(flights, 'departure', 'MNL', '2026-11-11') == 12
+    assert insert_api_flights(flights, 'departure', 'MNL', '2026-11-11') == 0
+    assert service.stats['batches'] == 2 and service.stats['stored'] == 12
+    assert _flight_count(production_db) == 12
+
+
+def test_streamed_payload_goes_through_the_service(service, production_db):
+    flights = make_flights(12)
+    for expected in (12, 0):
+        store = open_flight_store()
+        assert isinstance(store, WriterClient)
+        try:
+            payload = store.open_payload('departure', 'MNL', '2026-11-11')
+            stored = sum(store.insert_flight_batch(flights[start:start + 5], 'departure', 'MNL', '2026-11-11',
+                                                   payload=payload) for start in range(0, 12, 5))
+            store.record_payload(payload)
+        finally:
+            store.close()
+        assert stored == expected
+    assert _flight_count(production_db) == 12
+    assert service._payloads == {}
+
+
+def test_payload_of_a_collector_that_disconnects_is_discarded(service):
+    with WriterClient() as client:
+        payload = client.open_payload('departure', 'MNL', '2026-11-11')
+        client.insert_flight_batch(make_flights(3), 'departure', 'MNL', '2026-11-11', payload=payload)
+    for _ in range(100):
+        if not service._payloads:
+            break
+        time.sleep(0.02)
+    assert service._payloads == {}
+
+
+@pytest.mark.parametrize('error', [ConnectionRefusedError, FileNotFoundError, ConnectionResetError, TimeoutError,
+                                   EOFError])
+def test_unreachable_service_falls_back_to_direct_writes(production_db, monkeypatch, error):
+    def unreachable(*args, **kwargs):
+        raise error('writer down')
+
+    monkeypatch.setenv('DB_WRITER_ADDRESS', '127.0.0.1:6543')
+    monkeypatch.setattr(aviation_edge_writer, 'Client', unreachable)
+    assert insert_api_flights(make_flights(4), 'departure', 'MNL', '2026-11-11') == 4
+    assert _flight_count(production_db) == 4
+
+
+def test_service_lost_mid_request_falls_back_to_direct_writes(service, production_db, monkeypatch):
+    def reset(self, *request):
+        raise ConnectionResetError('connection reset by peer')
+
+    monkeypatch.setattr(WriterClient, '_request', reset)
+    assert insert_api_flights(make_flights(4), 'departure', 'MNL', '2026-11-11') == 4
+    assert service.stats['batches'] == 0
+    assert _flight_count(production_db) == 4
+
+
+def test_only_local_addresses_and_real_secrets_are_accepted():
+    assert parse_writer_address('127.0.0.1:6543') == ('127.0.0.1', 6543)
+    assert parse_writer_address('/tmp/writer.sock') == '/tmp/writer.sock'
+    with pytest.raises(ValueError, match='not local'):
+        parse_writer_address('10.0.0.5:6543')
+    for authkey in (b'', b'aviation-edge-writer', b'short'):
+        with pytest.raises(ValueError):
+            check_authkey(authkey)